@@ -134,6 +134,26 @@ class Adaptor(object):
         '''
         raise NotImplementedError
 
+    def stream_inspect_tensor(self, model, dataloader, op_list=[], iteration_list=[],
+                              quantization_cfg=None):
+        '''The function is used by tune strategy class for streaming the activations.
+
+           It's the iterator version of inspect_tensor with inspect_type 'activation', which
+           keeps one iteration in memory at a time.
+
+           Args:
+               model (object): The model to inspect.
+               dataloader (object): The dataloader used to feed into.
+               op_list (list): The op name in the fp32 model for dumpping.
+               iteration_list (list): The iteration list containing iterations to dump.
+               quantization_cfg (dict): The quantization config of the model.
+
+           Return:
+               Iterator of the activation dicts per iteration, in the format of the
+               'activation' list of inspect_tensor.
+        '''
+        raise NotImplementedError
+
     @abstractmethod
     def set_tensor(self, model, tensor_dict):
         '''The function is used by tune strategy class for setting tensor back to model.
@@ -164,6 +184,12 @@ class Adaptor(object):
         '''
         return model, 1.
 
+    def clear_session_cache(self):
+        ''' release the framework sessions the adaptor keeps for reusing across evaluations,
+            called when the tuning ends.
+        '''
+        pass
+
     @abstractmethod
     def _pre_eval_hook(self, model, *args, **kwargs):
         '''The function is used to do some preprocession before evaluation phase.
@@ -27,7 +27,7 @@ from packaging.version import Version
 from importlib.util import find_spec
 from neural_compressor.adaptor.adaptor import adaptor_registry, Adaptor
 from neural_compressor.adaptor.query import QueryBackendCapability
-from neural_compressor.adaptor.ox_utils.util import PROVIDERS, ONNXRT_BACKENDS
+from neural_compressor.adaptor.ox_utils.util import PROVIDERS, ONNXRT_BACKENDS, SessionCache
 from neural_compressor.utils.utility import LazyImport, dump_elapsed_time, \
                                             GLOBAL_STATE, MODE
 from neural_compressor.utils.utility import Statistics
@@ -94,6 +94,7 @@ class ONNXRUNTIMEAdaptor(Adaptor):
         self.benchmark = (GLOBAL_STATE.STATE == MODE.BENCHMARK)
         os.makedirs(self.work_space, exist_ok=True)
         self.pre_optimized_model = None
+        self._session_cache = SessionCache()
         self.quantizable_op_types = []
         self.query_handler_ext = None
         if framework_specific_info["approach"] == "post_training_auto_quant" and \
@@ -123,6 +124,10 @@ class ONNXRUNTIMEAdaptor(Adaptor):
         self.quantize_config = {} # adaptor should know current configs at any time
         self.quantize_params = {} # adaptor should know current params at any time
         self.min_max = None
+        # the calibration ranges reused by the trials quantizing the same model, see
+        # _get_quantize_params
+        self._calib_ranges = {}
+        self._calib_ranges_owner = None
 
         self.optype_statistics = None
 
@@ -159,6 +164,10 @@ class ONNXRUNTIMEAdaptor(Adaptor):
             format = QuantizationMode.IntegerOps
 
         self.quantizable_ops = self._query_quantizable_ops(model.model)
+        if self._calib_ranges_owner is None or self._calib_ranges_owner[0] is not model or \
+            self._calib_ranges_owner[1] is not data_loader:
+            self._calib_ranges = {}
+            self._calib_ranges_owner = (model, data_loader)
         tmp_model = copy.deepcopy(model)
 
         quantize_config = self._cfg_to_quantize_config(tune_cfg)
@@ -379,8 +388,13 @@ class ONNXRUNTIMEAdaptor(Adaptor):
                   black_nodes=black_nodes, white_nodes=white_nodes, \
                   iterations=list(range(0, quantize_config['calib_iteration'])),
                   backend=self.backend, reduce_range=self.reduce_range)
-        self.min_max = augment.dump_minmax()
-        quantize_params = augment.dump_calibration(quantize_config)
+        # the ranges only depend on the FP32 model and the calibration data, so the tensors
+        # calibrated by a previous trial, e.g. all of them after an op falls back, are reused
+        calib_key = ('naive', quantize_config['calib_iteration'],
+                     getattr(data_loader, 'batch_size', None))
+        self.min_max = augment.dump_minmax(
+            cached_ranges=self._calib_ranges.setdefault(calib_key, {}))
+        quantize_params = augment.calculate_quantization_params(quantize_config, self.min_max)
         return quantize_params
 
     def inspect_tensor(self, model, dataloader, op_list=[],
@@ -411,6 +425,23 @@ class ONNXRUNTIMEAdaptor(Adaptor):
             dump_data_to_local(tensors, save_path, 'inspect_result.pkl')
         return tensors
 
+    def stream_inspect_tensor(self, model, dataloader, op_list=[], iteration_list=[],
+                              quantization_cfg=None):
+        '''The function is used by tune strategy class for streaming the activations.
+        '''
+        from neural_compressor.adaptor.ox_utils.calibration import ONNXRTAugment
+        from neural_compressor.model.onnx_model import ONNXModel
+        if not isinstance(model, ONNXModel):
+            model = ONNXModel(model)
+
+        if len(op_list) > 0 and isinstance(op_list, KeysView):
+            op_list = [item[0] for item in op_list]
+        augment = ONNXRTAugment(model, dataloader, [], \
+                  iterations=iteration_list,
+                  white_nodes=op_list,
+                  backend=self.backend)
+        return augment.stream_activation()
+
     def set_tensor(self, model, tensor_dict):
         from onnx import numpy_helper
         from neural_compressor.model.onnx_model import ONNXModel
@@ -461,6 +492,8 @@ class ONNXRUNTIMEAdaptor(Adaptor):
                     scale_value,
                     zo_value)
             model.set_initializer(tensor_name, new_tensor_value)
+        # the tensors are rewritten in place, the sessions of the model are stale
+        self._session_cache.clear()
         return model
 
     def _requantize_bias(self, model, bias_name, bias_data):
@@ -673,7 +706,7 @@ class ONNXRUNTIMEAdaptor(Adaptor):
                 new_nodes.append(node)
 
         model.graph().ClearField('node')
-        model.graph().node.extend(new_nodes)
+        model.add_nodes(new_nodes)
 
         return model
 
@@ -889,13 +922,10 @@ class ONNXRUNTIMEAdaptor(Adaptor):
         Returns:
             (float) evaluation results. acc, f1 e.g.
         """
-        if input_graph.large_size: # pragma: no cover
-            onnx.save_model(input_graph.model,
-                            self.work_space + 'eval.onnx',
-                            save_as_external_data=True,
-                            all_tensors_to_one_file=True,
-                            location="weights.pb",
-                            convert_attribute=False)
+        from neural_compressor import options
+        from neural_compressor.adaptor.ox_utils.util import get_inference_session, \
+            pipelined_evaluate
+        from neural_compressor.utils.early_stop import EarlyStopDataLoader
         sess_options = ort.SessionOptions()
         if self.backend == 'TensorrtExecutionProvider':
             sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL 
@@ -904,15 +934,18 @@ class ONNXRUNTIMEAdaptor(Adaptor):
             cores_per_instance = int(os.environ.get('CORES_PER_INSTANCE'))
             assert cores_per_instance > 0, "benchmark cores_per_instance should greater than 0"
             sess_options.intra_op_num_threads = cores_per_instance
+        custom_ops_libraries = []
         if sys.version_info < (3,10) and find_spec('onnxruntime_extensions'): # pragma: no cover
             from onnxruntime_extensions import get_library_path
             sess_options.register_custom_ops_library(get_library_path())
-        session = ort.InferenceSession(self.work_space + 'eval.onnx',
-                                       sess_options,
-                                       providers=[self.backend]) if input_graph.large_size else \
-                  ort.InferenceSession(input_graph.model.SerializeToString(),
-                                       sess_options,
-                                       providers=[self.backend])
+            custom_ops_libraries.append(get_library_path())
+        session = get_inference_session(input_graph.model,
+                                        sess_options,
+                                        [self.backend],
+                                        model_path=self.work_space + 'eval.onnx',
+                                        save=True,
+                                        cache=self._session_cache,
+                                        custom_ops_libraries=custom_ops_libraries)
         results = []
         if metrics:
             for metric in metrics:
@@ -920,50 +953,78 @@ class ONNXRUNTIMEAdaptor(Adaptor):
             self.fp32_preds_as_label = any([hasattr(metric, "compare_label") and \
                 not metric.compare_label for metric in metrics]) 
 
-        ort_inputs = {}
         len_inputs = len(session.get_inputs())
         inputs_names = [session.get_inputs()[i].name for i in range(len_inputs)]
+        eval_options = options.onnxrt.evaluation
+        io_binding = session.io_binding() if eval_options.iobinding else None
+
+        def prepare_inputs(inputs):
+            ort_inputs = {}
+            if len_inputs == 1:
+                ort_inputs.update(
+                    inputs if isinstance(inputs, dict) else {inputs_names[0]: inputs}
+                )
+            else:
+                assert len_inputs == len(inputs), \
+                    'number of input tensors must align with graph inputs'
 
-        def eval_func(dataloader):
-            for idx, (inputs, labels) in enumerate(dataloader):
-                if not isinstance(labels, list):
-                    labels = [labels]
-                if len_inputs == 1:
-                    ort_inputs.update(
-                        inputs if isinstance(inputs, dict) else {inputs_names[0]: inputs}
-                    )
+                if isinstance(inputs, dict):  # pragma: no cover
+                    ort_inputs.update(inputs)
                 else:
-                    assert len_inputs == len(inputs), \
-                        'number of input tensors must align with graph inputs'
-
-                    if isinstance(inputs, dict):  # pragma: no cover
-                        ort_inputs.update(inputs)
-                    else:
-                        for i in range(len_inputs):
-                            # in case dataloader contains non-array input
-                            if not isinstance(inputs[i], np.ndarray):
-                                ort_inputs.update({inputs_names[i]: np.array(inputs[i])})
-                            else:
-                                ort_inputs.update({inputs_names[i]: inputs[i]})
+                    for i in range(len_inputs):
+                        # in case dataloader contains non-array input
+                        if not isinstance(inputs[i], np.ndarray):
+                            ort_inputs.update({inputs_names[i]: np.array(inputs[i])})
+                        else:
+                            ort_inputs.update({inputs_names[i]: inputs[i]})
+            return ort_inputs
+
+        def run(ort_inputs):
+            if io_binding is None:
+                return session.run(None, ort_inputs)
+            # the outputs are allocated by onnxruntime and copied out, the bound buffers are
+            # reused by the next batch while these predictions are postprocessed
+            io_binding.clear_binding_inputs()
+            for name, value in ort_inputs.items():
+                io_binding.bind_cpu_input(name, np.ascontiguousarray(value))
+            io_binding.clear_binding_outputs()
+            for output in session.get_outputs():
+                io_binding.bind_output(output.name)
+            session.run_with_iobinding(io_binding)
+            return io_binding.copy_outputs_to_cpu()
+
+        def handle_outputs(predictions, labels):
+            if not isinstance(labels, list):
+                labels = [labels]
+            if self.fp32_preds_as_label:
+                self.fp32_results.append(predictions) if fp32_baseline else \
+                    results.append(predictions)
+
+            if postprocess is not None:
+                predictions, labels = postprocess((predictions, labels))
+            if metrics:
+                for metric in metrics:
+                    if not hasattr(metric, "compare_label") or \
+                        (hasattr(metric, "compare_label") and metric.compare_label):
+                        metric.update(predictions, labels)
 
+        def eval_func(dataloader):
+            # the early stop dataloader checks the metric before fetching the next batch,
+            # so the batches can't be fetched ahead of the metric updates
+            if eval_options.pipeline and measurer is None and \
+                not isinstance(dataloader, EarlyStopDataLoader):
+                pipelined_evaluate(dataloader, prepare_inputs, run, handle_outputs,
+                                   iteration, eval_options.prefetch)
+                return
+            for idx, (inputs, labels) in enumerate(dataloader):
+                ort_inputs = prepare_inputs(inputs)
                 if measurer is not None:
                     measurer.start()
-                    predictions = session.run(None, ort_inputs)
+                    predictions = run(ort_inputs)
                     measurer.end()
                 else:
-                    predictions = session.run(None, ort_inputs)
-
-                if self.fp32_preds_as_label:
-                    self.fp32_results.append(predictions) if fp32_baseline else \
-                        results.append(predictions)
-
-                if postprocess is not None:
-                    predictions, labels = postprocess((predictions, labels))
-                if metrics:
-                    for metric in metrics:
-                        if not hasattr(metric, "compare_label") or \
-                            (hasattr(metric, "compare_label") and metric.compare_label):
-                            metric.update(predictions, labels)
+                    predictions = run(ort_inputs)
+                handle_outputs(predictions, labels)
                 if idx + 1 == iteration:
                     break
 
@@ -996,7 +1057,6 @@ class ONNXRUNTIMEAdaptor(Adaptor):
 
     def diagnosis_helper(self, fp32_model, int8_model, tune_cfg=None, save_path=None):
         from neural_compressor.utils.utility import dump_data_to_local
-        from neural_compressor.adaptor.ox_utils.util import find_by_name
         if self.format == "qlinearops":
             supported_optype = ['Conv', 'MatMul', 'Concat', 'Attention', 'FusedConv',
                 'Add', 'Mul', 'LeakyRelu', 'Sigmoid', 'GlobalAveragePool', 'AveragePool']
@@ -1014,7 +1074,7 @@ class ONNXRUNTIMEAdaptor(Adaptor):
         filtered_params = {}
         if self.min_max:
             for node_name in inspect_node_list:
-                node = find_by_name(node_name, fp32_model.nodes())
+                node = fp32_model.get_node(node_name)
                 filtered_params[node_name] = {
                     'min': np.array(self.min_max[node.output[0]][0], dtype=np.float32),
                     'max': np.array(self.min_max[node.output[0]][1], dtype=np.float32)}
@@ -1032,6 +1092,10 @@ class ONNXRUNTIMEAdaptor(Adaptor):
         """
         model.save(os.path.join(path, "best_model.onnx"))
 
+    def clear_session_cache(self):
+        """ release the InferenceSessions kept for the evaluation """
+        self._session_cache.clear()
+
 
 @adaptor_registry
 class ONNXRT_QLinearOpsAdaptor(ONNXRUNTIMEAdaptor):
@@ -24,6 +24,7 @@
 
 import copy
 import logging
+import os
 import sys
 
 import numpy as np
@@ -35,7 +36,8 @@ from packaging.version import Version
 from importlib.util import find_spec
 from neural_compressor.model.onnx_model import ONNXModel
 from neural_compressor.adaptor.ox_utils.util import make_dquant_node, is_B_transposed, \
-    _get_qrange_for_qType, calculate_scale_zp
+    _get_qrange_for_qType, calculate_scale_zp, get_inference_session
+from neural_compressor.adaptor.ox_utils.calibrator import CALIBRATOR, calib_ranges
 
 logger = logging.getLogger("neural_compressor")
 ONNX18_VERSION = Version("1.8.0")
@@ -83,6 +85,10 @@ class ONNXRTAugment:
         self.dynamically_quantized = False
         self.ort_version = Version(onnxruntime.__version__)
         self.reduce_range = reduce_range
+        # tensors whose calibration ranges are known, they aren't added as outputs
+        self.cached_tensors = set()
+        # tensors calibrated by the augmented model, including the cached ones
+        self.calib_tensors = []
 
     def augment_graph(self, activation_only=False, weight_only=False):
         """Augment_graph.
@@ -149,6 +155,8 @@ class ONNXRTAugment:
                     tensors_to_dump.update(node.output)
 
         model_inputs = [i.name for i in model.graph.input]
+        model_outputs = [t.name for t in model.graph.output]
+        self.calib_tensors = list(model_outputs)
         for tensor in tensors_to_dump:
             if tensor not in node_outputs and tensor not in initializers and \
                 tensor not in model_inputs:
@@ -185,8 +193,9 @@ class ONNXRTAugment:
                                 added_tensor = helper.ValueInfoProto()
                                 added_tensor.name = tensor
                                 added_outputs.append(added_tensor)
-            else:
-                if tensor not in [t.name for t in model.graph.output]:
+            elif tensor not in model_outputs:
+                self.calib_tensors.append(tensor)
+                if tensor not in self.cached_tensors:
                     added_tensor = helper.ValueInfoProto()
                     added_tensor.name = tensor
                     added_outputs.append(added_tensor)
@@ -205,32 +214,73 @@ class ONNXRTAugment:
                             convert_attribute=False)
 
     def get_intermediate_outputs(self, calib_mode=None):
-        """Gather intermediate model outputs after running inference."""
+        """Gather intermediate model outputs after running inference.
+
+        Args:
+            calib_mode (str, optional): None to keep every output tensor of each iteration,
+                or a calibration method registered in CALIBRATOR such as 'naive', in which
+                case the outputs are folded batch by batch into a streaming calibrator and
+                only the resulting [min, max] range is kept. Defaults to None.
+
+        Returns:
+            list: output tensor names
+            dict: output tensor name as key, a list of tensors or of one [min, max] range as
+                value. Initializers are only fetched once, so their lists hold one tensor.
+        """
+        output_dicts = {}
+        calibrators = {}
+        for outputs in self.iter_intermediate_outputs():
+            for name, output in outputs.items():
+                if calib_mode is None:
+                    output_dicts.setdefault(name, []).append(output)
+                else:
+                    if name not in calibrators:
+                        calibrators[name] = CALIBRATOR[calib_mode]()
+                    calibrators[name].collect(output)
+
+        # the KL thresholds are searched after the inference, on all the cores
+        for name, calib_range in calib_ranges(calibrators, os.cpu_count()).items():
+            output_dicts[name] = [calib_range]
+
+        return list(output_dicts.keys()), output_dicts
+
+    def iter_intermediate_outputs(self):
+        """Run the augmented model on the dataloader and yield its outputs batch by batch.
+
+        Yields:
+            dict: output tensor name as key, the output of the iteration as value. Initializers
+                are constant, so they're only in the outputs of the first iteration.
+        """
         # conduct inference session and get intermediate outputs
         so = onnxruntime.SessionOptions()
         if sys.version_info < (3,10) and find_spec('onnxruntime_extensions'): # pragma: no cover
             from onnxruntime_extensions import get_library_path
             so.register_custom_ops_library(get_library_path())
 
-        session = onnxruntime.InferenceSession(
-                    self.augmented_model.SerializeToString(),
-                    so,
-                    provider=self.backend) if not self.model_wrapper.large_size else \
-                  onnxruntime.InferenceSession(
-                    self.model_wrapper.model_path  + '_augment.onnx',
-                    so,
-                    provider=self.backend)
+        augment_path = self.model_wrapper.model_path + '_augment.onnx' \
+            if self.model_wrapper.large_size else None
+        providers = self.backend if isinstance(self.backend, list) else [self.backend]
+        session = get_inference_session(self.augmented_model, so, providers, augment_path)
 
-        intermediate_outputs = []
         len_inputs = len(session.get_inputs())
         inputs_names = [session.get_inputs()[i].name for i in range(len_inputs)]
-        output_dicts = {}
-        
+
         node_output_names = [output.name if output.name not in self.dequantized_output \
                              else self.dequantized_output[output.name] \
                              for output in session.get_outputs()]
+        session_output_names = [output.name for output in session.get_outputs()]
+        # initializers are constant, so they are only fetched in the first pass
+        initializer_names = set(i.name for i in self.augmented_model.graph.initializer)
+        activation_idx = [idx for idx, name in enumerate(session_output_names) \
+                          if name not in initializer_names]
+        fetched_idx = list(range(len(session_output_names)))
 
         for idx, (inputs, labels) in enumerate(self.dataloader):
+            if self.iterations != []:
+                if idx > max(self.iterations):
+                    break
+                if idx not in self.iterations:
+                    continue
             ort_inputs = {}
             if len_inputs == 1:
                 ort_inputs.update(
@@ -247,27 +297,10 @@ class ONNXRTAugment:
                             ort_inputs.update({inputs_names[i]: np.array(inputs[i])})
                         else:
                             ort_inputs.update({inputs_names[i]: inputs[i]})
-            if self.iterations != []:
-                if idx > max(self.iterations):
-                    break
-                if idx in self.iterations:
-                    for output_idx, output in enumerate(session.run(None, ort_inputs)): 
-                        if calib_mode == 'naive' and output.size != 0:
-                            output_dicts.setdefault(node_output_names[output_idx], \
-                                []).append([output.min(), output.max()])
-                        elif calib_mode == None:
-                            output_dicts.setdefault(node_output_names[output_idx], \
-                                []).append(output)
-            else:
-                for output_idx, output in enumerate(session.run(None, ort_inputs)): 
-                    if calib_mode == 'naive' and output.size != 0:
-                        output_dicts.setdefault(node_output_names[output_idx], \
-                            []).append([output.min(), output.max()])
-                    elif calib_mode == None:
-                        output_dicts.setdefault(node_output_names[output_idx], \
-                            []).append(output)
-
-        return list(output_dicts.keys()), output_dicts
+            outputs = session.run([session_output_names[i] for i in fetched_idx], ort_inputs)
+            yield {node_output_names[output_idx]: output \
+                   for output_idx, output in zip(fetched_idx, outputs)}
+            fetched_idx = activation_idx
 
     def _dequantize(self, tensor, scale_tensor, zo_tensor):
         """Helper function to dequantize tensor."""
@@ -358,7 +391,7 @@ class ONNXRTAugment:
 
         # Characterizing distribution of a node's values across test data sets
         clean_merged_dict = dict((i, merged_dict[i]) for i in merged_dict)
-        if calib_mode == 'naive':
+        if calib_mode in CALIBRATOR:
             pairs = [
                 tuple([
                     float(min(clean_merged_dict[name + '_Min'])),
@@ -367,18 +400,39 @@ class ONNXRTAugment:
             ]
         else:
             raise ValueError('Unknown value for calib_mode. \
-                             Currently only naive mode is supported.')
+                             Currently only {} modes are supported.'.format(list(CALIBRATOR)))
 
         final_dict = dict(zip(node_output_names, pairs))
 
         return final_dict
 
-    def dump_minmax(self, calib_mode='naive'):
-        """Get min/max values of tensors."""
+    def dump_minmax(self, calib_mode='naive', cached_ranges=None):
+        """Get min/max values of tensors.
+
+        Args:
+            calib_mode (str, optional): The calibration method registered in CALIBRATOR.
+                Defaults to 'naive'.
+            cached_ranges (dict, optional): The [min, max] ranges of the tensors calibrated
+                before with the same calib_mode, model and data. These tensors aren't calibrated
+                again and the new ranges are added to the dict. Defaults to None.
+
+        Returns:
+            dict: tensor name as key, the (min, max) range as value.
+        """
+        self.cached_tensors = set(cached_ranges) if cached_ranges else set()
         self.augment_graph()
+        if cached_ranges is not None and \
+            all(name in cached_ranges for name in self.calib_tensors):
+            logger.info("Reuse the calibration ranges of all {} tensors.".format(
+                len(self.calib_tensors)))
+            return {name: cached_ranges[name] for name in self.calib_tensors}
         node_output_names, output_dicts = self.get_intermediate_outputs(calib_mode)
-        return self._map_calibration(node_output_names, output_dicts,
-                                     calib_mode=calib_mode)
+        min_max = self._map_calibration(node_output_names, output_dicts,
+                                        calib_mode=calib_mode)
+        if cached_ranges is not None:
+            cached_ranges.update(min_max)
+            min_max = {name: cached_ranges[name] for name in self.calib_tensors}
+        return min_max
 
     def dump_calibration(self, q_config, calib_mode='naive'):
         """Gather calibration params for quantization.
@@ -389,7 +443,9 @@ class ONNXRTAugment:
                                         for each intermediate model output across
                                         test data sets, where the first element is
                                         a minimum of all values and the second element 
-                                        is a maximum of all values. Defaults to 'naive'.
+                                        is a maximum of all values, 'percentile' and 'kl'
+                                        clip the range with a running histogram.
+                                        Defaults to 'naive'.
         """
         return self.calculate_quantization_params(q_config, self.dump_minmax(calib_mode))
 
@@ -438,8 +494,8 @@ class ONNXRTAugment:
 
         return quantization_params
 
-    def dump_tensor(self, activation=True, weight=False):
-        """Dump activation or weight or both from the model."""
+    def _augment_for_dump(self, activation=True, weight=False):
+        """Augment the model to dump the tensors of the white nodes."""
         if "QuantizeLinear" in [node.op_type for node in self.model.graph.node] or \
             "DynamicQuantizeLinear" in [node.op_type for node in self.model.graph.node]:
             self.augment_nodes = ["DequantizeLinear"]
@@ -447,18 +503,26 @@ class ONNXRTAugment:
             self.dynamically_quantized = \
                 "DynamicQuantizeLinear" in [node.op_type for node in self.model.graph.node]
         self.augment_graph(activation_only=not weight, weight_only=not activation)
-        _, output_dicts = self.get_intermediate_outputs()
-        iters = len(list(output_dicts.values())[-1])
-        map_node_activation = [{} for _ in range(iters)]
-        map_node_weight = {}
         self.white_nodes = [node.replace('_quant', '') for node in self.white_nodes]
+
+    def _map_dumped_tensors(self, tensor_names):
+        """Map the dumped tensors to the white nodes they belong to.
+
+        Args:
+            tensor_names (list): The names of the dumped tensors.
+
+        Returns:
+            list: (tensor name, node name, tensor key, is weight) tuples, in the order of
+                tensor_names.
+        """
         augmengted_wrapper = ONNXModel(self.augmented_model)
         map_output = augmengted_wrapper.output_name_to_node
         map_input = augmengted_wrapper.input_name_to_nodes
         model_output_names = [t.name for t in self.model.graph.output]
         model_input_names = [t.name for t in self.model.graph.input]
-        model_initializer_names = [t.name for t in self.model.graph.initializer]
-        for tensor_name, tensors in output_dicts.items():
+        model_initializer_names = set(t.name for t in self.model.graph.initializer)
+        tensor_nodes = []
+        for tensor_name in tensor_names:
             if tensor_name.replace('_dequantized', '_quantized') in model_initializer_names:
                 nodes = [node for node in map_input[tensor_name] \
                     if node.name.replace('_quant', '') in self.white_nodes]
@@ -475,15 +539,26 @@ class ONNXRTAugment:
                     node_name = node.name.replace('_quant', '')
                 if node_name not in self.white_nodes:
                     continue
-                if node_name not in map_node_weight:
-                    map_node_weight[node_name] = {}
-                if tensor_name not in model_initializer_names:
-                    for i in range(iters):
-                        map_node_activation[i][node_name] = \
-                                               {tensor_name.replace('_quantized', ''): tensors[i]}
-                else:
-                    map_node_weight[node_name].update({tensor_name.replace('_quantized', ''): \
-                                                                                      tensors[0]})
+                tensor_nodes.append((tensor_name, node_name, tensor_name.replace('_quantized', ''),
+                                     tensor_name in model_initializer_names))
+        return tensor_nodes
+
+    def dump_tensor(self, activation=True, weight=False):
+        """Dump activation or weight or both from the model."""
+        self._augment_for_dump(activation, weight)
+        _, output_dicts = self.get_intermediate_outputs()
+        iters = max([len(tensors) for tensors in output_dicts.values()])
+        map_node_activation = [{} for _ in range(iters)]
+        map_node_weight = {}
+        for tensor_name, node_name, key, is_weight in self._map_dumped_tensors(output_dicts):
+            tensors = output_dicts[tensor_name]
+            if node_name not in map_node_weight:
+                map_node_weight[node_name] = {}
+            if not is_weight:
+                for i in range(iters):
+                    map_node_activation[i][node_name] = {key: tensors[i]}
+            else:
+                map_node_weight[node_name].update({key: tensors[0]})
         dumped_tensors_map = {}
         if weight:
             dumped_tensors_map.update({"weight": map_node_weight})
@@ -491,6 +566,24 @@ class ONNXRTAugment:
             dumped_tensors_map.update({"activation": map_node_activation})
         return dumped_tensors_map
 
+    def stream_activation(self):
+        """Yield the activations of the white nodes batch by batch.
+
+        The activations of an iteration are mapped like the ones of dump_tensor and released
+        once the next iteration is requested, so only one batch is kept in memory.
+
+        Yields:
+            dict: node name as key, {tensor name: activation} of the iteration as value.
+        """
+        self._augment_for_dump(activation=True, weight=False)
+        tensor_nodes = None
+        for outputs in self.iter_intermediate_outputs():
+            if tensor_nodes is None:
+                tensor_nodes = [(tensor_name, node_name, key) for tensor_name, node_name, key, \
+                    is_weight in self._map_dumped_tensors(outputs) if not is_weight]
+            yield {node_name: {key: outputs[tensor_name]} \
+                   for tensor_name, node_name, key in tensor_nodes}
+
     def calculate_scale_zeropoint(self, last_node, next_node, rmin, rmax, scheme, qType, quantize_range):
         """Given the source and destination node of tensor, return calculated zero point and scales."""
         zp_and_scale = []
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# coding: utf-8
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Streaming calibrators for onnx models.
+
+Each calibrator folds the outputs of one tensor batch by batch into a fixed size state,
+so the memory used by calibration doesn't grow with the number of calibration batches.
+"""
+
+import numpy as np
+from neural_compressor.utils.utility import combine_histogram
+from neural_compressor.utils.kl_divergence import KL_Divergence
+
+CALIBRATOR = {}
+
+def calib_registry(calib_method):
+    """The class decorator used to register all calibrator subclasses.
+
+    Args:
+        calib_method (str or list): The calibration method name(s) of the calibrator.
+
+    Returns:
+        cls: The class of register.
+    """
+    def decorator_calib(cls):
+        for method in calib_method if isinstance(calib_method, list) else [calib_method]:
+            assert method not in CALIBRATOR, "calibrator {} is already registered".format(method)
+            CALIBRATOR[method] = cls
+        return cls
+    return decorator_calib
+
+
+class CalibratorBase:
+    """Base calibrator class."""
+
+    def __init__(self):
+        """Initialize the calibrator."""
+        self._calib_min = None
+        self._calib_max = None
+
+    def collect(self, data):
+        """Fold one batch of tensor data into the statistics."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Clear the statistics."""
+        self._calib_min = None
+        self._calib_max = None
+
+    @property
+    def calib_range(self):
+        """Get the calibrated [min, max] range, None if no data is collected."""
+        if self._calib_min is None:
+            return None
+        return [self._calib_min, self._calib_max]
+
+
+@calib_registry(calib_method=['naive', 'minmax'])
+class MinMaxCalibrator(CalibratorBase):
+    """Calibrator keeping the running min and max values."""
+
+    def collect(self, data):
+        """Update the running min and max with one batch."""
+        data = np.asarray(data)
+        if data.size == 0:
+            return
+        data_min, data_max = data.min(), data.max()
+        if self._calib_min is None:
+            self._calib_min, self._calib_max = data_min, data_max
+        else:
+            self._calib_min = np.minimum(self._calib_min, data_min)
+            self._calib_max = np.maximum(self._calib_max, data_max)
+
+
+class HistogramCalibrator(CalibratorBase):
+    """Calibrator keeping a running symmetric histogram of the tensor values.
+
+    The histogram covers [-th, th] where th is the running max absolute value, and is
+    extended with combine_histogram when a new batch falls outside of it.
+    """
+
+    def __init__(self, num_bins=2048):
+        """Initialize the calibrator.
+
+        Args:
+            num_bins (int, optional): Number of bins of the first histogram. Defaults to 2048.
+        """
+        super().__init__()
+        self.num_bins = num_bins
+        self.histogram = None
+
+    def collect(self, data):
+        """Fold one batch into the running histogram and min/max."""
+        data = np.asarray(data, dtype=np.float32)
+        if data.size == 0:
+            return
+        if self.histogram is None:
+            data_min, data_max = data.min(), data.max()
+            th = max(abs(data_min), abs(data_max))
+            hist, hist_edges = np.histogram(data, bins=self.num_bins, range=(-th, th))
+            self.histogram = (hist, hist_edges, data_min, data_max, th)
+        else:
+            self.histogram = combine_histogram(self.histogram, data)
+        self._calib_min, self._calib_max = self.histogram[2], self.histogram[3]
+
+    def clear(self):
+        """Clear the statistics."""
+        super().clear()
+        self.histogram = None
+
+    @property
+    def calib_range(self):
+        """Get the calibrated [min, max] range computed from the histogram."""
+        if self.histogram is None:
+            return None
+        return self.clip_range(self.compute_threshold())
+
+    def clip_range(self, th):
+        """Get the [min, max] range clipped to an absolute threshold."""
+        return [max(self._calib_min, -th), min(self._calib_max, th)]
+
+    def compute_threshold(self):
+        """Compute the absolute threshold from the histogram."""
+        raise NotImplementedError
+
+    def abs_histogram(self):
+        """Fold the symmetric histogram into a histogram of absolute values starting at 0."""
+        hist, hist_edges, _, _, _ = self.histogram
+        half = len(hist) // 2
+        abs_hist = hist[half:].copy()
+        abs_hist[len(hist) % 2:] += hist[:half][::-1]
+        abs_edges = hist_edges[half:].copy()
+        abs_edges[0] = 0.
+        return abs_hist, abs_edges
+
+
+@calib_registry(calib_method='percentile')
+class PercentileCalibrator(HistogramCalibrator):
+    """Calibrator clipping the range to a percentile of the absolute values."""
+
+    def __init__(self, num_bins=2048, percentile=99.999):
+        """Initialize the calibrator.
+
+        Args:
+            num_bins (int, optional): Number of bins of the first histogram. Defaults to 2048.
+            percentile (float, optional): Percentile of absolute values kept in the range.
+                Defaults to 99.999.
+        """
+        super().__init__(num_bins)
+        self.percentile = percentile
+
+    def compute_threshold(self):
+        """Get the smallest bin edge whose cumulative count reaches the percentile."""
+        abs_hist, abs_edges = self.abs_histogram()
+        total = abs_hist.sum()
+        if total == 0:
+            return self.histogram[4]
+        cdf = np.cumsum(abs_hist, dtype=np.float64) / total
+        idx = min(int(np.searchsorted(cdf, self.percentile / 100.)), len(abs_hist) - 1)
+        return float(abs_edges[idx + 1])
+
+
+@calib_registry(calib_method='kl')
+class KLCalibrator(HistogramCalibrator):
+    """Calibrator minimizing the KL divergence between the fp32 and quantized distributions."""
+
+    def __init__(self, num_bins=2048, num_quantized_bins=255):
+        """Initialize the calibrator.
+
+        Args:
+            num_bins (int, optional): Number of bins of the first histogram. Defaults to 2048.
+            num_quantized_bins (int, optional): Number of quantized bins. Defaults to 255.
+        """
+        super().__init__(num_bins)
+        self.num_quantized_bins = num_quantized_bins
+
+    def kl_histogram(self):
+        """Get the absolute histogram in the format of LayerHistogramCollector.hist_dict."""
+        abs_hist, abs_edges = self.abs_histogram()
+        return abs_hist, abs_edges, 0., abs_edges[-1], self.histogram[4]
+
+    def compute_threshold(self):
+        """Search the threshold with the KL divergence algorithm."""
+        abs_hist, abs_edges, min_val, max_val, _ = self.kl_histogram()
+        return KL_Divergence().get_threshold(abs_hist, abs_edges, min_val, max_val,
+                                             len(abs_hist), None, self.num_quantized_bins)
+
+
+def calib_ranges(calibrators, num_threads=None):
+    """Get the calibrated ranges of several tensors.
+
+    The thresholds of the KL calibrators are searched together by KL_Divergence.get_thresholds,
+    on num_threads threads, instead of one tensor after the other.
+
+    Args:
+        calibrators (dict): Tensor name as key and calibrator as value.
+        num_threads (int, optional): Number of threads of the KL threshold search.
+            Defaults to None, which searches the thresholds one by one.
+
+    Returns:
+        dict: Tensor name as key and [min, max] range as value, in the order of calibrators.
+            The tensors without collected data are left out.
+    """
+    ranges = {}
+    kl_groups = {}
+    for name, calibrator in calibrators.items():
+        if isinstance(calibrator, KLCalibrator) and calibrator.histogram is not None:
+            kl_groups.setdefault(calibrator.num_quantized_bins, {})[name] = calibrator
+        elif calibrator.calib_range is not None:
+            ranges[name] = calibrator.calib_range
+    for num_quantized_bins, group in kl_groups.items():
+        hist_dict = {name: calibrator.kl_histogram() for name, calibrator in group.items()}
+        thresholds = KL_Divergence(num_threads).get_thresholds(hist_dict, None,
+                                                               num_quantized_bins)
+        for name, th in thresholds.items():
+            ranges[name] = group[name].clip_range(th)
+    return {name: ranges[name] for name in calibrators if name in ranges}
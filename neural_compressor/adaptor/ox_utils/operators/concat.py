@@ -33,7 +33,7 @@ class ConcatOperator(Operator):
         node = self.node
         if len(node.input) == 1: # pragma: no cover
             return False
-        inits = [i.name for i in self.quantizer.model.initializer()]
+        inits = [inp for inp in node.input if self.quantizer.model.get_initializer(inp)]
         if all([inp not in self.quantizer.quantized_value_map and inp not in inits \
             for inp in node.input]) or \
             not all([inp in self.quantizer.quantized_value_map or inp in inits \
@@ -44,7 +44,7 @@ class ConcatOperator(Operator):
     def quantize(self):
         """Do quantizaion."""
         node = self.node
-        inits = [i.name for i in self.quantizer.model.initializer()] 
+        inits = [inp for inp in node.input if self.quantizer.model.get_initializer(inp)]
         for idx, inp in enumerate(node.input):
             initializer_use_weight_qType = inp not in inits
             self.quantizer.quantize_inputs(node, [idx], initializer_use_weight_qType)
@@ -33,7 +33,7 @@ class MatMulOperator(Operator):
         """Do quantizaion."""
         node = self.node
         self.quantizer.quantize_inputs(node, [0])
-        if self.per_channel and find_by_name(node.input[1], self.quantizer.model.initializer()):
+        if self.per_channel and self.quantizer.model.get_initializer(node.input[1]):
             self.quantizer.quantize_weights_per_channel(node, [1],
                                     self.weight_dtype, self.weight_scheme, 1)
         else:
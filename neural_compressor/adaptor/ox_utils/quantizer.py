@@ -188,7 +188,7 @@ class Quantizer:
                                                 child.output[0], node.input[0]])
                     self.remove_nodes.append(node)
             self.model.remove_nodes(self.remove_nodes)
-            self.model.graph().node.extend(self.new_nodes)
+            self.model.add_nodes(self.new_nodes)
             for node, old_input_name, new_input_name in self.replace_input:
                 self.model.replace_node_input(node, old_input_name, new_input_name)
             self.model.update()
@@ -203,9 +203,9 @@ class Quantizer:
                     datas = []
                     for n in dq_nodes:
                         datas.append([onnx.numpy_helper.to_array(
-                                          find_by_name(n.input[1], self.model.initializer())), 
+                                          self.model.get_initializer(n.input[1])), 
                                       onnx.numpy_helper.to_array(
-                                          find_by_name(n.input[2], self.model.initializer()))])
+                                          self.model.get_initializer(n.input[2]))])
                     for idx, data in enumerate(datas):
                         repeaded_id = [i for i, item in enumerate(datas[idx:]) if item == data]
                         for i in repeaded_id[1:]:
@@ -214,7 +214,7 @@ class Quantizer:
                                                        dq_nodes[i].output[0], 
                                                        dq_nodes[idx].output[0]])
                 self.model.remove_nodes(self.remove_nodes)
-                self.model.graph().node.extend(self.new_nodes)
+                self.model.add_nodes(self.new_nodes)
                 for node, old_input_name, new_input_name in self.replace_input:
                     self.model.replace_node_input(node, old_input_name, new_input_name)
                 self.model.update()
@@ -232,11 +232,14 @@ class Quantizer:
             if self.should_quantize(node):
                 op_quantizer = OPERATORS[node.op_type](self, node)
                 if op_quantizer.quantize_check():
+                    node_name = node.name
                     op_quantizer.quantize()
+                    if node.name != node_name:
+                        self.model.node_renamed(node, node_name)
             elif self.should_cast(node): # pragma: no cover
                 op_caster = OPERATORS[node.op_type](self, node)
                 op_caster.cast()
-        self.model.graph().node.extend(self.new_nodes)
+        self.model.add_nodes(self.new_nodes)
         self.model.remove_nodes(self.remove_nodes)
 
         for node, old_input_name, new_input_name in self.replace_input:
@@ -264,7 +267,7 @@ class Quantizer:
                 mode = self.config[node.name.split('_quant')[0]]['activation']['quant_mode']
                 if op_converter.convert_check(mode):
                     op_converter.convert(mode)
-        self.model.graph().node.extend(self.new_nodes)
+        self.model.add_nodes(self.new_nodes)
         self.model.remove_nodes(self.remove_nodes)
         for node, old_input_name, new_input_name in self.replace_input:
             self.model.replace_node_input(node, old_input_name, new_input_name)
@@ -291,7 +294,7 @@ class Quantizer:
             if start_id == end_id:
                 if all([i.op_type in ['QuantizeLinear', 'DequantizeLinear'] \
                     for i in match_nodes]):
-                    pair = [str(find_by_name(i.input[2], self.model.initializer()).data_type) \
+                    pair = [str(self.model.get_initializer(i.input[2]).data_type) \
                         for i in match_nodes[::-1]]
                     if ' '.join(pair) in support_pair and support_pair[' '.join(pair)]:
                         self.replace_input.append([
@@ -332,7 +335,7 @@ class Quantizer:
                             self.remove_nodes.append(match_nodes[1])
                         for child in children:
                             self.replace_input.append([
-                                find_by_name(child.name, self.model.model.graph.node),
+                                self.model.get_node(child.name),
                                 match_nodes[1].output[0], match_nodes[0].input[0]])
                 return
 
@@ -356,7 +359,7 @@ class Quantizer:
         min_positive_val = 1e-7
         max_finite_val = 1e4
         for idx, tensor_name in enumerate(node.input):
-            initializer = find_by_name(tensor_name, self.model.initializer())
+            initializer = self.model.get_initializer(tensor_name)
             if initializer is not None:
                 if initializer.data_type != onnx_proto.TensorProto.FLOAT: 
                     continue
@@ -451,7 +454,7 @@ class Quantizer:
         for idx, tensor_name in enumerate(node.input):
             if indices and idx not in indices:
                 continue
-            initializer = find_by_name(tensor_name, self.model.initializer())
+            initializer = self.model.get_initializer(tensor_name)
             if initializer is not None:
                 if initializer.data_type != onnx_proto.TensorProto.FLOAT:
                     return
@@ -564,12 +567,12 @@ class Quantizer:
                             self.config[node.name]['activation']['scheme'] == 'asym':
                             scale_name = tensor_name + "_scale"
                             zeropoint_name = tensor_name + "_zero_point"
-                            if find_by_name(scale_name, self.model.initializer()):
+                            if self.model.get_initializer(scale_name):
                                 self.model.remove_initializer(
-                                    find_by_name(scale_name, self.model.initializer()))
-                            if find_by_name(zeropoint_name, self.model.initializer()):
+                                    self.model.get_initializer(scale_name))
+                            if self.model.get_initializer(zeropoint_name):
                                 self.model.remove_initializer(
-                                    find_by_name(zeropoint_name, self.model.initializer()))
+                                    self.model.get_initializer(zeropoint_name))
                             qlinear_node = onnx.helper.make_node("DynamicQuantizeLinear", 
                                 [tensor_name],
                                 [tensor_name + "_quantized", scale_name, zeropoint_name],
@@ -598,8 +601,7 @@ class Quantizer:
             input_name not in self.quantization_params or \
             input_name not in self.quantized_value_map or \
             (input_name in self.quantized_value_map and \
-            find_by_name(self.quantized_value_map[input_name].scale_name, 
-            self.model.initializer()) is None):
+            self.model.get_initializer(self.quantized_value_map[input_name].scale_name) is None):
             self._dynamic_quantize_bias(input_name, weight_name + '_scale', bias_name,
                 bias_name + "_quantized")
         else:
@@ -609,7 +611,7 @@ class Quantizer:
                 if len(beta_attribute):
                     beta = onnx.helper.get_attribute_value(beta_attribute[0])
             _, quant_value = self.quantize_bias(bias_name, input_name, weight_name, beta)
-            self.model.remove_initializer(find_by_name(bias_name, self.model.initializer()))
+            self.model.remove_initializer(self.model.get_initializer(bias_name))
             inputs = [quant_value.q_name, quant_value.scale_name, quant_value.zp_name]
             axis = None
             if find_by_name(weight_name + '_DequantizeLinear', self.new_nodes):
@@ -620,7 +622,7 @@ class Quantizer:
             dequant_node = make_dquant_node(bias_name + '_DequantizeLinear', inputs, 
                 [bias_name + '_dequantized'], axis)
             self.new_nodes.append(dequant_node)
-            self.replace_input.append([find_by_name(node.name, self.model.nodes()), 
+            self.replace_input.append([self.model.get_node(node.name), 
                 bias_name, bias_name + '_dequantized'])
 
     def quantize_bias(self, bias_name, input_name, weight_name, beta=1.0):
@@ -629,11 +631,11 @@ class Quantizer:
         Zero Point == 0 and Scale == Input_Scale * Weight_Scale
         """
         # get scale for weight
-        weight_scale_initializer = find_by_name(weight_name + '_scale', self.model.initializer())
+        weight_scale_initializer = self.model.get_initializer(weight_name + '_scale')
         weight_scale = self.tensor_proto_to_array(weight_scale_initializer)
 
         # get bias
-        bias_initializer = find_by_name(bias_name, self.model.initializer())
+        bias_initializer = self.model.get_initializer(bias_name)
         bias_data = self.tensor_proto_to_array(bias_initializer)
         quantized_bias_name = bias_name + "_quantized"
 
@@ -644,7 +646,7 @@ class Quantizer:
         else:
             raise ValueError("Expected {} to be in quantized value map \
                               for static quantization".format(input_name))
-        inputscale_initializer = find_by_name(input_scale_name, self.model.initializer())
+        inputscale_initializer = self.model.get_initializer(input_scale_name)
         input_scale = self.tensor_proto_to_array(inputscale_initializer)
 
         # calcuate scale for bias
@@ -659,21 +661,21 @@ class Quantizer:
                        bias_initializer.dims)
         packed_bias_initializer = onnx.numpy_helper.from_array(bias_np_data, 
                                                                quantized_bias_name)
-        self.model.initializer().extend([packed_bias_initializer])
+        self.model.extend_initializers([packed_bias_initializer])
 
         # update scale initializer
         quantized_bias_scale_name = bias_name + "_scale"
         bias_scale_data = np.asarray(bias_scale, dtype=np.float32).reshape(-1)
         packed_bias_scale_initializer = onnx.numpy_helper.from_array(bias_scale_data,
                                                          quantized_bias_scale_name)
-        self.model.initializer().extend([packed_bias_scale_initializer])
+        self.model.extend_initializers([packed_bias_scale_initializer])
 
         # update zero initializer
         quantized_bias_zp_name = bias_name + "_zero_point"
         bias_zp_data = np.zeros(bias_scale.shape, dtype=np.int32).reshape(-1)
         packed_bias_zp_initializer = onnx.numpy_helper.from_array(
             bias_zp_data, quantized_bias_zp_name)
-        self.model.initializer().extend([packed_bias_zp_initializer])
+        self.model.extend_initializers([packed_bias_zp_initializer])
 
         # log entries for this quantized bias value
         quantized_bias_entry = QuantizedInitializer(bias_name,
@@ -762,7 +764,7 @@ class Quantizer:
 
     def quantize_weight_per_channel(self, weight_name, weight_qType, scheme, channel_axis):
         """Quantize weight per-channel."""
-        initializer = find_by_name(weight_name, self.model.initializer())
+        initializer = self.model.get_initializer(weight_name)
         if initializer is None:
             raise ValueError("{} is not an initializer", weight_name)
 
@@ -834,7 +836,7 @@ class Quantizer:
                                                 packed_weight_name)
 
         if not self.add_qdq_pair_to_weight or self.mode != 'qdq':
-            self.model.initializer().append(packed_weight_initializer)
+            self.model.extend_initializers([packed_weight_initializer])
         if weight.axis is not None:
             zero_scale_shape = [weight.initializer.dims[weight.axis]]
         else:  # scale and zero point must be scalar
@@ -845,7 +847,7 @@ class Quantizer:
         zero_initializer = onnx.helper.make_tensor(zero_point_name, zero_point_type, 
                                                     zero_scale_shape, weight.zero_points)
 
-        self.model.initializer().extend([scale_initializer, zero_initializer])
+        self.model.extend_initializers([scale_initializer, zero_initializer])
 
     @staticmethod
     def tensor_proto_to_array(initializer):
@@ -921,7 +923,7 @@ class Quantizer:
             quantized_bias_name (string): bias name
         """
         # Add tensors for the shape to be reshaped to
-        weight = find_by_name(weight_name, self.model.initializer())
+        weight = self.model.get_initializer(weight_name)
         if weight is None:
             raise ValueError("Expected {} to be an initializer".format(node.input[1]))
 
@@ -951,7 +953,7 @@ class Quantizer:
 
     def is_valid_quantize_weight(self, weight_name):
         """Check weight can be quantized."""
-        weight = find_by_name(weight_name, self.model.initializer())
+        weight = self.model.get_initializer(weight_name)
         if weight is not None:
             return weight.data_type == onnx_proto.TensorProto.FLOAT
         else:
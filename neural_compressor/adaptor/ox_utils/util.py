@@ -18,11 +18,14 @@
 
 import os
 import numpy as np
+from collections import OrderedDict
 from neural_compressor.utils.utility import LazyImport
 from enum import Enum
 from pathlib import Path
 import abc
 
+onnx = LazyImport('onnx')
+ort = LazyImport('onnxruntime')
 helper = LazyImport('onnx.helper')
 numpy_helper = LazyImport('onnx.numpy_helper')
 onnx_proto = LazyImport('onnx.onnx_pb')
@@ -177,6 +180,88 @@ def collate_preds(results):
         collate_results = np.concatenate(results)
     return collate_results
 
+def pipelined_evaluate(dataloader, prepare, run, consume, iteration=-1, prefetch=2):
+    """Evaluate with the input preparation, the inference and the output handling overlapped.
+
+    A loader thread iterates the dataloader and prepares the inputs into a bounded queue, the
+    calling thread runs the inference and a consumer thread handles the outputs in the order
+    of the batches. onnxruntime releases the GIL while running, so the data loading and the
+    postprocessing are hidden behind the inference. The batches are fetched ahead of the
+    output handling, so the dataloader must not depend on the handled batches.
+
+    Args:
+        dataloader (object): the dataloader yielding (inputs, labels).
+        prepare (function): turns the inputs of a batch into the inference inputs.
+        run (function): runs the inference of the prepared inputs.
+        consume (function): handles the (predictions, labels) of a batch.
+        iteration (int, optional): the number of batches, -1 for all. Defaults to -1.
+        prefetch (int, optional): the number of batches queued between the threads.
+            Defaults to 2.
+    """
+    import queue
+    import threading
+    end = object()
+    stop = threading.Event()
+    errors = []
+    inputs_queue = queue.Queue(maxsize=max(prefetch, 1))
+    outputs_queue = queue.Queue(maxsize=max(prefetch, 1))
+
+    def put(items, item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(items):
+        while not stop.is_set():
+            try:
+                return items.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return end
+
+    def load():
+        try:
+            for idx, (inputs, labels) in enumerate(dataloader):
+                if not put(inputs_queue, (prepare(inputs), labels)):
+                    return
+                if idx + 1 == iteration:
+                    break
+        except Exception as e:
+            errors.append(e)
+        put(inputs_queue, end)
+
+    def handle():
+        try:
+            for predictions, labels in iter(lambda: get(outputs_queue), end):
+                consume(predictions, labels)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    threads = [threading.Thread(target=load, daemon=True),
+               threading.Thread(target=handle, daemon=True)]
+    for thread in threads:
+        thread.start()
+    try:
+        for ort_inputs, labels in iter(lambda: get(inputs_queue), end):
+            if not put(outputs_queue, (run(ort_inputs), labels)):
+                break
+        put(outputs_queue, end)
+        threads[1].join()
+    except Exception as e:
+        errors.append(e)
+    finally:
+        # set before joining, so an interrupt doesn't leave the threads blocked on the queues
+        stop.set()
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+
 def quantize_data_with_scale_zero(data, qType, scheme, scale, zero_point):
     """Quantize data with scale and zero point.
     
@@ -452,3 +537,120 @@ def find_by_name(name, item_list):
         return items[0]
     else:
         return None
+
+# the SessionOptions attributes that are part of the session cache key
+_SESSION_OPTIONS_KEYS = ['graph_optimization_level', 'execution_mode', 'intra_op_num_threads',
+                         'inter_op_num_threads', 'enable_cpu_mem_arena', 'enable_mem_pattern',
+                         'enable_profiling', 'log_severity_level']
+
+def is_large_model(model):
+    """Check if a ModelProto exceeds the 2GB protobuf limit, it can't be serialized then."""
+    return model.ByteSize() > onnx.checker.MAXIMUM_PROTOBUF
+
+class SessionCache(object):
+    """The InferenceSessions of the models evaluated last, kept by an adaptor for reuse.
+
+    A session is keyed by the identity of the ModelProto, which the cache holds, and its
+    serialized size, so a model edited in place with a different size gets a new session.
+    A model whose tensors are rewritten with the same size needs a clear. The providers, the
+    session options and the custom op libraries are part of the key as well. The cache isn't
+    pickled, e.g. with the adaptor sent to the trial workers.
+    """
+
+    def __init__(self, size=2):
+        """Initialize a session cache.
+
+        Args:
+            size (int, optional): the number of sessions kept. Defaults to 2.
+        """
+        self.size = size
+        self._sessions = OrderedDict()
+
+    def __getstate__(self):
+        """Get the state without the sessions, they can't be pickled."""
+        return {'size': self.size}
+
+    def __setstate__(self, state):
+        """Set the state with an empty cache."""
+        self.size = state['size']
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        """Return the number of sessions kept."""
+        return len(self._sessions)
+
+    @staticmethod
+    def key(model, sess_options, providers, custom_ops_libraries=()):
+        """Get the key of a session."""
+        return (id(model), model.ByteSize(), tuple(providers), tuple(custom_ops_libraries)) + \
+            tuple(str(getattr(sess_options, attr)) for attr in _SESSION_OPTIONS_KEYS)
+
+    def get(self, key, model):
+        """Get the session of a key, None if it isn't kept."""
+        entry = self._sessions.get(key)
+        # the id of a released model can be reused by a new one
+        if entry is None or entry[0] is not model:
+            return None
+        self._sessions.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, model, session):
+        """Keep the session of a key, the session used least recently is dropped if full."""
+        if self.size <= 0:
+            return
+        self._sessions[key] = (model, session)
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.size:
+            self._sessions.popitem(last=False)
+
+    def clear(self):
+        """Release the sessions."""
+        self._sessions.clear()
+
+def get_inference_session(model, sess_options, providers, model_path=None, save=False,
+                          cache=None, custom_ops_libraries=()):
+    """Get an InferenceSession of a model, reusing the sessions of a cache.
+
+    Sessions which write the optimized model to a file aren't cached.
+
+    Args:
+        model (ModelProto): the model.
+        sess_options (SessionOptions): the session options, the custom op libraries are
+            registered to them already.
+        providers (list): the execution providers.
+        model_path (str, optional): the file the session loads a model larger than 2GB from.
+        save (bool, optional): save a model larger than 2GB to model_path with its weights as
+            external data first. Defaults to False.
+        cache (SessionCache, optional): the cache of the sessions. Defaults to None.
+        custom_ops_libraries (list, optional): the custom op libraries registered to the
+            session options, part of the cache key. Defaults to ().
+
+    Returns:
+        InferenceSession: the session.
+    """
+    large_size = is_large_model(model)
+    if large_size and model_path is None: # pragma: no cover
+        raise ValueError('The model exceeds 2GB, a model path is required to load it.')
+    if sess_options.optimized_model_filepath:
+        cache = None
+    if cache is not None:
+        key = cache.key(model, sess_options, providers, custom_ops_libraries)
+        session = cache.get(key, model)
+        if session is not None:
+            return session
+
+    if large_size: # pragma: no cover
+        if save:
+            onnx.save_model(model,
+                            model_path,
+                            save_as_external_data=True,
+                            all_tensors_to_one_file=True,
+                            location="weights.pb",
+                            convert_attribute=False)
+        session = ort.InferenceSession(model_path, sess_options, providers=providers)
+    else:
+        session = ort.InferenceSession(model.SerializeToString(), sess_options,
+                                       providers=providers)
+    if cache is not None:
+        cache.put(key, model, session)
+    return session
@@ -18,6 +18,8 @@
 import copy
 import math
 import os
+import shutil
+import tempfile
 from collections import OrderedDict, UserDict
 from packaging.version import Version
 import yaml
@@ -27,6 +29,7 @@ from .adaptor import adaptor_registry, Adaptor
 from ..utils.utility import LazyImport, CpuInfo, GLOBAL_STATE, MODE
 from ..utils.utility import Statistics
 from ..utils import logger
+from ..utils.tensor_store import TensorStore, INSPECT_STORE_DIR
 from .query import QueryBackendCapability
 from ..experimental.data.dataloaders.base_dataloader import BaseDataLoader
 
@@ -1235,6 +1238,7 @@ class PyTorchAdaptor(TemplateAdaptor):
 
         # for tensorboard
         self.dump_times = 0
+        self.tensorboard_store = None
         self.fused_dict = {}
 
         self.optype_statistics = None
@@ -1618,12 +1622,17 @@ class PyTorchAdaptor(TemplateAdaptor):
             if hasattr(modules[key[0]], 'zero_point'):
                 value['activation']['zero_point'] = int(modules[key[0]].zero_point)
 
-    def _pre_eval_hook(self, model, op_list=None, iteration_list=None):
+    def _pre_eval_hook(self, model, op_list=None, iteration_list=None, store=None):
         """The function is used to do some preprocession before evaluation phase.
            Here, it used to add hook for dump output tensor for quantizable ops.
 
         Args:
              model (object): input model
+             op_list (list, optional): list of ops which to be dumped
+             iteration_list (list, optional): indexs of iteration which to dump tensor
+             store (TensorStore, optional): store the output tensors are recorded to, the
+                                            statistics are recorded to a store for the
+                                            tensorboard by default
 
         Returns:
               model (object): model with hook
@@ -1665,31 +1674,39 @@ class PyTorchAdaptor(TemplateAdaptor):
         class _RecordingObserver(ABC, torch.nn.Module):
             """The module is mainly for debug and records the tensor values during runtime.
 
+            The tensors are appended to the store as soon as they're observed, so they aren't
+            kept in memory.
+
             Args:
                 iteration_list (list, optional): indexs of iteration which to dump tensor.
+                store (TensorStore): store the tensors are recorded to.
             """
-            def __init__(self, iteration_list=None, **kwargs):
+            def __init__(self, iteration_list=None, store=None, **kwargs):
                 super(_RecordingObserver, self).__init__(**kwargs)
-                self.output_tensors_dict = OrderedDict()
                 self.current_iter = 1
                 self.iteration_list = iteration_list
+                self.store = store
+                # set once the observers are added, it's the name of the observed op
+                self.op_name = None
 
             def forward(self, x):
                 if (self.iteration_list is None and self.current_iter == 1) or \
                     (self.iteration_list is not None and
                      self.current_iter in self.iteration_list):
-                    if type(x) is tuple or type(x) is list:
-                        self.output_tensors_dict[self.current_iter] = \
-                            [i.to("cpu") if i.device != 'cpu' else i.clone() for i in x]
-                    else:
-                        self.output_tensors_dict[self.current_iter] = \
-                            x.to("cpu") if x.device != "cpu" else x.clone()
+                    outputs = x if type(x) is tuple or type(x) is list else [x]
+                    for index, output in enumerate(outputs):
+                        output = output.detach().to("cpu")
+                        self.store.record(self.op_name, self.current_iter,
+                                          self.op_name + ".output" + str(index),
+                                          (torch.dequantize(output) if output.is_quantized
+                                           else output).numpy(), output.is_quantized)
                 self.current_iter += 1
                 return x
 
             @torch.jit.export
             def get_tensor_value(self):
-                return self.output_tensors_dict
+                return OrderedDict((iteration, self.store.load(self.op_name, iteration))
+                                   for iteration in self.store.iterations())
 
             with_args = classmethod(_with_args)
 
@@ -1815,11 +1832,20 @@ class PyTorchAdaptor(TemplateAdaptor):
         else:
             white_list = torch.quantization.get_default_compare_output_module_list()
 
+        if store is None:
+            store_path = os.path.join(self.workspace_path, 'tensorboard',
+                                      'baseline' if self.dump_times == 0 else
+                                      'tune_' + str(self.dump_times))
+            shutil.rmtree(store_path, ignore_errors=True)
+            store = self.tensorboard_store = TensorStore(store_path, mode='stats')
         model = model if model.is_quantized else copy.deepcopy(model)
         model._model.qconfig = torch.quantization.QConfig(
             weight=torch.quantization.default_debug_observer,
-            activation=_RecordingObserver.with_args(iteration_list=iteration_list))
+            activation=_RecordingObserver.with_args(iteration_list=iteration_list, store=store))
         _prepare(model._model, op_list=op_list, white_list=white_list)
+        for name, module in model._model.named_modules():
+            if isinstance(module, _RecordingObserver):
+                module.op_name = name.replace(".activation_post_process", "")
 
         return model
 
@@ -1882,7 +1908,6 @@ class PyTorchAdaptor(TemplateAdaptor):
             None
         """
         from torch.utils.tensorboard import SummaryWriter
-        from torch.quantization import get_observer_dict
 
         model = model._model
 
@@ -1913,14 +1938,13 @@ class PyTorchAdaptor(TemplateAdaptor):
                 break
 
         summary = OrderedDict()
-        observer_dict = {}
-        get_observer_dict(model, observer_dict)
-        for key in observer_dict:
-            if isinstance(observer_dict[key], torch.nn.modules.linear.Identity):
-                continue
-            op_name = key.strip(".activation_post_process")
-            summary[op_name + ".output"] = observer_dict[key].get_tensor_value()
-            for iter in summary[op_name + ".output"]:
+        store = self.tensorboard_store
+        self.tensorboard_store = None
+        if store is not None:
+            store.close()
+            for op_name in store.ops():
+                summary[op_name + ".output"] = OrderedDict(
+                    (iter, store.load(op_name, iter)) for iter in store.iterations())
                 # Only collect last fused child output
                 op = op_name
                 if self.is_fused_child(op_name) == True and \
@@ -1933,11 +1957,17 @@ class PyTorchAdaptor(TemplateAdaptor):
                     else:
                         op = op_name
 
-                if summary[op_name + ".output"][iter].is_quantized:
-                    writer.add_histogram(op + "/Output/int8",
-                                         torch.dequantize(summary[op_name + ".output"][iter]))
-                else:
-                    writer.add_histogram(op + "/Output/fp32", summary[op_name + ".output"][iter])
+                for iter, outputs in summary[op_name + ".output"].items():
+                    tag = op + ("/Output/int8" if store.is_quantized(op_name, iter) else
+                                "/Output/fp32")
+                    for stats in outputs.values():
+                        if stats['num'] == 0 or not np.isfinite(stats['histogram'][1]).all():
+                            continue
+                        writer.add_histogram_raw(tag, min=stats['min'], max=stats['max'],
+                            num=stats['num'], sum=stats['mean'] * stats['num'],
+                            sum_squares=(stats['std'] ** 2 + stats['mean'] ** 2) * stats['num'],
+                            bucket_limits=stats['histogram'][1][1:].tolist(),
+                            bucket_counts=stats['histogram'][0].tolist(), global_step=iter)
 
         state_dict = model.state_dict()
         for key in state_dict:
@@ -1976,7 +2006,36 @@ class PyTorchAdaptor(TemplateAdaptor):
                        op_list=None,
                        iteration_list=None,
                        inspect_type='activation',
-                       save_to_disk=False):
+                       save_to_disk=False,
+                       save_path=None,
+                       record_mode='tensor',
+                       sample_size=1024):
+        """The function is used by tune strategy class for dumping tensor info.
+
+        The activations are recorded to a TensorStore while the model runs. With save_to_disk
+        the store is kept in save_path/fp32 or save_path/quan and the activations are returned
+        memory-mapped, otherwise it's a temporary store in the workspace, read in memory and
+        removed.
+
+        Args:
+            model (object): The model to inspect.
+            dataloader (object): The dataloader used to feed into.
+            op_list (list): The op name in the fp32 model for dumpping.
+            iteration_list (list): The iteration list containing iterations to dump.
+            inspect_type (str): The valid value are 'weight', 'activation', 'all'.
+            save_to_disk (bool): Save to disk or memory.
+            save_path (str, optional): The directory of the activation store with
+                                       save_to_disk. Defaults to the dump_tensor directory
+                                       of the workspace.
+            record_mode (str, optional): 'tensor' to record the activations, 'sample' to
+                                         record a reservoir sample of their values or 'stats'
+                                         to record their statistics. Defaults to 'tensor'.
+            sample_size (int, optional): The size of the samples of the 'sample' mode.
+
+        Returns:
+            dict: The weights and the activations, see Adaptor.inspect_tensor. The
+                  activations are statistics dicts in the 'stats' mode, see tensor_statistics.
+        """
         if self.version.release >= Version("1.8.0").release:
             from torch.fx import GraphModule
             if type(model._model) == GraphModule:  # pragma: no cover
@@ -2003,82 +2062,47 @@ class PyTorchAdaptor(TemplateAdaptor):
         assert min(iteration_list) > 0, \
             "Iteration number should great zero, 1 means first iteration."
         iterations = max(iteration_list) if iteration_list is not None else -1
-        new_model = self._pre_eval_hook(new_model, op_list=op_list_, iteration_list=iteration_list)
+        dump_dir = os.path.join(self.workspace_path, 'dump_tensor')
+        if save_to_disk:
+            store_path = os.path.join(save_path if save_path else dump_dir,
+                                      'quan' if is_quantized else 'fp32', INSPECT_STORE_DIR)
+            shutil.rmtree(store_path, ignore_errors=True)
+        else:
+            os.makedirs(self.workspace_path, exist_ok=True)
+            store_path = tempfile.mkdtemp(prefix='inspect_', dir=self.workspace_path)
+        store = TensorStore(store_path, mode=record_mode, sample_size=sample_size)
+        new_model = self._pre_eval_hook(new_model, op_list=op_list_,
+                                        iteration_list=iteration_list, store=store)
         self.evaluate(new_model, dataloader, iteration=iterations)
-        observer_dict = {}
+        store.flush()
         ret = {}
         if inspect_type == 'activation' or inspect_type == 'all':
-            from torch.quantization import get_observer_dict
             ret['activation'] = []
-            get_observer_dict(new_model._model, observer_dict)
             if iteration_list is None:
                 iteration_list = [1]
             for i in iteration_list:
                 summary = OrderedDict()
-                for key in observer_dict:
-                    if isinstance(observer_dict[key], torch.nn.modules.linear.Identity):
+                for op_name in store.ops():
+                    # the temporary store is removed below, its records are read in memory
+                    value = store.load(op_name, i, mmap=save_to_disk)
+                    if not value:
                         continue
-                    op_name = key.replace(".activation_post_process", "")
-                    value = observer_dict[key].get_tensor_value()[i]
                     if op_name in op_list:
-                        if type(value) is list:
-                            summary[op_name] = {}
-                            for index in range(len(value)):
-                                summary[op_name].update({
-                                    op_name + ".output" + str(index):
-                                    dequantize(value[index]).numpy()
-                                    if value[index].is_quantized else value[index].numpy()
-                                })
-                        else:
-                            summary[op_name] = {
-                                op_name + ".output0":
-                                dequantize(value).numpy() if value.is_quantized else value.numpy()
-                            }
-                    else:
-                        if bool(self.fused_dict):
-                            if is_quantized:
-                                for a in fp32_int8_map:
-                                    if op_name == fp32_int8_map[a]['weight']:
-                                        if type(value) is list:
-                                            summary[a] = {}
-                                            for index in range(len(value)):
-                                                summary[a].update({
-                                                    op_name + ".output" + str(index):
-                                                    dequantize(value[index]).numpy()
-                                                    if value[index].is_quantized else
-                                                    value[index].numpy()
-                                                })
-                                        else:
-                                            summary[a] = {
-                                                op_name + ".output0":
-                                                dequantize(value).numpy()
-                                                if value.is_quantized else value.numpy()
-                                            }
-                            else:
-                                for a in fp32_int8_map:  # pragma: no cover
-                                    if op_name == fp32_int8_map[a]['activation']:
-                                        if type(value) is list:
-                                            summary[a] = {}
-                                            for index in range(len(value)):
-                                                summary[a].update({
-                                                    op_name + ".output" + str(index):
-                                                    dequantize(value[index]).numpy()
-                                                    if value[index].is_quantized else
-                                                    value[index].numpy()
-                                                })
-                                        else:
-                                            summary[a] = {
-                                                op_name + ".output0":
-                                                dequantize(value).numpy()
-                                                if value.is_quantized else value.numpy()
-                                            }
+                        summary[op_name] = dict(value)
+                    elif bool(self.fused_dict):
+                        for a in fp32_int8_map:
+                            if op_name == fp32_int8_map[a][
+                                    'weight' if is_quantized else 'activation']:
+                                summary[a] = dict(value)
 
                 if save_to_disk:
-                    dump_dir = os.path.join(self.workspace_path, 'dump_tensor')
                     os.makedirs(dump_dir, exist_ok=True)
                     np.savez(os.path.join(dump_dir, 'activation_iter{}.npz'.format(i)), **summary)
 
                 ret['activation'].append(summary)
+        if not save_to_disk:
+            store.close()
+            shutil.rmtree(store_path, ignore_errors=True)
 
         if inspect_type == 'weight' or inspect_type == 'all':
             ret['weight'] = {}
@@ -2126,6 +2150,7 @@ class PyTorchAdaptor(TemplateAdaptor):
                                     break
 
             if save_to_disk:
+                os.makedirs(dump_dir, exist_ok=True)
                 np.savez(os.path.join(dump_dir, 'weight.npz'), **ret['weight'])
         else:
             ret['weight'] = None
@@ -2724,6 +2749,7 @@ class PyTorch_FXAdaptor(TemplateAdaptor):
         """
 
         self.tune_cfg = None
+        self.op_sensitivity = None
         if self.device == "cpu":
             query_config_file = "pytorch_cpu.yaml"
         else:  # pragma: no cover
@@ -3613,10 +3639,12 @@ class PyTorch_FXAdaptor(TemplateAdaptor):
         Returns:
             ops_lst (list): sorted op list by sensitivity
         """
-        from .torch_utils.util import get_fallback_order
-        ordered_ops = get_fallback_order(self, model.model, dataloader, tune_cfg, 
-                                         confidence_batches, fallback, requantize_cfgs)
-        return ordered_ops
+        from .torch_utils.sensitivity import OpSensitivity
+        # the ops are scored once for the model, the later calls reuse the scores
+        if self.op_sensitivity is None or \
+            not self.op_sensitivity.matches(model.model, dataloader, confidence_batches):
+            self.op_sensitivity = OpSensitivity(self, model.model, dataloader, confidence_batches)
+        return self.op_sensitivity.get_order(tune_cfg, fallback)
 
 
 class PyTorchQuery(QueryBackendCapability):
@@ -21,6 +21,7 @@ import copy
 import os
 import logging
 import tempfile
+import numpy as np
 import tensorflow as tf
 
 from collections import OrderedDict, UserDict
@@ -37,7 +38,7 @@ from .transform_graph.rerange_quantized_concat import RerangeQuantizedConcat
 from .transform_graph.bias_correction import BiasCorrection
 from .util import generate_feed_dict, iterator_sess_run,version1_gt_version2,version1_eq_version2
 from .util import version1_gte_version2,version1_lte_version2,version1_lt_version2
-from .util import TF_SPR_BASE_VERSIONS
+from .util import TF_SPR_BASE_VERSIONS, get_tensor_by_name
 from .quantize_graph.quantize_graph_for_intel_cpu import QuantizeGraphForIntel
 from .quantize_graph_common import QuantizeGraphHelper
 from .quantize_graph.qdq.optimize_qdq import OptimizeQDQGraph
@@ -68,6 +69,7 @@ from .graph_rewriter.qdq.insert_qdq_pattern import GenerateGraphWithQDQPattern
 from .graph_rewriter.qdq.share_qdq_y_pattern import ShareQDQForItexYPatternOptimizer
 from .graph_rewriter.qdq.merge_duplicated_qdq import MergeDuplicatedQDQOptimizer
 from neural_compressor.adaptor.tf_utils.graph_rewriter.generic.insert_print_node import InsertPrintMinMaxNode
+from .graph_rewriter.generic.convert_print_to_tap import ConvertPrintToTapOptimizer
 from .graph_util import GraphRewriterHelper as Helper
 
 
@@ -127,6 +129,7 @@ class GraphConverter:
         self._gen_tmp_filenames()
         self._kl_op_dict = {}
         self._kl_keys = []
+        self._kl_print_node_names = []
         self._print_node_mapping = {}
         self._enable_kl_op_names = [
             k for k in self.op_wise_config if self.op_wise_config[k][1] == 'kl'
@@ -158,11 +161,15 @@ class GraphConverter:
         self.exclude_node_names = []
 
     # pylint: disable=no-member
-    def _inference(self, model):
+    def _inference(self, model, tap_tensor_names=None, tap_fn=None):
         """Run the calibration on the input graph.
 
         Args:
             model(TensorflowBaseModel): input TensorflowBaseModel
+            tap_tensor_names(list, optional): the tensors fetched along with the outputs,
+                the graph must not have an iterator.
+            tap_fn(callable, optional): called with the values of the tapped tensors of
+                each iteration.
         """
         # ITEX optimization has broken INC calibration process.
         # INC needs turn off ITEX optimization pass in calibration stage.
@@ -172,6 +179,10 @@ class GraphConverter:
         iter_op = model.iter_op
         input_tensor = model.input_tensor
         output_tensor = model.output_tensor
+        tap_tensor = [get_tensor_by_name(sess.graph, name) for name in tap_tensor_names] \
+            if tap_tensor_names else []
+        assert not (tap_tensor and iter_op), 'The tensors of iterator graph can not be tapped.'
+        fetches = [output_tensor, tap_tensor] if tap_tensor else output_tensor
         # TF table initialization: https://github.com/tensorflow/tensorflow/issues/8665
         node_names = [node.name for node in sess.graph.as_graph_def().node]
         if 'init_all_tables' in node_names:
@@ -181,9 +192,11 @@ class GraphConverter:
         logger.info("Start sampling on calibration dataset.")
         if len(self.data_loader) == 0:
             feed_dict = {}
-            _ = sess.run(output_tensor, feed_dict) if iter_op==[] \
+            results = sess.run(fetches, feed_dict) if iter_op==[] \
                 else iterator_sess_run(sess, iter_op, \
                     feed_dict, output_tensor, self.calib_iteration)
+            if tap_tensor:
+                tap_fn(results[1])
         for idx, (inputs, labels) in enumerate(self.data_loader):
             if len(input_tensor) == 1:
                 feed_dict = {}
@@ -241,9 +254,11 @@ class GraphConverter:
                             if check_shape(dis_tensor, dis_input):
                                 feed_dict.update({dis_tensor: dis_input})
                                 break
-            _ = sess.run(output_tensor, feed_dict) if iter_op==[] \
+            results = sess.run(fetches, feed_dict) if iter_op==[] \
                 else iterator_sess_run(sess, iter_op, \
                     feed_dict, output_tensor, self.calib_iteration)
+            if tap_tensor:
+                tap_fn(results[1])
             if idx + 1 == self.calib_iteration:
                 break
         os.environ["ITEX_REMAPPER"] = "1"
@@ -426,6 +441,7 @@ class GraphConverter:
 
         for i in output_node_names:
             self._kl_keys.append(';' + i + '__print__;__KL')
+        self._kl_print_node_names = output_node_names
 
         fp32_graph_def = graph_pb2.GraphDef()
         fp32_graph_def.CopyFrom(self._fp32_model.graph_def)
@@ -504,13 +520,8 @@ class GraphConverter:
                         sampling_graph_def, i[0], i[-1], self.new_api).do_transformation()
                     output_tensor_names.extend(output_names)
                 if self.quantized_node_info:
-                    sampling_graph_def.library.CopyFrom(self.model.graph_def.library)
-                    self._sampling_model.graph_def = sampling_graph_def
-                    self._sampling_model.output_tensor_names = output_tensor_names
-                    tmp_dump_file = tempfile.mkstemp(suffix='.log')[1]
-                    with CaptureOutputToFile(tmp_dump_file):
-                        self._inference(self._sampling_model)
-                    self._calibration_data = Helper.gen_valid_sampling_log(tmp_dump_file)
+                    self._calibration_data = self._generate_sampling_data(
+                        sampling_graph_def, output_tensor_names)
 
                 if len(self._calibration_data) > 0:
                     self._freeze_requantization_ranges(self._kl_op_dict)
@@ -584,8 +595,88 @@ class GraphConverter:
             self._tmp_model.graph_def = self._tmp_graph_def
             self._tmp_model.save(self._int8_dynamic_range_model_path)
 
+    def _generate_sampling_data(self, sampling_graph_def, output_tensor_names):
+        """Run the sampling graph and get the min/max values of the quantized nodes.
+
+        The min/max tensors of the Print nodes are fetched as session outputs, and the values
+        are collected in numpy. The Print nodes and their log are only used for the graph
+        with an iterator, or if the tensor taps fail.
+
+        Args:
+            sampling_graph_def (graphdef): the graph with the Print nodes of InsertPrintMinMaxNode.
+            output_tensor_names (list): the output tensor names of the sampling graph.
+
+        Returns:
+            list: the calibration data lines consumed by FreezeValueTransformer.
+        """
+        sampling_graph_def.library.CopyFrom(self.model.graph_def.library)
+        tap_graph_def, taps = ConvertPrintToTapOptimizer(
+            copy.deepcopy(sampling_graph_def)).do_transformation()
+        self._sampling_model.graph_def = tap_graph_def
+        self._sampling_model.output_tensor_names = output_tensor_names
+        if taps and not self._sampling_model.iter_op:
+            tap_values = []
+            try:
+                self._inference(self._sampling_model, [name for name, _ in taps],
+                    lambda values: tap_values.append(np.array(values, dtype=np.float64)))
+            except (ValueError, tf.errors.OpError) as e:
+                # a tensor is missing or not fetchable, e.g. inside a control flow frame
+                logger.warning("Fail to fetch the calibration tensors due to {}, " \
+                               "fall back to the sampling log.".format(repr(e)))
+            else:
+                return Helper.gen_valid_sampling_data([message for _, message in taps],
+                                                      tap_values)
+
+        self._sampling_model.graph_def = sampling_graph_def
+        self._sampling_model.output_tensor_names = output_tensor_names
+        tmp_dump_file = tempfile.mkstemp(suffix='.log')[1]
+        with CaptureOutputToFile(tmp_dump_file):
+            self._inference(self._sampling_model)
+        return Helper.gen_valid_sampling_log(tmp_dump_file)
+
+    def _collect_kl_histograms(self):
+        """Collect the histograms of the KL nodes by fetching their tensors from the fp32 graph.
+
+        Returns:
+            bool: True if the histograms are collected, False if the graph has an iterator or
+                the tensors can't be fetched.
+        """
+        if not self._kl_print_node_names:
+            return True
+        model = Model(copy.deepcopy(self._fp32_model.graph_def), **self._tmp_model.kwargs)
+        model.output_tensor_names = self.output_tensor_names
+        model.input_tensor_names = self.input_tensor_names
+        if model.iter_op:
+            return False
+        keys = [self._print_node_mapping[name] + '_eightbit_requant_range' \
+                for name in self._kl_print_node_names]
+        kl_op_dict = {}
+
+        def update_histograms(values):
+            for key, value in zip(keys, values):
+                if key not in kl_op_dict:
+                    kl_op_dict[key] = get_tensor_histogram(value)
+                else:
+                    kl_op_dict[key] = combine_histogram(kl_op_dict[key], value)
+
+        try:
+            self._inference(model, [name + ':0' for name in self._kl_print_node_names],
+                            update_histograms)
+        except (ValueError, tf.errors.OpError) as e:
+            logger.warning("Fail to fetch the KL tensors due to {}, " \
+                           "fall back to the sampling log.".format(repr(e)))
+            return False
+        self._kl_op_dict.update(kl_op_dict)
+        return True
+
     def _generate_calibration_data(self, tmp_path, output_data, enable_kl_algo=False):
-        """Generate the calibration data."""
+        """Generate the calibration data.
+
+        The KL histograms are collected from the fetched tensors, the tensors are only printed
+        to the log and parsed if they can't be fetched.
+        """
+        if enable_kl_algo and self._collect_kl_histograms():
+            return
         tmp_dump_file = os.path.join(os.path.dirname(self.output_graph), 'requant_min_max.log')
 
         logger.debug("Generate calibration data and save to {}.".format(tmp_dump_file))
@@ -799,13 +890,8 @@ class GraphConverter:
 
 
         if self.quantized_node_info:
-            sampling_graph_def.library.CopyFrom(self.model.graph_def.library)
-            self._sampling_model.graph_def = sampling_graph_def
-            self._sampling_model.output_tensor_names = output_tensor_names
-            tmp_dump_file = tempfile.mkstemp(suffix='.log')[1]
-            with CaptureOutputToFile(tmp_dump_file):
-                self._inference(self._sampling_model)
-            self._calibration_data = Helper.gen_valid_sampling_log(tmp_dump_file)
+            self._calibration_data = self._generate_sampling_data(
+                sampling_graph_def, output_tensor_names)
 
         # Insert QDQ pattern
         self._tmp_graph_def = GenerateGraphWithQDQPattern(
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Convert the calibration Print nodes into tensor taps Graph Rewriter."""
+
+from tensorflow.core.framework import node_def_pb2
+
+from ..graph_base import GraphRewriterBase
+
+
+class ConvertPrintToTapOptimizer(GraphRewriterBase):
+    """Replace the calibration Print nodes with Identity nodes and return the tapped tensors.
+
+    The Print nodes inserted by InsertPrintMinMaxNode write their min/max values to stderr,
+    which has to be captured and parsed. After the conversion, the min/max tensors are fetched
+    as session outputs instead, and the Identity nodes keep the control dependencies on the
+    former Print nodes valid.
+    """
+
+    def __init__(self, model, print_suffix='__print__'):
+        """Initilization.
+
+        Args:
+            model (graphdef): the sampling graph with the Print nodes.
+            print_suffix (string, optional): the suffix in the message of the calibration
+                Print nodes. Defaults to '__print__'.
+        """
+        super().__init__(model)
+        self.print_suffix = print_suffix
+
+    def do_transformation(self):
+        """Convert the calibration Print nodes.
+
+        Returns:
+            graphdef: the converted graph.
+            list: a (tensor name, message) tuple per Print node, the tensor it printed and
+                its message, in graph order.
+        """
+        taps = []
+        for node in self.model.node:
+            if node.op != 'Print' or \
+                self.print_suffix not in node.attr['message'].s.decode(errors='ignore'):
+                continue
+            data_inputs = [i for i in node.input if not i.startswith('^')]
+            control_inputs = [i for i in node.input if i.startswith('^')]
+            tensor_name = data_inputs[0] if ':' in data_inputs[0] else data_inputs[0] + ':0'
+            taps.append((tensor_name, node.attr['message'].s.decode()))
+
+            identity_node = node_def_pb2.NodeDef()
+            identity_node.op = 'Identity'
+            identity_node.name = node.name
+            identity_node.device = node.device
+            identity_node.input.extend(data_inputs[:1] + control_inputs)
+            identity_node.attr['T'].CopyFrom(node.attr['T'])
+            node.CopyFrom(identity_node)
+        return self.model, taps
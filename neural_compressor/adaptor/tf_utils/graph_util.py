@@ -921,6 +921,36 @@ class GraphRewriterHelper():
 
         return int32_bias
 
+    @staticmethod
+    def gen_per_iter_sampling_data(data):
+        """Merge the requantization min/max lines of one sampling iteration.
+
+        Args:
+          data: the sampling lines of one iteration.
+
+        Returns:
+          the sampling lines with the requantization min/max lines merged.
+        """
+        res = []
+        requant_tmp = []
+        for i in data:
+            if i.find("__print__;__requant_") == -1:
+                res.append(i)
+            else:
+                requant_tmp.append(i)
+        sorted_requant = sorted(requant_tmp)
+        odd_list = sorted_requant[::2]
+        even_list = sorted_requant[1::2]
+        for index, value in enumerate(even_list):
+            min_value = min(0, float(value.split(':')[1][1:-1]))
+            max_value = float(odd_list[index].split(':')[1][1:-1])
+            max_value = max_value if max_value > min_value else min_value + 1e-05
+            mixed_str = value.split(':')[0] + '_max:[' + \
+                str(min_value) + '][' + str(max_value) + ']'
+
+            res.append(mixed_str)
+        return res
+
     @staticmethod
     def gen_valid_sampling_log(log_path):
         """Generate the valid sampling log.
@@ -931,26 +961,6 @@ class GraphRewriterHelper():
         Returns:
           the sampling min max value.
         """
-        def gen_per_iter(data):
-            res = []
-            requant_tmp = []
-            for i in data:
-                if i.find("__print__;__requant_") == -1:
-                    res.append(i)
-                else:
-                    requant_tmp.append(i)
-            sorted_requant = sorted(requant_tmp)
-            odd_list = sorted_requant[::2]
-            even_list = sorted_requant[1::2]
-            for index, value in enumerate(even_list):
-                min_value = min(0, float(value.split(':')[1][1:-1]))
-                max_value = float(odd_list[index].split(':')[1][1:-1])
-                max_value = max_value if max_value > min_value else min_value + 1e-05
-                mixed_str = value.split(':')[0] + '_max:[' + \
-                    str(min_value) + '][' + str(max_value) + ']'
-
-                res.append(mixed_str)
-            return res
         with open(log_path) as f:
             valid_data = [i.strip() for i in f.readlines() if i.startswith(';')]
 
@@ -965,12 +975,35 @@ class GraphRewriterHelper():
         final_res = []
 
         for i in range(iterations):
-            final_res.extend(gen_per_iter(valid_data[int(i*step): int(step*( i+ 1))]))
+            final_res.extend(GraphRewriterHelper.gen_per_iter_sampling_data(
+                valid_data[int(i*step): int(step*( i+ 1))]))
             if i + 1 == iterations and int(step*( i+ 1)) < len(valid_data):
-                final_res.extend(gen_per_iter(valid_data[int(step*( i+ 1)): len(valid_data)]))
+                final_res.extend(GraphRewriterHelper.gen_per_iter_sampling_data(
+                    valid_data[int(step*( i+ 1)): len(valid_data)]))
 
         return final_res
 
+    @staticmethod
+    def gen_valid_sampling_data(messages, values):
+        """Generate the valid sampling data from the fetched min/max values.
+
+        It's the binary counterpart of gen_valid_sampling_log, the values are fetched from the
+        tensor taps instead of parsed from the log printed by the Print nodes.
+
+        Args:
+          messages: the message of each Print node.
+          values: the min/max values of each iteration, in shape (iterations, len(messages)).
+
+        Returns:
+          the sampling min max value.
+        """
+        final_res = []
+        for iteration_values in values:
+            final_res.extend(GraphRewriterHelper.gen_per_iter_sampling_data(
+                ['{}[{!r}]'.format(message, float(value)) \
+                 for message, value in zip(messages, iteration_values)]))
+        return final_res
+
     @staticmethod
     def analysis_rnn_model(graph_def, bf16_ops=[], fp32_ops=[]):
         """Match the RNN and dynamic RNN patterns."""
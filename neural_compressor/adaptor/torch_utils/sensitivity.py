@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Incremental op sensitivity analysis for the PyTorch FX quantization."""
+
+import copy
+from packaging.version import Version
+from ...utils import logger
+from ...utils.utility import LazyImport
+from .util import fetch_module, get_example_input, simple_inference, quantize_fx, op_cfg_mapping
+
+torch = LazyImport("torch")
+
+# the number of ops at the top of the ranking validated by the full model quantization
+VALIDATION_OPS = 3
+
+
+class OpSensitivity(object):
+    """Rank the quantizable ops of a model by their sensitivity, without quantizing the model per op.
+
+    The inputs and the fp32 outputs of the ops are captured once, by hooks on the fp32 model
+    running the confidence batches. An op is then scored alone: it's quantized with its config,
+    calibrated and re-executed on its cached inputs, and its output is compared with the fp32
+    one by the MSE relative to the fp32 output. The scores only depend on the op and its config,
+    so they're kept and reused by the later rankings of the tuning, while the captured tensors
+    are released once the ops are scored. They're only captured again for a new config.
+
+    The model is only quantized to validate the ranking: the ops at its top, which decide the
+    next tuning config, are re-ranked by the MSE of the output of the last op of the model
+    quantized without them, or with them re-quantized, as get_fallback_order does for every op.
+    The ops which can't be re-executed alone, e.g. the ones called with several inputs or not
+    being modules, are validated the same way. The validated ops come first in the order, sorted
+    by their measured MSE, and the other scored ops follow by their score: an op which can't be
+    scored is measured on the model like the top ones, which is more than the score of the tail
+    tells, and the MSE of the model output and the score of an op alone can't be compared.
+
+    Args:
+        adaptor (object): The PyTorch_FXAdaptor.
+        model (torch.nn.Module): The fp32 model.
+        dataloader (object): The calibration dataloader.
+        confidence_batches (int): The number of batches to run the ops on.
+    """
+
+    def __init__(self, adaptor, model, dataloader, confidence_batches):
+        """Initialize the attributes, the example inputs are fetched from the dataloader."""
+        self.adaptor = adaptor
+        self.model = model
+        self.dataloader = dataloader
+        self.confidence_batches = confidence_batches
+        self.model.eval()
+        self.example_inputs = [get_example_input(dataloader, i) for i in range(confidence_batches)]
+        self.modules = dict(model.named_modules())
+        # op name -> [(input, output)] per batch, only kept while get_order scores the ops
+        self.records = {}
+        # the ops which can't be re-executed alone
+        self.unscorable = set()
+        # (op name, qconfig) -> relative MSE of the op quantized alone
+        self.scores = {}
+        # op name -> fp32 outputs of the op per batch
+        self.fp32_outputs = {}
+
+    def matches(self, model, dataloader, confidence_batches):
+        """Check whether the captured records are of the model and the batches."""
+        return self.model is model and self.dataloader is dataloader and \
+            self.confidence_batches == confidence_batches
+
+    def capture(self, op_names):
+        """Capture the inputs and the fp32 outputs of the ops not captured yet."""
+        op_names = [name for name in op_names if name not in self.records and \
+            name not in self.unscorable]
+        if not op_names:
+            return
+        captured = {name: [] for name in op_names if self.modules.get(name) not in \
+            (None, self.model)}
+        handles = []
+        for name in captured:
+            # the inputs are cloned before the forward, the in-place ops change them
+            def pre_hook(module, inputs, name=name):
+                captured[name].append([tuple(input.detach().clone() if isinstance(
+                    input, torch.Tensor) else input for input in inputs), None])
+            def hook(module, inputs, output, name=name):
+                captured[name][-1][1] = output.detach().clone() if isinstance(
+                    output, torch.Tensor) else None
+            handles.append(self.modules[name].register_forward_pre_hook(pre_hook))
+            handles.append(self.modules[name].register_forward_hook(hook))
+        try:
+            for example_inp in self.example_inputs:
+                simple_inference(self.model, example_inp)
+        finally:
+            for handle in handles:
+                handle.remove()
+
+        for name in op_names:
+            records = captured.get(name)
+            if records is None or len(records) != len(self.example_inputs) or \
+                any(len(inputs) != 1 or not isinstance(inputs[0], torch.Tensor) or \
+                    output is None for inputs, output in records):
+                self.unscorable.add(name)
+            else:
+                self.records[name] = [(inputs[0], output) for inputs, output in records]
+
+    def score(self, op_name, qconfig):
+        """Get the relative MSE of the op quantized alone, None if it can't be re-executed alone."""
+        key = (op_name, str(qconfig))
+        if key in self.scores:
+            return self.scores[key]
+        records = self.records.get(op_name)
+        if op_name in self.unscorable or not records:
+            return None
+        from torch.quantization.quantize_fx import prepare_fx, convert_fx
+        from ..pytorch import _cfgs_to_fx_cfgs
+        try:
+            op_model = torch.nn.Sequential(copy.deepcopy(self.modules[op_name]))
+            fx_op_cfgs = _cfgs_to_fx_cfgs({'0': qconfig}, self.adaptor.approach)
+            with torch.no_grad():
+                if self.adaptor.version.release >= Version("1.13.0").release:  # pragma: no cover
+                    op_model = prepare_fx(op_model, fx_op_cfgs, (records[0][0],))
+                else:
+                    op_model = prepare_fx(op_model, fx_op_cfgs)
+                for input, _ in records:
+                    op_model(input)
+                op_model = convert_fx(op_model)
+                score = 0.
+                for input, output in records:
+                    q_output = op_model(input)
+                    if q_output.is_quantized:
+                        q_output = q_output.dequantize()
+                    score += float((q_output - output).pow(2).mean() / \
+                        (output.pow(2).mean() + 1e-12))
+        except Exception as e:
+            logger.debug("Fail to quantize {} alone: {}, it's validated on the model.".format(
+                op_name, e))
+            self.unscorable.add(op_name)
+            return None
+        self.scores[key] = score / len(records)
+        return self.scores[key]
+
+    def _get_last_outputs(self, model, last_module_name):
+        """Get the outputs of the last op of the model on the example inputs."""
+        outputs = []
+        def output_hook(module, input, output):
+            outputs.append(output.dequantize() if output.is_quantized else output)
+        handle = fetch_module(model, last_module_name).register_forward_hook(output_hook)
+        try:
+            for example_inp in self.example_inputs:
+                simple_inference(model, example_inp)
+        finally:
+            handle.remove()
+        return outputs
+
+    def validate(self, op_cfgs, op_names, last_module_name):
+        """Get the MSE of the output of the last op of the model quantized by op_cfgs per op.
+
+        Args:
+            op_cfgs (dict): The qconfigs of the ops of the current tuning config.
+            op_names (dict): The ops to validate with their qconfig in the validation, None to
+                fall back the op.
+            last_module_name (str): The name of the last op.
+
+        Returns:
+            dict: The MSE per op.
+        """
+        from ..pytorch import _cfgs_to_fx_cfgs
+        if last_module_name not in self.fp32_outputs:
+            self.fp32_outputs[last_module_name] = self._get_last_outputs(
+                self.model, last_module_name)
+        fp32_outputs = self.fp32_outputs[last_module_name]
+        mse = {}
+        for op_name, qconfig in op_names.items():
+            backup_qconfig = op_cfgs[op_name]
+            op_cfgs[op_name] = qconfig
+            fx_op_cfgs = _cfgs_to_fx_cfgs(op_cfgs, self.adaptor.approach)
+            op_cfgs[op_name] = backup_qconfig
+            q_model = quantize_fx(self.adaptor, copy.deepcopy(self.model), fx_op_cfgs,
+                                  self.example_inputs)
+            q_outputs = self._get_last_outputs(q_model, last_module_name)
+            mse[op_name] = float(sum((q_output - fp32_output).pow(2).sum() \
+                for q_output, fp32_output in zip(q_outputs, fp32_outputs)))
+        return mse
+
+    def get_order(self, tune_cfg, fallback=True):
+        """Get the ops sorted by sensitivity.
+
+        Args:
+            tune_cfg (dict): The current tuning config.
+            fallback (bool): Sort the int8 ops to fall back, the most sensitive first, if True,
+                or sort the fp32 ops to re-quantize, the least sensitive first, if False.
+
+        Returns:
+            ordered_ops (list): The sorted (op name, op type) tuples.
+        """
+        from ..pytorch import _cfg_to_qconfig
+        op_type_dict = dict(tune_cfg['op'].keys())
+        op_cfgs = _cfg_to_qconfig(tune_cfg, tune_cfg["approach"])
+        if fallback:
+            qconfigs = {op_name: qconfig for op_name, qconfig in op_cfgs.items() \
+                if qconfig and op_name in op_type_dict}
+            for op_name, qconfig in qconfigs.items():
+                op_cfg_mapping.setdefault(op_name, qconfig)
+        else:
+            qconfigs = {op_name: op_cfg_mapping[op_name] for (op_name, op_type), cfg \
+                in tune_cfg['op'].items() if op_type not in ['LayerNorm', 'Dropout', \
+                'InstanceNorm3d'] and cfg['weight']['dtype'] == 'fp32' and \
+                op_name in op_cfg_mapping}
+        if not qconfigs:
+            return []
+
+        self.capture([op_name for op_name, qconfig in qconfigs.items() \
+            if (op_name, str(qconfig)) not in self.scores])
+        try:
+            scores = {op_name: self.score(op_name, qconfig) \
+                for op_name, qconfig in qconfigs.items()}
+        finally:
+            # only the scores are kept, not the activations of the confidence batches
+            self.records.clear()
+        scored = sorted([op_name for op_name in scores if scores[op_name] is not None],
+                        key=lambda op_name: scores[op_name], reverse=fallback)
+        unscored = [op_name for op_name in scores if scores[op_name] is None]
+        logger.debug("Score {} ops alone, validate {} ops on the model.".format(
+            len(scored), len(unscored) + min(len(scored), VALIDATION_OPS)))
+
+        # the unscored ops are measured on the model with the top ones, and ranked with them
+        # ahead of the scored tail, see the class docstring
+        validated = scored[:VALIDATION_OPS] + unscored
+        mse = self.validate(op_cfgs, {op_name: None if fallback else qconfigs[op_name] \
+            for op_name in validated}, list(op_cfgs.keys())[-1])
+        ordered_ops = sorted(validated, key=lambda op_name: mse[op_name]) + \
+            scored[VALIDATION_OPS:]
+        return [(op_name, op_type_dict[op_name]) for op_name in ordered_ops]
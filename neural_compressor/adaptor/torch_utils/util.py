@@ -196,7 +196,7 @@ def collate_torch_preds(results):
                 for batch in output
             ]
             collate_results.append(np.concatenate(output))
-    elif isinstance(batch, torch.Tensor):
+    elif isinstance(batch, (torch.Tensor, np.ndarray)):
         results = [
             batch.numpy() if isinstance(batch, torch.Tensor) else batch
             for batch in results
@@ -690,6 +690,36 @@ def get_fallback_order(adaptor, fp32_model, dataloader, tune_cfg,
                 order_dict[name] = order_dict.get(name, 0) + len(order_dict) - i
     return ordered_ops
 
+def quantize_fx(adaptor, model, fx_op_cfgs, example_inputs):
+    """Quantize the model with torch.fx, calibrated on the example inputs.
+
+    Args:
+        adaptor (object): the PyTorch_FXAdaptor.
+        model (torch.nn.Module): the model to quantize in place, e.g. a copy of the fp32 model.
+        fx_op_cfgs (dict/QConfigMapping): the torch.fx quantization configuration.
+        example_inputs (list): the example inputs to calibrate the model.
+
+    Returns:
+        model (torch.fx.GraphModule/torch.nn.Module): the quantized model.
+    """
+    from torch.quantization.quantize_fx import prepare_fx, convert_fx
+    from ..pytorch import PyTorch_FXAdaptor
+    if adaptor.sub_module_list is None:
+        if adaptor.version.release >= Version("1.13.0").release:  # pragma: no cover
+            model = prepare_fx(model, fx_op_cfgs, example_inputs[0])
+        else:
+            model = prepare_fx(model, fx_op_cfgs,)
+    else:
+        PyTorch_FXAdaptor.prepare_sub_graph(adaptor.sub_module_list, fx_op_cfgs, \
+                                            model, prefix='')
+    for example_inp in example_inputs:
+        simple_inference(model, example_inp)
+    if adaptor.sub_module_list is None:
+        model = convert_fx(model)
+    else:
+        PyTorch_FXAdaptor.convert_sub_graph(adaptor.sub_module_list, model, prefix='')
+    return model
+
 op_cfg_mapping = {}
 def get_mse_order_per_fp32(adaptor, model, example_inp, tune_cfg):
     """This is a helper method to check the mse influence to last module after QDQ(quant/dequant).
@@ -712,7 +742,7 @@ def get_mse_order_per_fp32(adaptor, model, example_inp, tune_cfg):
     for k, v in tune_cfg['op'].keys():
         op_type_dict[k] = v
 
-    from ..pytorch import _cfg_to_qconfig, _cfgs_to_fx_cfgs, PyTorch_FXAdaptor
+    from ..pytorch import _cfg_to_qconfig, _cfgs_to_fx_cfgs
     op_cfgs = _cfg_to_qconfig(tune_cfg, tune_cfg["approach"])
     # insert hook to get output tesnor from last module
     last_module_name = list(op_cfgs.keys())[-1]
@@ -735,22 +765,8 @@ def get_mse_order_per_fp32(adaptor, model, example_inp, tune_cfg):
         op_cfgs[op_name] = None
         fx_op_cfgs = _cfgs_to_fx_cfgs(op_cfgs, tune_cfg["approach"])
         op_cfgs[op_name] = qconfig
-        from torch.quantization.quantize_fx import prepare_fx,convert_fx
         # do quantization
-        if adaptor.sub_module_list is None:
-            if adaptor.version.release >= Version("1.13.0").release:  # pragma: no cover
-                tmp_model = prepare_fx(tmp_model, fx_op_cfgs, example_inp)
-            else:
-                tmp_model = prepare_fx(tmp_model, fx_op_cfgs,)
-        else:
-            PyTorch_FXAdaptor.prepare_sub_graph(adaptor.sub_module_list, fx_op_cfgs, \
-                                                tmp_model, prefix='')
-        simple_inference(tmp_model, example_inp)
-        if adaptor.sub_module_list is None:
-            tmp_model = convert_fx(tmp_model)
-        else:
-            PyTorch_FXAdaptor.convert_sub_graph(adaptor.sub_module_list, \
-                                                tmp_model, prefix='')
+        tmp_model = quantize_fx(adaptor, tmp_model, fx_op_cfgs, [example_inp])
 
         # insert hook to get output tesnor from last module
         module = fetch_module(tmp_model, list(op_cfgs.keys())[-1]) # get last module
@@ -787,22 +803,8 @@ def get_mse_order_per_fp32(adaptor, model, example_inp, tune_cfg):
         op_cfgs[op_name] = None
         fx_op_cfgs = _cfgs_to_fx_cfgs(op_cfgs, tune_cfg["approach"])
         op_cfgs[op_name] = qconfig
-        from torch.quantization.quantize_fx import prepare_fx,convert_fx
         # do quantization
-        if adaptor.sub_module_list is None:
-            if adaptor.version.release >= Version("1.13.0").release:  # pragma: no cover
-                tmp_model = prepare_fx(tmp_model, fx_op_cfgs, example_inp)
-            else:
-                tmp_model = prepare_fx(tmp_model, fx_op_cfgs,)
-        else:
-            PyTorch_FXAdaptor.prepare_sub_graph(adaptor.sub_module_list, fx_op_cfgs, \
-                                                tmp_model, prefix='')
-        simple_inference(tmp_model, example_inp)
-        if adaptor.sub_module_list is None:
-            tmp_model = convert_fx(tmp_model)
-        else:
-            PyTorch_FXAdaptor.convert_sub_graph(adaptor.sub_module_list, \
-                                                tmp_model, prefix='')
+        tmp_model = quantize_fx(adaptor, tmp_model, fx_op_cfgs, [example_inp])
 
         # insert hook to get output tesnor from last module
         module = fetch_module(tmp_model, last_module_name) # get last module
@@ -861,25 +863,11 @@ def get_mse_order_per_int8(adaptor, fp32_model, example_input, tune_cfg):
     for op_name, op_type in tqdm(quant_list):
         if op_name in op_cfg_mapping:
             tmp_model = copy.deepcopy(fp32_model)
-            from ..pytorch import _cfg_to_qconfig, _cfgs_to_fx_cfgs, PyTorch_FXAdaptor
+            from ..pytorch import _cfg_to_qconfig, _cfgs_to_fx_cfgs
             op_cfgs[op_name] = op_cfg_mapping[op_name]
             fx_op_cfgs = _cfgs_to_fx_cfgs(op_cfgs, tune_cfg["approach"])
-            from torch.quantization.quantize_fx import prepare_fx,convert_fx
             # do quantization
-            if adaptor.sub_module_list is None:
-                if adaptor.version.release >= Version("1.13.0").release:  # pragma: no cover
-                    tmp_model = prepare_fx(tmp_model, fx_op_cfgs, example_inp)
-                else:
-                    tmp_model = prepare_fx(tmp_model, fx_op_cfgs,)
-            else:
-                PyTorch_FXAdaptor.prepare_sub_graph(adaptor.sub_module_list, fx_op_cfgs, \
-                                                    tmp_model, prefix='')
-            simple_inference(tmp_model, example_inp)
-            if adaptor.sub_module_list is None:
-                tmp_model = convert_fx(tmp_model)
-            else:
-                PyTorch_FXAdaptor.convert_sub_graph(adaptor.sub_module_list, \
-                                                    tmp_model, prefix='')
+            tmp_model = quantize_fx(adaptor, tmp_model, fx_op_cfgs, [example_inp])
 
 
             # record int8 model output tensor
@@ -626,6 +626,8 @@ dataloader_schema = Schema({
     Optional('transform'): transform_schema,
     Optional('shuffle', default = False): And(bool, lambda s: s in [True, False]),
     Optional('distributed', default = False): And(bool, lambda s: s in [True, False]),
+    Optional('cache', default=None): Or(None, str),
+    Optional('batch_transform', default=False): bool,
 })
 
 configs_schema = Schema({
@@ -916,7 +918,7 @@ schema = Schema({
         'exit_policy': {'timeout': 0, 'max_trials': 100, 'performance_only': False},
         'random_seed': 1978, 'tensorboard': False,
         'workspace': {'path': default_workspace},
-        'diagnosis': False,
+        'diagnosis': False, 'workers': 1,
         }): {
         Optional('strategy', default={'name': 'basic'}): {
             'name': And(str, lambda s: s in STRATEGIES), 
@@ -927,6 +929,7 @@ schema = Schema({
             Optional('latency_weight', default=1.0): float,
             Optional('confidence_batches', default=2): int,
             Optional('hawq_v2_loss', default=None): object,
+            Optional('mse_streaming', default=False): bool,
         } ,
         Hook('accuracy_criterion', handler=_valid_accuracy_field): object,
         Optional('accuracy_criterion', default={'relative': 0.01}): {
@@ -952,9 +955,11 @@ schema = Schema({
         },
         Optional('random_seed', default=1978): int,
         Optional('tensorboard', default=False): And(bool, lambda s: s in [True, False]),
+        Optional('workers', default=1): And(int, lambda s: s > 0),
         Optional('workspace', default={'path': default_workspace}): {
             Optional('path', default=None): str,
-            Optional('resume'): str
+            Optional('resume'): str,
+            Optional('baseline_cache'): str
         },
         Optional('diagnosis', default = {
             'diagnosis_after_tuning': False,
@@ -1025,7 +1030,8 @@ schema = Schema({
                     Optional('task'): str
                 },
                 Optional('ROC'): {
-                    Optional('task'): str
+                    Optional('task'): str,
+                    Optional('num_bins'): And(int, lambda s: s > 0)
                 },
             }, 
             Optional('metric', default=None): {
@@ -1074,18 +1080,24 @@ schema = Schema({
                     Optional('task'): str
                 },
                 Optional('ROC'): {
-                    Optional('task'): str
+                    Optional('task'): str,
+                    Optional('num_bins'): And(int, lambda s: s > 0)
                 },
             },
             Optional('configs'): configs_schema,
             Optional('iteration', default=-1): int,
+            Optional('early_stop'): {
+                Optional('confidence', default=0.99): And(float, lambda s: 0 < s < 1),
+                Optional('min_samples', default=0): And(int, lambda s: s >= 0),
+                Optional('shuffled', default=False): bool,
+            },
             Optional('dataloader'): dataloader_schema,
             Optional('postprocess'): {
                 Optional('transform'): postprocess_schema
             },
         },
         Optional('performance'): {
-            Optional('warmup', default=5): int,
+            Optional('warmup', default=5): Or(int, And(str, lambda s: s == 'auto')),
             Optional('iteration', default=-1): int,
             Optional('configs'): configs_schema,
             Optional('dataloader'): dataloader_schema,
@@ -1153,6 +1165,7 @@ schema = Schema({
             Optional("supernet_ckpt_path", default=None): str,
             Optional("batch_size", default=64): int,
             Optional("num_workers", default=20): int,
+            Optional("num_validation_processes", default=1): int,
             },
     },
 
@@ -1422,7 +1435,7 @@ class Conf(object):
             if pythonic_config.quantization.strategy_kwargs:
                 st_kwargs = pythonic_config.quantization.strategy_kwargs
                 for st_key in ['sigopt_api_token', 'sigopt_project_id', 'sigopt_experiment_name', \
-                    'accuracy_weight', 'latency_weight', 'hawq_v2_loss']:
+                    'accuracy_weight', 'latency_weight', 'hawq_v2_loss', 'mse_streaming']:
 
                     if st_key in st_kwargs:
                         st_val =  st_kwargs[st_key]
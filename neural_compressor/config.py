@@ -206,7 +206,7 @@ class BenchmarkConfig:
     @warmup.setter
     def warmup(self, warmup):
         """Set warmup."""
-        if check_value('warmup', warmup, int):
+        if warmup == 'auto' or check_value('warmup', warmup, int):
             self._warmup = warmup
 
     @property
@@ -17,7 +17,16 @@
 # ==============================================================================
 """Definitions of the methods to fetch data from an iterable-style or list-style dataset."""
 
+import collections
+import multiprocessing
+import sys
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# the arrays of a batch from this size on are sent back by the worker processes in shared memory
+SHARED_MEMORY_MIN_BYTES = 65536
 
 class Fetcher(object):    # pragma: no cover
     """Base class for different fetchers."""
@@ -121,4 +130,176 @@ class IndexFetcher(Fetcher):    # pragma: no cover
         data = [self.dataset[idx] for idx in batched_indices]
         return self.collate_fn(data)
 
-FETCHERS = {"index": IndexFetcher, "iter": IterableFetcher, }
+class ParallelIndexFetcher(IndexFetcher):    # pragma: no cover
+    """Fetch the batches of indices in a pool of workers.
+
+    The batches are fetched by the workers concurrently and yielded in the order of the
+    batched indices, with at most prefetch batches being fetched ahead.
+    """
+
+    def __init__(self, dataset, collate_fn, drop_last, distributed, num_workers=1,
+                 prefetch=None):
+        """Initialize ParallelIndexFetcher.
+
+        Args:
+            dataset (object): dataset object from which to get data
+            collate_fn (callable): merge data with outer dimension batch size
+            drop_last (bool): whether to drop the last batch if it is incomplete
+            distributed (bool): whether the dataloader is distributed
+            num_workers (int, optional): number of workers. Defaults to 1.
+            prefetch (int, optional): number of batches fetched ahead. Defaults to twice
+                                      the number of workers.
+        """
+        super(ParallelIndexFetcher, self).__init__(dataset, collate_fn, drop_last, distributed)
+        self.num_workers = max(num_workers, 1)
+        self.prefetch = prefetch or 2 * self.num_workers
+
+    def iterate(self, batch_sampler):
+        """Fetch the batches of a batch sampler in order.
+
+        Args:
+            batch_sampler (BatchSampler): the batch sampler generating the batched indices
+
+        """
+        pending = collections.deque()
+        pool = self._start()
+        try:
+            for batched_indices in batch_sampler:
+                pending.append(self._submit(pool, batched_indices))
+                if len(pending) >= self.prefetch:
+                    yield self._result(pending.popleft())
+            while pending:
+                yield self._result(pending.popleft())
+        finally:
+            self._stop(pool, pending)
+
+    @abstractmethod
+    def _start(self):
+        """Start the pool of workers."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _submit(self, pool, batched_indices):
+        """Submit a batch to the pool and return its pending result."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _result(self, pending_result):
+        """Wait for a pending result and return the batch."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _stop(self, pool, pending):
+        """Stop the pool of workers, the pending results are dropped."""
+        raise NotImplementedError
+
+class ThreadIndexFetcher(ParallelIndexFetcher):    # pragma: no cover
+    """Fetch the batches of indices in a pool of threads.
+
+    It suits the datasets whose loading releases the GIL, e.g. image decoding and resizing.
+    """
+
+    def _start(self):
+        """Start the pool of workers."""
+        return ThreadPoolExecutor(self.num_workers)
+
+    def _submit(self, pool, batched_indices):
+        """Submit a batch to the pool and return its pending result."""
+        return pool.submit(self, batched_indices)
+
+    def _result(self, pending_result):
+        """Wait for a pending result and return the batch."""
+        return pending_result.result()
+
+    def _stop(self, pool, pending):
+        """Stop the pool of workers, the pending results are dropped."""
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+_worker_fetcher = None
+
+def _init_worker(fetcher):
+    """Keep the fetcher inherited by a forked worker process."""
+    global _worker_fetcher
+    _worker_fetcher = fetcher
+
+def _fetch_in_worker(batched_indices):
+    """Fetch a batch in a worker process with its large arrays in shared memory."""
+    return _to_shared_memory(IndexFetcher.__call__(_worker_fetcher, batched_indices))
+
+def _to_shared_memory(data):
+    """Replace the large arrays of a batch with the shared memory blocks holding them."""
+    from multiprocessing import shared_memory
+    if isinstance(data, np.ndarray) and data.dtype != object and \
+        data.nbytes >= SHARED_MEMORY_MIN_BYTES:
+        shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        np.ndarray(data.shape, data.dtype, buffer=shm.buf)[...] = data
+        shm.close()
+        return ('__shared_memory__', shm.name, data.shape, data.dtype.str)
+    if isinstance(data, dict):
+        return {key: _to_shared_memory(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return type(data)(_to_shared_memory(value) for value in data)
+    return data
+
+def _from_shared_memory(data, release=False):
+    """Rebuild the arrays of a batch from the shared memory blocks holding them.
+
+    The arrays are copied out once and the blocks are freed. With release, the blocks are
+    only freed.
+    """
+    from multiprocessing import shared_memory
+    if isinstance(data, tuple) and len(data) == 4 and data[0] == '__shared_memory__':
+        _, name, shape, dtype = data
+        shm = shared_memory.SharedMemory(name=name)
+        array = None if release else np.ndarray(shape, np.dtype(dtype), buffer=shm.buf).copy()
+        shm.close()
+        shm.unlink()
+        return array
+    if isinstance(data, dict):
+        return {key: _from_shared_memory(value, release) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return type(data)(_from_shared_memory(value, release) for value in data)
+    return data
+
+class ProcessIndexFetcher(ParallelIndexFetcher):    # pragma: no cover
+    """Fetch the batches of indices in a pool of forked processes.
+
+    The dataset and the collate_fn are inherited by the workers instead of being pickled, and
+    the large arrays of the batches are sent back in shared memory.
+    """
+
+    @staticmethod
+    def is_available():
+        """Check if the platform supports forked workers and shared memory, from Python 3.8."""
+        return sys.version_info >= (3, 8) and 'fork' in multiprocessing.get_all_start_methods()
+
+    def _start(self):
+        """Start the pool of workers."""
+        from multiprocessing import resource_tracker
+        # the workers register their shared memory blocks with the tracker of this process
+        resource_tracker.ensure_running()
+        context = multiprocessing.get_context('fork')
+        return context.Pool(self.num_workers, initializer=_init_worker, initargs=(self,))
+
+    def _submit(self, pool, batched_indices):
+        """Submit a batch to the pool and return its pending result."""
+        return pool.apply_async(_fetch_in_worker, (list(batched_indices),))
+
+    def _result(self, pending_result):
+        """Wait for a pending result and return the batch."""
+        return _from_shared_memory(pending_result.get())
+
+    def _stop(self, pool, pending):
+        """Stop the pool of workers, the pending results are dropped."""
+        for pending_result in pending:
+            try:
+                _from_shared_memory(pending_result.get(), release=True)
+            except Exception:
+                pass
+        pool.terminate()
+        pool.join()
+
+FETCHERS = {"index": IndexFetcher, "iter": IterableFetcher,
+            "thread": ThreadIndexFetcher, "process": ProcessIndexFetcher, }
@@ -31,6 +31,10 @@ from ..conf.dotdict import DotDict
 from ..utils import logger
 from ..utils import OPTIONS
 from ..utils.utility import GLOBAL_STATE, MODE
+from ..utils.latency_stats import detect_warmup, latency_summary, format_latency_summary
+from ..utils.latency_stats import LatencyHistogram
+from ..utils.cpu_topology import get_cpu_topology, numactl_available, apply_cpu_affinity
+from ..utils.cpu_topology import format_cpu_list, CPU_AFFINITY_ENV
 from ..utils.create_obj_from_config import create_eval_func, create_dataloader
 from ..conf.dotdict import deep_get, deep_set
 from ..model import BaseModel
@@ -75,53 +79,25 @@ def set_all_env_var(conf, overwrite_existing=False):
 
 def get_architecture():
     """Get the architecture name of the system."""
-    p1 = subprocess.Popen("lscpu", stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-    p2 = subprocess.Popen(["grep", "Architecture"], stdin=p1.stdout, stdout=subprocess.PIPE)
-    p3 = subprocess.Popen(["cut", "-d", ":", "-f2"], stdin=p2.stdout, stdout=subprocess.PIPE)
-    res=None
-    for line in iter(p3.stdout.readline, b''):
-        res=line.decode("utf-8").strip()
-    return res
+    return get_cpu_topology().architecture
 
 def get_threads_per_core():
     """Get the threads per core."""
-    p1 = subprocess.Popen("lscpu", stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-    p2 = subprocess.Popen(["grep", "Thread(s) per core"], stdin=p1.stdout, stdout=subprocess.PIPE)
-    p3 = subprocess.Popen(["cut", "-d", ":", "-f2"], stdin=p2.stdout, stdout=subprocess.PIPE)
-    res = None
-    for line in iter(p3.stdout.readline, b''):
-        res=line.decode("utf-8").strip()
-    return res
+    return str(get_cpu_topology().threads_per_core)
 
 def get_threads():
     """Get the list of threads."""
-    p1 = subprocess.Popen(["cat","/proc/cpuinfo"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-    p2 = subprocess.Popen(["grep", "processor"], stdin=p1.stdout, stdout=subprocess.PIPE)
-    p3 = subprocess.Popen(["cut", "-d", ":", "-f2"], stdin=p2.stdout, stdout=subprocess.PIPE)
-    res = []
-    for line in iter(p3.stdout.readline, b''):
-        res.append(line.decode("utf-8").strip())
-    return res
+    return [str(cpu) for cpu in get_cpu_topology().threads]
 
 def get_physical_ids():
     """Get the list of sockets."""
-    p1 = subprocess.Popen(["cat","/proc/cpuinfo"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-    p2 = subprocess.Popen(["grep", "physical id"], stdin=p1.stdout, stdout=subprocess.PIPE)
-    p3 = subprocess.Popen(["cut", "-d", ":", "-f2"], stdin=p2.stdout, stdout=subprocess.PIPE)
-    res = []
-    for line in iter(p3.stdout.readline, b''):
-        res.append(line.decode("utf-8").strip())
-    return res
+    topology = get_cpu_topology()
+    return [str(topology.socket_of(cpu)) for cpu in topology.threads]
 
 def get_core_ids():
     """Get the ids list of the cores."""
-    p1 = subprocess.Popen(["cat","/proc/cpuinfo"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-    p2 = subprocess.Popen(["grep", "core id"], stdin=p1.stdout, stdout=subprocess.PIPE)
-    p3 = subprocess.Popen(["cut", "-d", ":", "-f2"], stdin=p2.stdout, stdout=subprocess.PIPE)
-    res = []
-    for line in iter(p3.stdout.readline, b''):
-        res.append(line.decode("utf-8").strip())
-    return res
+    topology = get_cpu_topology()
+    return [str(topology.core_of(cpu)) for cpu in topology.threads]
 
 def get_bounded_threads(core_ids, threads, sockets):
     """Return the threads id list that we will bind instances to."""
@@ -134,6 +110,10 @@ def get_bounded_threads(core_ids, threads, sockets):
             existing_socket_core_list.append(socket_core)
     return res
 
+def _latency_histogram_path(num_of_instance, cores_per_instance, instance_id):
+    """Get the path of the latency histogram saved by a benchmark instance."""
+    return '{}_{}_{}_latency.npz'.format(num_of_instance, cores_per_instance, instance_id)
+
 class Benchmark(object):
     """Benchmark class is used to evaluate the model performance with the objective settings.
 
@@ -157,6 +137,7 @@ class Benchmark(object):
         self._custom_b_func = False
         self._metric = None
         self._results = {}
+        self._latency_summary = {}
         if isinstance(conf_fname_or_obj, BenchmarkConf):
             self.conf = conf_fname_or_obj
         elif isinstance(conf_fname_or_obj, Config):
@@ -195,10 +176,28 @@ class Benchmark(object):
     fit = __call__
 
     def summary_benchmark(self):
-        """Get the summary of the benchmark."""
+        """Get the summary of the benchmark.
+
+        The latency histograms saved by the instances are merged for the tail latency of all
+        instances. The logs are parsed for the average latency and throughput if some instance
+        doesn't save its histogram, e.g. the one running a user-defined benchmark function.
+        """
         if sys.platform in ['linux']:
             num_of_instance = int(os.environ.get('NUM_OF_INSTANCE'))
             cores_per_instance = int(os.environ.get('CORES_PER_INSTANCE'))
+            histograms = [_latency_histogram_path(num_of_instance, cores_per_instance, i) \
+                          for i in range(0, num_of_instance)]
+            if all(os.path.exists(path) for path in histograms):
+                histogram = LatencyHistogram.load(histograms[0])
+                for path in histograms[1:]:
+                    histogram.merge(LatencyHistogram.load(path))
+                summary = histogram.summary()
+                self._latency_summary['performance'] = summary
+                logger.info("\n\nMultiple instance benchmark summary: ")
+                logger.info("Iterations: {}".format(summary['count']))
+                logger.info(format_latency_summary(summary))
+                logger.info("Throughput sum: {:.3f} images/sec".format(summary['throughput']))
+                return
             latency_l = []
             throughput_l = []
             for i in range(0, num_of_instance):
@@ -228,18 +227,24 @@ class Benchmark(object):
         if(sys.platform in ['linux'] and get_architecture() == 'aarch64' and int(get_threads_per_core()) > 1):
             raise OSError('Currently no support on ARM with hyperthreads')
         elif sys.platform in ['linux']:
-            bounded_threads = get_bounded_threads(get_core_ids(), get_threads(), get_physical_ids())
+            layout = get_cpu_topology().instance_layout(num_of_instance, cores_per_instance)
 
         for i in range(0, num_of_instance):
-            if sys.platform in ['linux'] and get_architecture() == 'x86_64':
-                core_list_idx = np.arange(0, cores_per_instance) + i * cores_per_instance
-                core_list = np.array(bounded_threads)[core_list_idx]
+            histogram_path = _latency_histogram_path(num_of_instance, cores_per_instance, i)
+            if os.path.exists(histogram_path):
+                os.remove(histogram_path)
+            if sys.platform in ['linux']:
+                core_list, nodes = layout[i]
+                core_list = np.array(core_list)
             else:
                 core_list = np.arange(0, cores_per_instance) + i * cores_per_instance
-            # bind cores only allowed in linux/mac os with numactl enabled
-            prefix = self.generate_prefix(core_list)
+                nodes = None
+            # bind cores only allowed in linux/mac os
+            prefix = self.generate_prefix(core_list, nodes)
             instance_cmd = '{} {}'.format(prefix, raw_cmd)
             if sys.platform in ['linux']:
+                # the instance saves its latency histogram named by its id
+                instance_cmd = 'NC_INSTANCE_ID={} {}'.format(i, instance_cmd)
                 instance_log = '{}_{}_{}.log'.format(num_of_instance, cores_per_instance, i)
                 multi_instance_cmd += '{} 2>&1|tee {} & \\\n'.format(
                     instance_cmd, instance_log)
@@ -260,15 +265,25 @@ class Benchmark(object):
         except KeyboardInterrupt:
             os.killpg(os.getpgid(p.pid), signal.SIGKILL)
 
-    def generate_prefix(self, core_list):
+    def generate_prefix(self, core_list, nodes=None):
         """Generate the command prefix with numactl.
 
+        Without numactl on linux, the instance pins itself to the cores with
+        os.sched_setaffinity, see apply_cpu_affinity.
+
         Args:
             core_list: a list of core indexes bound with specific instances
+            nodes: the NUMA nodes of the cores, the memory of an instance spanning several
+                nodes is interleaved across them instead of allocated locally
         """
-        if sys.platform in ['linux'] and os.system('numactl --show >/dev/null 2>&1') == 0:
-            return 'OMP_NUM_THREADS={} numactl --localalloc --physcpubind={}'.format(\
-                len(core_list), ','.join(core_list.astype(str)))
+        if sys.platform in ['linux'] and numactl_available():
+            memory_policy = '--interleave={}'.format(format_cpu_list(nodes)) \
+                if nodes and len(nodes) > 1 else '--localalloc'
+            return 'OMP_NUM_THREADS={} numactl {} --physcpubind={}'.format(\
+                len(core_list), memory_policy, format_cpu_list(core_list))
+        elif sys.platform in ['linux']:
+            return 'OMP_NUM_THREADS={} {}={}'.format(
+                len(core_list), CPU_AFFINITY_ENV, format_cpu_list(core_list))
         elif sys.platform in ['win32']:  # pragma: no cover
             # (TODO) should we move the hw_info from ux?
             from neural_compressor.ux.utils.hw_info import get_number_of_sockets
@@ -295,6 +310,8 @@ class Benchmark(object):
         """
         cfg = self.conf.usr_cfg
         GLOBAL_STATE.STATE = MODE.BENCHMARK
+        # the instance launched without numactl binds its cores by itself
+        apply_cpu_affinity()
         framework_specific_info = {'device': cfg.device, \
                                    'approach': cfg.quantization.approach, \
                                    'random_seed': cfg.tuning.random_seed,
@@ -371,7 +388,10 @@ class Benchmark(object):
         warmup =  0 if deep_get(cfg, 'evaluation.{}.warmup'.format(mode)) is None \
             else deep_get(cfg, 'evaluation.{}.warmup'.format(mode))
 
-        if len(self.objectives.objectives[0].result_list()) < warmup:
+        if warmup == 'auto':
+            warmup = detect_warmup(self.objectives.objectives[0].result_list())
+            logger.info("Detect the end of warm-up after {} iterations.".format(warmup))
+        elif len(self.objectives.objectives[0].result_list()) < warmup:
             if len(self.objectives.objectives[0].result_list()) > 1 and warmup != 0:
                 warmup = 1
             else:
@@ -380,6 +400,14 @@ class Benchmark(object):
         result_list = self.objectives.objectives[0].result_list()[warmup:]
         latency = np.array(result_list).mean() / batch_size
         self._results[mode] = acc, batch_size, result_list
+        summary = latency_summary(result_list, batch_size)
+        self._latency_summary[mode] = summary
+        instance_id = os.environ.get('NC_INSTANCE_ID')
+        if mode == 'performance' and instance_id is not None and len(result_list) > 0:
+            histogram = LatencyHistogram()
+            histogram.add(result_list, batch_size)
+            histogram.save(_latency_histogram_path(int(os.environ.get('NUM_OF_INSTANCE')),
+                int(os.environ.get('CORES_PER_INSTANCE')), int(instance_id)))
 
         logger.info("\n{} mode benchmark result:".format(mode))
         for i, res in enumerate(result_list):
@@ -394,6 +422,17 @@ class Benchmark(object):
             logger.info("Batch size = {}".format(batch_size))
             logger.info("Latency: {:.3f} ms".format(latency * 1000))
             logger.info("Throughput: {:.3f} images/sec".format(1. / latency))
+            if summary:
+                logger.info(format_latency_summary(summary))
+
+    @property
+    def latency_summary(self):
+        """Get the latency statistics of each mode, see latency_summary.
+
+        The 'performance' entry of the process launching multiple instances holds the merged
+        statistics of all instances.
+        """
+        return self._latency_summary
 
     @property
     def results(self):
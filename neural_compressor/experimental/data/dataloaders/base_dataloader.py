@@ -113,6 +113,14 @@ class BaseDataLoader:
         """
         return iter(self.dataloader)
 
+    def __len__(self):
+        """Get the number of batches of the generated dataloader.
+
+        Returns:
+            int: the number of batches
+        """
+        return len(self.dataloader)
+
     @abstractmethod
     def _generate_dataloader(self, dataset, batch_size, last_batch, collate_fn, sampler,
                              batch_sampler, num_workers, pin_memory, shuffle, distributed):
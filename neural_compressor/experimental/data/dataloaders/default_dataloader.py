@@ -46,7 +46,7 @@ class DefaultDataLoader(BaseDataLoader):
     
     def __init__(self, dataset, batch_size=1, last_batch='rollover', collate_fn=None,
                  sampler=None, batch_sampler=None, num_workers=0, pin_memory=False,
-                 shuffle=False, distributed=False):
+                 shuffle=False, distributed=False, worker_type='thread'):
         """Initialize DefaultDataLoader.
 
         Args:
@@ -58,10 +58,16 @@ class DefaultDataLoader(BaseDataLoader):
             collate_fn (callable, optional): merge data with outer dimension batch size. Defaults to None.
             sampler (Sampler, optional): Sampler object to sample data. Defaults to None.
             batch_sampler (BatchSampler, optional): BatchSampler object to generate batch of indices. Defaults to None.
-            num_workers (int, optional): number of subprocesses to use for data loading. Defaults to 0.
+            num_workers (int, optional): number of workers to use for data loading, 0 loads the data
+                                         in the calling thread. Defaults to 0.
             pin_memory (bool, optional): whether to copy data into pinned memory before returning. Defaults to False.
             shuffle (bool, optional): whether to shuffle data. Defaults to False.
-            distributed (bool, optional): whether the dataloader is distributed. Defaults to False.            
+            distributed (bool, optional): whether the dataloader is distributed. Defaults to False.
+            worker_type (str, optional): the workers of num_workers, 'thread' for threads, which suit
+                                         the decoding and resizing that release the GIL, or 'process'
+                                         for forked processes, which fall back to threads where fork
+                                         or shared memory (Python 3.8+) isn't available.
+                                         Defaults to 'thread'.
         """
         self.dataset = dataset
         self.last_batch = last_batch
@@ -74,6 +80,9 @@ class DefaultDataLoader(BaseDataLoader):
         self.shuffle = shuffle
         self.distributed = distributed
         self.drop_last = False if last_batch == 'rollover' else True
+        assert worker_type in ['process', 'thread'], \
+            "worker_type only supports 'process' and 'thread'"
+        self.worker_type = worker_type
         if self.collate_fn == None:
             self.collate_fn = default_collate
 
@@ -123,6 +132,15 @@ class DefaultDataLoader(BaseDataLoader):
 
         sampler = self._generate_sampler(dataset, distributed)
         self.batch_sampler = BatchSampler(sampler, batch_size, self.drop_last)
+        if num_workers and self.dataset_type == 'index':
+            worker_type = self.worker_type
+            if worker_type == 'process' and not FETCHERS['process'].is_available():
+                worker_type = 'thread'
+            self.fetcher = FETCHERS[worker_type](dataset, collate_fn, self.drop_last,
+                                                 distributed, num_workers)
+            for data in self.fetcher.iterate(self.batch_sampler):
+                yield data
+            return
         self.fetcher = FETCHERS[self.dataset_type](dataset, collate_fn, self.drop_last, distributed)
 
         for batched_indices in self.batch_sampler:
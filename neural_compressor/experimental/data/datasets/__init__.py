@@ -18,6 +18,7 @@
 """Built-in datasets class for multiple framework backends."""
 
 from .dataset import Datasets, Dataset, IterableDataset, dataset_registry
+from .cached_dataset import CachedDataset
 from os.path import dirname, basename, isfile, join
 import glob
 
@@ -28,4 +29,4 @@ for f in modules:
         __import__(basename(f)[:-3], globals(), locals(), level=1)
 
 
-__all__ = ["Datasets", "Dataset", "IterableDataset", "dataset_registry"]
+__all__ = ["Datasets", "Dataset", "IterableDataset", "dataset_registry", "CachedDataset"]
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Cache of the preprocessed samples of a dataset in memory-mapped files."""
+
+import os
+import sys
+import json
+import pickle
+import shutil
+import hashlib
+import numpy as np
+from neural_compressor.utils import logger
+from neural_compressor.utils.utility import LazyImport
+from neural_compressor.utils.baseline_cache import stable_repr
+
+torch = LazyImport('torch')
+
+# the keys of the dataset arguments holding the paths of the data
+DATA_PATH_KEYS = ['root', 'data_dir', 'data_path', 'content_folder', 'style_folder']
+
+
+def dataset_cache_key(framework, data_source, cfg_preprocess=None, cfg_filter=None):
+    """Get the cache key of a dataset created from its config.
+
+    It covers the framework, the dataset type and arguments, the transform and filter configs,
+    and the paths, sizes and modification times of the files under the data paths, so the cache
+    is reused by the tuning runs with the same dataset config and rebuilt when the data changes.
+
+    Args:
+        framework (str): The framework of the dataset.
+        data_source (dict): The dataset config, the dataset type with its arguments.
+        cfg_preprocess (dict, optional): The transform config. Defaults to None.
+        cfg_filter (dict, optional): The filter config. Defaults to None.
+
+    Returns:
+        str: The hex digest.
+    """
+    files = {}
+    for args in data_source.values():
+        for key in DATA_PATH_KEYS:
+            path = args.get(key) if isinstance(args, dict) else None
+            if isinstance(path, str) and os.path.exists(path):
+                files[key] = _files_digest(path)
+    fingerprint = stable_repr({'framework': framework, 'dataset': data_source,
+                               'transform': cfg_preprocess, 'filter': cfg_filter,
+                               'files': files})
+    return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+
+def _files_digest(path):
+    """Hash the relative path, size and modification time of every file under a path."""
+    digest = hashlib.sha256()
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        digest.update('{} {}'.format(stat.st_size, stat.st_mtime_ns).encode())
+        return digest.hexdigest()
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        for name in sorted(names):
+            file_path = os.path.join(root, name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:  # pragma: no cover
+                continue
+            digest.update('{}\0{}\0{}\n'.format(os.path.relpath(file_path, path),
+                                               stat.st_size, stat.st_mtime_ns).encode())
+    return digest.hexdigest()
+
+
+def _is_tensor(sample):
+    """Check if the sample is a torch tensor, without importing torch."""
+    return 'torch' in sys.modules and isinstance(sample, sys.modules['torch'].Tensor)
+
+
+def _flatten(sample, leaves):
+    """Split a sample into its structure and its leaves.
+
+    The tuples, dicts and lists of arrays are kept in the structure. The numpy arrays, the
+    torch tensors and the numeric scalars and lists are the leaves stored in the memory-mapped
+    files, the other objects, e.g. strings or lists of strings, are pickled.
+    """
+    if isinstance(sample, tuple):
+        return ('tuple', [_flatten(item, leaves) for item in sample])
+    if isinstance(sample, dict):
+        return ('dict', [(key, _flatten(value, leaves)) for key, value in sample.items()])
+    if isinstance(sample, list) and sample and \
+        all(isinstance(item, np.ndarray) or _is_tensor(item) for item in sample):
+        return ('list', [_flatten(item, leaves) for item in sample])
+    kind = 'object'
+    if isinstance(sample, np.ndarray):
+        kind = 'ndarray'
+    elif _is_tensor(sample):
+        # the tensors are read back on the CPU
+        kind = 'tensor'
+        sample = sample.detach().cpu().numpy()
+    elif isinstance(sample, np.generic):
+        kind = 'generic'
+    elif isinstance(sample, (bool, int, float)):
+        kind = 'scalar'
+    elif isinstance(sample, list) and sample and \
+        all(isinstance(item, (bool, int, float)) for item in sample):
+        kind = 'list'
+    if kind != 'object' and np.asarray(sample).dtype.kind in 'biufc':
+        leaves.append(np.asarray(sample))
+        return ('leaf', kind, len(leaves) - 1)
+    leaves.append(sample)
+    return ('object', len(leaves) - 1)
+
+
+def _unflatten(structure, get_leaf):
+    """Rebuild a sample from its structure and the leaves returned by get_leaf."""
+    if structure[0] == 'tuple':
+        return tuple(_unflatten(item, get_leaf) for item in structure[1])
+    if structure[0] == 'dict':
+        return {key: _unflatten(value, get_leaf) for key, value in structure[1]}
+    if structure[0] == 'list':
+        return [_unflatten(item, get_leaf) for item in structure[1]]
+    if structure[0] == 'object':
+        return get_leaf(structure[1])
+    _, kind, idx = structure
+    leaf = get_leaf(idx)
+    if kind == 'list':
+        return leaf.tolist()
+    if kind == 'scalar':
+        return leaf.item()
+    if kind == 'generic':
+        return leaf[()]
+    if kind == 'tensor':
+        return torch.from_numpy(np.asarray(leaf))
+    return leaf
+
+
+class CachedDataset(object):
+    """Keep the preprocessed samples of an index dataset in memory-mapped files.
+
+    The samples are fetched from the dataset, with its transform and filter, once and written
+    to cache_dir/key. Every array of a sample is appended to a file per position in the sample,
+    with its offset and shape in an index. The arrays of the same shape in all the samples are
+    then mapped as one array and the ragged ones are sliced by their offsets, without copy in
+    both cases. The torch tensors are stored as numpy arrays and shared with the returned
+    tensors by torch.from_numpy. The objects which aren't numeric, e.g. strings, are pickled.
+
+    The transform runs once, so the random transforms are frozen by the cache.
+
+    Args:
+        dataset (object): The index dataset.
+        cache_dir (str): The directory of the caches.
+        key (str): The key of the dataset, e.g. from dataset_cache_key.
+    """
+
+    def __init__(self, dataset, cache_dir, key):
+        """Initialize the cache, the samples are written if they aren't cached yet."""
+        self.dataset = dataset
+        self.path = os.path.join(os.path.abspath(os.path.expanduser(cache_dir)), key)
+        if not os.path.exists(os.path.join(self.path, 'index.json')):
+            self._write()
+        self._load()
+
+    def _write(self):
+        """Fetch the samples of the dataset and write them to the cache."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = '{}.tmp-{}'.format(self.path, os.getpid())
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        files = []
+        try:
+            offsets, shapes, dtypes, objects = [], [], [], []
+            structure = None
+            for idx in range(len(self.dataset)):
+                leaves = []
+                sample_structure = _flatten(self.dataset[idx], leaves)
+                if structure is None:
+                    structure = sample_structure
+                    for pos, leaf in enumerate(leaves):
+                        is_array = isinstance(leaf, np.ndarray)
+                        files.append(open(os.path.join(tmp_path, '{}.bin'.format(pos)), 'wb') \
+                            if is_array else None)
+                        offsets.append([0])
+                        shapes.append([])
+                        dtypes.append(leaf.dtype.str if is_array else None)
+                        objects.append([])
+                elif sample_structure != structure:
+                    raise ValueError('sample {} differs from the first one in structure'.format(
+                        idx))
+                for pos, leaf in enumerate(leaves):
+                    if dtypes[pos] is None:
+                        objects[pos].append(leaf)
+                        continue
+                    if leaf.dtype.str != dtypes[pos] or \
+                        (shapes[pos] and leaf.ndim != len(shapes[pos][0])):
+                        raise ValueError('sample {} differs from the first one in dtype or '
+                                         'rank'.format(idx))
+                    files[pos].write(np.ascontiguousarray(leaf).tobytes())
+                    offsets[pos].append(offsets[pos][-1] + leaf.size)
+                    shapes[pos].append(leaf.shape)
+            for pos, file in enumerate(files):
+                if file is None:
+                    with open(os.path.join(tmp_path, '{}.pkl'.format(pos)), 'wb') as f:
+                        pickle.dump(objects[pos], f)
+                    continue
+                file.close()
+                np.save(os.path.join(tmp_path, '{}_offsets.npy'.format(pos)),
+                        np.asarray(offsets[pos], dtype=np.int64))
+                np.save(os.path.join(tmp_path, '{}_shapes.npy'.format(pos)),
+                        np.asarray(shapes[pos], dtype=np.int64))
+            with open(os.path.join(tmp_path, 'index.json'), 'w') as f:
+                json.dump({'length': len(self.dataset), 'structure': structure,
+                           'dtypes': dtypes}, f)
+            try:
+                os.rename(tmp_path, self.path)
+            except OSError:  # pragma: no cover
+                # written by another process meanwhile
+                shutil.rmtree(tmp_path, ignore_errors=True)
+            logger.info("Cached {} preprocessed samples in {}.".format(len(self.dataset),
+                                                                      self.path))
+        except Exception:
+            for file in files:
+                if file is not None:
+                    file.close()
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+    def _load(self):
+        """Map the files of the cache."""
+        with open(os.path.join(self.path, 'index.json')) as f:
+            index = json.load(f)
+        self.structure = index['structure']
+        self.length = index['length']
+        self.leaves = []
+        for pos, dtype in enumerate(index['dtypes']):
+            if dtype is None:
+                with open(os.path.join(self.path, '{}.pkl'.format(pos)), 'rb') as f:
+                    self.leaves.append(('object', pickle.load(f)))
+                continue
+            offsets = np.load(os.path.join(self.path, '{}_offsets.npy'.format(pos)))
+            shapes = np.load(os.path.join(self.path, '{}_shapes.npy'.format(pos)))
+            data_path = os.path.join(self.path, '{}.bin'.format(pos))
+            # the pages are shared and copied on write, writing to a sample doesn't change the cache
+            data = np.memmap(data_path, dtype=np.dtype(dtype), mode='c') if offsets[-1] else \
+                np.zeros(0, dtype=np.dtype(dtype))
+            if len(shapes) and (shapes == shapes[0]).all():
+                self.leaves.append(('fixed', data.reshape((self.length,) + tuple(shapes[0]))))
+            else:
+                self.leaves.append(('ragged', (data, offsets, shapes)))
+
+    def _get_leaf(self, index, pos):
+        """Get the leaf at a position of a sample."""
+        kind, value = self.leaves[pos]
+        if kind == 'object':
+            return value[index]
+        if kind == 'fixed':
+            return value[index]
+        data, offsets, shapes = value
+        return data[offsets[index]:offsets[index + 1]].reshape(shapes[index])
+
+    def __getitem__(self, index):
+        """Get the preprocessed sample of an index."""
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('index {} is out of range'.format(index))
+        return _unflatten(self.structure, lambda pos: self._get_leaf(index, pos))
+
+    def __len__(self):
+        """Get the number of samples."""
+        return self.length
@@ -528,6 +528,120 @@ class ComposeTransform(BaseTransform):
             sample = transform(sample)
         return sample
 
+class BatchPlan(object):
+    """The fused computation of the batch transforms on a stacked batch of images.
+
+    The transforms add their steps by their batch_plan method. The steps which only reindex
+    the images, e.g. crop and transpose, are applied to the batch as numpy views, and so are
+    the parameters of the elementwise steps, e.g. the mean of normalization, which are
+    broadcast to the batch shape without copy. The elementwise steps then run on the final
+    views, the first one writes the output buffer in its final layout and the others update it
+    in place, so there is no temporary array per step and per image.
+
+    Args:
+        images (np.ndarray): The stacked batch of images.
+    """
+
+    def __init__(self, images):
+        """Initialize `BatchPlan` class."""
+        self.images = images
+        self.views = []
+        self.steps = []
+        self.dtype = images.dtype
+
+    @property
+    def shape(self):
+        """Get the shape of the batch after the steps added so far."""
+        return self.images.shape
+
+    def view(self, func):
+        """Add a step reindexing the batch, func maps an array of the batch shape to a view."""
+        self.images = func(self.images)
+        self.views.append(func)
+
+    def elementwise(self, ufunc, param):
+        """Add a step applying the binary ufunc to the batch and the broadcast param."""
+        param = np.asarray(param)
+        self.dtype = ufunc(np.zeros(1, dtype=self.dtype), param.reshape(-1)[:1]).dtype
+        self.steps.append((ufunc, np.broadcast_to(param, self.shape), len(self.views),
+                           self.dtype))
+
+    def cast(self, dtype):
+        """Add a step converting the batch to dtype.
+
+        The cast from a float dtype to another one is fused into the elementwise steps before
+        it, they are computed in the cast dtype.
+        """
+        dtype = np.dtype(dtype)
+        if self.steps and self.steps[-1][0] is not None and \
+            np.issubdtype(self.dtype, np.floating) and np.issubdtype(dtype, np.floating):
+            for idx in range(len(self.steps) - 1, -1, -1):
+                ufunc, param, position, _ = self.steps[idx]
+                if ufunc is None:
+                    break
+                self.steps[idx] = (ufunc, param, position, dtype)
+        else:
+            self.steps.append((None, None, len(self.views), dtype))
+        self.dtype = dtype
+
+    def run(self):
+        """Run the steps and return the contiguous output batch."""
+        images = self.images
+        buffers = {}
+        for ufunc, param, position, dtype in self.steps:
+            out = buffers.get(dtype)
+            if out is None:
+                out = buffers[dtype] = np.empty(images.shape, dtype=dtype)
+            if ufunc is None:
+                np.copyto(out, images, casting='unsafe')
+            else:
+                for func in self.views[position:]:
+                    param = func(param)
+                ufunc(images, param, out=out, dtype=dtype)
+            images = out
+        if images is self.images:
+            images = np.ascontiguousarray(images)
+        return images
+
+class BatchComposeTransform(ComposeTransform):
+    """Composes several transforms together to run on a collated batch.
+
+    The transforms run once per batch on the stacked images instead of once per image, as a
+    BatchPlan fusing their steps. Every transform must have a batch_plan method, which adds
+    its steps to the plan as if the batch were one image with a leading batch dimension.
+    The images which aren't collated into one numeric array, e.g. of different sizes before
+    CenterCrop, are transformed one by one.
+
+    Args:
+        transform_list (list of Transform objects): list of transforms to compose
+
+    Returns:
+        sample (tuple): tuple of processed images and labels of the batch
+    """
+
+    def __init__(self, transform_list):
+        """Initialize `BatchComposeTransform` class."""
+        for transform in transform_list:
+            assert hasattr(transform, 'batch_plan'), \
+                "{} doesn't support batch".format(type(transform).__name__)
+        super().__init__(transform_list)
+
+    def __call__(self, sample):
+        """Call transforms in transform_list on the batch."""
+        images, labels = sample
+        if not isinstance(images, np.ndarray) or not np.issubdtype(images.dtype, np.number):
+            images = [super(BatchComposeTransform, self).__call__((image, None))[0] \
+                for image in images]
+            try:
+                return (np.stack(images), labels)
+            except ValueError:
+                return (images, labels)
+        plan = BatchPlan(images)
+        for transform in self.transform_list:
+            transform.batch_plan(plan)
+        return (plan.run(), labels)
+
+
 @transform_registry(transform_type="CropToBoundingBox", process="preprocess", \
         framework="pytorch")
 class CropToBoundingBox(BaseTransform):
@@ -779,6 +893,12 @@ class Transpose(BaseTransform):
         image = np.transpose(image, axes=self.perm)
         return (image, label)
 
+    def batch_plan(self, plan):
+        """Transpose the images of the batch according to perm."""
+        assert len(plan.shape) == len(self.perm) + 1, "Image rank doesn't match Perm rank"
+        axes = [0] + [axis + 1 for axis in self.perm]
+        plan.view(lambda images: np.transpose(images, axes=axes))
+
 @transform_registry(transform_type="Transpose", process="preprocess", \
                     framework="tensorflow, tensorflow_itex")
 class TensorflowTranspose(Transpose):
@@ -990,6 +1110,10 @@ class CastONNXTransform(BaseTransform):
         image = image.astype(np_dtype_map[self.dtype])
         return (image, label)
 
+    def batch_plan(self, plan):
+        """Convert the images of the batch to given dtype."""
+        plan.cast(np_dtype_map[self.dtype])
+
 @transform_registry(transform_type="Cast", process="general", framework="pytorch")
 class CastPyTorchTransform(BaseTransform):
     """Convert image to given dtype.
@@ -1863,6 +1987,21 @@ class CenterCropTransform(BaseTransform):
         image = image[y0:y0 + self.height, x0:x0 + self.width, :]
         return (image, label)
 
+    def batch_plan(self, plan):
+        """Crop the images of the batch at the center to the given size."""
+        h, w = plan.shape[1], plan.shape[2]
+        if h + 1 < self.height or w + 1 < self.width:
+            raise ValueError(
+                "Required crop size {} is larger then input image size {}".format(
+                    (self.height, self.width), (h, w)))
+
+        if self.height == h and self.width == w:
+            return
+
+        y0 = (h - self.height) // 2
+        x0 = (w - self.width) // 2
+        plan.view(lambda images: images[:, y0:y0 + self.height, x0:x0 + self.width, :])
+
 @transform_registry(transform_type="Normalize", process="preprocess", framework="mxnet")
 class MXNetNormalizeTransform(BaseTransform):
     """Normalize a image with mean and standard deviation.
@@ -1956,6 +2095,12 @@ class NormalizeTransform(BaseTransform):
         image = (image - self.mean) / self.std
         return (image, label)
 
+    def batch_plan(self, plan):
+        """Normalize the images of the batch."""
+        assert len(self.mean) == plan.shape[-1], 'Mean channel must match image channel'
+        plan.elementwise(np.subtract, self.mean)
+        plan.elementwise(np.true_divide, self.std)
+
 @transform_registry(transform_type="RandomCrop", process="preprocess", \
                 framework="mxnet, onnxrt_qlinearops, onnxrt_integerops")
 class RandomCropTransform(BaseTransform):
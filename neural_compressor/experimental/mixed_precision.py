@@ -17,7 +17,6 @@
 # ==============================================================================
 """Class for low precision model generation across multiple framework backends."""
 import os
-import pickle
 import random
 import sys
 import numpy as np
@@ -27,7 +26,7 @@ from ..conf.dotdict import deep_get
 from ..strategy import STRATEGIES
 from ..utils import logger
 from ..utils.create_obj_from_config import create_dataloader
-from ..utils.utility import CpuInfo, time_limit
+from ..utils.utility import CpuInfo, time_limit, TuningHistoryJournal
 from ..model import BaseModel
 from .graph_optimization import GraphOptimization
 
@@ -147,8 +146,7 @@ class MixedPrecision(GraphOptimization):
         if self.resume_file: # pragma: no cover
             assert os.path.exists(self.resume_file), \
                 "The specified resume file {} doesn't exist!".format(self.resume_file)
-            with open(self.resume_file, 'rb') as f:
-                _resume = pickle.load(f).__dict__
+            _resume = TuningHistoryJournal.load(self.resume_file)
 
         self.strategy = STRATEGIES[strategy](
             self._model,
@@ -167,6 +165,7 @@ class MixedPrecision(GraphOptimization):
         except Exception as e: # pragma: no cover
             logger.info("Unexpected exception {} happened during turing.".format(repr(e)))
         finally: 
+            self.strategy.adaptor.clear_session_cache()
             if self.strategy.best_qmodel:
                 logger.info(
                     "Specified timeout or max trials is reached! "
@@ -40,6 +40,7 @@ class DyNAS(NASBase):
         from .dynast.dynas_manager import (ParameterManager,
                                            TransformerLTEncoding)
         from .dynast.dynas_predictor import Predictor
+        from .dynast.dynas_scheduler import SubnetValidationScheduler
         from .dynast.dynas_search import (ProblemMultiObjective,
                                           SearchAlgoManager)
         from .dynast.dynas_utils import (EvaluationInterfaceMobileNetV3,
@@ -51,6 +52,7 @@ class DyNAS(NASBase):
         self.Predictor = Predictor
         self.ProblemMultiObjective = ProblemMultiObjective
         self.SearchAlgoManager = SearchAlgoManager
+        self.SubnetValidationScheduler = SubnetValidationScheduler
         self.SUPERNET_PARAMETERS = {
             'ofa_resnet50': {
                 'd':  {'count': 5,  'vars': [0, 1, 2]},
@@ -110,6 +112,7 @@ class DyNAS(NASBase):
         self.latency_predictor = None
         self.results_csv_path = None
         self.num_workers = None
+        self.num_validation_processes = 1
         self.init_cfg(conf_fname_or_obj)
 
     def estimate(self, individual):
@@ -164,19 +167,28 @@ class DyNAS(NASBase):
             # Clear also creates empty CSV file.
             self.validation_interface.clear_csv()
 
-        df = pd.read_csv(self.results_csv_path)
-        latest_population = [self.supernet_manager.random_sample()
-                             for _ in range(max(self.population - df.shape[0], 0))]
+        validation_scheduler = self.SubnetValidationScheduler(
+            validation_interface=self.validation_interface,
+            csv_path=self.results_csv_path,
+            num_processes=self.num_validation_processes,
+        )
+        # Resume the validation of the population interrupted last time
+        latest_population = validation_scheduler.load_pending()
+        if latest_population is not None:
+            logger.info('[DyNAS-T] Resume the validation of {} pending subnets.'.format(
+                len(latest_population)))
+        else:
+            df = pd.read_csv(self.results_csv_path)
+            latest_population = [self.supernet_manager.random_sample()
+                                 for _ in range(max(self.population - df.shape[0], 0))]
 
         # Start Lightweight Iterative Neural Architecture Search (LINAS)
         num_loops = round(self.num_evals/self.population)
         for loop in range(num_loops):
 
-            for i, individual in enumerate(latest_population):
-                logger.info(
-                '[DyNAS-T] Starting eval {} of {} in LINAS loop {} of {}.'.format(
-                    i+1, len(latest_population), loop+1, num_loops))
-                self.validation_interface.eval_subnet(individual)
+            logger.info('[DyNAS-T] Validating {} subnets in LINAS loop {} of {}.'.format(
+                len(latest_population), loop+1, num_loops))
+            validation_scheduler.validate(latest_population)
 
             self.create_acc_predictor()
             self.create_macs_predictor()
@@ -306,6 +318,7 @@ class DyNAS(NASBase):
         self.supernet_ckpt_path = dynas_config.supernet_ckpt_path
         self.batch_size = dynas_config.batch_size
         self.num_workers = dynas_config.num_workers
+        self.num_validation_processes = dynas_config.num_validation_processes
         if dynas_config.population < 10:  # pragma: no cover
             raise NotImplementedError(
                 "Please specify a population size >= 10"
@@ -124,6 +124,24 @@ class ParameterManager:
 
         return np.array(onehot)
 
+    def onehot_population(self, pymoo_vectors: list) -> np.ndarray:
+        """Generate the onehot vectors of a whole population at once.
+
+        It is the vectorized onehot_generic, every row is the onehot vector of one individual.
+
+        Args:
+            pymoo_vectors (list): the pymoo individuals, one 1-D vector per individual
+
+        Returns:
+            onehot (numpy array): the 2-D array of the onehot vectors
+        """
+        pymoo_vectors = np.asarray(pymoo_vectors, dtype=int).reshape(-1, len(self.mapper))
+        sizes = [len(value) for value in self.mapper]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(int)
+        onehot = np.zeros((len(pymoo_vectors), sum(sizes)), dtype=int)
+        onehot[np.arange(len(pymoo_vectors))[:, None], offsets + pymoo_vectors] = 1
+        return onehot
+
     def random_sample(self) -> list:
         """Generate a random subnetwork from the possible elastic parameter range."""
         pymoo_vector = list()
@@ -0,0 +1,184 @@
+"""DyNAS subnet validation scheduler class."""
+
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import json
+import multiprocessing
+import os
+from typing import List
+
+from neural_compressor.utils import logger
+from neural_compressor.utils.cpu_topology import get_cpu_topology
+from neural_compressor.utils.utility import LazyImport
+
+torch = LazyImport('torch')
+
+
+def _validation_worker(validation_interface, individuals, tasks, cores) -> None:
+    """Validate the subnets of the task queue in a process pinned to cores."""
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+        torch.set_num_threads(len(cores))
+    # every process stops at its None
+    for index in iter(tasks.get, None):
+        validation_interface.eval_subnet(individuals[index])
+
+
+class SubnetValidationScheduler:
+    """Validate the candidate subnets of DyNAS concurrently and resumably.
+
+    The subnets are validated by the eval_subnet of the validation interface. With more than one
+    process, every process is pinned to its own physical cores and pulls the subnets from a
+    shared task queue. The processes are forked, so the supernet and the data provider loaded by
+    the parent are shared copy-on-write instead of being loaded per process.
+
+    The subnets already in the results csv file are skipped, and the population being validated
+    is kept in a pending file next to the csv file until it is done, so an interrupted search
+    resumes with the subnets not validated yet.
+
+    Args:
+        validation_interface (EvaluationInterface): The interface that validates the subnets.
+        csv_path (str): The results csv file of the validations.
+        num_processes (int, Optional): The number of concurrent validation processes.
+    """
+
+    def __init__(
+        self,
+        validation_interface,
+        csv_path: str,
+        num_processes: int = 1,
+    ) -> None:
+        """Initialize the attributes."""
+        self.validation_interface = validation_interface
+        self.csv_path = csv_path
+        self.pending_path = '{}.pending'.format(csv_path)
+        self.num_processes = max(int(num_processes or 1), 1)
+
+    def subnet_key(
+        self,
+        individual: list,
+    ) -> str:
+        """Get the results csv file column of a subnet, None if the interface can't build it."""
+        interface = self.validation_interface
+        param_dict = interface.manager.translate2param(individual)
+        try:
+            sample = interface.get_sample(param_dict)
+        except NotImplementedError:
+            return None
+        return str(interface.get_csv_subnet(sample, param_dict))
+
+    def validated_subnets(self) -> set:
+        """Get the subnets already in the results csv file."""
+        if not self.csv_path or not os.path.exists(self.csv_path):
+            return set()
+        with open(self.csv_path, newline='') as f:
+            rows = list(csv.reader(f))
+        return set(row[0] for row in rows[1:] if row)
+
+    def load_pending(self) -> List[list]:
+        """Get the population of an interrupted validation, None if there isn't one."""
+        if not os.path.exists(self.pending_path):
+            return None
+        with open(self.pending_path) as f:
+            return json.load(f)
+
+    def save_pending(
+        self,
+        population: List[list],
+    ) -> None:
+        """Save the population being validated."""
+        tmp_path = '{}.tmp'.format(self.pending_path)
+        with open(tmp_path, 'w') as f:
+            json.dump(population, f)
+        os.replace(tmp_path, self.pending_path)
+
+    def validate(
+        self,
+        population: list,
+    ) -> None:
+        """Validate the subnets of the population which aren't validated yet.
+
+        Args:
+            population (list): The PyMoo vectors of the subnets.
+        """
+        population = [[int(value) for value in individual] for individual in population]
+        self.save_pending(population)
+
+        validated = self.validated_subnets()
+        individuals, keys = [], set()
+        for individual in population:
+            key = self.subnet_key(individual)
+            if key is not None and (key in validated or key in keys):
+                continue
+            keys.add(key)
+            individuals.append(individual)
+        if len(individuals) < len(population):
+            logger.info('[DyNAS-T] Skip {} subnets validated already.'.format(
+                len(population) - len(individuals)))
+
+        num_processes = min(self.num_processes, len(individuals))
+        if num_processes > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            logger.warning('[DyNAS-T] Concurrent validation requires the fork start method, '
+                           'validate the subnets serially.')
+            num_processes = 1
+        if num_processes > 1:
+            self._validate_concurrently(individuals, num_processes)
+        else:
+            for i, individual in enumerate(individuals):
+                logger.info('[DyNAS-T] Starting eval {} of {}.'.format(i + 1, len(individuals)))
+                self.validation_interface.eval_subnet(individual)
+
+        os.remove(self.pending_path)
+
+    def _validate_concurrently(
+        self,
+        individuals: List[list],
+        num_processes: int,
+    ) -> None:
+        """Validate the subnets in num_processes processes pinned to their own cores."""
+        topology = get_cpu_topology()
+        cores_per_process = max(len(topology.physical_cores) // num_processes, 1)
+        if cores_per_process * num_processes <= len(topology.physical_cores):
+            layout = [cores for cores, _ in topology.instance_layout(num_processes, cores_per_process)]
+        else:
+            logger.warning('[DyNAS-T] Fewer physical cores than validation processes, '
+                           'the processes are not pinned.')
+            layout = [None] * num_processes
+        logger.info('[DyNAS-T] Validate {} subnets in {} processes.'.format(
+            len(individuals), num_processes))
+
+        context = multiprocessing.get_context('fork')
+        tasks = context.Queue()
+        for index in list(range(len(individuals))) + [None] * num_processes:
+            tasks.put(index)
+        self.validation_interface.csv_lock = context.Lock()
+        try:
+            processes = [context.Process(target=_validation_worker,
+                                         args=(self.validation_interface, individuals, tasks, cores))
+                         for cores in layout]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        finally:
+            self.validation_interface.csv_lock = None
+        failed = [process.exitcode for process in processes if process.exitcode != 0]
+        if failed:
+            raise RuntimeError('[DyNAS-T] {} validation processes failed, rerun the search to '
+                               'resume the pending subnets.'.format(len(failed)))
@@ -196,12 +196,8 @@ class ProblemMultiObjective(Problem):
         # Store results for a given generation for PyMoo
         objective_x_arr, objective_y_arr = list(), list()
 
-        # Measure new individuals
-        for i in range(len(x)):
-
-            _, objective_x, objective_y = self.evaluation_interface.eval_subnet(
-                x[i])
-
+        # Measure new individuals, the whole generation at once in predictor mode
+        for _, objective_x, objective_y in self.evaluation_interface.eval_subnets(x):
             objective_x_arr.append(objective_x)
             objective_y_arr.append(objective_y)
 
@@ -19,10 +19,11 @@
 
 import copy
 import csv
-import time
+import os
 import uuid
 from datetime import datetime
-from typing import Tuple
+from functools import lru_cache
+from typing import List, Tuple
 
 import numpy as np
 import ofa
@@ -32,6 +33,8 @@ from neural_compressor.experimental.nas.dynast.dynas_manager import \
 from neural_compressor.experimental.nas.dynast.dynas_predictor import Predictor
 # from neural_compressor.experimental.nas.dynast.supernetwork.machine_translation.transformer_interface import (
 #     compute_bleu, compute_latency, compute_macs)
+from neural_compressor.utils.cpu_topology import get_cpu_topology
+from neural_compressor.utils.latency_stats import measure_until_stable
 from neural_compressor.utils.utility import LazyImport, logger
 from ofa.imagenet_classification.data_providers.imagenet import \
     ImagenetDataProvider
@@ -100,6 +103,15 @@ def _auto_steps(
     return int(max(batch_size*min_steps, min_samples)//batch_size//warmup_scale)
 
 
+@lru_cache(maxsize=4)
+def _get_inputs(
+    input_size: Tuple[int, int, int, int],
+    device: str,
+) -> torch.Tensor:
+    """Get the random inputs of an input size, allocated once and reused by the measurements."""
+    return torch.randn(input_size, device=device)
+
+
 @torch.no_grad()
 def measure_latency(
     model: torch.nn.Module,
@@ -107,53 +119,61 @@ def measure_latency(
     warmup_steps: int = None,
     measure_steps: int = None,
     device: str = 'cpu',
+    num_threads: int = None,
 ) -> Tuple[float, float]:
     """Measure Torch model's latency.
 
+    The model runs until the confidence interval of its median latency converges, see
+    measure_until_stable, with the warm-up iterations and the outliers dropped.
+
     Args:
         model (torch.nn.Module): Torch model.
         input_size (Tuple): a tuple (batch size, channels, resolution, resolution).
         warmup_steps (int): how many data batches to use to warm up the device.
           If 'None' it will be adjusted automatically w.r.t batch size.
         measure_steps (int): how many data batches to use for latency measurement.
-          If 'None' it will be adjusted automatically w.r.t batch size.
+          If 'None' the batches are measured until the median latency converges, at most
+          4 times the automatic number of steps w.r.t batch size.
         device (str): which device is being used for latency measurement.
+        num_threads (int): the number of threads the model runs with. If 'None' it is the
+          number of physical cores the process is bound to.
 
     Returns:
-        mean latency; std latency.
+        median latency; std latency.
     """
     if not warmup_steps:
-        warmup_steps = _auto_steps(input_size[0], is_warmup=True)
-    if not measure_steps:
-        measure_steps = _auto_steps(input_size[0])
-
-    times = []
-
-    inputs = torch.randn(input_size, device=device)
+        warmup_steps = _auto_steps(input_size[0], is_warmup=True, min_steps=5, min_samples=50)
+    if measure_steps:
+        min_steps = max_steps = measure_steps
+    else:
+        min_steps, max_steps = 10, 4 * _auto_steps(input_size[0])
+    if not num_threads and hasattr(os, 'sched_getaffinity'):
+        # one thread per physical core, the SMT siblings only slow the kernels down
+        cpus = os.sched_getaffinity(0)
+        try:
+            num_threads = len(get_cpu_topology().cores_of(cpus))
+        except (OSError, ValueError):
+            num_threads = len(cpus)
+
+    inputs = _get_inputs(tuple(input_size), str(device))
     model = model.eval()
     rm_bn_from_net(model)
     model = model.to(device)
 
-    if 'cuda' in str(device):
-        torch.cuda.synchronize()
-    for _ in range(warmup_steps):
-        model(inputs)
-    if 'cuda' in str(device):
-        torch.cuda.synchronize()
-
-    for _ in range(measure_steps):
-        if 'cuda' in str(device):
-            torch.cuda.synchronize()
-        st = time.time()
-        model(inputs)
-        if 'cuda' in str(device):
-            torch.cuda.synchronize()
-        ed = time.time()
-        times.append(ed - st)
+    synchronize = torch.cuda.synchronize if 'cuda' in str(device) else None
+    default_num_threads = torch.get_num_threads()
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    try:
+        summary = measure_until_stable(lambda: model(inputs), synchronize=synchronize,
+                                       warmup=warmup_steps, min_iterations=min_steps,
+                                       max_iterations=max_steps)
+    finally:
+        torch.set_num_threads(default_num_threads)
 
     # Convert to s->ms, round to 0.001
-    latency_mean = np.round(np.mean(times) * 1e3, 3)
-    latency_std = np.round(np.std(times) * 1e3, 3)
+    latency_mean = np.round(summary['median'] * 1e3, 3)
+    latency_std = np.round(summary['std'] * 1e3, 3)
 
     return latency_mean, latency_std
 
@@ -194,6 +214,8 @@ class OFARunner(Runner):
         self.ofa_network = ofa.model_zoo.ofa_net(supernet, pretrained=True)
         self.run_config = ImagenetRunConfig(test_batch_size=64, n_worker=num_workers)
         self.batch_size = batch_size
+        # the measured latency of each subnet config, so it is never measured twice
+        self.latency_cache = {}
 
     def estimate_accuracy_top1(
         self,
@@ -297,8 +319,11 @@ class OFARunner(Runner):
             subnet_cfg (dict): The dictionary describing the subnet.
 
         Returns:
-            mean latency; std latency.
+            median latency; std latency.
         """
+        key = (str(subnet_cfg), self.batch_size, self.device, warmup_steps, measure_steps)
+        if key in self.latency_cache:
+            return self.latency_cache[key]
         model = self.get_subnet(subnet_cfg)
         input_size = (self.batch_size, 3, 224, 224)
 
@@ -312,6 +337,7 @@ class OFARunner(Runner):
         logger.info(
             '[DyNAS-T] Model\'s latency: {} +/- {}'.format(latency_mean, latency_std))
 
+        self.latency_cache[key] = (latency_mean, latency_std)
         return latency_mean, latency_std
 
     def get_subnet(
@@ -362,6 +388,7 @@ class TransformerLTRunner(Runner):  #noqa: D101
         self.batch_size = batch_size
         self.dataset_path = datasetpath
         self.checkpoint_path = checkpoint_path
+        self.latency_cache = {}
 
     def estimate_accuracy_bleu(
         self,
@@ -419,13 +446,17 @@ class TransformerLTRunner(Runner):  #noqa: D101
         Args:
             subnet_cfg: sub-network Torch model
         Returns:
-            mean latency; std latency
+            median latency; std latency
         """
+        key = (str(subnet_cfg), self.batch_size)
+        if key in self.latency_cache:
+            return self.latency_cache[key]
         latency_mean, latency_std = transformer_interface.compute_latency(
             subnet_cfg, self.dataset_path, self.batch_size)
         logger.info(
             '[DyNAS-T] Model\'s latency: {} +/- {}'.format(latency_mean, latency_std))
 
+        self.latency_cache[key] = (latency_mean, latency_std)
         return latency_mean, latency_std
 
 
@@ -455,6 +486,8 @@ class EvaluationInterface:
         self.metrics = metrics
         self.predictor_mode = predictor_mode
         self.csv_path = csv_path
+        # the lock serializing the csv writes of concurrent validation processes
+        self.csv_lock = None
 
     def eval_subnet(
         self,
@@ -463,6 +496,95 @@ class EvaluationInterface:
         """Evaluate the subnet."""
         pass
 
+    def eval_subnets(
+        self,
+        x: list,
+    ) -> List[Tuple[dict, float, float]]:
+        """Evaluate a population of subnets.
+
+        In predictor mode, the population is encoded into one feature matrix and every predictor
+        is called once for the whole population instead of once per subnet. Otherwise, or if the
+        interface doesn't implement get_sample, the subnets are evaluated one by one with eval_subnet.
+
+        Args:
+            x (list): The PyMoo vectors of the subnets.
+
+        Returns:
+            A list of the (subnet, objective x, objective y) tuples of the subnets.
+        """
+        if not self.predictor_mode or type(self).get_sample is EvaluationInterface.get_sample:
+            return [self.eval_subnet(individual) for individual in x]
+
+        # PyMoo vector to Elastic Parameter Mapping
+        param_dicts = [self.manager.translate2param(individual) for individual in x]
+        features = self.onehot_subnets(x, param_dicts)
+
+        # Always predict the accuracy
+        accuracy = self.estimate_accuracy(features)
+        lat, macs = np.zeros(len(param_dicts)), np.zeros(len(param_dicts))
+        if 'macs' in self.metrics:
+            macs = self.evaluator.estimate_macs(features)
+        if 'lat' in self.metrics:
+            lat = self.evaluator.estimate_latency(features)
+
+        results, rows = [], []
+        date = str(datetime.now())
+        for i, param_dict in enumerate(param_dicts):
+            sample = self.get_sample(param_dict)
+            rows.append([self.get_csv_subnet(sample, param_dict), date, lat[i], macs[i], accuracy[i]])
+            # PyMoo only minimizes objectives, thus accuracy needs to be negative
+            results.append((sample, lat[i] if 'lat' in self.metrics else macs[i], -accuracy[i]))
+
+        self.write_csv(rows)
+        return results
+
+    def write_csv(
+        self,
+        rows: list,
+    ) -> None:
+        """Append the result rows to the csv file, under csv_lock if it is set."""
+        if not self.csv_path:
+            return
+        if self.csv_lock is not None:
+            self.csv_lock.acquire()
+        try:
+            with open(self.csv_path, 'a') as f:
+                writer = csv.writer(f)
+                writer.writerows(rows)
+        finally:
+            if self.csv_lock is not None:
+                self.csv_lock.release()
+
+    def get_sample(
+        self,
+        param_dict: dict,
+    ) -> dict:
+        """Get the subnet description of the elastic parameters of a subnet."""
+        raise NotImplementedError
+
+    def get_csv_subnet(
+        self,
+        sample: dict,
+        param_dict: dict,
+    ) -> dict:
+        """Get the subnet column written to the csv file."""
+        return sample
+
+    def onehot_subnets(
+        self,
+        x: list,
+        param_dicts: list,
+    ) -> np.ndarray:
+        """Encode the subnets into the 2-D feature array of the predictors."""
+        return self.manager.onehot_population(x)
+
+    def estimate_accuracy(
+        self,
+        features: np.ndarray,
+    ) -> np.ndarray:
+        """Estimate the accuracy of the encoded subnets with the predictor."""
+        return self.evaluator.estimate_accuracy_top1(features)
+
     def clear_csv(self) -> None:
         """Clear the csv file."""
         if self.csv_path:
@@ -502,12 +624,7 @@ class EvaluationInterfaceResNet50(EvaluationInterface):
         # PyMoo vector to Elastic Parameter Mapping
         param_dict = self.manager.translate2param(x)
 
-        sample = {
-            'd': param_dict['d'],
-            'e': param_dict['e'],
-            'w': param_dict['w'],
-            'r': [224],
-        }
+        sample = self.get_sample(param_dict)
         subnet_sample = copy.deepcopy(sample)
 
         # Always evaluate/predict top1
@@ -530,12 +647,7 @@ class EvaluationInterfaceResNet50(EvaluationInterface):
             if 'lat' in self.metrics:
                 lat, _ = self.evaluator.measure_latency(subnet_sample)
 
-        if self.csv_path:
-            with open(self.csv_path, 'a') as f:
-                writer = csv.writer(f)
-                date = str(datetime.now())
-                result = [subnet_sample, date, lat, macs, top1]
-                writer.writerow(result)
+        self.write_csv([[subnet_sample, str(datetime.now()), lat, macs, top1]])
 
         # PyMoo only minimizes objectives, thus accuracy needs to be negative
         # Requires format: subnetwork, objective x, objective y
@@ -544,6 +656,18 @@ class EvaluationInterfaceResNet50(EvaluationInterface):
         else:
             return sample, macs, -top1
 
+    def get_sample(
+        self,
+        param_dict: dict,
+    ) -> dict:
+        """Get the subnet description of the elastic parameters of a subnet."""
+        return {
+            'd': param_dict['d'],
+            'e': param_dict['e'],
+            'w': param_dict['w'],
+            'r': [224],
+        }
+
 
 class EvaluationInterfaceMobileNetV3(EvaluationInterface):
     """Evaluation Interface class for MobileNetV3.
@@ -573,13 +697,7 @@ class EvaluationInterfaceMobileNetV3(EvaluationInterface):
         # PyMoo vector to Elastic Parameter Mapping
         param_dict = self.manager.translate2param(x)
 
-        sample = {
-            'wid': None,
-            'ks': param_dict['ks'],
-            'e': param_dict['e'],
-            'd': param_dict['d'],
-            'r': [224],
-        }
+        sample = self.get_sample(param_dict)
         subnet_sample = copy.deepcopy(sample)
 
         # Always evaluate/predict top1
@@ -599,12 +717,7 @@ class EvaluationInterfaceMobileNetV3(EvaluationInterface):
             if 'lat' in self.metrics:
                 lat, _ = self.evaluator.measure_latency(subnet_sample)
 
-        if self.csv_path:
-            with open(self.csv_path, 'a') as f:
-                writer = csv.writer(f)
-                date = str(datetime.now())
-                result = [subnet_sample, date, lat, macs, top1]
-                writer.writerow(result)
+        self.write_csv([[subnet_sample, str(datetime.now()), lat, macs, top1]])
 
         # PyMoo only minimizes objectives, thus accuracy needs to be negative
         # Requires format: subnetwork, objective x, objective y
@@ -613,6 +726,19 @@ class EvaluationInterfaceMobileNetV3(EvaluationInterface):
         else:
             return sample, macs, -top1
 
+    def get_sample(
+        self,
+        param_dict: dict,
+    ) -> dict:
+        """Get the subnet description of the elastic parameters of a subnet."""
+        return {
+            'wid': None,
+            'ks': param_dict['ks'],
+            'e': param_dict['e'],
+            'd': param_dict['d'],
+            'r': [224],
+        }
+
 
 class EvaluationInterfaceTransformerLT(EvaluationInterface):  #noqa: D101
     def __init__(
@@ -632,23 +758,7 @@ class EvaluationInterfaceTransformerLT(EvaluationInterface):  #noqa: D101
         # PyMoo vector to Elastic Parameter Mapping
         param_dict = self.manager.translate2param(x)
 
-        sample = {
-            'encoder': {
-                'encoder_embed_dim': param_dict['encoder_embed_dim'][0],
-                'encoder_layer_num': 6,  # param_dict['encoder_layer_num'][0],
-                'encoder_ffn_embed_dim': param_dict['encoder_ffn_embed_dim'],
-                'encoder_self_attention_heads': param_dict['encoder_self_attention_heads'],
-            },
-            'decoder': {
-                'decoder_embed_dim': param_dict['decoder_embed_dim'][0],
-                'decoder_layer_num': param_dict['decoder_layer_num'][0],
-                'decoder_ffn_embed_dim': param_dict['decoder_ffn_embed_dim'],
-                'decoder_self_attention_heads': param_dict['decoder_self_attention_heads'],
-                'decoder_ende_attention_heads': param_dict['decoder_ende_attention_heads'],
-                'decoder_arbitrary_ende_attn': param_dict['decoder_arbitrary_ende_attn']
-            }
-        }
-
+        sample = self.get_sample(param_dict)
         subnet_sample = copy.deepcopy(sample)
 
         # Always evaluate/predict top1
@@ -668,12 +778,7 @@ class EvaluationInterfaceTransformerLT(EvaluationInterface):  #noqa: D101
             if 'lat' in self.metrics:
                 lat, _ = self.evaluator.measure_latency(subnet_sample)
 
-        if self.csv_path:
-            with open(self.csv_path, 'a') as f:
-                writer = csv.writer(f)
-                date = str(datetime.now())
-                result = [param_dict, date, lat, macs, bleu, ]
-                writer.writerow(result)
+        self.write_csv([[param_dict, str(datetime.now()), lat, macs, bleu]])
 
         # PyMoo only minimizes objectives, thus accuracy needs to be negative
         # Requires format: subnetwork, objective x, objective y
@@ -682,6 +787,47 @@ class EvaluationInterfaceTransformerLT(EvaluationInterface):  #noqa: D101
         else:
             return sample, macs, -bleu
 
+    def get_sample(
+        self,
+        param_dict: dict,
+    ) -> dict:  #noqa: D102
+        return {
+            'encoder': {
+                'encoder_embed_dim': param_dict['encoder_embed_dim'][0],
+                'encoder_layer_num': 6,  # param_dict['encoder_layer_num'][0],
+                'encoder_ffn_embed_dim': param_dict['encoder_ffn_embed_dim'],
+                'encoder_self_attention_heads': param_dict['encoder_self_attention_heads'],
+            },
+            'decoder': {
+                'decoder_embed_dim': param_dict['decoder_embed_dim'][0],
+                'decoder_layer_num': param_dict['decoder_layer_num'][0],
+                'decoder_ffn_embed_dim': param_dict['decoder_ffn_embed_dim'],
+                'decoder_self_attention_heads': param_dict['decoder_self_attention_heads'],
+                'decoder_ende_attention_heads': param_dict['decoder_ende_attention_heads'],
+                'decoder_arbitrary_ende_attn': param_dict['decoder_arbitrary_ende_attn']
+            }
+        }
+
+    def get_csv_subnet(
+        self,
+        sample: dict,
+        param_dict: dict,
+    ) -> dict:  #noqa: D102
+        return param_dict
+
+    def onehot_subnets(
+        self,
+        x: list,
+        param_dicts: list,
+    ) -> np.ndarray:  #noqa: D102
+        return np.concatenate([self.manager.onehot_custom(param_dict) for param_dict in param_dicts])
+
+    def estimate_accuracy(
+        self,
+        features: np.ndarray,
+    ) -> np.ndarray:  #noqa: D102
+        return self.evaluator.estimate_accuracy_bleu(features)
+
     def clear_csv(self) -> None:  #noqa: D102
         if self.csv_path:
             f = open(self.csv_path, "w")
@@ -15,11 +15,11 @@
 # limitations under the License.
 
 """Translate pre-processed data with a trained model."""
-import time
 import warnings
 
 import numpy as np
 
+from neural_compressor.utils.latency_stats import measure_until_stable
 from neural_compressor.utils.utility import logger, LazyImport
 
 from .transformer_supernetwork import TransformerSuperNetwork
@@ -209,43 +209,26 @@ def compute_latency(config, dataset_path, batch_size, get_model_parameters=False
 
     model.eval()
 
+    synchronize = torch.cuda.synchronize if args.latgpu else None
+
     with torch.no_grad():
 
-        # dry runs
-        for _ in range(15):
-            encoder_out_test = model.encoder(
-                src_tokens=src_tokens_test, src_lengths=src_lengths_test)
+        encoder_out_test = model.encoder(
+            src_tokens=src_tokens_test, src_lengths=src_lengths_test)
 
-        encoder_latencies = []
         logger.info('[DyNAS-T] Measuring encoder for dataset generation...')
-        for _ in range(args.latiter):
-            if args.latgpu:
-                start = time.time()
-            elif args.latcpu:
-                start = time.time()
-
-            model.encoder(src_tokens=src_tokens_test,
-                          src_lengths=src_lengths_test)
-
-            if args.latgpu:
-                end = time.time()
-                encoder_latencies.append((end - start) * 1000)
-            elif args.latcpu:
-                end = time.time()
-                encoder_latencies.append((end - start) * 1000)
-
-        encoder_latencies.sort()
-        encoder_latencies = encoder_latencies[int(
-            args.latiter * 0.1): -max(1, int(args.latiter * 0.1))]
+        encoder_summary = measure_until_stable(
+            lambda: model.encoder(src_tokens=src_tokens_test, src_lengths=src_lengths_test),
+            synchronize=synchronize, warmup=15, max_iterations=args.latiter)
         logger.info(
-            f'[DyNAS-T] Encoder latency for dataset generation: Mean: '
-            '{np.mean(encoder_latencies)} ms; Std: {np.std(encoder_latencies)} ms'
+            '[DyNAS-T] Encoder latency for dataset generation: Median: '
+            '{} ms; Std: {} ms'.format(encoder_summary['median'] * 1000, encoder_summary['std'] * 1000)
         )
 
         encoder_out_test_with_beam = model.encoder.reorder_encoder_out(
             encoder_out_test, new_order)
 
-        # dry runs
+        # dry runs, the warm-up left in the timed calls is dropped by measure_until_stable
         for _ in range(15):
             model.decoder(prev_output_tokens=prev_output_tokens_test_with_beam,
                           encoder_out=encoder_out_test_with_beam)
@@ -254,38 +237,24 @@ def compute_latency(config, dataset_path, batch_size, get_model_parameters=False
         decoder_iterations_dict = {'iwslt': 23, 'wmt': 30}
 
         decoder_iterations = decoder_iterations_dict['wmt']
-        decoder_latencies = []
 
-        logger.info('[DyNAS-T] Measuring decoder for dataset generation...')
-        for _ in range(args.latiter):
-            if args.latgpu:
-                start = time.time()
-            elif args.latcpu:
-                start = time.time()
+        def run_decoder():
             incre_states = {}
             for k_regressive in range(decoder_iterations):
                 model.decoder(prev_output_tokens=prev_output_tokens_test_with_beam[:, :k_regressive + 1],
                               encoder_out=encoder_out_test_with_beam, incremental_state=incre_states)
-            if args.latgpu:
-                end = time.time()
-                decoder_latencies.append((end - start) * 1000)
 
-            elif args.latcpu:
-                end = time.time()
-                decoder_latencies.append((end - start) * 1000)
-
-        # only use the 10% to 90% latencies to avoid outliers
-        decoder_latencies.sort()
-        decoder_latencies = decoder_latencies[int(
-            args.latiter * 0.1): -max(1, int(args.latiter * 0.1))]
+        logger.info('[DyNAS-T] Measuring decoder for dataset generation...')
+        decoder_summary = measure_until_stable(
+            run_decoder, synchronize=synchronize, warmup=0, max_iterations=args.latiter)
 
     logger.info(
-        f'[DyNAS-T] Decoder latency for dataset generation: Mean: '
-        '{np.mean(decoder_latencies)} ms; \t Std: {np.std(decoder_latencies)} ms'
+        '[DyNAS-T] Decoder latency for dataset generation: Median: '
+        '{} ms; \t Std: {} ms'.format(decoder_summary['median'] * 1000, decoder_summary['std'] * 1000)
     )
 
-    lat_mean = np.mean(encoder_latencies)+np.mean(decoder_latencies)
-    lat_std = np.std(encoder_latencies)+np.std(decoder_latencies)
+    lat_mean = (encoder_summary['median'] + decoder_summary['median']) * 1000
+    lat_std = (encoder_summary['std'] + decoder_summary['std']) * 1000
     return lat_mean, lat_std
 
 
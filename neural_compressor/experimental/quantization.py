@@ -18,14 +18,13 @@
 """Neural Compressor Quantization API."""
 
 import os
-import pickle
 import random
 import numpy as np
 from .component import Component
 from ..conf.dotdict import deep_get, deep_set, DotDict
 from ..strategy import STRATEGIES
 from ..utils import logger
-from ..utils.utility import time_limit
+from ..utils.utility import time_limit, TuningHistoryJournal
 from ..utils.create_obj_from_config import create_dataloader
 from ..model import BaseModel
 from ..model.tensorflow_model import TensorflowQATModel
@@ -154,8 +153,7 @@ class Quantization(Component):
         if self.resume_file:
             assert os.path.exists(self.resume_file), \
                 "The specified resume file {} doesn't exist!".format(self.resume_file)
-            with open(self.resume_file, 'rb') as f:
-                _resume = pickle.load(f).__dict__
+            _resume = TuningHistoryJournal.load(self.resume_file)
 
         self.strategy = STRATEGIES[strategy](
             self._model,
@@ -182,6 +180,7 @@ class Quantization(Component):
             import traceback
             traceback.print_exc()
         finally:
+            self.strategy.adaptor.clear_session_cache()
             if self.strategy.best_qmodel:
                 logger.info(
                     "Specified timeout or max trials is reached! "
@@ -299,6 +299,17 @@ class BaseMetric(object):
         """
         raise NotImplementedError
 
+    def running_mean(self):
+        """Get the running mean of per-sample scores in [0, 1] and the number of samples.
+
+        The early stop of the evaluation bounds the final result with it.
+
+        Returns:
+            tuple: (mean, num_samples), or None if the result isn't the mean of per-sample
+                scores in [0, 1], e.g. mAP or MSE.
+        """
+        return None
+
     @property
     def metric(self):
         """Return its metric class.
@@ -479,6 +490,51 @@ def _shape_validate(preds, labels):
     return preds, labels
 
 
+class _GrowableBuffer(object):
+    """A NumPy buffer growing along the first axis with amortized O(1) appends.
+
+    It replaces np.append per batch, which copies all the collected data and makes
+    the collection O(n^2) in the number of samples.
+    """
+
+    def __init__(self):
+        """Initialize an empty buffer."""
+        self._data = None
+        self._size = 0
+
+    def __len__(self):
+        """Return the number of collected rows."""
+        return self._size
+
+    def append(self, batch):
+        """Append a batch along the first axis, the same as np.append(data, batch, axis=0).
+
+        Args:
+            batch: The batch to append, its trailing dimensions must match the collected data.
+        """
+        batch = np.asarray(batch)
+        if batch.ndim == 0:
+            batch = batch.reshape(1)
+        if self._data is None:
+            self._data = np.empty((max(2 * batch.shape[0], 1),) + batch.shape[1:], dtype=batch.dtype)
+        elif batch.shape[1:] != self._data.shape[1:]:
+            raise ValueError('all the input array dimensions except for the first axis must match '
+                             'exactly, but got {} and {}'.format(self._data.shape, batch.shape))
+        size = self._size + batch.shape[0]
+        dtype = np.result_type(self._data.dtype, batch.dtype)
+        if size > self._data.shape[0] or dtype != self._data.dtype:
+            data = np.empty((max(size, 2 * self._data.shape[0]),) + self._data.shape[1:], dtype=dtype)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+        self._data[self._size:size] = batch
+        self._size = size
+
+    @property
+    def data(self):
+        """Return the collected data, None if nothing is collected."""
+        return None if self._data is None else self._data[:self._size]
+
+
 @metric_registry('F1', 'tensorflow, tensorflow_itex, pytorch, mxnet, onnxrt_qlinearops, onnxrt_integerops')
 class F1(BaseMetric):
     """F1 score of a binary classification problem.
@@ -576,15 +632,13 @@ class Accuracy(BaseMetric):
     that were correct classified.
 
     Attributes:
-        pred_list: List of prediction to score.
-        label_list: List of labels to score.
+        correct_num: The number of correct predictions.
         sample: The total number of samples.
     """
     
     def __init__(self):
-        """Initialize predictions, labels and sample."""
-        self.pred_list = []
-        self.label_list = []
+        """Initialize the number of correct predictions and sample."""
+        self.correct_num = 0
         self.sample = 0
 
     def update(self, preds, labels, sample_weight=None):
@@ -598,12 +652,12 @@ class Accuracy(BaseMetric):
         preds, labels = _accuracy_shape_check(preds, labels)
         update_type = _accuracy_type_check(preds, labels)
         if update_type == 'binary':
-            self.pred_list.extend(preds)
-            self.label_list.extend(labels)
+            if len(preds.shape) == len(labels.shape) + 1:
+                preds = preds.reshape(labels.shape)
+            self.correct_num += np.sum(preds == labels)
             self.sample += labels.shape[0]
         elif update_type == 'multiclass':
-            self.pred_list.extend(np.argmax(preds, axis=1).astype('int32'))
-            self.label_list.extend(labels)
+            self.correct_num += np.sum(np.argmax(preds, axis=1).astype('int32') == labels)
             self.sample += labels.shape[0]
         elif update_type == 'multilabel':
             #(N, C, ...) -> (N*..., C)
@@ -616,25 +670,26 @@ class Accuracy(BaseMetric):
                 preds = preds.transpose(trans_list).reshape(-1, num_label)
                 labels = labels.transpose(trans_list).reshape(-1, num_label)
             self.sample += preds.shape[0]*preds.shape[1]
-            self.pred_list.append(preds)
-            self.label_list.append(labels)
+            self.correct_num += np.sum(preds == labels)
 
     def reset(self):
         """Clear the predictions and labels."""
-        self.pred_list = []
-        self.label_list = []
+        self.correct_num = 0
         self.sample = 0
 
     def result(self):
         """Compute the accuracy."""
-        correct_num = np.sum(
-            np.array(self.pred_list) == np.array(self.label_list))
+        correct_num = self.correct_num
         if getattr(self, '_hvd', None) is not None:
             allghter_correct_num = sum(self._hvd.allgather_object(correct_num))
             allgather_sample = sum(self._hvd.allgather_object(self.sample))
             return allghter_correct_num / allgather_sample
         return correct_num / self.sample
 
+    def running_mean(self):
+        """Get the running accuracy of this process and its number of samples."""
+        return (float(self.correct_num) / self.sample if self.sample else 0.), int(self.sample)
+
 
 class PyTorchLoss():
     """A dummy PyTorch Metric.
@@ -733,21 +788,21 @@ class MAE(BaseMetric):
     difference between the predicted and actual numeric values.
     
     Attributes:
-        pred_list: List of prediction to score.
-        label_list: List of references corresponding to the prediction result.
+        aes_sum: The sum of the absolute errors.
+        aes_size: The number of the absolute errors.
         compare_label (bool): Whether to compare label. False if there are no 
           labels and will use FP32 preds as labels.
     """
     
     def __init__(self, compare_label=True):
-        """Initialize the list of prediction and labels.
+        """Initialize the running sum of absolute errors.
 
         Args:
             compare_label: Whether to compare label. False if there are no 
               labels and will use FP32 preds as labels.
         """
-        self.label_list = []
-        self.pred_list = []
+        self.aes_sum = 0
+        self.aes_size = 0
         self.compare_label = compare_label
 
     def update(self, preds, labels, sample_weight=None):
@@ -759,13 +814,15 @@ class MAE(BaseMetric):
             sample_weight: The sample weight.
         """
         preds, labels = _shape_validate(preds, labels)
-        self.label_list.extend(labels)
-        self.pred_list.extend(preds)
+        for (a, b) in zip(labels, preds):
+            ae = abs(a-b)
+            self.aes_sum += np.sum(ae)
+            self.aes_size += ae.size
 
     def reset(self):
         """Clear the predictions and labels."""
-        self.label_list = []
-        self.pred_list = []
+        self.aes_sum = 0
+        self.aes_size = 0
 
     def result(self):
         """Compute the MAE score.
@@ -773,9 +830,8 @@ class MAE(BaseMetric):
         Returns:
             The MAE score.
         """
-        aes = [abs(a-b) for (a,b) in zip(self.label_list, self.pred_list)]
-        aes_sum = sum([np.sum(ae) for ae in aes])
-        aes_size = sum([ae.size for ae in aes])
+        aes_sum = self.aes_sum
+        aes_size = self.aes_size
         assert aes_size, "predictions shouldn't be none"
         if getattr(self, '_hvd', None) is not None:
             aes_sum = sum(self._hvd.allgather_object(aes_sum))
@@ -836,21 +892,21 @@ class MSE(BaseMetric):
     and the actual values.
     
     Attributes:
-        pred_list: List of prediction to score.
-        label_list: List of references corresponding to the prediction result.
+        squares_sum: The sum of the squared errors.
+        squares_size: The number of the squared errors.
         compare_label (bool): Whether to compare label. False if there are no labels
                               and will use FP32 preds as labels.
     """
     
     def __init__(self, compare_label=True):
-        """Initialize the list of prediction and labels.
+        """Initialize the running sum of squared errors.
 
         Args:
             compare_label: Whether to compare label. False if there are no 
               labels and will use FP32 preds as labels.
         """
-        self.label_list = []
-        self.pred_list = []
+        self.squares_sum = 0
+        self.squares_size = 0
         self.compare_label = compare_label
 
     def update(self, preds, labels, sample_weight=None):
@@ -862,13 +918,15 @@ class MSE(BaseMetric):
             sample_weight: The sample weight.
         """
         preds, labels = _shape_validate(preds, labels)
-        self.pred_list.extend(preds)
-        self.label_list.extend(labels)
+        for (a, b) in zip(labels, preds):
+            square = (a-b)**2.0
+            self.squares_sum += np.sum(square)
+            self.squares_size += square.size
 
     def reset(self):
         """Clear the predictions and labels."""
-        self.label_list = []
-        self.pred_list = []
+        self.squares_sum = 0
+        self.squares_size = 0
 
     def result(self):
         """Compute the MSE score.
@@ -876,9 +934,8 @@ class MSE(BaseMetric):
         Returns:
             The MSE score.
         """
-        squares = [(a-b)**2.0 for (a,b) in zip(self.label_list, self.pred_list)]
-        squares_sum = sum([np.sum(square) for square in squares])
-        squares_size = sum([square.size for square in squares])
+        squares_sum = self.squares_sum
+        squares_size = self.squares_size
         assert squares_size, "predictions should't be None"
         if getattr(self, '_hvd', None) is not None:
             squares_sum = sum(self._hvd.allgather_object(squares_sum))
@@ -952,6 +1009,11 @@ class TensorflowTopK(BaseMetric):
             return allgather_num_correct / allgather_num_sample 
         return self.num_correct / self.num_sample
 
+    def running_mean(self):
+        """Get the running top-k score of this process and its number of samples."""
+        return (float(self.num_correct) / self.num_sample if self.num_sample else 0.), \
+            int(self.num_sample)
+
 
 @metric_registry('topk', 'pytorch, mxnet, onnxrt_qlinearops, onnxrt_integerops')
 class GeneralTopK(BaseMetric):
@@ -1019,6 +1081,11 @@ class GeneralTopK(BaseMetric):
             allgather_num_sample = sum(self._hvd.allgather_object(self.num_sample))
             return allgather_num_correct / allgather_num_sample
         return self.num_correct / self.num_sample
+
+    def running_mean(self):
+        """Get the running top-k score of this process and its number of samples."""
+        return (float(self.num_correct) / self.num_sample if self.num_sample else 0.), \
+            int(self.num_sample)
     
 
 @metric_registry('COCOmAPv2', 'tensorflow, tensorflow_itex, onnxrt_qlinearops, onnxrt_integerops')
@@ -1469,11 +1536,10 @@ class mIOU(BaseMetric):
         if getattr(self, '_hvd', None) is not None:
             preds = self._hvd.allgather_object(preds)
             labels = self._hvd.allgather_object(labels)
-            preds_list, labels_list = np.array([], dtype = p_dtype), np.array([], dtype = l_dtype)
-            for i in range(self._hvd.size()):
-                preds_list = np.append(preds_list, preds[i])
-                labels_list = np.append(labels_list, labels[i])
-            preds, labels = preds_list, labels_list
+            preds = np.concatenate([np.array([], dtype = p_dtype)] + \
+                [np.ravel(preds[i]) for i in range(self._hvd.size())])
+            labels = np.concatenate([np.array([], dtype = l_dtype)] + \
+                [np.ravel(labels[i]) for i in range(self._hvd.size())])
         mask = (labels >= 0) & (labels < self.num_classes)
         self.hist += np.bincount(
             self.num_classes * labels[mask].astype(int) +
@@ -1508,8 +1574,8 @@ class ONNXRTGLUE(BaseMetric):
         """
         assert task in ['mrpc', 'qqp', 'qnli', 'rte', 'sts-b', 'cola', \
             'mnli', 'wnli', 'sst-2'], 'Unsupported task type'
-        self.pred_list = None
-        self.label_list = None
+        self._preds = _GrowableBuffer()
+        self._labels = _GrowableBuffer()
         self.task = task
         self.return_key = {
             "cola": "mcc",
@@ -1536,17 +1602,23 @@ class ONNXRTGLUE(BaseMetric):
             preds = preds[0]
         if isinstance(labels, list) and len(labels) == 1:
             labels = labels[0]
-        if self.pred_list is None:
-            self.pred_list = preds
-            self.label_list = labels
-        else:
-            self.pred_list = np.append(self.pred_list, preds, axis=0)
-            self.label_list = np.append(self.label_list, labels, axis=0)
+        self._preds.append(preds)
+        self._labels.append(labels)
 
     def reset(self):
         """Reset the prediction and labels."""
-        self.pred_list = None
-        self.label_list = None
+        self._preds = _GrowableBuffer()
+        self._labels = _GrowableBuffer()
+
+    @property
+    def pred_list(self):
+        """Return the collected predictions."""
+        return self._preds.data
+
+    @property
+    def label_list(self):
+        """Return the collected labels."""
+        return self._labels.data
 
     def result(self):
         """Compute the GLUE score."""
@@ -1562,17 +1634,31 @@ class ONNXRTGLUE(BaseMetric):
 
 @metric_registry('ROC', 'pytorch')
 class ROC(BaseMetric):
-    """Computes ROC score."""
+    """Computes ROC score.
+
+    The accuracy of the rounded scores is returned and the area under the ROC curve is
+    kept in the roc_auc attribute. By default the scores and labels are collected to
+    compute the exact AUC. With num_bins set, only running counters and per-bin label
+    counts of the scores are kept, the AUC is approximated by treating the scores in the
+    same bin as ties, and the memory doesn't grow with the number of samples.
+
+    Attributes:
+        roc_auc: The area under the ROC curve computed by the last result call.
+    """
     
-    def __init__(self, task='dlrm'):
+    def __init__(self, task='dlrm', num_bins=None):
         """Initialize the metric.
 
         Args:
             task:The name of the task (Choices: dlrm, dien, wide_deep.).
+            num_bins: The number of equal-width bins over the score range [0, 1] for the
+              streaming AUC approximation, None to compute the exact AUC. Defaults to None.
         """
         assert task in ['dlrm', 'dien', 'wide_deep'], 'Unsupported task type'
-        self.pred_list = None
-        self.label_list = None
+        assert num_bins is None or num_bins > 0, 'num_bins should be a positive integer'
+        self.num_bins = num_bins
+        self.roc_auc = None
+        self.reset()
         self.task = task
         self.return_key = {
             "dlrm": "acc",
@@ -1591,23 +1677,62 @@ class ROC(BaseMetric):
             preds = preds[0]
         if isinstance(labels, list) and len(labels) == 1:
             labels = labels[0]
-        if self.pred_list is None:
-            self.pred_list = preds
-            self.label_list = labels
-        else:
-            self.pred_list = np.append(self.pred_list, preds, axis=0)
-            self.label_list = np.append(self.label_list, labels, axis=0)
+        if self.num_bins is None:
+            self._preds.append(preds)
+            self._labels.append(labels)
+            return
+        scores = np.asarray(preds).reshape(-1)
+        targets = np.asarray(labels).reshape(-1)
+        self.correct_num += np.sum(np.round(scores) == targets)
+        self.sample += targets.shape[0]
+        bins = np.clip((scores * self.num_bins).astype(np.int64), 0, self.num_bins - 1)
+        positive = targets == 1
+        self.pos_hist += np.bincount(bins[positive], minlength=self.num_bins)
+        self.neg_hist += np.bincount(bins[~positive], minlength=self.num_bins)
 
     def reset(self):
         """Reset the prediction and labels."""
-        self.pred_list = None
-        self.label_list = None
+        self._preds = _GrowableBuffer()
+        self._labels = _GrowableBuffer()
+        self.correct_num = 0
+        self.sample = 0
+        if self.num_bins is not None:
+            self.pos_hist = np.zeros(self.num_bins, dtype=np.int64)
+            self.neg_hist = np.zeros(self.num_bins, dtype=np.int64)
+
+    @property
+    def pred_list(self):
+        """Return the collected predictions."""
+        return self._preds.data
+
+    @property
+    def label_list(self):
+        """Return the collected labels."""
+        return self._labels.data
+
+    def _binned_auc(self):
+        """Approximate the AUC from the per-bin label counts, scores in one bin are ties."""
+        num_pos, num_neg = self.pos_hist.sum(), self.neg_hist.sum()
+        if num_pos == 0 or num_neg == 0:
+            return float('nan')
+        neg_below = np.cumsum(self.neg_hist) - self.neg_hist
+        pairs = np.sum(self.pos_hist * (neg_below + 0.5 * self.neg_hist))
+        return pairs / (num_pos * num_neg)
 
     def result(self):
         """Compute the ROC score."""
+        if self.num_bins is not None:
+            self.roc_auc = self._binned_auc()
+            return self.correct_num / self.sample
         import sklearn.metrics
         scores = np.squeeze(self.pred_list)
         targets = np.squeeze(self.label_list)
-        roc_auc = sklearn.metrics.roc_auc_score(targets, scores)
+        self.roc_auc = sklearn.metrics.roc_auc_score(targets, scores)
         acc = sklearn.metrics.accuracy_score(targets, np.round(scores))
         return acc
+
+    def running_mean(self):
+        """Get the running accuracy of the binned ROC, the exact ROC keeps no running counts."""
+        if self.num_bins is None:
+            return None
+        return (float(self.correct_num) / self.sample if self.sample else 0.), int(self.sample)
@@ -18,17 +18,143 @@
 """Class for ONNX model."""
 
 import os
+import copy
 import logging
 from pathlib import Path
 from neural_compressor.utils.utility import LazyImport
 from neural_compressor.model.base_model import BaseModel
 
 onnx = LazyImport('onnx')
-ort = LazyImport("onnxruntime")
 ortq = LazyImport("neural_compressor.adaptor.ox_utils.util")
 
 logger = logging.getLogger("neural_compressor")
 
+
+class _NameIndex(object):
+    """Name to protos index of a repeated field of the graph, e.g. the nodes or initializers.
+
+    The index is built on the first lookup and kept up to date by the add, remove and rename
+    methods of ONNXModel. It is rebuilt when the size of the field differs from the one it
+    indexes, so the field edited directly is detected. A proto found by a name it no longer
+    has is moved to its new name. Protos with the same name are kept in the field order, the
+    first one is returned like find_by_name does.
+    """
+
+    def __init__(self, model, field):
+        """Initialize a name index.
+
+        Args:
+            model (ONNXModel): the model.
+            field (str): the indexed field of the graph, 'node' or 'initializer'.
+        """
+        self._model = model
+        self._field = field
+        self._index = None
+        self._size = 0
+
+    def __deepcopy__(self, memo):
+        """Get an empty index of the copied model, the indexed protos are copied with it."""
+        return _NameIndex(copy.deepcopy(self._model, memo), self._field)
+
+    def __getstate__(self):
+        """Get the state without the index, the protos are pickled with the graph."""
+        state = self.__dict__.copy()
+        state['_index'] = None
+        state['_size'] = 0
+        return state
+
+    def __setstate__(self, state):
+        """Set the state, the index is rebuilt on the next lookup."""
+        self.__dict__.update(state)
+        self._index = None
+
+    def _get_field(self):
+        """Get the indexed repeated field."""
+        return getattr(self._model.model.graph, self._field)
+
+    def invalidate(self):
+        """Drop the index, it is rebuilt on the next lookup."""
+        self._index = None
+
+    def _build(self):
+        """Index the protos of the field by name."""
+        field = self._get_field()
+        self._index = {}
+        for proto in field:
+            self._index.setdefault(proto.name, []).append(proto)
+        self._size = len(field)
+
+    def get(self, name, scan_on_miss=False):
+        """Get the first proto with a name.
+
+        Args:
+            name (str): the name.
+            scan_on_miss (bool, optional): scan the field if the name isn't indexed, for the
+                protos renamed in place without ONNXModel. Defaults to False.
+
+        Returns:
+            The proto, None if there isn't one.
+        """
+        field = self._get_field()
+        if self._index is None or self._size != len(field):
+            self._build()
+        protos = self._index.get(name)
+        if protos and any(proto.name != name for proto in protos):
+            for proto in [proto for proto in protos if proto.name != name]:
+                self.renamed(proto, name)
+            protos = self._index.get(name)
+        if protos:
+            return protos[0]
+        if scan_on_miss:
+            for proto in field:
+                if proto.name == name:
+                    return proto
+        return None
+
+    def renamed(self, proto, old_name):
+        """Move the proto renamed in place from its old name to the new one."""
+        protos = None if self._index is None else self._index.get(old_name)
+        if not protos:
+            return
+        for i, item in enumerate(protos):
+            if item is proto:
+                break
+        else:
+            return
+        del protos[i]
+        if not protos:
+            del self._index[old_name]
+        self._index.setdefault(proto.name, []).append(proto)
+
+    def added(self, protos):
+        """Index the protos appended to the field, they are the protos in the field."""
+        if self._index is None or self._size + len(protos) != len(self._get_field()):
+            self._index = None
+            return
+        for proto in protos:
+            self._index.setdefault(proto.name, []).append(proto)
+        self._size += len(protos)
+
+    def removed(self, proto):
+        """Drop the proto removed from the field."""
+        protos = None if self._index is None else self._index.get(proto.name)
+        if not protos or self._size - 1 != len(self._get_field()):
+            self._index = None
+            return
+        for i, item in enumerate(protos):
+            if item is proto:
+                break
+        else:
+            i = protos.index(proto) if proto in protos else None
+        if i is None:
+            self._index = None
+            return
+        del protos[i]
+        if not protos:
+            del self._index[proto.name]
+        self._size -= 1
+
+
 class ONNXModel(BaseModel):
     """Build ONNX model."""
 
@@ -40,16 +166,13 @@ class ONNXModel(BaseModel):
         """
         self._model = model if not isinstance(model, str) else onnx.load(model)
         self._model_path = None if not isinstance(model, str) else model
-        self._large_size = False
-        try:
-            ort.InferenceSession(self._model.SerializeToString())
-        except Exception as e:  # pragma: no cover
-            if 'Message onnx.ModelProto exceeds maximum protobuf size of 2GB' in str(e):
-                self._large_size = True
-                if self._model_path is None:
-                    logger.warning('Please use model path instead of onnx model '
-                                   'object to quantize')
+        self._large_size = ortq.is_large_model(self._model)
+        if self._large_size and self._model_path is None:  # pragma: no cover
+            logger.warning('Please use model path instead of onnx model '
+                           'object to quantize')
         self.node_name_counter = {}
+        self._node_index = _NameIndex(self, 'node')
+        self._initializer_index = _NameIndex(self, 'initializer')
         self._output_name_to_node = {}
         self._input_name_to_nodes = {}
         self._get_input_name_to_nodes(self._model.graph.node)
@@ -96,6 +219,8 @@ class ONNXModel(BaseModel):
     def model(self, model):
         """Set model itself."""
         self._model = model
+        self._node_index.invalidate()
+        self._initializer_index.invalidate()
         self._graph_info = {}
         self._get_graph_info()
         self._output_name_to_node = {}
@@ -113,6 +238,8 @@ class ONNXModel(BaseModel):
 
     def update(self):
         """Update model info."""
+        self._node_index.invalidate()
+        self._initializer_index.invalidate()
         self._graph_info = {}
         self._get_graph_info()
         self._output_name_to_node = {}
@@ -168,6 +295,7 @@ class ONNXModel(BaseModel):
         """Remove a node from model."""
         if node in self._model.graph.node:
             self._model.graph.node.remove(node)
+            self._node_index.removed(node)
 
     def remove_nodes(self, nodes_to_remove):
         """Remove nodes from model."""
@@ -177,32 +305,48 @@ class ONNXModel(BaseModel):
     def add_node(self, node):
         """Add a node to model."""
         self._model.graph.node.extend([node])
+        self._node_index.added(self._model.graph.node[-1:])
 
     def add_nodes(self, nodes_to_add):
         """Add nodes to model."""
-        self._model.graph.node.extend(nodes_to_add)
+        nodes = self._model.graph.node
+        nodes.extend(nodes_to_add)
+        self._node_index.added(nodes[len(nodes) - len(nodes_to_add):])
+
+    def get_node(self, name):
+        """Get a node by name."""
+        return self._node_index.get(name, scan_on_miss=True)
+
+    def node_renamed(self, node, old_name):
+        """Update the node index for a node renamed in place."""
+        self._node_index.renamed(node, old_name)
 
     def add_initializer(self, tensor):
         """Add a initializer to model."""
-        if ortq.find_by_name(tensor.name, self._model.graph.initializer) is None:
+        if self.get_initializer(tensor.name) is None:
             self._model.graph.initializer.extend([tensor])
+            self._initializer_index.added(self._model.graph.initializer[-1:])
 
     def add_initializers(self, tensors):
         """Add initializers to model."""
         for tensor in tensors:
             self.add_initializer(tensor)
 
+    def extend_initializers(self, tensors):
+        """Append initializers to model, the ones with an existing name are appended too."""
+        initializers = self._model.graph.initializer
+        initializers.extend(tensors)
+        self._initializer_index.added(initializers[len(initializers) - len(tensors):])
+
     def get_initializer(self, name):
         """Get an initializer by name."""
-        for tensor in self._model.graph.initializer:
-            if tensor.name == name:
-                return tensor
-        return None
+        return self._initializer_index.get(name)
 
     def remove_initializer(self, tensor):
         """Remove an initializer from model."""
         if tensor in self._model.graph.initializer:
             self._model.graph.initializer.remove(tensor)
+            self._initializer_index.removed(tensor)
 
     def remove_initializers(self, init_to_remove):
         """Remove initializers from model."""
@@ -292,6 +436,10 @@ class ONNXModel(BaseModel):
 
     def find_node_by_name(self, node_name, new_nodes_list, graph):
         """Find out node by name."""
+        if graph is self._model.graph:
+            # the nodes looked up here are the new ones mostly, a miss doesn't rebuild the index
+            node = self._node_index.get(node_name)
+            return node if node is not None else ortq.find_by_name(node_name, new_nodes_list)
         graph_nodes_list = list(graph.node)  #deep copy
         graph_nodes_list.extend(new_nodes_list)
         node = ortq.find_by_name(node_name, graph_nodes_list)
@@ -455,6 +603,7 @@ class ONNXModel(BaseModel):
             len(list(set([n.name for n in self.model.graph.node])))
         self.model.graph.ClearField('node')
         self.model.graph.node.extend(nodes)
+        self._node_index.invalidate()
 
     def get_nodes_chain(self, start_node, stop_node, result_chain=[]):
         """Get nodes chain with given start node and stop node."""
@@ -467,7 +616,7 @@ class ONNXModel(BaseModel):
             else:
                 continue
 
-            node = ortq.find_by_name(node_name, list(self.model.graph.node))
+            node = self.get_node(node_name)
             for parent in self.get_parents(node):
                 start_node.append(parent.name)
 
@@ -26,6 +26,7 @@ from copy import deepcopy
 
 import tracemalloc
 from .utils.utility import get_size
+from .utils.latency_stats import LatencyRecorder
 
 OBJECTIVES = {}
 
@@ -62,7 +63,7 @@ class Objective(object):
     def reset(self):
         """The interface reset benchmark measuring."""
         self._result_list = []
-        return self._result_list
+        return self.result_list()
 
     @abstractmethod
     def start(self):
@@ -133,6 +134,23 @@ class Performance(Objective):
     """Configuration Performance class."""
     representation = 'duration (seconds)'
 
+    @property
+    def _result_list(self):
+        """The durations are kept in an array-backed LatencyRecorder."""
+        return self._recorder.values
+
+    @_result_list.setter
+    def _result_list(self, durations):
+        self._recorder = LatencyRecorder()
+        self._recorder.extend(durations)
+
+    def result_list(self):
+        """The interface to get benchmark measuring result list.
+
+        The durations are copied from the recorder into a list of floats.
+        """
+        return self._recorder.values.tolist()
+
     def start(self):
         """Record the start time."""
         self.start_time = time.time()
@@ -140,7 +158,7 @@ class Performance(Objective):
         """Record the duration time."""
         self.duration = time.time() - self.start_time
         assert self.duration >= 0, 'please use start() before end()'
-        self._result_list.append(self.duration)
+        self._recorder.append(self.duration)
 
 @objective_registry
 class Footprint(Objective):
@@ -219,7 +237,9 @@ class MultiObjective:
         
     @property
     def accuracy_target(self):
-        """Set the accuracy target."""
+        """Get the accuracy target, it's computed from the baseline at the first access."""
+        if self._accuracy_target is None and self._baseline is not None:
+            self._accuracy_target = self._get_accuracy_target()
         return self._accuracy_target
     
     @accuracy_target.setter
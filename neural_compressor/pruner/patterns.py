@@ -74,6 +74,70 @@ def get_pattern(config, modules):
 SparsityInfo = namedtuple("SparsityInfo", ['zero_cnt', 'total_cnt', 'sparsity_ratio'])
 
 
+def get_global_kthvalue(tensors, k, bins=1024, chunk_size=2 ** 20):
+    """Get the k-th smallest value of several tensors without concatenating them.
+
+    The values are counted into histograms of equal-width bins, chunk by chunk, and the search
+    descends into the bin holding the k-th value until the values left in it are not more than
+    the elements of the largest tensor. Only those candidates are gathered for torch.kthvalue,
+    so the peak memory is about the size of one layer rather than of the whole model. The result
+    is the same as torch.kthvalue(torch.cat(tensors), k).
+
+    Args:
+        tensors: A list of Tensors, e.g. the pruning scores of the layers.
+        k: An integer, the 1-based rank of the value to find.
+        bins: An integer, the number of histogram bins of each pass.
+        chunk_size: An integer, the number of elements processed at a time.
+
+    Returns:
+        A 0-dim Tensor, the k-th smallest value.
+    """
+    tensors = [t.detach().flatten() for t in tensors if t.numel() > 0]
+    total_cnt = sum(t.numel() for t in tensors)
+    k = int(k)
+    assert 0 < k <= total_cnt, f"k should be in [1, {total_cnt}], but got {k}"
+    if len(tensors) == 1:
+        return torch.kthvalue(tensors[0], k)[0]
+    lowest = min(t.min() for t in tensors)
+    highest = max(t.max() for t in tensors)
+    if not (torch.isfinite(lowest) and torch.isfinite(highest)):
+        return torch.kthvalue(torch.cat(tensors), k)[0]
+
+    def get_bins(values, origin, scale):
+        # monotonic in the values, so every bin holds a contiguous range of them
+        return ((values.double() - origin) * scale).floor_().clamp_(0, bins - 1).long()
+
+    # the (origin, scale, bin) of the bins the search descended into
+    selected_bins = []
+
+    def iter_candidates():
+        for tensor in tensors:
+            for chunk in tensor.split(chunk_size):
+                for origin, scale, index in selected_bins:
+                    chunk = chunk[get_bins(chunk, origin, scale) == index]
+                yield chunk
+
+    max_cnt = max(t.numel() for t in tensors)
+    cnt = total_cnt
+    while cnt > max_cnt:
+        if lowest == highest:
+            return lowest
+        origin, scale = float(lowest), bins / (float(highest) - float(lowest))
+        counts = torch.zeros(bins, dtype=torch.long, device=tensors[0].device)
+        for values in iter_candidates():
+            counts += torch.bincount(get_bins(values, origin, scale), minlength=bins)
+        cumsum = counts.cumsum(0)
+        index = int(torch.searchsorted(cumsum, k))
+        if index > 0:
+            k -= int(cumsum[index - 1])
+        selected_bins.append((origin, scale, index))
+        cnt = int(counts[index])
+        if cnt > max_cnt:
+            lowest = min(values.min() for values in iter_candidates() if values.numel() > 0)
+            highest = max(values.max() for values in iter_candidates() if values.numel() > 0)
+    return torch.kthvalue(torch.cat(list(iter_candidates())), k)[0]
+
+
 class BasePattern:
     """Pruning Pattern.
 
@@ -96,6 +160,10 @@ class BasePattern:
         max_sparsity_ratio_per_op: A float representing the maximum sparsity that one layer could reach.
         min_sparsity_ratio_per_op: A float representing the minimum sparsity that one layer could reach.
         target_sparsity: A float representing the sparsity ratio of the modules after pruning.
+
+    The masks are bool tensors, True means unpruned. A pattern may keep the masks in a compact form,
+    e.g. one value per block, which is only expanded to the weight shape when it's applied, see
+    expand_mask and apply_mask.
     """
 
     def __init__(self, config, modules):
@@ -189,11 +257,9 @@ class BasePattern:
         k = int(exact_sparsity_ratio * flattern_score.numel())
         threshold, _ = torch.kthvalue(flattern_score, k)
         if not k < 1:
-            zero = torch.tensor([0.]).to(score.device)
-            one = torch.tensor([1.]).to(score.device)
-            mask = torch.where(score <= threshold, zero, one)
+            mask = score > threshold
         else:
-            mask = torch.ones(score.shape, device=score.device)
+            mask = torch.ones(score.shape, dtype=torch.bool, device=score.device)
         return mask
 
     def get_block_size_dict(self, data):
@@ -242,12 +308,43 @@ class BasePattern:
         pattern_lock_masks = {}
         for key in modules.keys():
             weight = modules[key].weight
-            shape = weight.shape
-            mask = torch.ones(shape)
-            mask[weight == 0] = 0.0
-            pattern_lock_masks[key] = mask.to(weight.device)
+            pattern_lock_masks[key] = weight != 0
         return pattern_lock_masks
 
+    def expand_mask(self, mask, key):
+        """Expand a mask of the layer to the shape of its weight.
+
+        Args:
+            mask: The mask, in the compact form of the pattern or in the weight shape.
+            key: The layer name.
+
+        Returns:
+            The mask in the weight shape.
+        """
+        return mask
+
+    def apply_mask(self, weight, mask, key):
+        """Multiply the weight with the mask in place.
+
+        Args:
+            weight: The weight data.
+            mask: The mask, in the compact form of the pattern or in the weight shape.
+            key: The layer name.
+        """
+        weight.mul_(self.expand_mask(mask, key))
+
+    def get_element_zero_cnt(self, mask, key):
+        """Count the pruned weight elements of a mask without expanding it.
+
+        Args:
+            mask: The mask, in the compact form of the pattern or in the weight shape.
+            key: The layer name.
+
+        Returns:
+            An int, the number of pruned elements.
+        """
+        return int(torch.sum(mask == 0).data.item())
+
     def check_layer_validity(self):
         """Check if a layer is valid for this block_size."""
         pass
@@ -386,6 +483,9 @@ class PatternNxM(BasePattern):
             block_size: A list of two integers representing the height and width of the block.
             Please note that the vertical direction of a Linear layer's weight refers to the output channel.
                 because PyTorch's tensor matmul has a hidden transpose operation.
+
+    The masks of the valid layers are kept at block granularity, i.e. in shape [s1/N, s2/M] of the
+    two-dimensional weight, so a 4x1 mask takes 1/16 of the memory of a float32 mask of the weight shape.
     """
 
     def __init__(self, config, modules):
@@ -456,6 +556,8 @@ class PatternNxM(BasePattern):
             The unpruned weights.
         """
         assert key not in self.invalid_layers
+        if self.is_block_mask(data, key):
+            return data != 0
         block_size = self.block_size[key]
         data = self._reshape_orig_to_2dims(data)
         shape = data.shape
@@ -508,10 +610,47 @@ class PatternNxM(BasePattern):
             if key in self.invalid_layers:
                 continue
             # progressive masks are unstructured, therefore directly find zeros
-            zero_cnt += float(torch.sum(pre_masks[key] == 0).data.item())
-            total_cnt += float(pre_masks[key].numel())
+            zero_cnt += float(self.get_element_zero_cnt(pre_masks[key], key))
+            total_cnt += float(self.modules[key].weight.numel())
         return (zero_cnt / total_cnt)
 
+    def is_block_mask(self, mask, key):
+        """Check whether a mask of the layer is at block granularity.
+
+        A mask in the weight shape and a block-level mask are only the same shape for 1x1 blocks,
+        where they are identical as well.
+        """
+        return key not in self.invalid_layers and \
+            tuple(mask.shape) != tuple(self.modules[key].weight.shape)
+
+    def expand_mask(self, mask, key):
+        """Expand a block-level mask to the shape of the weight, please refer to BasePattern.expand_mask."""
+        if not self.is_block_mask(mask, key):
+            return mask
+        return self.reshape_reduced_to_orig(mask, key, self.modules[key].weight.shape)
+
+    def apply_mask(self, weight, mask, key):
+        """Multiply the weight with the mask in place, please refer to BasePattern.apply_mask.
+
+        A block-level mask of a two-dimensional weight is broadcast over the blocks instead of
+        being expanded.
+        """
+        if self.is_block_mask(mask, key) and weight.dim() == 2 and weight.is_contiguous():
+            block_size = self.block_size[key]
+            shape = weight.shape
+            weight.view(shape[0] // block_size[0], block_size[0], shape[1] // block_size[1],
+                        block_size[1]).mul_(mask[:, None, :, None])
+        else:
+            weight.mul_(self.expand_mask(mask, key))
+
+    def get_element_zero_cnt(self, mask, key):
+        """Count the pruned weight elements, please refer to BasePattern.get_element_zero_cnt."""
+        zero_cnt = int(torch.sum(mask == 0).data.item())
+        if self.is_block_mask(mask, key):
+            block_size = self.block_size[key]
+            zero_cnt *= block_size[0] * block_size[1]
+        return zero_cnt
+
     def _reshape_orig_to_2dims(self, data):
         """Process layers that are not two-dimensional(e.g conv layer).
 
@@ -601,12 +740,8 @@ class PatternNxM(BasePattern):
         return new_scores
 
     def get_mask_per_threshold(self, score, threshold, block_size):
-        """Get the mask per threshold."""
-        zero = torch.tensor([0.]).to(score.device)
-        one = torch.tensor([1.]).to(score.device)
-        mask = torch.where(score <= threshold, zero, one)
-        mask = mask.repeat_interleave(block_size[0], dim=0).repeat_interleave(block_size[1], dim=-1)
-        return mask
+        """Get the block-level mask per threshold."""
+        return score > threshold
 
     def get_masks_global(self, scores, cur_target_sparsity_ratio, pre_masks,
                          keep_exact_sparsity_ratio=True):
@@ -634,14 +769,14 @@ class PatternNxM(BasePattern):
         if k_blockwise <= 0:
             return masks
         new_scores = self.reduce_scores(scores)
-        global_scores = torch.cat([torch.flatten(v) for v in new_scores.values()])
+        global_scores = list(new_scores.values())
         residual_k = k_blockwise
         not_exceed_layers = [key for key in new_scores.keys()]
         if self.min_sparsity_ratio_per_op > 0:
             sparsity_infos_perlayer, _ = self.get_sparsity_ratio_each_layer(masks)
 
         while True:
-            threshold, _ = torch.kthvalue(global_scores, residual_k)
+            threshold = get_global_kthvalue(global_scores, residual_k)
             for key in not_exceed_layers:
                 block_size = self.block_size[key]
                 score = new_scores[key]
@@ -659,7 +794,6 @@ class PatternNxM(BasePattern):
                     # uptade status
                     self.keep_mask_layers[key] = True
                     masks[key] = self.get_single_mask_per_target_ratio(new_scores[key], adjust_ratio)
-                    masks[key] = masks[key].repeat_interleave(block_size[0], 0).repeat_interleave(block_size[1], -1)
                     if keep_exact_sparsity_ratio:
                         zero_cnt = self.get_sparsity_ratio({key: masks[key]}, return_dict=True)["zero_cnt"]
                         residual_k -= zero_cnt
@@ -671,17 +805,12 @@ class PatternNxM(BasePattern):
             if not_exceed_layers == new_not_exceed_layers or len(new_not_exceed_layers) == 0:
                 break
             not_exceed_layers = new_not_exceed_layers
-            global_scores = torch.cat([torch.flatten(new_scores[key]) for key in not_exceed_layers])
+            global_scores = [new_scores[key] for key in not_exceed_layers]
 
         for key in masks.keys():
             if key in self.invalid_layers:
                 continue
-            if len(scores[key].shape) == 4:  ## need to permute
-                mask = masks[key]
-                orig_shape = scores[key].shape
-                mask = self._reshape_2dims_to_orig(mask, orig_shape)
-                masks[key] = mask
-            layer_ratio = torch.sum(masks[key] == 0.0).data.item() / masks[key].numel()
+            layer_ratio = self.get_element_zero_cnt(masks[key], key) / self.modules[key].weight.numel()
             logger.info(f'layer {key} sparsity_ratio is {layer_ratio}')
         return masks
 
@@ -697,14 +826,11 @@ class PatternNxM(BasePattern):
         pattern_lock_masks = {}
         for key in modules.keys():
             weight = modules[key].weight
-            ori_shape = weight.shape
             if key in self.invalid_layers:
-                mask = torch.ones(weight.shape, device=weight.device)
+                mask = torch.ones(weight.shape, dtype=torch.bool, device=weight.device)
                 pattern_lock_masks[key] = mask
                 continue
-            reduced_mask = self.get_reduced_masks_from_data(weight, key)
-            mask = self.reshape_reduced_to_orig(reduced_mask, key, ori_shape)
-            pattern_lock_masks[key] = mask
+            pattern_lock_masks[key] = self.get_reduced_masks_from_data(weight, key)
         return pattern_lock_masks
 
     # ---------------progressive related--------------------
@@ -759,6 +885,9 @@ class PatternNxM(BasePattern):
         Returns:
             A dict{"layer_name": Tensor} that stores the masks generated in progressive pruning.
         """
+        # progressive masks are finer than the blocks
+        pre_masks = {key: self.expand_mask(pre_masks[key], key) for key in pre_masks.keys()}
+        cur_masks = {key: self.expand_mask(cur_masks[key], key) for key in cur_masks.keys()}
         use_global = progressive_configs["use_global"]
         if use_global:
             return self.update_progressive_masks_global(pre_masks, cur_masks, scores, \
@@ -803,7 +932,7 @@ class PatternNxM(BasePattern):
                 new_added_mask_reshape[:, :, :, progressive_step:, :] = 1.0
             new_added_mask = new_added_mask_reshape.reshape(shape)
             new_added_mask = self._reshape_2dims_to_orig(new_added_mask, pre_masks[key].shape)
-            progressive_masks[key] = pre_masks[key] * new_added_mask
+            progressive_masks[key] = (pre_masks[key] * new_added_mask) != 0
         return progressive_masks
 
     def update_progressive_masks_scores(self, pre_masks, cur_masks, scores, progressive_step, progressive_configs):
@@ -850,7 +979,7 @@ class PatternNxM(BasePattern):
 
             mask = self._reshape_2dims_to_orig(mask, pre_masks[key].shape)
             progressive_mask = pre_masks[key] * (mask + new_added_masks[key])
-            progressive_masks[key] = torch.where(progressive_mask == 0, zero, one)  # binary
+            progressive_masks[key] = progressive_mask != 0  # binary
         return progressive_masks
 
     def update_progressive_masks_local(self, pre_masks, cur_masks, scores, progressive_step, progressive_configs):
@@ -908,11 +1037,10 @@ class PatternNxM(BasePattern):
             score_masked_row = score_masked_row[:new_added_cnts]
             global_new_added_score_list.append(score_masked_row)
 
-        global_new_added_scores = torch.cat(global_new_added_score_list, dim=0)
-        if global_new_added_scores.size()[0] == 0:
+        if sum(score.numel() for score in global_new_added_score_list) == 0:
             # an empty tensor, at target sparsity is 0 situation
             return pre_masks
-        threshold, _ = torch.kthvalue(global_new_added_scores, kth_masked_position, dim=0)
+        threshold = get_global_kthvalue(global_new_added_score_list, kth_masked_position)
         for key in scores.keys():
             new_added_mask = new_added_masks[key]
             score = scores[key]
@@ -921,7 +1049,7 @@ class PatternNxM(BasePattern):
             zero = torch.tensor([0.]).to(score.device)
             one = torch.tensor([1.]).to(score.device)
             progressive_mask = (new_added_mask + torch.where(score_masked <= threshold, zero, one)) * pre_masks[key]
-            progressive_masks[key] = progressive_mask
+            progressive_masks[key] = progressive_mask != 0
         return progressive_masks
 
 
@@ -1009,9 +1137,7 @@ class PatternNInM(BasePattern):
         threshold = threshold.expand(shape[0], shape[1] // M, M)
         threshold = threshold.reshape((shape[0], shape[1]))
 
-        one = torch.tensor([1.]).to(current_score.device)
-        zero = torch.tensor([0.]).to(current_score.device)
-        mask = torch.where(current_score <= threshold, zero, one)
+        mask = current_score > threshold
         return mask
 
     def get_sparsity_ratio(self, pre_masks, return_dict=False):
@@ -1126,7 +1252,7 @@ class PatternNInM(BasePattern):
             shape = current_score_new.shape
             current_score_new = current_score_new.reshape((shape[0], shape[1]))
             ##to get the sum of N scores in each block with M
-            current_score_new = current_score_new * (1.0 - mask)
+            current_score_new = current_score_new * mask.logical_not()
             current_score_new = current_score_new.reshape(shape[0], shape[1] // M, M)
             score_sum = self.reduce_tensor(current_score_new, dim=-1)
             least_ninm_masks[key] = mask
@@ -1145,13 +1271,9 @@ class PatternNInM(BasePattern):
         Returns:
             mask: The elementwise pruning mask.
         """
-        zero = torch.tensor([0.]).to(score.device)
-        one = torch.tensor([1.]).to(score.device)
-        mask = torch.where(score <= threshold, zero, one)
-        mask = mask.repeat_interleave(block_size[1], dim=-1)
+        mask = (score > threshold).repeat_interleave(block_size[1], dim=-1)
         ## both zero will be zero
-        mask = (mask + least_ninm_mask)
-        mask = torch.where(mask <= 0, zero, one)
+        mask = mask | least_ninm_mask
         return mask
 
     def get_masks_global(self, scores, cur_target_sparsity_ratio, pre_masks,
@@ -1178,12 +1300,12 @@ class PatternNInM(BasePattern):
         if k_blockwise <= 0:
             return masks
         new_scores, least_ninm_masks = self.reduce_scores(scores)
-        global_scores = torch.cat([torch.flatten(v) for v in new_scores.values()])  ##block_wise
+        global_scores = list(new_scores.values())  ##block_wise
         residual_k = k_blockwise
         not_exceed_layers = [key for key in new_scores.keys()]
 
         while True:
-            threshold, _ = torch.kthvalue(global_scores, residual_k)
+            threshold = get_global_kthvalue(global_scores, residual_k)
             for key in not_exceed_layers:
                 score = new_scores[key]
                 mask = self.get_ele_mask_per_threshold(score, threshold, (self.N, self.M), least_ninm_masks[key])
@@ -1202,10 +1324,7 @@ class PatternNInM(BasePattern):
                     masks[key] = self.get_single_mask_per_target_ratio(new_scores[key], adjust_ratio)
                     masks[key] = masks[key].repeat_interleave(self.M, dim=-1)
                     ## both zero will be zero
-                    masks[key] = (masks[key] + least_ninm_masks[key])
-                    zero = torch.tensor([0.]).to(score.device)
-                    one = torch.tensor([1.]).to(score.device)
-                    masks[key] = torch.where(masks[key] <= 0, zero, one)
+                    masks[key] = masks[key] | least_ninm_masks[key]
                     if keep_exact_sparsity_ratio:
                         zero_cnt = self.get_sparsity_ratio({key: masks[key]}, return_dict=True)["zero_cnt"]
                         residual_k -= zero_cnt
@@ -1217,14 +1336,14 @@ class PatternNInM(BasePattern):
             if not_exceed_layers == new_not_exceed_layers or len(new_not_exceed_layers) == 0:
                 break
             not_exceed_layers = new_not_exceed_layers
-            global_scores = torch.cat([torch.flatten(new_scores[key]) for key in not_exceed_layers])
+            global_scores = [new_scores[key] for key in not_exceed_layers]
 
         for key in masks.keys():
             if key in self.invalid_layers:
                 continue
-            if len(scores[key].shape) == 4:  ## need to permute
+            orig_shape = scores[key].shape
+            if len(orig_shape) == 4 and masks[key].shape != orig_shape:  ## need to permute
                 mask = masks[key]
-                orig_shape = scores[key].shape
                 mask = self._reshape_2dims_to_orig(mask, orig_shape)
                 masks[key] = mask
             layer_ratio = torch.sum(masks[key] == 0.0).data.item() / masks[key].numel()
@@ -1245,7 +1364,7 @@ class PatternNInM(BasePattern):
             weight = modules[key].weight
             orig_shape = weight.shape
             if key in self.invalid_layers:
-                mask = torch.ones(orig_shape, device=weight.device)
+                mask = torch.ones(orig_shape, dtype=torch.bool, device=weight.device)
                 pattern_lock_masks[key] = mask
                 continue
             mask = self.get_least_ninm_mask_from_data(weight)
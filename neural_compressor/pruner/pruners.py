@@ -103,7 +103,8 @@ class BasePruner:
     Attributes:
         modules: A dict {"module_name": Tensor} that stores the pruning modules' weights.
         config: A config dict object that contains the pruner information.
-        masks: A dict {"module_name": Tensor} that stores the masks for modules' weights.
+        masks: A dict {"module_name": Tensor} that stores the bool masks for modules' weights, possibly in
+            the compact form of the pattern.
         scores: A dict {"module_name": Tensor} that stores the score for modules' weights,
             which are used to determine what parts to be pruned by a criterion.
         pattern: A Pattern object defined in ./patterns.py
@@ -139,7 +140,9 @@ class BasePruner:
 
         for key in self.modules.keys():
             module = self.modules[key]
-            self.masks[key] = torch.ones(module.weight.shape).to(module.weight.device)  ##TODO support bias or others
+            # an all-ones mask broadcast from a single element, it doesn't take the memory of the weight
+            self.masks[key] = torch.ones((), dtype=torch.bool, device=module.weight.device).expand(
+                module.weight.shape)  ##TODO support bias or others
 
         self.target_sparsity_ratio = self.config['target_sparsity']
         self.current_sparsity_ratio = 0.0
@@ -159,15 +162,13 @@ class BasePruner:
         
         Weights are multipled with masks. This is the formal pruning process.
         """
-        with torch.no_grad():
-            for key in self.modules.keys():
-                module = self.modules[key]
-                module.weight.data = module.weight.data * self.masks[key]
+        self.mask_weights_general(self.masks)
 
     def mask_weights_general(self, input_masks):
         """Apply input masks to corresponding modules' weights.
         
-        Weights are multipled with input_masks. 
+        Weights are multipled with input_masks in place, a compact mask is only expanded by the pattern
+        at this point.
 
         Args:
             input_masks: A dict {"module_name": Tensor} that stores the masks for modules' weights.
@@ -175,7 +176,7 @@ class BasePruner:
         with torch.no_grad():
             for key in self.modules.keys():
                 module = self.modules[key]
-                module.weight.data = module.weight.data * input_masks[key]
+                self.pattern.apply_mask(module.weight.data, input_masks[key], key)
 
     def on_step_begin(self, local_step):
         """Implement at the start of each step."""
@@ -93,7 +93,7 @@ class Pruning:
                 cnt += modules[key].weight.numel()
             pattern_sparsity_cnt += int(cnt * sparsity_ratio)
             for key in pruner.masks.keys():
-                element_sparsity_cnt += torch.sum(pruner.masks[key] == 0).data.item()
+                element_sparsity_cnt += pruner.pattern.get_element_zero_cnt(pruner.masks[key], key)
 
         linear_conv_cnt = 0
         param_cnt = 0
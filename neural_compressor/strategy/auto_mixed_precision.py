@@ -104,6 +104,8 @@ class AutoMixedPrecisionTuneStrategy(TuneStrategy):
 
     def traverse(self):
         """Traverse the tuning space according to auto-mixed precision strategy."""
+        # the traverse is overridden, the trials aren't run by the parallel workers
+        self._warn_sequential_trials()
         # get fp32 model baseline
         if self.baseline is None and (self.eval_dataloader or self.eval_func):
             logger.info("Get FP32 model baseline.")
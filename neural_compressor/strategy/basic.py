@@ -97,6 +97,7 @@ class BasicTuneStrategy(TuneStrategy):
                 for op_index, op_tuning_cfg in enumerate(fallback_sampler):
                     op_tuning_cfg['calib_sampling_size'] = calib_sampling_size
                     yield op_tuning_cfg
+                    # commits the pending parallel trials, the fallback runs one trial at a time
                     acc, _ = self.last_tune_result
                     op_fallback_acc_impact[fallback_items_name_lst[op_index]] = acc
 
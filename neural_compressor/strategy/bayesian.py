@@ -36,6 +36,9 @@ from .utils.tuning_structs import OpTuningConfig
 @strategy_registry
 class BayesianTuneStrategy(TuneStrategy):
     """The Bayesian tuning strategy."""
+
+    # every config is generated from the results of the previous ones
+    parallel_trials = False
     
     def __init__(self, model, conf, q_dataloader, q_func=None, eval_dataloader=None, 
                  eval_func=None, dicts=None, q_hooks=None):
@@ -101,6 +101,8 @@ class ConservativeTuneStrategy(TuneStrategy):
 
     def traverse(self):
         """Traverse the tuning space."""
+        # the traverse is overridden, the trials aren't run by the parallel workers
+        self._warn_sequential_trials()
         if not (self.cfg.evaluation and self.cfg.evaluation.accuracy and \
             (self.cfg.evaluation.accuracy.metric or self.cfg.evaluation.accuracy.multi_metrics)) \
             and self.eval_func is None:
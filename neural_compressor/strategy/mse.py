@@ -18,11 +18,13 @@
 """MSE tuning strategy."""
 
 from copy import deepcopy
+import hashlib
 import numpy as np
 from collections import OrderedDict
 from typing import Dict, Any, List
 from .strategy import strategy_registry, TuneStrategy
 from ..utils import logger
+from ..utils.baseline_cache import stable_repr, dataloader_fingerprint
 from time import time 
 
 from .utils.tuning_sampler import OpTypeWiseTuningSampler, FallbackTuningSampler
@@ -75,6 +77,80 @@ class MSETuneStrategy(TuneStrategy):
         euclidean_dist = np.sum(diff_tensor ** 2)
         return euclidean_dist / fp32_tensor.size
 
+    def _fp32_tensors_name(self, op_name_lst, tune_cfg):
+        # the fused FP32 model inspected by some adaptors depends on the tuning config
+        key = stable_repr([op_name_lst, tune_cfg, dataloader_fingerprint(self.calib_dataloader)])
+        return 'activation_' + hashlib.sha256(key.encode()).hexdigest()[:32]
+
+    def _load_fp32_tensors(self, op_name_lst, tune_cfg):
+        """Load the FP32 activations of the ops dumped by a previous run from the baseline cache."""
+        if self._baseline_cache is None:
+            return None
+        return self._baseline_cache.load_arrays(self._fp32_tensors_name(op_name_lst, tune_cfg))
+
+    def _save_fp32_tensors(self, op_name_lst, tune_cfg, fp32_tensor_dict):
+        """Save the FP32 activations of the ops to the baseline cache."""
+        if self._baseline_cache is not None:
+            self._baseline_cache.save_arrays(self._fp32_tensors_name(op_name_lst, tune_cfg),
+                                             fp32_tensor_dict)
+
+    def _dumped_ops_mse(self, op_name_lst, fp32_model, tune_cfg):
+        """Calculate the MSE of the ops from the activations dumped by inspect_tensor."""
+        fp32_tensor_dict = self._load_fp32_tensors(op_name_lst, tune_cfg)
+        if fp32_tensor_dict is None:
+            fp32_dump_content = self.adaptor.inspect_tensor(fp32_model, 
+                self.calib_dataloader, op_name_lst, [1], inspect_type='activation', 
+                save_to_disk=True, save_path="./nc_workspace/", 
+                quantization_cfg=tune_cfg)
+            fp32_tensor_dict = fp32_dump_content['activation'][0]
+            self._save_fp32_tensors(op_name_lst, tune_cfg, fp32_tensor_dict)
+        best_qmodel = self.q_model = self.adaptor.quantize(tune_cfg, self.model, \
+                                                           self.calib_dataloader, self.q_func)
+        quant_dump_content = self.adaptor.inspect_tensor(best_qmodel, 
+            self.calib_dataloader, op_name_lst, [1], inspect_type='activation',
+            save_to_disk=True, save_path="./nc_workspace/", 
+            quantization_cfg=tune_cfg)
+        dequantize_tensor_dict = quant_dump_content['activation'][0]
+        return {
+            op: self._mse_metric_gap(
+                list(fp32_tensor_dict[op].values())[0],
+                list(dequantize_tensor_dict[op].values())[0]) for op in fp32_tensor_dict}
+
+    def _streamed_ops_mse(self, op_name_lst, fp32_model, tune_cfg):
+        """Calculate the MSE of the ops with the FP32 and quantized models run in lockstep.
+
+        The activations of both models are streamed batch by batch over the first
+        confidence_batches batches, and the MSE of each op is accumulated per batch, weighted by
+        the size of the activation, so nothing is dumped and only one batch is kept in memory.
+
+        Returns:
+            dict: The MSE per op, None if the adaptor can't stream the activations.
+        """
+        confidence_batches = self.cfg.tuning.strategy.confidence_batches or 2
+        iteration_list = list(range(confidence_batches))
+        try:
+            fp32_stream = self.adaptor.stream_inspect_tensor(fp32_model, self.calib_dataloader,
+                op_name_lst, iteration_list, quantization_cfg=tune_cfg)
+        except NotImplementedError:
+            logger.warning("The adaptor doesn't support streaming the activations, " \
+                "fall back to dump them.")
+            return None
+        best_qmodel = self.q_model = self.adaptor.quantize(tune_cfg, self.model, \
+                                                           self.calib_dataloader, self.q_func)
+        quant_stream = self.adaptor.stream_inspect_tensor(best_qmodel, self.calib_dataloader,
+            op_name_lst, iteration_list, quantization_cfg=tune_cfg)
+        mse_sum, mse_size = {}, {}
+        for fp32_tensor_dict, dequantize_tensor_dict in zip(fp32_stream, quant_stream):
+            for op in fp32_tensor_dict:
+                if op not in dequantize_tensor_dict:
+                    continue
+                fp32_tensor = list(fp32_tensor_dict[op].values())[0]
+                mse_sum[op] = mse_sum.get(op, 0.) + self._mse_metric_gap(fp32_tensor,
+                    list(dequantize_tensor_dict[op].values())[0]) * fp32_tensor.size
+                mse_size[op] = mse_size.get(op, 0) + fp32_tensor.size
+            del fp32_tensor_dict, dequantize_tensor_dict
+        return {op: mse_sum[op] / mse_size[op] for op in mse_sum}
+
     def mse_impact_lst(self, op_list: List, fp32_model,  best_qmodel):
         """Calculate and generate the MSE impact list.
 
@@ -92,22 +168,11 @@ class MSETuneStrategy(TuneStrategy):
         for (op_name, op_type) in list(op_list):
             op_mapping[op_name] = (op_name, op_type)
         current_best_tune_cfg = self._tune_cfg_converter(self.cur_best_tuning_cfg)
-        fp32_dump_content = self.adaptor.inspect_tensor(fp32_model, 
-            self.calib_dataloader, op_name_lst, [1], inspect_type='activation', 
-            save_to_disk=True, save_path="./nc_workspace/", 
-            quantization_cfg=current_best_tune_cfg)
-        fp32_tensor_dict = fp32_dump_content['activation'][0]
-        best_qmodel = self.q_model = self.adaptor.quantize(current_best_tune_cfg, self.model, \
-                                                           self.calib_dataloader, self.q_func)
-        quant_dump_content = self.adaptor.inspect_tensor(best_qmodel, 
-            self.calib_dataloader, op_name_lst, [1], inspect_type='activation',
-            save_to_disk=True, save_path="./nc_workspace/", 
-            quantization_cfg=current_best_tune_cfg)
-        dequantize_tensor_dict = quant_dump_content['activation'][0]
-        ops_mse = {
-            op: self._mse_metric_gap(
-                list(fp32_tensor_dict[op].values())[0],
-                list(dequantize_tensor_dict[op].values())[0]) for op in fp32_tensor_dict}
+        ops_mse = None
+        if self.cfg.tuning.strategy.get('mse_streaming'):
+            ops_mse = self._streamed_ops_mse(op_name_lst, fp32_model, current_best_tune_cfg)
+        if ops_mse is None:
+            ops_mse = self._dumped_ops_mse(op_name_lst, fp32_model, current_best_tune_cfg)
         ordered_op_names = sorted(ops_mse.keys(), key=lambda key: ops_mse[key], reverse=self.higher_is_better)
         
         ordered_op_name_types = [op_mapping[name] for name in ordered_op_names]
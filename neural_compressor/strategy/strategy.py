@@ -34,7 +34,11 @@ from ..objective import MultiObjective
 from ..adaptor import FRAMEWORKS
 from ..utils.utility import Statistics, dump_data_to_local
 from ..utils.utility import fault_tolerant_file, equal_dicts, GLOBAL_STATE, MODE
+from ..utils.utility import canonical_hash, TuningHistoryJournal
 from ..utils.create_obj_from_config import create_eval_func, create_train_func
+from ..utils.early_stop import EarlyStopCriterion
+from ..utils.baseline_cache import BaselineCache, model_digest, dataloader_fingerprint
+from ..utils.baseline_cache import collate_outputs
 from ..utils import logger
 from ..utils import OPTIONS
 from ..version import __version__
@@ -51,6 +55,7 @@ from ..utils import logger
 
 from .utils.tuning_space import TuningItem, TuningSpace
 from .utils.tuning_structs import OpTuningConfig
+from .utils.trial_executor import TrialExecutor, TrialEntry, dump_strategy, load_trial_state
 
 
 STRATEGIES = {}
@@ -73,10 +78,45 @@ def strategy_registry(cls):
     STRATEGIES[cls.__name__[:-len('TuneStrategy')].lower()] = cls
     return cls
 
+def _committed_trial_state(name):
+    """Create the property of a tuning state updated by the committed trials.
+
+    The value is kept in the `_<name>` attribute. Reading it calls TuneStrategy._sync_trials
+    first, which commits the pending parallel trials.
+    """
+    attr = '_' + name
+
+    def fget(self):
+        self._sync_trials()
+        return getattr(self, attr)
+
+    def fset(self, value):
+        setattr(self, attr, value)
+
+    def fdel(self):
+        delattr(self, attr)
+
+    return property(fget, fset, fdel, "The {} of the committed trials.".format(name))
+
+
 @strategy_registry
 class TuneStrategy(object):
     """Basic class for tuning strategy."""
 
+    last_tune_result = _committed_trial_state('last_tune_result')
+    last_qmodel = _committed_trial_state('last_qmodel')
+    best_tune_result = _committed_trial_state('best_tune_result')
+    best_qmodel = _committed_trial_state('best_qmodel')
+    q_model = _committed_trial_state('q_model')
+    cur_best_acc = _committed_trial_state('cur_best_acc')
+    cur_best_tuning_cfg = _committed_trial_state('cur_best_tuning_cfg')
+    cur_best_qmodel = _committed_trial_state('cur_best_qmodel')
+
+    # Whether the trials can run in parallel, see _parallel_traverse. A strategy whose
+    # next_tune_cfg reads the result of every config before it yields the next one, e.g.
+    # bayesian, gains nothing from the workers and runs the trials sequentially.
+    parallel_trials = True
+
     def __init__(self, model, conf, q_dataloader=None, q_func=None, eval_dataloader=None, 
                  eval_func=None, resume=None, q_hooks=None):
         """Init the TuneStrategy.
@@ -97,6 +137,7 @@ class TuneStrategy(object):
         self.model = model
         self.cfg = conf.usr_cfg
         self.history_path = self._create_path(self.cfg.tuning.workspace.path, './history.snapshot')
+        self._history_journal = TuningHistoryJournal(self.history_path)
         self.deploy_path = self._create_path(self.cfg.tuning.workspace.path, 'deploy.yaml')
         logger.debug("Dump user yaml configuration:")
         logger.debug(self.cfg)
@@ -139,7 +180,14 @@ class TuneStrategy(object):
         #   # tuning history under different yaml configs
         #   ...,
         # ]
-
+        # It is indexed by the canonical hash of yaml config and tune_cfg, see _update_history_index.
+        self._indexed_history = None
+        self._indexed_items = []
+        self._yaml_index = {}
+
+        self._trial_executor = None
+        self._baseline_cache = None
+        self.last_eval_info = {}
         self.baseline = None
         self.last_tune_result = None
         self.last_qmodel = None
@@ -203,7 +251,11 @@ class TuneStrategy(object):
         if self.baseline is None:
             logger.info("Get FP32 model baseline.")
             self._fp32_model = self.model
-            self.baseline = self._evaluate(self.model)       
+            self._baseline_cache = self._create_baseline_cache()
+            self.baseline = self._load_cached_baseline()
+            if self.baseline is None:
+                self.baseline = self._evaluate(self.model)
+                self._save_cached_baseline()
             self.objectives.baseline = self.baseline
             # record the FP32 baseline
             self._add_tuning_history()
@@ -211,6 +263,15 @@ class TuneStrategy(object):
 
         trials_count = 0
         traverse_start_time = time()
+        workers = self.cfg.tuning.workers or 1
+        if workers > 1 and not self.parallel_trials:
+            self._warn_sequential_trials()
+        elif workers > 1:
+            payload = dump_strategy(self) if TrialExecutor.is_available() else None
+            if payload is not None:
+                return self._parallel_traverse(payload, workers, traverse_start_time)
+            logger.warning("Parallel trials need core affinity support and a strategy sent to "
+                           "the worker processes by pickle, run the trials sequentially.")
         for op_tuning_cfg in self.next_tune_cfg():
             tuning_start_time = time()
             tune_cfg = self._tune_cfg_converter(op_tuning_cfg)
@@ -225,62 +286,191 @@ class TuneStrategy(object):
             logger.debug(tune_cfg)
 
             self.tuning_times += 1
-            self.q_model = self.adaptor.quantize(
-                copy.deepcopy(tune_cfg), self.model, self.calib_dataloader, self.q_func)
-            self.algo.calib_iter = tune_cfg['calib_iteration']
-            self.algo.q_model = self.q_model
-            # TODO align the api to let strategy has access to pre_optimized model
-            assert self.adaptor.pre_optimized_model
-            self.algo.origin_model = self.adaptor.pre_optimized_model
-            if self.cfg.quantization.recipes.fast_bias_correction:
-                self.algo.algorithms[0].quantization_cfg = tune_cfg
-            self.last_qmodel = self.algo()
-            assert self.last_qmodel
-            self.last_tune_result = self._evaluate(self.last_qmodel)
-            self.cur_best_acc, self.cur_best_tuning_cfg = self.update_best_op_tuning_cfg(op_tuning_cfg)
-            need_stop = self.stop(self.cfg.tuning.exit_policy.timeout, trials_count)
-
-            # record the tuning history
-            saved_tune_cfg = copy.deepcopy(tune_cfg)
-            saved_last_tune_result = copy.deepcopy(self.last_tune_result)
-            self._add_tuning_history(saved_tune_cfg,
-                                    saved_last_tune_result,
-                                    q_config=self.q_model.q_config)
-            self.tune_result_record.append(copy.deepcopy(self.last_tune_result))
-            self.tune_cfg = tune_cfg
-            now_time = time()
-            acc_res_msg = ""
-            performace_res_msg = ""
-            if self.tuning_result_data:
-                acc_res_msg = "[ " + "| ".join(self.tuning_result_data[0]) + " ]"
-                performace_res_msg = "[ " + "| ".join(self.tuning_result_data[1]) + " ]"
-            logger.debug(f"*** The accuracy of last tuning is: {acc_res_msg}")
-            logger.debug(f"*** The perfomance of last tuning is: {performace_res_msg}")
-            logger.debug(f"*** The last tuning time: {(now_time - tuning_start_time):.2f} s")
-            logger.debug(f"*** The tuning process lasted time: {(now_time - traverse_start_time):.2f} s")
-            
-            self._dump_tuning_process_statistics()
-            if need_stop:
-                if self.re_quant:
-                    logger.info("*** Do not stop the tuning process, re-quantize the ops.")
-                    continue
-                if self.cfg.tuning.diagnosis and self.cfg.tuning.diagnosis.diagnosis_after_tuning:
-                    logger.debug(f'*** Start to do diagnosis (inspect tensor).')
-                    self._diagnosis()
-                if self.use_multi_objective and len(self.tune_result_record) > 1 and \
-                    self.best_tune_result is not None:
-                    best_trail, best_result = self.objectives.best_result(self.tune_result_record,
-                                                                          copy.deepcopy(self.baseline))
-                    if best_result != self.best_tune_result:
-                        from neural_compressor.utils.utility import recover
-                        self.best_qmodel = recover(self.model.model, 
-                            os.path.join(self.cfg.tuning.workspace.path, 'history.snapshot'),
-                            best_trail)
-                        logger.debug(f"*** Update the best qmodel by recovering from history.")
-                        self.best_tune_result = best_result
-                    self._dump_tuning_process_statistics()
+            self.q_model, self.last_qmodel, self.last_tune_result, self.last_eval_info = \
+                self._run_trial(tune_cfg)
+            if self._commit_trial(op_tuning_cfg, tune_cfg, trials_count,
+                                  tuning_start_time, traverse_start_time):
                 break
 
+    def _warn_sequential_trials(self):
+        """Warn that tuning.workers is ignored, the strategy runs the trials sequentially."""
+        if (self.cfg.tuning.workers or 1) > 1:
+            logger.warning("The {} runs the trials sequentially, ignore tuning.workers.".format(
+                type(self).__name__))
+
+    def _sync_trials(self):
+        """Commit the pending parallel trials, so the tuning state read is up to date.
+
+        next_tune_cfg is resumed before the results of the previous configs are committed
+        when the trials run in parallel, the tuning state properties call it before they
+        return, so the generator sees the same state as in the sequential traverse.
+        """
+        executor = getattr(self, '_trial_executor', None)
+        if executor is not None:
+            executor.sync()
+
+    def _run_trial(self, tune_cfg):
+        """Quantize the model with the tuning config and evaluate it.
+
+        Args:
+            tune_cfg (dict): The tuning config converted by _tune_cfg_converter.
+
+        Returns:
+            tuple: The quantized model, the model after the algorithms, its evaluation result and
+                the information of the evaluation, see last_eval_info.
+        """
+        q_model, last_qmodel = self._quantize_trial(tune_cfg)
+        tune_result = self._evaluate(last_qmodel)
+        return q_model, last_qmodel, tune_result, self.last_eval_info
+
+    def _quantize_trial(self, tune_cfg):
+        """Quantize the model with the tuning config and apply the algorithms.
+
+        Args:
+            tune_cfg (dict): The tuning config converted by _tune_cfg_converter.
+
+        Returns:
+            tuple: The quantized model and the model after the algorithms.
+        """
+        q_model = self.adaptor.quantize(
+            copy.deepcopy(tune_cfg), self.model, self.calib_dataloader, self.q_func)
+        self.algo.calib_iter = tune_cfg['calib_iteration']
+        self.algo.q_model = q_model
+        # TODO align the api to let strategy has access to pre_optimized model
+        assert self.adaptor.pre_optimized_model
+        self.algo.origin_model = self.adaptor.pre_optimized_model
+        if self.cfg.quantization.recipes.fast_bias_correction:
+            self.algo.algorithms[0].quantization_cfg = tune_cfg
+        last_qmodel = self.algo()
+        assert last_qmodel
+        return q_model, last_qmodel
+
+    def _commit_trial(self, op_tuning_cfg, tune_cfg, trials_count, tuning_start_time, traverse_start_time):
+        """Update the tuning state and history with the result of the last trial.
+
+        Args:
+            op_tuning_cfg (dict): The config yielded by next_tune_cfg.
+            tune_cfg (dict): The tuning config converted by _tune_cfg_converter.
+            trials_count (int): The number of configs yielded so far.
+            tuning_start_time (float): The time the trial started.
+            traverse_start_time (float): The time the traverse started.
+
+        Returns:
+            bool: True if the traverse should stop.
+        """
+        self.cur_best_acc, self.cur_best_tuning_cfg = self.update_best_op_tuning_cfg(op_tuning_cfg)
+        need_stop = self.stop(self.cfg.tuning.exit_policy.timeout, trials_count)
+
+        # record the tuning history
+        saved_tune_cfg = copy.deepcopy(tune_cfg)
+        saved_last_tune_result = copy.deepcopy(self.last_tune_result)
+        self._add_tuning_history(saved_tune_cfg,
+                                saved_last_tune_result,
+                                q_config=self.q_model.q_config)
+        self.tune_result_record.append(copy.deepcopy(self.last_tune_result))
+        self.tune_cfg = tune_cfg
+        now_time = time()
+        acc_res_msg = ""
+        performace_res_msg = ""
+        if self.tuning_result_data:
+            acc_res_msg = "[ " + "| ".join(self.tuning_result_data[0]) + " ]"
+            performace_res_msg = "[ " + "| ".join(self.tuning_result_data[1]) + " ]"
+        logger.debug(f"*** The accuracy of last tuning is: {acc_res_msg}")
+        logger.debug(f"*** The perfomance of last tuning is: {performace_res_msg}")
+        logger.debug(f"*** The last tuning time: {(now_time - tuning_start_time):.2f} s")
+        logger.debug(f"*** The tuning process lasted time: {(now_time - traverse_start_time):.2f} s")
+        
+        self._dump_tuning_process_statistics()
+        if need_stop:
+            if self.re_quant:
+                logger.info("*** Do not stop the tuning process, re-quantize the ops.")
+                return False
+            if self.cfg.tuning.diagnosis and self.cfg.tuning.diagnosis.diagnosis_after_tuning:
+                logger.debug(f'*** Start to do diagnosis (inspect tensor).')
+                self._diagnosis()
+            if self.use_multi_objective and len(self.tune_result_record) > 1 and \
+                self.best_tune_result is not None:
+                best_trail, best_result = self.objectives.best_result(self.tune_result_record,
+                                                                      copy.deepcopy(self.baseline))
+                if best_result != self.best_tune_result:
+                    from neural_compressor.utils.utility import recover
+                    self.best_qmodel = recover(self.model.model, 
+                        os.path.join(self.cfg.tuning.workspace.path, 'history.snapshot'),
+                        best_trail)
+                    logger.debug(f"*** Update the best qmodel by recovering from history.")
+                    self.best_tune_result = best_result
+                self._dump_tuning_process_statistics()
+        return need_stop
+
+    def _parallel_traverse(self, payload, workers, traverse_start_time):
+        """Traverse the tuning space with the trials running in parallel worker processes.
+
+        The next configs are pulled from next_tune_cfg while the previous trials are running, and
+        the results are committed in the order of the generator. Reading the tuning state, e.g.
+        last_tune_result in next_tune_cfg, commits the pending trials first, so the traversed
+        configs, the tuning history and the stopping point are the same as the sequential traverse.
+        The workers send back the quantized models and the adaptor attributes they set, e.g. the
+        quantize config and the pre-optimized model, so the committed state is the one of the
+        sequential traverse without quantizing the model again. The committed config is only
+        quantized in the main process if the worker fails or its models can't be pickled.
+
+        The trials are only pipelined while next_tune_cfg doesn't read the tuning state, e.g. the
+        op-type-wise stage of basic. A stage reading last_tune_result after each config, e.g. the
+        one-by-one fallback of basic, commits every trial before it yields the next config, so
+        its trials run one at a time.
+
+        Args:
+            payload (bytes): The strategy pickled by dump_strategy.
+            workers (int): The number of worker processes.
+            traverse_start_time (float): The time the traverse started.
+        """
+        def _commit(entry):
+            tuning_history = entry.tuning_history or self._find_tuning_history(entry.tune_cfg)
+            if tuning_history and entry.trials_count < self.cfg.tuning.exit_policy.max_trials:
+                self.last_tune_result = tuning_history['last_tune_result']
+                self.best_tune_result = tuning_history['best_tune_result']
+                logger.warn("Find evaluated tuning config, skip.")
+                return False
+            logger.debug("Dump current tuning configuration:")
+            logger.debug(entry.tune_cfg)
+            self.tuning_times += 1
+            try:
+                self.last_tune_result, self.last_eval_info, state = entry.future.result()
+            except Exception as e:
+                logger.warning("Fail to run the trial in the worker process: {}, "
+                               "run it in the main process.".format(e))
+                self.q_model, self.last_qmodel, self.last_tune_result, self.last_eval_info = \
+                    self._run_trial(entry.tune_cfg)
+            else:
+                if state is not None:
+                    self.q_model, self.last_qmodel = load_trial_state(self, state)
+                else:
+                    self.q_model, self.last_qmodel = self._quantize_trial(entry.tune_cfg)
+            # the objective compares its own last value in stop
+            self.objectives.val = self.last_tune_result
+            return self._commit_trial(entry.op_tuning_cfg, entry.tune_cfg, entry.trials_count,
+                                      entry.tuning_start_time, traverse_start_time)
+
+        trials_count = 0
+        with TrialExecutor(payload, workers, _commit) as executor:
+            self._trial_executor = executor
+            try:
+                for op_tuning_cfg in self.next_tune_cfg():
+                    if executor.stopped:
+                        break
+                    tune_cfg = self._tune_cfg_converter(op_tuning_cfg)
+                    trials_count += 1
+                    tuning_history = self._find_tuning_history(tune_cfg)
+                    entry = TrialEntry(trials_count, op_tuning_cfg, tune_cfg,
+                        tuning_history if trials_count < self.cfg.tuning.exit_policy.max_trials else None)
+                    executor.submit(entry)
+                    while executor.full() and not executor.stopped:
+                        executor.commit_next()
+                    if executor.stopped:
+                        break
+                executor.sync()
+            finally:
+                self._trial_executor = None
 
     def _fallback_started(self):
         self.fallback_start_point = self.tuning_times
@@ -511,8 +701,10 @@ class TuneStrategy(object):
         self.__dict__.update(resume)
         for history in self.tuning_history:
             if self._same_yaml(history['cfg'], self.cfg):
-                self.__dict__.update({k: v for k, v in history.items() \
-                                        if k not in ['version', 'history']})
+                # set the attributes, the tuning results are properties of the strategy
+                for k, v in history.items():
+                    if k not in ['version', 'history']:
+                        setattr(self, k, v)
                 logger.info("Start to resume tuning process.")
                 # resume the best tuning model if needed
                 try:
@@ -763,6 +955,7 @@ class TuneStrategy(object):
         Returns:
             Objective: The objective value evaluated.
         """
+        self.last_eval_info = {}
         if self.eval_func:
             if self.cfg.tuning.tensorboard:
                 # Pytorch can insert observer to model in this hook.
@@ -794,7 +987,8 @@ class TuneStrategy(object):
                 postprocess_cfg,
                 iteration,
                 tensorboard = self.cfg.tuning.tensorboard,
-                fp32_baseline = self.baseline == None)
+                fp32_baseline = self.baseline == None,
+                early_stop = self._early_stop_criterion())
 
             if getattr(self.eval_dataloader, 'distributed', False):
                 if 'tensorflow' in self.framework:
@@ -820,6 +1014,9 @@ class TuneStrategy(object):
                                                      "different between processes, please reset "
                                                      "dataloader's batch_size.")
             val = self.objectives.evaluate(eval_func, model) 
+            if getattr(eval_func.dataloader, 'partial', False):
+                self.last_eval_info = {'partial_evaluation': True,
+                                       'evaluated_samples': eval_func.dataloader.num_samples}
         if isinstance(val[0], list):
             assert all([np.isscalar(i) for i in val[0]]), \
                 "The eval_func should return a scalar or list of scalar, " \
@@ -831,6 +1028,92 @@ class TuneStrategy(object):
             
         return val
 
+    def _create_baseline_cache(self):
+        """Create the cache of the FP32 baseline if tuning.workspace.baseline_cache is set.
+
+        The entry is keyed by the digest of the FP32 model, the fingerprint of the evaluation
+        dataloader and the evaluation config, so it's reused only if all of them are unchanged.
+
+        Returns:
+            BaselineCache: The cache, None if it isn't enabled or the evaluation can't be keyed.
+        """
+        path = self.cfg.tuning.workspace.baseline_cache
+        if not path:
+            return None
+        if self.eval_func is not None:
+            logger.warning("The FP32 baseline evaluated by eval_func can't be keyed, "
+                           "ignore tuning.workspace.baseline_cache.")
+            return None
+        digest = model_digest(self.model)
+        if digest is None:
+            logger.warning("Fail to get the digest of the FP32 model, "
+                           "ignore tuning.workspace.baseline_cache.")
+            return None
+        accuracy_cfg = self.cfg.evaluation.accuracy
+        key = {'version': __version__,
+               'framework': self.framework,
+               'device': self.cfg.device,
+               'model_cfg': self.cfg.model,
+               'model': digest,
+               'dataloader': dataloader_fingerprint(self.eval_dataloader),
+               'accuracy': {k: accuracy_cfg[k] for k in \
+                            ['metric', 'multi_metrics', 'postprocess', 'iteration']},
+               'objectives': self.objectives.representation}
+        return BaselineCache(path, key)
+
+    def _load_cached_baseline(self):
+        """Load the FP32 baseline and restore the FP32 outputs from the baseline cache.
+
+        Returns:
+            list: The cached baseline, None if it isn't cached.
+        """
+        if self._baseline_cache is None:
+            return None
+        cached = self._baseline_cache.load_baseline()
+        if cached is None:
+            return None
+        baseline, has_outputs = cached
+        if has_outputs:
+            outputs = self._baseline_cache.load_arrays('fp32_outputs')
+            if outputs is None:
+                return None
+            # the adaptors collate the FP32 outputs of all batches as the reference
+            self.adaptor.fp32_results = [outputs]
+        logger.info("Reuse the FP32 baseline cached in {}.".format(self._baseline_cache.path))
+        return baseline
+
+    def _save_cached_baseline(self):
+        """Save the FP32 baseline and the FP32 outputs compared by the metrics to the cache."""
+        if self._baseline_cache is None:
+            return
+        has_outputs = bool(getattr(self.adaptor, 'fp32_preds_as_label', False))
+        if has_outputs:
+            results = getattr(self.adaptor, 'fp32_results', None)
+            outputs = collate_outputs(results) if results else None
+            if outputs is None or not self._baseline_cache.save_arrays('fp32_outputs', outputs):
+                logger.warning("Fail to cache the FP32 outputs, don't cache the FP32 baseline.")
+                return
+            # collate once instead of in every evaluation
+            self.adaptor.fp32_results = [outputs]
+        self._baseline_cache.save_baseline(self.baseline, has_outputs)
+        logger.info("Save the FP32 baseline to cache {}.".format(self._baseline_cache.path))
+
+    def _early_stop_criterion(self):
+        """Create the criterion to stop the accuracy evaluation early if it's enabled.
+
+        Returns:
+            EarlyStopCriterion: The criterion, None for the baseline evaluation or if the
+                early stop isn't enabled or the accuracy has multiple metrics.
+        """
+        early_stop = self.cfg.evaluation.accuracy.early_stop
+        if not early_stop or self.baseline is None or isinstance(self.baseline[0], list):
+            return None
+        return EarlyStopCriterion(self.objectives.accuracy_target[0],
+                                  self.objectives.higher_is_better,
+                                  early_stop.confidence,
+                                  early_stop.min_samples,
+                                  early_stop.shuffled)
+
     def __getstate__(self):
         """Magic method for pickle saving.
 
@@ -979,10 +1262,52 @@ class TuneStrategy(object):
         return need_stop
 
     def _save(self):
-        """Save current tuning state to snapshot for resuming."""
+        """Save current tuning state to snapshot for resuming.
+
+        Only the changes since the last save are appended to the snapshot journal.
+        """
         logger.info("Save tuning history to {}.".format(self.history_path))
-        with fault_tolerant_file(self.history_path) as f:
-            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._history_journal.write(self.__getstate__()['tuning_history'])
+
+    def _yaml_hash(self, cfg):
+        """Get the hash of the yaml config fields compared by _same_yaml."""
+        return canonical_hash(cfg, ignore_keys=['tuning'])
+
+    def _update_history_index(self):
+        """Index the tuning history items added since the last call.
+
+        The yaml configs are indexed by _yaml_hash and the history items of each yaml
+        config by the canonical hash of their tune_cfg, so looking up an evaluated tune_cfg
+        only compares the configs with the same hash instead of the whole history.
+        """
+        if self._indexed_history is not self.tuning_history or \
+                len(self._indexed_items) > len(self.tuning_history):
+            self._indexed_history = self.tuning_history
+            self._indexed_items = []
+            self._yaml_index = {}
+        for tuning_history in self.tuning_history[len(self._indexed_items):]:
+            self._yaml_index.setdefault(self._yaml_hash(tuning_history['cfg']),
+                                        []).append(tuning_history)
+            self._indexed_items.append([tuning_history, {}, 0])
+        for item in self._indexed_items:
+            tuning_history, tune_cfg_index, indexed_count = item
+            for history in tuning_history['history'][indexed_count:]:
+                if history:
+                    tune_cfg_index.setdefault(canonical_hash(history['tune_cfg']),
+                                              []).append(history)
+            item[2] = len(tuning_history['history'])
+
+    def _same_yaml_tuning_history(self):
+        """Yield the tuning history and its tune_cfg index under same yaml config."""
+        self._update_history_index()
+        for tuning_history in self._yaml_index.get(self._yaml_hash(self.cfg), []):
+            # only check if a tune_cfg is evaluated under same yam config, excluding
+            # some fields in tuning section of yaml, such as tensorboard, snapshot, resume.
+            if self._same_yaml(tuning_history['cfg'], self.cfg):
+                for item in self._indexed_items:
+                    if item[0] is tuning_history:
+                        yield tuning_history, item[1]
+                        break
 
     def _find_tuning_history(self, tune_cfg):
         """Check if the specified tune_cfg is evaluated or not on same yaml config.
@@ -993,14 +1318,11 @@ class TuneStrategy(object):
         Returns:
             tuning_history or None: The tuning history containing evaluated tune_cfg.
         """
-        for tuning_history in self.tuning_history:
-            # only check if a tune_cfg is evaluated under same yam config, excluding
-            # some fields in tuning section of yaml, such as tensorboard, snapshot, resume.
-            if self._same_yaml(tuning_history['cfg'], self.cfg):
-                for history in tuning_history['history']:
-                    if history and history['tune_cfg'] == tune_cfg:
-                        return tuning_history
-
+        tune_cfg_hash = canonical_hash(tune_cfg)
+        for tuning_history, tune_cfg_index in self._same_yaml_tuning_history():
+            for history in tune_cfg_index.get(tune_cfg_hash, []):
+                if history['tune_cfg'] == tune_cfg:
+                    return tuning_history
         return None
 
     def _find_history(self, tune_cfg):
@@ -1009,13 +1331,11 @@ class TuneStrategy(object):
         Returns:
             history or None: The history containing evaluated tune_cfg.
         """
-        for tuning_history in self.tuning_history:
-            # only check if a tune_cfg is evaluated under same yam config, excluding
-            # some fields in tuning section of yaml, such as tensorboard, snapshot, resume.
-            if self._same_yaml(tuning_history['cfg'], self.cfg):
-                for history in tuning_history['history']:
-                    if history and history['tune_cfg'] == tune_cfg:
-                        return history
+        tune_cfg_hash = canonical_hash(tune_cfg)
+        for tuning_history, tune_cfg_index in self._same_yaml_tuning_history():
+            for history in tune_cfg_index.get(tune_cfg_hash, []):
+                if history['tune_cfg'] == tune_cfg:
+                    return history
         return None
 
     def _find_self_tuning_history(self):
@@ -1024,12 +1344,8 @@ class TuneStrategy(object):
         Returns:
             history or None: The history for self.
         """
-        for tuning_history in self.tuning_history:
-            # only check if a tune_cfg is evaluated under same yam config, excluding
-            # some fields in tuning section of yaml, such as tensorboard, snapshot, resume.
-            if self._same_yaml(tuning_history['cfg'], self.cfg):
-                return tuning_history
-
+        for tuning_history, _ in self._same_yaml_tuning_history():
+            return tuning_history
         return None
 
     def _add_tuning_history(self, tune_cfg=None, tune_result=None, **kwargs):
@@ -1037,19 +1353,17 @@ class TuneStrategy(object):
 
         Note this record is added under same yaml config.
         """
-        found = False
         d = {'tune_cfg': tune_cfg, 'tune_result': tune_result}
-        for tuning_history in self.tuning_history:
-            if self._same_yaml(tuning_history['cfg'], self.cfg):
-                d.update(kwargs)
-                tuning_history['history'].append(d)
-                tuning_history['last_tune_result'] = self.last_tune_result
-                tuning_history['best_tune_result'] = self.best_tune_result
-                tuning_history['cfg'] = self.cfg
-                found = True
-                break
-
-        if not found:
+        # mark the results of partial evaluations
+        d.update(self.last_eval_info)
+        tuning_history = self._find_self_tuning_history()
+        if tuning_history is not None:
+            d.update(kwargs)
+            tuning_history['history'].append(d)
+            tuning_history['last_tune_result'] = self.last_tune_result
+            tuning_history['best_tune_result'] = self.best_tune_result
+            tuning_history['cfg'] = self.cfg
+        else:
             tuning_history = {}
             tuning_history['version']  = __version__
             tuning_history['cfg']     = self.cfg
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Executor running tuning trials in a pool of worker processes."""
+
+import os
+import pickle
+import queue
+import signal
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from time import time
+from ...utils import logger
+
+# The strategy unpickled once by each worker process and the attributes of its adaptor then.
+_trial_strategy = None
+_initial_adaptor_state = None
+
+
+def dump_strategy(strategy):
+    """Pickle the strategy for the trial workers.
+
+    The workers are spawned, so they don't inherit the thread pools of the main process, and
+    the strategy is sent to them with its model, adaptor, dataloaders and evaluation function.
+
+    Args:
+        strategy (TuneStrategy): The strategy.
+
+    Returns:
+        bytes: The pickled strategy, None if it can't be pickled, e.g. with a local eval_func.
+    """
+    # __getstate__ of the strategy only keeps the tuning history for resuming
+    state = {k: v for k, v in strategy.__dict__.items() if k != '_trial_executor'}
+    try:
+        return pickle.dumps((type(strategy), state))
+    except Exception as e:
+        logger.warning("Fail to send the strategy to the trial workers: {}.".format(e))
+        return None
+
+
+def _init_worker(cores_queue, pids_queue, payload):
+    """Pin the worker process to its own partition of cores and load the strategy."""
+    global _trial_strategy, _initial_adaptor_state
+    pids_queue.put(os.getpid())
+    cores = cores_queue.get()
+    try:
+        os.sched_setaffinity(0, cores)
+    except OSError as e: # pragma: no cover
+        logger.warning("Fail to set the affinity of trial worker to cores {}: {}.".format(cores, e))
+    # set before the frameworks are imported by unpickling the strategy
+    os.environ['OMP_NUM_THREADS'] = str(len(cores))
+    strategy_class, state = pickle.loads(payload)
+    _trial_strategy = strategy_class.__new__(strategy_class)
+    _trial_strategy.__dict__.update(state)
+    _trial_strategy._trial_executor = None
+    _initial_adaptor_state = dict(_trial_strategy.adaptor.__dict__)
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(len(cores))
+
+
+def _run_trial(tune_cfg):
+    """Quantize and evaluate one tuning config in the worker process.
+
+    The quantized models are sent back with the adaptor attributes the worker has set since
+    it loaded the strategy, e.g. quantize_config or pre_optimized_model, so the main process
+    commits the trial without quantizing the model again.
+
+    Returns:
+        tuple: The evaluation result, the information of the evaluation and the trial state
+            pickled by pickle.dumps((q_model, last_qmodel, adaptor_state)), None if the models
+            can't be pickled.
+    """
+    q_model, last_qmodel, tune_result, eval_info = _trial_strategy._run_trial(tune_cfg)
+    adaptor_state = {k: v for k, v in _trial_strategy.adaptor.__dict__.items()
+                     if k not in _initial_adaptor_state or _initial_adaptor_state[k] is not v}
+    try:
+        state = pickle.dumps((q_model, last_qmodel, adaptor_state))
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        logger.warning("Fail to send the quantized model to the main process: {}.".format(e))
+        state = None
+    return tune_result, eval_info, state
+
+
+def load_trial_state(strategy, state):
+    """Load the trial state sent back by a worker into the strategy of the main process.
+
+    Args:
+        strategy (TuneStrategy): The strategy.
+        state (bytes): The trial state returned by the worker.
+
+    Returns:
+        tuple: The quantized model and the model after the algorithms.
+    """
+    q_model, last_qmodel, adaptor_state = pickle.loads(state)
+    strategy.adaptor.__dict__.update(adaptor_state)
+    return q_model, last_qmodel
+
+
+def partition_cores(cores, num_partitions):
+    """Split the cores into contiguous partitions of (almost) equal size.
+
+    Args:
+        cores (list): The core ids.
+        num_partitions (int): The number of partitions.
+
+    Returns:
+        list: The list of core id lists, the first len(cores) % num_partitions ones get one more core.
+    """
+    cores = sorted(cores)
+    size, rest = divmod(len(cores), num_partitions)
+    partitions, start = [], 0
+    for i in range(num_partitions):
+        end = start + size + (1 if i < rest else 0)
+        partitions.append(cores[start:end])
+        start = end
+    return partitions
+
+
+class TrialEntry:
+    """A tuning config pulled from the generator and its pending trial."""
+
+    def __init__(self, trials_count, op_tuning_cfg, tune_cfg, tuning_history=None):
+        """Init a TrialEntry.
+
+        Args:
+            trials_count (int): The position of the config in the generator.
+            op_tuning_cfg (dict): The config yielded by next_tune_cfg.
+            tune_cfg (dict): The config converted for the adaptor.
+            tuning_history (dict, optional): The matched tuning history if the config was evaluated.
+        """
+        self.trials_count = trials_count
+        self.op_tuning_cfg = op_tuning_cfg
+        self.tune_cfg = tune_cfg
+        self.tuning_history = tuning_history
+        self.tuning_start_time = time()
+        self.future = None
+
+
+class TrialExecutor:
+    """Run the quantization and evaluation of tuning configs in worker processes.
+
+    Up to `workers` configs are in flight, each worker owns a disjoint partition of the cores
+    available to the process. The results are committed by the `commit` callback strictly in the
+    order the configs were submitted, so the tuning history and the stopping point are the same
+    as the sequential traverse. Once the callback returns True, the pending trials are dropped.
+    """
+
+    def __init__(self, payload, workers, commit):
+        """Init a TrialExecutor.
+
+        Args:
+            payload (bytes): The strategy pickled by dump_strategy, its _run_trial is called in
+                the workers.
+            workers (int): The number of worker processes.
+            commit (callable): Callback taking a TrialEntry and returning True if the tuning should stop.
+        """
+        self.payload = payload
+        self.commit = commit
+        self.pending = deque()
+        self.stopped = False
+        self._committing = False
+        self._dropped_futures = []
+        cores = sorted(os.sched_getaffinity(0))
+        self.workers = min(workers, len(cores))
+        self._partitions = partition_cores(cores, self.workers)
+        self._pool = None
+        self._pids_queue = None
+
+    @staticmethod
+    def is_available():
+        """Check if the platform supports pinned trial workers.
+
+        The initializer of ProcessPoolExecutor needs Python 3.7.
+        """
+        return hasattr(os, 'sched_setaffinity') and sys.version_info >= (3, 7)
+
+    def __enter__(self):
+        """Start the worker processes."""
+        ctx = multiprocessing.get_context('spawn')
+        cores_queue = ctx.Queue()
+        for cores in self._partitions:
+            cores_queue.put(cores)
+        self._pids_queue = ctx.Queue()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                         initializer=_init_worker,
+                                         initargs=(cores_queue, self._pids_queue, self.payload))
+        logger.info("Run tuning trials in {} workers with cores {}.".format(
+            self.workers, self._partitions))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Drop the pending trials and stop the worker processes."""
+        self._drop_pending()
+        # the trials dropped after the stop are still running, don't wait for them
+        running = [future for future in self._dropped_futures if not future.done()]
+        self._pool.shutdown(wait=not running)
+        if running:
+            for pid in self._worker_pids():
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except OSError: # pragma: no cover
+                    pass
+        self._pool = None
+
+    def _worker_pids(self):
+        """Get the process ids the started workers have reported."""
+        pids = []
+        while True:
+            try:
+                pids.append(self._pids_queue.get(timeout=0.1))
+            except queue.Empty:
+                return pids
+
+    def full(self):
+        """Check if all workers are busy."""
+        return len(self.pending) >= self.workers
+
+    def submit(self, entry):
+        """Start the trial of the entry unless it is found in the tuning history."""
+        if entry.tuning_history is None:
+            entry.future = self._pool.submit(_run_trial, entry.tune_cfg)
+        self.pending.append(entry)
+
+    def commit_next(self):
+        """Wait for the oldest pending trial and commit it."""
+        entry = self.pending.popleft()
+        self._committing = True
+        try:
+            self.stopped = bool(self.commit(entry))
+        finally:
+            self._committing = False
+        if self.stopped:
+            self._drop_pending()
+
+    def _drop_pending(self):
+        for entry in self.pending:
+            if entry.future is not None and not entry.future.cancel():
+                self._dropped_futures.append(entry.future)
+        self.pending.clear()
+
+    def sync(self):
+        """Commit all pending trials in order, so the committed state is up to date.
+
+        It is a no-op when it's called from the commit callback itself.
+        """
+        if self._committing:
+            return
+        while self.pending and not self.stopped:
+            self.commit_next()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""On-disk cache of the FP32 baseline shared by tuning runs."""
+
+import os
+import pickle
+import hashlib
+import numpy as np
+from . import logger
+from .utility import fault_tolerant_file
+
+# the number of dataset samples hashed by dataloader_fingerprint
+FINGERPRINT_SAMPLES = 16
+
+
+def stable_repr(obj):
+    """Get a repr of a nested config which is the same in every process.
+
+    Unlike canonical_hash, it doesn't depend on the salted hash of strings, so it can be
+    used to build on-disk keys.
+    """
+    if isinstance(obj, dict):
+        return '{' + ','.join(sorted(stable_repr(k) + ':' + stable_repr(v) \
+            for k, v in obj.items())) + '}'
+    if isinstance(obj, (set, frozenset)):
+        return '{' + ','.join(sorted(stable_repr(v) for v in obj)) + '}'
+    if isinstance(obj, list):
+        return '[' + ','.join(stable_repr(v) for v in obj) + ']'
+    if isinstance(obj, tuple):
+        return '(' + ','.join(stable_repr(v) for v in obj) + ')'
+    return repr(obj)
+
+
+def _to_numpy(tensor):
+    """Convert a framework tensor to a numpy array."""
+    if isinstance(tensor, np.ndarray):
+        return tensor
+    if hasattr(tensor, 'detach'):
+        return tensor.detach().cpu().numpy()
+    if hasattr(tensor, 'numpy'):
+        return tensor.numpy()
+    return np.asarray(tensor)
+
+
+def _update_digest(sha, obj):
+    """Feed a nested structure of tensors and python objects into the digest."""
+    if isinstance(obj, dict):
+        for key in sorted(obj, key=stable_repr):
+            sha.update(stable_repr(key).encode())
+            _update_digest(sha, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        sha.update('{}:{}'.format(type(obj).__name__, len(obj)).encode())
+        for item in obj:
+            _update_digest(sha, item)
+    elif isinstance(obj, np.ndarray) or hasattr(obj, 'detach') or \
+            (hasattr(obj, 'numpy') and hasattr(obj, 'shape')):
+        array = np.ascontiguousarray(_to_numpy(obj))
+        sha.update('{}{}'.format(array.dtype, array.shape).encode())
+        sha.update(array.view(np.uint8).data if array.dtype != object else \
+            repr(array.tolist()).encode())
+    else:
+        sha.update(repr(obj).encode())
+
+
+def model_digest(model):
+    """Get the digest of the structure and weights of a model.
+
+    Args:
+        model (object): The neural_compressor model wrapper or the framework model, e.g. an ONNX
+            ModelProto, a torch.nn.Module or a TensorFlow GraphDef.
+
+    Returns:
+        str: The hex digest, None if the model type isn't supported.
+    """
+    sha = hashlib.sha256()
+    graph_def = getattr(model, 'graph_def', None)
+    model = getattr(model, 'model', model)
+    if hasattr(model, 'graph') and hasattr(model, 'opset_import'):
+        # onnx ModelProto, hash the protos one by one to support models larger than 2GB
+        for opset in model.opset_import:
+            sha.update(opset.SerializeToString())
+        for field in ['input', 'output', 'node', 'initializer']:
+            for proto in getattr(model.graph, field):
+                sha.update(proto.SerializeToString())
+    elif hasattr(model, 'state_dict') and callable(model.state_dict):
+        sha.update(repr(model).encode())
+        for name, tensor in model.state_dict().items():
+            sha.update(name.encode())
+            _update_digest(sha, tensor)
+    elif graph_def is not None:
+        sha.update(graph_def.SerializeToString())
+    elif hasattr(model, 'SerializeToString'):
+        sha.update(model.SerializeToString())
+    else:
+        return None
+    return sha.hexdigest()
+
+
+def dataloader_fingerprint(dataloader):
+    """Get the fingerprint of a dataloader.
+
+    It covers the dataloader type, the batch size, the dataset type and length, and the content
+    of FINGERPRINT_SAMPLES samples spread evenly over the dataset. A dataset without random
+    access is fingerprinted by its first batch.
+
+    Args:
+        dataloader (object): The dataloader.
+
+    Returns:
+        str: The hex digest, None if the dataloader is None.
+    """
+    if dataloader is None:
+        return None
+    sha = hashlib.sha256()
+    sha.update('{}:{}'.format(type(dataloader).__name__,
+                              getattr(dataloader, 'batch_size', None)).encode())
+    dataset = getattr(dataloader, 'dataset', None)
+    if dataset is not None and hasattr(dataset, '__len__') and hasattr(dataset, '__getitem__'):
+        length = len(dataset)
+        sha.update('{}:{}'.format(type(dataset).__name__, length).encode())
+        indices = sorted(set(np.linspace(0, length - 1, FINGERPRINT_SAMPLES).astype(int))) \
+            if length else []
+        for index in indices:
+            _update_digest(sha, dataset[int(index)])
+    else:
+        for batch in dataloader:
+            _update_digest(sha, batch)
+            break
+    return sha.hexdigest()
+
+
+def collate_outputs(results):
+    """Concatenate the per-batch model outputs into numpy arrays.
+
+    Args:
+        results (list): The outputs of each batch, an array or a list of arrays per batch.
+
+    Returns:
+        list or np.ndarray: One array per model output, or a single array.
+    """
+    batch = results[0]
+    if isinstance(batch, (list, tuple)):
+        return [np.concatenate([_to_numpy(output) for output in outputs]) \
+                for outputs in zip(*results)]
+    return np.concatenate([_to_numpy(output) for output in results])
+
+
+class _ArrayRef(object):
+    """Placeholder of an array stored in its own file."""
+
+    def __init__(self, index):
+        self.index = index
+
+
+class BaselineCache(object):
+    """On-disk cache of the FP32 baseline and FP32 outputs.
+
+    An entry is a directory under `path` named by the digest of the key, e.g. the model digest,
+    the evaluation dataloader fingerprint and the metric config, so a tuning run of the same
+    model, data and metric can reuse the entry of a previous run. The baseline is pickled, the
+    arrays are saved as .npy files and loaded memory-mapped, so a large set of FP32 outputs
+    is paged in only when it's used.
+    """
+
+    def __init__(self, path, key):
+        """Init a BaselineCache.
+
+        Args:
+            path (str): The root directory of the cache.
+            key (object): The nested config identifying the entry, see stable_repr.
+        """
+        self.key = stable_repr(key)
+        self.path = os.path.join(os.path.abspath(os.path.expanduser(path)),
+                                 hashlib.sha256(self.key.encode()).hexdigest()[:32])
+
+    def _load(self, name):
+        filename = os.path.join(self.path, name + '.pkl')
+        if not os.path.exists(filename):
+            return None
+        try:
+            with open(filename, 'rb') as f:
+                key, value = pickle.load(f)
+        except Exception as e: # pragma: no cover
+            logger.warning("Fail to load the baseline cache {}: {}.".format(filename, e))
+            return None
+        return value if key == self.key else None
+
+    def _save(self, name, value):
+        os.makedirs(self.path, exist_ok=True)
+        with fault_tolerant_file(os.path.join(self.path, name + '.pkl')) as f:
+            pickle.dump((self.key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load_baseline(self):
+        """Load the cached baseline.
+
+        Returns:
+            tuple: (baseline, has_outputs), the baseline objective values and whether the FP32
+                outputs were saved with it, None if the baseline isn't cached.
+        """
+        return self._load('baseline')
+
+    def save_baseline(self, baseline, has_outputs=False):
+        """Save the baseline.
+
+        Args:
+            baseline (list): The baseline objective values.
+            has_outputs (bool, optional): Whether the FP32 outputs are saved by save_arrays.
+                Defaults to False.
+        """
+        self._save('baseline', (baseline, has_outputs))
+
+    def load_arrays(self, name):
+        """Load the nested structure of arrays saved by save_arrays.
+
+        Args:
+            name (str): The name of the arrays.
+
+        Returns:
+            object: The nested structure with memory-mapped arrays, None if it isn't cached.
+        """
+        skeleton = self._load(name)
+        if skeleton is None:
+            return None
+        directory = os.path.join(self.path, name)
+
+        def _restore(obj):
+            if isinstance(obj, _ArrayRef):
+                return np.load(os.path.join(directory, '{}.npy'.format(obj.index)),
+                               mmap_mode='c')
+            if isinstance(obj, dict):
+                return {k: _restore(v) for k, v in obj.items()}
+            if isinstance(obj, (list, tuple)):
+                return [_restore(v) for v in obj] if isinstance(obj, list) else \
+                    tuple(_restore(v) for v in obj)
+            return obj
+
+        try:
+            return _restore(skeleton)
+        except (OSError, ValueError) as e: # pragma: no cover
+            logger.warning("Fail to load the cached arrays {}: {}.".format(name, e))
+            return None
+
+    def save_arrays(self, name, arrays):
+        """Save a nested dict/list structure of arrays.
+
+        Args:
+            name (str): The name of the arrays.
+            arrays (object): The nested structure, its leaves are numpy arrays or python objects.
+
+        Returns:
+            bool: True if the arrays are saved, False if some array can't be memory-mapped.
+        """
+        flattened = []
+
+        def _split(obj):
+            if isinstance(obj, np.ndarray):
+                flattened.append(obj)
+                return _ArrayRef(len(flattened) - 1)
+            if isinstance(obj, dict):
+                return {k: _split(v) for k, v in obj.items()}
+            if isinstance(obj, (list, tuple)):
+                return [_split(v) for v in obj] if isinstance(obj, list) else \
+                    tuple(_split(v) for v in obj)
+            return obj
+
+        skeleton = _split(arrays)
+        if any(array.dtype == object or array.ndim == 0 for array in flattened):
+            return False
+        directory = os.path.join(self.path, name)
+        os.makedirs(directory, exist_ok=True)
+        for index, array in enumerate(flattened):
+            np.save(os.path.join(directory, '{}.npy'.format(index)), array)
+        # the skeleton is written last, so an interrupted save is never loaded
+        self._save(name, skeleton)
+        return True
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process CPU topology discovery and NUMA-aware core binding for benchmarking."""
+
+import os
+import re
+import shutil
+import platform
+import subprocess
+from functools import lru_cache
+from . import logger
+
+# the environment variable of the cores an instance pins itself to without numactl
+CPU_AFFINITY_ENV = 'NC_CPU_AFFINITY'
+
+
+def parse_cpu_list(text):
+    """Parse a cpu list like '0-3,8,10-11' of sysfs and numactl into a list of cpu ids."""
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-')
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def format_cpu_list(cpus):
+    """Format a list of cpu ids as a comma separated cpu list."""
+    return ','.join(str(int(cpu)) for cpu in cpus)
+
+
+class CpuTopology(object):
+    """The sockets, NUMA nodes, physical cores and SMT siblings of the logical cpus.
+
+    The topology is parsed from the content of /proc/cpuinfo and the cpu lists of
+    /sys/devices/system/node, so no lscpu/grep process is spawned. A cpu without 'physical id'
+    or 'core id', e.g. on aarch64, is treated as a socket 0 core of its own, and the socket
+    stands for the NUMA node if the node lists aren't available.
+    """
+
+    def __init__(self, cpuinfo, node_cpus=None, architecture=None):
+        """Init a CpuTopology.
+
+        Args:
+            cpuinfo (str): The content of /proc/cpuinfo.
+            node_cpus (dict, optional): The cpu ids of each NUMA node id. Defaults to None.
+            architecture (str, optional): The machine architecture. Defaults to the one of
+                the running system.
+        """
+        self.architecture = architecture or platform.machine()
+        # processor -> (socket, core)
+        self._cpus = {}
+        for block in re.split(r'\n\s*\n', cpuinfo):
+            fields = {}
+            for line in block.splitlines():
+                if ':' in line:
+                    key, value = line.split(':', 1)
+                    fields[key.strip()] = value.strip()
+            if 'processor' not in fields or not fields['processor'].isdigit():
+                continue
+            processor = int(fields['processor'])
+            socket = int(fields.get('physical id', 0))
+            core = int(fields.get('core id', processor))
+            self._cpus[processor] = (socket, core)
+        self._node_of = {}
+        for node, cpus in (node_cpus or {}).items():
+            for cpu in cpus:
+                if cpu in self._cpus:
+                    self._node_of[cpu] = node
+        for cpu, (socket, _) in self._cpus.items():
+            self._node_of.setdefault(cpu, socket if not node_cpus else min(node_cpus))
+        self._siblings = {}
+        for cpu in sorted(self._cpus):
+            self._siblings.setdefault(self._cpus[cpu], []).append(cpu)
+
+    @classmethod
+    def from_system(cls, cpuinfo_path='/proc/cpuinfo', node_path='/sys/devices/system/node'):
+        """Read the topology of the running system.
+
+        Args:
+            cpuinfo_path (str, optional): The path of cpuinfo. Defaults to '/proc/cpuinfo'.
+            node_path (str, optional): The sysfs directory of the NUMA nodes.
+                Defaults to '/sys/devices/system/node'.
+
+        Returns:
+            CpuTopology: The topology.
+        """
+        with open(cpuinfo_path) as f:
+            cpuinfo = f.read()
+        node_cpus = {}
+        if os.path.isdir(node_path):
+            for name in os.listdir(node_path):
+                match = re.fullmatch(r'node(\d+)', name)
+                cpulist = os.path.join(node_path, name, 'cpulist')
+                if match and os.path.exists(cpulist):
+                    with open(cpulist) as f:
+                        cpus = parse_cpu_list(f.read())
+                    if cpus:
+                        node_cpus[int(match.group(1))] = cpus
+        return cls(cpuinfo, node_cpus)
+
+    @property
+    def threads(self):
+        """The ids of the logical cpus."""
+        return sorted(self._cpus)
+
+    @property
+    def sockets(self):
+        """The ids of the sockets."""
+        return sorted(set(socket for socket, _ in self._cpus.values()))
+
+    @property
+    def nodes(self):
+        """The ids of the NUMA nodes."""
+        return sorted(set(self._node_of.values()))
+
+    @property
+    def physical_cores(self):
+        """The first logical cpu of every physical core, in cpu id order."""
+        return sorted(siblings[0] for siblings in self._siblings.values())
+
+    @property
+    def threads_per_core(self):
+        """The number of SMT threads per physical core."""
+        return max((len(siblings) for siblings in self._siblings.values()), default=1)
+
+    def socket_of(self, cpu):
+        """Get the socket id of a logical cpu."""
+        return self._cpus[cpu][0]
+
+    def core_of(self, cpu):
+        """Get the core id of a logical cpu within its socket."""
+        return self._cpus[cpu][1]
+
+    def node_of(self, cpu):
+        """Get the NUMA node id of a logical cpu."""
+        return self._node_of[cpu]
+
+    def siblings(self, cpu):
+        """Get the logical cpus sharing the physical core of a cpu."""
+        return list(self._siblings[self._cpus[cpu]])
+
+    def cores_of(self, cpus):
+        """Get the physical cores, i.e. their first logical cpus, the logical cpus run on.
+
+        The cpus missing from the cpuinfo, e.g. in a container, count as a core of their own.
+        """
+        return sorted({self._siblings[self._cpus[cpu]][0] if cpu in self._cpus else cpu
+                       for cpu in cpus})
+
+    def node_cores(self, node):
+        """Get the physical cores, i.e. their first logical cpus, of a NUMA node."""
+        return [cpu for cpu in self.physical_cores if self._node_of[cpu] == node]
+
+    def instance_layout(self, num_of_instance, cores_per_instance):
+        """Lay out the benchmark instances on the physical cores of the NUMA nodes.
+
+        An instance is placed on a single node whenever one has enough free cores, and among
+        those, on the node running the fewest instances, so the instances share the memory
+        bandwidth of all the nodes instead of filling the first node up. An instance larger
+        than the free cores of every node is split across nodes, and sockets, in id order.
+
+        Args:
+            num_of_instance (int): The number of instances.
+            cores_per_instance (int): The number of physical cores of each instance.
+
+        Returns:
+            list: A (cores, nodes) tuple per instance, the cpu ids the instance is bound to
+                and the ids of the nodes they belong to.
+        """
+        assert num_of_instance * cores_per_instance <= len(self.physical_cores), \
+            'num_of_instance * cores_per_instance should <= cpu physical cores'
+        free = {node: self.node_cores(node) for node in self.nodes}
+        running = {node: 0 for node in self.nodes}
+        layout = []
+        for _ in range(num_of_instance):
+            candidates = [node for node in self.nodes if len(free[node]) >= cores_per_instance]
+            if candidates:
+                node = min(candidates, key=lambda n: (running[n], -len(free[n]), n))
+                cores, free[node] = free[node][:cores_per_instance], \
+                    free[node][cores_per_instance:]
+                nodes = [node]
+            else:
+                cores, nodes = [], []
+                for node in self.nodes:
+                    needed = cores_per_instance - len(cores)
+                    if needed == 0:
+                        break
+                    if free[node]:
+                        cores += free[node][:needed]
+                        free[node] = free[node][needed:]
+                        nodes.append(node)
+            for node in nodes:
+                running[node] += 1
+            layout.append((cores, nodes))
+        return layout
+
+
+@lru_cache(None)
+def get_cpu_topology():
+    """Get the topology of the running system, it's parsed once per process."""
+    return CpuTopology.from_system()
+
+
+@lru_cache(None)
+def numactl_available():
+    """Check whether numactl can bind the processes, it's checked once per process."""
+    if shutil.which('numactl') is None:
+        return False
+    try:
+        return subprocess.run(['numactl', '--show'], stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL).returncode == 0
+    except OSError: # pragma: no cover
+        return False
+
+
+def apply_cpu_affinity():
+    """Pin the running process to the cores in CPU_AFFINITY_ENV, if it is set.
+
+    It's the in-process binding of a benchmark instance when numactl is unavailable.
+
+    Returns:
+        list: The cpu ids the process is pinned to, None if it isn't pinned.
+    """
+    cpus = os.environ.get(CPU_AFFINITY_ENV)
+    if not cpus or not hasattr(os, 'sched_setaffinity'):
+        return None
+    cpus = parse_cpu_list(cpus)
+    try:
+        os.sched_setaffinity(0, cpus)
+    except OSError as e:
+        logger.warning("Fail to set the cpu affinity to {}: {}.".format(cpus, e))
+        return None
+    return cpus
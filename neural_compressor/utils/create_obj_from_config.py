@@ -19,7 +19,14 @@
 
 from neural_compressor.experimental.metric import METRICS
 from neural_compressor.experimental.data import Datasets, TRANSFORMS, FILTERS, DATALOADERS
+from neural_compressor.experimental.data.datasets.cached_dataset import CachedDataset, \
+    dataset_cache_key
+from neural_compressor.experimental.data.dataloaders.default_dataloader import default_collate
+from neural_compressor.experimental.data.transforms.transform import BatchComposeTransform
 from neural_compressor.experimental.common import Optimizers, Criterions
+from neural_compressor.utils import logger
+from neural_compressor.utils.early_stop import early_stop_dataloader, running_mean, \
+    is_shuffled
 from collections import OrderedDict
 import copy
 import gc
@@ -64,8 +71,12 @@ def get_algorithm(algorithms, cfg, compose=False):
     #(TODO) only support open/close according to cfg
     return [algorithms()[algo]() for algo in algo_conf if cfg[algo]]
 
-def create_dataset(framework, data_source, cfg_preprocess, cfg_filter):
-    """Create the dataset from the data source."""
+def create_dataset(framework, data_source, cfg_preprocess, cfg_filter, cache=None):
+    """Create the dataset from the data source.
+
+    With a cache directory, the preprocessed samples of an index dataset are cached in
+    memory-mapped files, which are reused by the later runs with the same dataset config.
+    """
     transform_list = []
     # generate framework specific transforms
     preprocess = None
@@ -85,9 +96,45 @@ def create_dataset(framework, data_source, cfg_preprocess, cfg_filter):
     # in this case we should prepare eval_data and calib_data sperately
     dataset = datasets[dataset_type](**data_source[dataset_type],
                                      transform=preprocess, filter=filter)
+    if cache is not None:
+        if not (hasattr(dataset, '__getitem__') and hasattr(dataset, '__len__')):
+            logger.warning("Only the index dataset can be cached, {} is not cached.".format(
+                dataset_type))
+            return dataset
+        key = dataset_cache_key(framework, data_source, cfg_preprocess, cfg_filter)
+        try:
+            dataset = CachedDataset(dataset, cache, key)
+        except ValueError as e:
+            logger.warning("Fail to cache {}: {}, use the dataset directly.".format(
+                dataset_type, e))
     return dataset
 
 
+def split_batch_preprocess(framework, cfg_preprocess):
+    """Split the transform config into the per-sample transforms and the batch transforms.
+
+    The trailing transforms supporting batches, e.g. Normalize, Transpose and Cast, are
+    composed into a BatchComposeTransform, which runs on the collated batches.
+
+    Returns:
+        tuple: The per-sample transform config and the BatchComposeTransform, which are None
+            if there isn't any such transform.
+    """
+    preprocesses = TRANSFORMS(framework, 'preprocess')
+    names = list(cfg_preprocess.keys())
+    start = len(names)
+    while start > 0 and hasattr(preprocesses[names[start - 1]], 'batch_plan'):
+        start -= 1
+    if start == len(names):
+        return cfg_preprocess, None
+    cfg_batch = OrderedDict((name, cfg_preprocess[name]) for name in names[start:])
+    batch_preprocess = BatchComposeTransform(
+        get_preprocess(preprocesses, cfg_batch).transform_list)
+    cfg_sample = OrderedDict((name, cfg_preprocess[name]) for name in names[:start]) \
+        if start else None
+    return cfg_sample, batch_preprocess
+
+
 def create_dataloader(framework, dataloader_cfg):
     """Create the dataloader according to the framework."""
     batch_size = int(dataloader_cfg['batch_size']) \
@@ -99,22 +146,43 @@ def create_dataloader(framework, dataloader_cfg):
     distributed = dataloader_cfg['distributed'] \
         if dataloader_cfg.get('distributed') is not None else False
 
+    cfg_preprocess = copy.deepcopy(dataloader_cfg['transform'])
+    collate_fn = None
+    if dataloader_cfg.get('batch_transform') and cfg_preprocess:
+        if framework.startswith('onnxrt'):
+            cfg_preprocess, batch_preprocess = split_batch_preprocess(framework, cfg_preprocess)
+            if batch_preprocess is not None:
+                collate_fn = lambda batch: batch_preprocess(default_collate(batch))
+        else:
+            logger.warning("Batch transform is only supported by ONNX Runtime, "
+                           "the transforms run per sample.")
+
     dataset = create_dataset(framework,
                              copy.deepcopy(dataloader_cfg['dataset']),
-                             copy.deepcopy(dataloader_cfg['transform']),
-                             copy.deepcopy(dataloader_cfg['filter']),)
+                             cfg_preprocess,
+                             copy.deepcopy(dataloader_cfg['filter']),
+                             dataloader_cfg.get('cache'))
 
     return DATALOADERS[framework](dataset=dataset,
                                   batch_size=batch_size,
                                   last_batch=last_batch,
+                                  collate_fn=collate_fn,
                                   shuffle=shuffle,
                                   distributed=distributed)
 
 
+def _has_len(dataloader):
+    try:
+        len(dataloader)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
 def create_eval_func(framework, dataloader, adaptor,
                      metric, postprocess_cfg=None,
                      iteration=-1, tensorboard=False,
-                     fp32_baseline=False):
+                     fp32_baseline=False, early_stop=None):
     """The interface to create evaluate function from config.
 
     Args:
@@ -126,6 +194,10 @@ def create_eval_func(framework, dataloader, adaptor,
         iteration: The number of iterations to evaluate.
         tensorboard: Whether to use tensorboard.
         fp32_baseline: The fp32 baseline score.
+        early_stop: The EarlyStopCriterion to stop the evaluation once the accuracy target
+            is settled, only for a single metric averaging per-sample scores, e.g. topk,
+            and samples in random order.
+            The wrapped dataloader of the last evaluation is kept in eval_func.dataloader.
 
     Returns:
         The constructed evaluation function
@@ -150,12 +222,34 @@ def create_eval_func(framework, dataloader, adaptor,
     else:
         metrics = metric
 
+    if early_stop is not None:
+        eval_metrics = metrics if isinstance(metrics, list) else [metrics]
+        if len(eval_metrics) != 1 or running_mean(eval_metrics[0]) is None:
+            logger.warning("Early stop of evaluation only supports a single metric averaging "
+                           "per-sample scores, e.g. topk, evaluate all the samples.")
+            early_stop = None
+        elif getattr(dataloader, 'distributed', False) or not _has_len(dataloader):
+            logger.warning("Early stop of evaluation needs the length of a not distributed "
+                           "dataloader, evaluate all the samples.")
+            early_stop = None
+        elif not (early_stop.shuffled or is_shuffled(dataloader)):
+            logger.warning("Early stop of evaluation needs the samples in random order, "
+                           "shuffle them in the dataloader or set early_stop.shuffled if "
+                           "the dataset is shuffled, evaluate all the samples.")
+            early_stop = None
+
     def eval_func(model, measurer=None):
-        return adaptor.evaluate(model, dataloader, postprocess,
+        eval_dataloader = dataloader
+        if early_stop is not None:
+            eval_dataloader = early_stop_dataloader(dataloader, eval_metrics[0], early_stop,
+                                                    iteration)
+        eval_func.dataloader = eval_dataloader
+        return adaptor.evaluate(model, eval_dataloader, postprocess,
                                 metrics, measurer, iteration,
                                 tensorboard, fp32_baseline)
     # TODO: to find a better way
     eval_func.builtin = True
+    eval_func.dataloader = dataloader
 
     return eval_func
 
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Early termination of the accuracy evaluation with sequential bounds."""
+
+import math
+import sys
+from neural_compressor.experimental.data.dataloaders.base_dataloader import BaseDataLoader
+from neural_compressor.experimental.data.dataloaders.pytorch_dataloader import PyTorchDataLoader
+from . import logger
+
+
+def running_mean(metric):
+    """Get the running mean of per-sample scores in [0, 1] and the number of samples.
+
+    Args:
+        metric (object): The metric instance, the built-in metrics implement it with
+            BaseMetric.running_mean.
+
+    Returns:
+        tuple: (mean, num_samples), or None if the metric isn't the mean of per-sample
+            scores in [0, 1], e.g. mAP or MSE.
+    """
+    get_running_mean = getattr(metric, 'running_mean', None)
+    return get_running_mean() if callable(get_running_mean) else None
+
+
+def is_shuffled(dataloader):
+    """Check if a dataloader yields the samples in random order.
+
+    Only a torch DataLoader with a RandomSampler is known to, which includes the pytorch
+    dataloader of neural_compressor created with shuffle=True. The dataloaders of the other
+    frameworks ignore their shuffle argument.
+
+    Args:
+        dataloader (object): The evaluation dataloader.
+
+    Returns:
+        bool: True if the dataloader shuffles the samples.
+    """
+    torch = sys.modules.get('torch')
+    if torch is None:
+        return False
+    if isinstance(dataloader, PyTorchDataLoader):
+        return bool(dataloader.shuffle) and not dataloader.distributed
+    return isinstance(getattr(dataloader, 'sampler', None), torch.utils.data.RandomSampler)
+
+
+class EarlyStopCriterion(object):
+    """Decide if the accuracy target is settled before all samples are evaluated.
+
+    The final accuracy over N samples, of which n are evaluated with running accuracy p,
+    lies in [n * p / N, (n * p + N - n) / N] for sure. Assuming the samples are in random
+    order, the Hoeffding-Serfling bound for sampling without replacement narrows it to
+    p +/- sqrt((1 - (n - 1) / N) * log(1 / delta) / (2 * n)) with probability 1 - delta.
+    The evaluation stops once the whole interval is on one side of the target.
+
+    The random order is required: in an evaluation set sorted by class, the first samples
+    are no estimate of the final accuracy and the bound is wrong. So create_eval_func only
+    uses the criterion with a shuffling dataloader, see is_shuffled, or if shuffled is set
+    because the samples are known to be in random order, e.g. shuffled once on disk.
+    """
+
+    def __init__(self, target, higher_is_better=True, confidence=0.99, min_samples=0,
+                 shuffled=False):
+        """Init an EarlyStopCriterion.
+
+        Args:
+            target (float): The accuracy target.
+            higher_is_better (bool, optional): Whether the accuracy meets the target when it's
+                higher than the target. Defaults to True.
+            confidence (float, optional): The confidence 1 - delta of each bound. Defaults to 0.99.
+            min_samples (int, optional): The number of samples evaluated before any decision.
+                Defaults to 0.
+            shuffled (bool, optional): Whether the evaluation samples are in random order
+                even if the dataloader doesn't shuffle them. Defaults to False.
+        """
+        self.target = target
+        self.higher_is_better = higher_is_better
+        self.confidence = confidence
+        self.min_samples = min_samples
+        self.shuffled = shuffled
+
+    def bounds(self, mean, num_samples, total_samples):
+        """Get the bounds of the final accuracy.
+
+        Args:
+            mean (float): The running accuracy.
+            num_samples (int): The number of evaluated samples.
+            total_samples (int): The (estimated) number of all samples.
+
+        Returns:
+            tuple: The lower and upper bounds of the final accuracy.
+        """
+        total_samples = max(total_samples, num_samples)
+        lower = mean * num_samples / total_samples
+        upper = (mean * num_samples + total_samples - num_samples) / total_samples
+        if num_samples < total_samples:
+            eps = math.sqrt((1. - (num_samples - 1.) / total_samples) * \
+                math.log(1. / (1. - self.confidence)) / (2. * num_samples))
+            lower, upper = max(lower, mean - eps), min(upper, mean + eps)
+        return lower, upper
+
+    def decide(self, mean, num_samples, total_samples):
+        """Check if the final accuracy is settled.
+
+        Args:
+            mean (float): The running accuracy.
+            num_samples (int): The number of evaluated samples.
+            total_samples (int): The (estimated) number of all samples.
+
+        Returns:
+            str: 'met' or 'missed' if the final accuracy will meet or miss the target,
+                None if it isn't settled yet.
+        """
+        if num_samples == 0 or num_samples < self.min_samples:
+            return None
+        lower, upper = self.bounds(mean, num_samples, total_samples)
+        if self.higher_is_better:
+            if lower >= self.target:
+                return 'met'
+            if upper < self.target:
+                return 'missed'
+        else:
+            if upper < self.target:
+                return 'met'
+            if lower >= self.target:
+                return 'missed'
+        return None
+
+
+class EarlyStopDataLoader(object):
+    """Dataloader wrapper stopping the evaluation once the criterion settles the accuracy.
+
+    The adaptors update the metric with a batch before they fetch the next one, so the
+    metric is consulted between two batches without any change of the evaluation loops.
+    The other attributes are forwarded to the wrapped dataloader. Use early_stop_dataloader
+    to wrap a BaseDataLoader, the adaptors change its batch size if the evaluation fails.
+    """
+
+    def __init__(self, dataloader, metric, criterion, iteration=-1):
+        """Init an EarlyStopDataLoader.
+
+        Args:
+            dataloader (object): The evaluation dataloader.
+            metric (object): The metric updated by the evaluation.
+            criterion (EarlyStopCriterion): The criterion to stop the evaluation.
+            iteration (int, optional): The number of evaluated batches, -1 means all.
+                Defaults to -1.
+        """
+        self.dataloader = dataloader
+        self.metric = metric
+        self.criterion = criterion
+        self.iteration = iteration
+        self.decision = None
+        self.num_samples = 0
+
+    def __getattr__(self, name):
+        """Forward the other attributes to the wrapped dataloader."""
+        return getattr(self.__dict__['dataloader'], name)
+
+    def __len__(self):
+        """Return the number of batches of the wrapped dataloader."""
+        return len(self.dataloader)
+
+    def __iter__(self):
+        """Iterate the wrapped dataloader until the accuracy is settled."""
+        self.decision = None
+        # the batch size of the wrapped dataloader can change between two evaluations
+        total_batches = len(self.dataloader)
+        if self.iteration > 0:
+            total_batches = min(total_batches, self.iteration)
+        for num_batches, batch in enumerate(self.dataloader):
+            if num_batches > 0:
+                mean, self.num_samples = running_mean(self.metric)
+                total_samples = self.num_samples * total_batches // num_batches
+                self.decision = self.criterion.decide(mean, self.num_samples, total_samples)
+                if self.decision is not None:
+                    logger.info("Stop the evaluation after {} samples, accuracy {:.4f} {} "
+                                "the target {:.4f}.".format(self.num_samples, mean,
+                                'will meet' if self.decision == 'met' else 'cannot meet',
+                                self.criterion.target))
+                    return
+            yield batch
+
+    @property
+    def partial(self):
+        """Whether the last evaluation was stopped early."""
+        return self.decision is not None
+
+
+class EarlyStopBaseDataLoader(EarlyStopDataLoader, BaseDataLoader):
+    """EarlyStopDataLoader of a BaseDataLoader, the adaptors can change its batch size."""
+
+    def batch(self, batch_size, last_batch=None):
+        """Set the batch size of the wrapped dataloader.
+
+        Args:
+            batch_size (int): number of samples per batch.
+            last_batch (str, optional): whether to drop the last batch if it is incomplete.
+                Defaults to None.
+        """
+        self.dataloader.batch(batch_size, last_batch)
+
+    @property
+    def batch_size(self):
+        """Get the batch size of the wrapped dataloader."""
+        return self.dataloader.batch_size
+
+
+def early_stop_dataloader(dataloader, metric, criterion, iteration=-1):
+    """Wrap a dataloader to stop the evaluation once the criterion settles the accuracy.
+
+    Args:
+        dataloader (object): The evaluation dataloader.
+        metric (object): The metric updated by the evaluation.
+        criterion (EarlyStopCriterion): The criterion to stop the evaluation.
+        iteration (int, optional): The number of evaluated batches, -1 means all.
+            Defaults to -1.
+
+    Returns:
+        EarlyStopDataLoader: the wrapped dataloader, an EarlyStopBaseDataLoader if the
+            dataloader is a BaseDataLoader.
+    """
+    if isinstance(dataloader, BaseDataLoader):
+        return EarlyStopBaseDataLoader(dataloader, metric, criterion, iteration)
+    return EarlyStopDataLoader(dataloader, metric, criterion, iteration)
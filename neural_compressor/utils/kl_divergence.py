@@ -18,13 +18,21 @@
 """KL Divergence: measure probability distribution difference to determine the thresholds per quantized op."""
 
 import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 
 class KL_Divergence(object):
     """The class of supporting KL divergence calibration algorithm."""
-    def __init__(self):
-        """Init a KL Divergence object."""
-        pass
+    def __init__(self, num_threads=None):
+        """Init a KL Divergence object.
+
+        Args:
+            num_threads (int, optional): Number of threads used by get_thresholds to search
+                several tensors concurrently. None means search them one by one.
+        """
+        self.num_threads = num_threads
 
     def expand_quantized_bins(self, quantized_bins, reference_bins):
         """Expand quantized bins."""
@@ -68,20 +76,12 @@ class KL_Divergence(object):
                 tmp_sum2 += p_idx * (math.log(P_sum * q_idx))
         return (tmp_sum1 - tmp_sum2) / P_sum
 
-    def get_threshold(self,
-                      hist,
-                      hist_edges,
-                      min_val,
-                      max_val,
-                      num_bins,
-                      quantized_type,
-                      num_quantized_bins=255):
-        """The interface of getting threshold per op using KL divergency algorithm."""
+    def _candidate_range(self, hist, min_val, max_val, num_bins):
+        """Get the first and the last bin index which are candidates of the threshold."""
         if min_val >= 0:
             ending_iter = num_bins - 1
             starting_iter = int(ending_iter * 0.7)
         else:
-            th = max(abs(max_val), abs(min_val))
             starting_iter = 0
             ending_iter = num_bins - 1
             if abs(max_val) > abs(min_val):
@@ -100,47 +100,124 @@ class KL_Divergence(object):
                     else:
                         break
                 starting_iter = int(0.6 * ending_iter)
+        return starting_iter, ending_iter
+
+    def kl_divergence(self, hist, index, num_quantized_bins=255):
+        """Compute the KL divergence of one candidate bin index with the reference loops.
+
+        This is the original element-by-element implementation. It is slow and only used to
+        break near ties of the vectorized search, so the selected index is exactly the one
+        the loops would select.
+        """
+        reference_distr_P = hist[0:index].tolist()
+        outliers_count = sum(hist[index:2048])
+        reference_distr_P[index - 1] += outliers_count
+        reference_distr_bins = reference_distr_P[:]
+        candidate_distr_Q = hist[0:index].tolist()
+        num_merged_bins = int(index / num_quantized_bins)
+        candidate_distr_Q_quantized = [0] * num_quantized_bins
+        j_start = 0
+        j_end = num_merged_bins
+
+        for idx in range(num_quantized_bins):
+            candidate_distr_Q_quantized[idx] = sum(
+                candidate_distr_Q[j_start:j_end])
+            j_start += num_merged_bins
+            j_end += num_merged_bins
+            if idx + 1 == num_quantized_bins - 1:
+                j_end = index
+        candidate_distr_Q = self.expand_quantized_bins(
+            candidate_distr_Q_quantized, reference_distr_bins)
+        P_sum = sum(reference_distr_P)
+        Q_sum = sum(candidate_distr_Q)
+        return self.safe_entropy(reference_distr_P, P_sum, candidate_distr_Q, Q_sum)
+
+    def kl_divergences(self, hist, candidates, num_quantized_bins=255):
+        """Compute the KL divergence of all candidate bin indexes at once.
+
+        The reference distribution P of candidate i is hist[0:i] with the outliers folded into
+        its last bin, and the candidate distribution Q merges hist[0:i] into num_quantized_bins
+        bins. Because every bin of Q except the last one only depends on i // num_quantized_bins,
+        those bins are merged once per group of candidates with a reshape, and the last bin of
+        every candidate is read from cumulative sums.
 
+        Args:
+            hist (np.array): The histogram.
+            candidates (np.array): Candidate bin indexes, each one must satisfy hist[i - 1] != 0.
+            num_quantized_bins (int): Number of bins of the quantized distribution.
+
+        Returns:
+            np.array: The KL divergence of each candidate.
+        """
+        hist = np.asarray(hist, dtype=np.float64)
+        candidates = np.asarray(candidates, dtype=np.int64)
+        safe_hist = np.where(hist > 0, hist, 1.)
+        hist_log_hist = hist * np.log(safe_hist)
+        cum_hist = np.concatenate(([0.], np.cumsum(hist)))
+        cum_nonzero = np.concatenate(([0], np.cumsum(hist != 0)))
+        cum_hist_log_hist = np.concatenate(([0.], np.cumsum(hist_log_hist)))
+
+        # the outliers are hist[i:2048] to be consistent with the reference loops
+        outliers_end = min(2048, hist.size)
+        outliers = np.where(candidates < outliers_end,
+                            cum_hist[outliers_end] - cum_hist[np.minimum(candidates, outliers_end)],
+                            0.)
+        last_p = hist[candidates - 1] + outliers
+        p_sum = cum_hist[candidates] + outliers
+        q_sum = cum_hist[candidates]
+
+        # sum(p * log(q)) where q is the average of a merged bin over its non-zero elements
+        p_log_q = np.empty(candidates.size)
+        num_merged_bins = candidates // num_quantized_bins
+        for merged in np.unique(num_merged_bins):
+            group = np.nonzero(num_merged_bins == merged)[0]
+            indexes = candidates[group]
+            last_start = (num_quantized_bins - 1) * merged
+            head = 0.
+            if merged > 0:
+                merged_sum = hist[:last_start].reshape(-1, merged).sum(axis=1)
+                merged_nonzero = (hist[:last_start] != 0).reshape(-1, merged).sum(axis=1)
+                valid = merged_nonzero > 0
+                head = np.sum(merged_sum[valid] * np.log(merged_sum[valid] / merged_nonzero[valid]))
+            last_sum = cum_hist[indexes] - cum_hist[last_start]
+            last_nonzero = cum_nonzero[indexes] - cum_nonzero[last_start]
+            p_log_q[group] = head + (last_sum + outliers[group]) * np.log(last_sum / last_nonzero)
+
+        p_log_p = cum_hist_log_hist[candidates - 1] + last_p * np.log(last_p)
+        return (p_sum * np.log(q_sum) - p_sum * np.log(p_sum) + p_log_p - p_log_q) / p_sum
+
+    def get_threshold(self,
+                      hist,
+                      hist_edges,
+                      min_val,
+                      max_val,
+                      num_bins,
+                      quantized_type,
+                      num_quantized_bins=255):
+        """The interface of getting threshold per op using KL divergency algorithm."""
+        hist = np.asarray(hist)
+        starting_iter, ending_iter = self._candidate_range(hist, min_val, max_val, num_bins)
         bin_width = hist_edges[1] - hist_edges[0]
-        min_kl_divergence = 0
+
+        candidates = np.arange(max(starting_iter, 1), ending_iter + 1)
+        candidates = candidates[hist[candidates - 1] != 0]
         min_kl_index = 0
-        kl_inited = False
-
-        for i in range(starting_iter, ending_iter + 1):
-            reference_distr_P = hist[0:i].tolist()
-            outliers_count = sum(hist[i:2048])
-            if reference_distr_P[i - 1] == 0:
-                continue
-            reference_distr_P[i - 1] += outliers_count
-            reference_distr_bins = reference_distr_P[:]
-            candidate_distr_Q = hist[0:i].tolist()
-            num_merged_bins = int(i / num_quantized_bins)
-            candidate_distr_Q_quantized = [0] * num_quantized_bins
-            j_start = 0
-            j_end = num_merged_bins
-
-            for idx in range(num_quantized_bins):
-                candidate_distr_Q_quantized[idx] = sum(
-                    candidate_distr_Q[j_start:j_end])
-                j_start += num_merged_bins
-                j_end += num_merged_bins
-                if idx + 1 == num_quantized_bins - 1:
-                    j_end = i
-            candidate_distr_Q = self.expand_quantized_bins(
-                candidate_distr_Q_quantized, reference_distr_bins)
-            P_sum = sum(reference_distr_P)
-            Q_sum = sum(candidate_distr_Q)
-            kl_divergence = self.safe_entropy(reference_distr_P, P_sum,
-                                              candidate_distr_Q, Q_sum)
-            if not kl_inited:
-                min_kl_divergence = kl_divergence
-                min_kl_index = i
-                kl_inited = True
-            elif kl_divergence < min_kl_divergence:
-                min_kl_divergence = kl_divergence
-                min_kl_index = i
+        if candidates.size > 0:
+            divergences = self.kl_divergences(hist, candidates, num_quantized_bins)
+            min_kl_divergence = divergences.min()
+            # candidates too close to the minimum are compared again with the reference
+            # loops since the rounding errors of both implementations differ.
+            tolerance = 1e-8 * max(1., abs(min_kl_divergence))
+            ties = candidates[divergences <= min_kl_divergence + tolerance]
+            if ties.size == 1:
+                min_kl_index = int(ties[0])
             else:
-                pass
+                min_kl_divergence = None
+                for i in ties.tolist():
+                    kl_divergence = self.kl_divergence(hist, i, num_quantized_bins)
+                    if min_kl_divergence is None or kl_divergence < min_kl_divergence:
+                        min_kl_divergence = kl_divergence
+                        min_kl_index = i
 
         if min_kl_index == 0:
             while starting_iter > 0:
@@ -150,4 +227,29 @@ class KL_Divergence(object):
                 else:
                     break
             min_kl_index = starting_iter
-        return (min_kl_index + 0.5) * bin_width
\ No newline at end of file
+        return (min_kl_index + 0.5) * bin_width
+
+    def get_thresholds(self, hist_dict, quantized_type, num_quantized_bins=255):
+        """Get the thresholds of several tensors, concurrently if num_threads is set.
+
+        Args:
+            hist_dict (dict): Tensor name as key and (hist, hist_edges, min_val, max_val, th)
+                as value, which is the format of LayerHistogramCollector.hist_dict.
+            quantized_type: The quantized data type.
+            num_quantized_bins (int): Number of bins of the quantized distribution.
+
+        Returns:
+            dict: Tensor name as key and threshold as value.
+        """
+        def _search(item):
+            hist, hist_edges, min_val, max_val, _ = item
+            return self.get_threshold(hist, hist_edges, min_val, max_val, len(hist),
+                                      quantized_type, num_quantized_bins)
+
+        names = list(hist_dict.keys())
+        if self.num_threads and self.num_threads > 1 and len(names) > 1:
+            with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+                thresholds = list(executor.map(_search, [hist_dict[name] for name in names]))
+        else:
+            thresholds = [_search(hist_dict[name]) for name in names]
+        return dict(zip(names, thresholds))
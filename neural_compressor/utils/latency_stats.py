@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Latency recording, warm-up detection and tail latency statistics for benchmarking."""
+
+import math
+import time
+
+import numpy as np
+
+# the percentiles reported by the latency summary
+PERCENTILES = [50, 90, 99, 99.9]
+
+# time.perf_counter_ns is new in Python 3.7
+_perf_counter_ns = getattr(time, 'perf_counter_ns', lambda: int(time.perf_counter() * 1e9))
+
+
+class LatencyRecorder(object):
+    """Array-backed recorder of per-iteration latencies.
+
+    The latencies are kept in a float64 array doubled on demand, 8 bytes per iteration
+    instead of a python float object and a list slot.
+    """
+
+    def __init__(self, capacity=1024):
+        """Init a LatencyRecorder.
+
+        Args:
+            capacity (int, optional): The initial capacity. Defaults to 1024.
+        """
+        self._data = np.empty(max(1, capacity), dtype=np.float64)
+        self._size = 0
+
+    def append(self, latency):
+        """Record the latency of one iteration."""
+        if self._size == len(self._data):
+            data = np.empty(2 * len(self._data), dtype=np.float64)
+            data[:self._size] = self._data
+            self._data = data
+        self._data[self._size] = latency
+        self._size += 1
+
+    def extend(self, latencies):
+        """Record the latencies of several iterations."""
+        for latency in latencies:
+            self.append(latency)
+
+    @property
+    def values(self):
+        """The recorded latencies as a numpy array."""
+        return self._data[:self._size]
+
+    def __len__(self):
+        """Return the number of recorded iterations."""
+        return self._size
+
+
+def detect_warmup(latencies, batch=5, max_fraction=0.5):
+    """Detect the end of warm-up with the MSER-5 truncation rule.
+
+    The latencies are averaged in batches of `batch` iterations, and the number of leading
+    batches d is chosen to minimize the squared standard error of the mean of the remaining
+    batches, sum((x_i - mean_d)^2) / (n - d)^2. Dropping slow warm-up iterations reduces the
+    error until the steady state is reached, dropping steady state iterations increases it.
+
+    Args:
+        latencies (array like): The per-iteration latencies in running order.
+        batch (int, optional): The number of iterations averaged per batch. Defaults to 5.
+        max_fraction (float, optional): The maximum fraction of the iterations treated as
+            warm-up. Defaults to 0.5.
+
+    Returns:
+        int: The number of warm-up iterations.
+    """
+    latencies = np.asarray(latencies, dtype=np.float64)
+    num_batches = len(latencies) // batch
+    if num_batches < 2:
+        return 0
+    means = latencies[:num_batches * batch].reshape(num_batches, batch).mean(axis=1)
+    # the sums over means[d:] for every d
+    tail_sum = np.cumsum(means[::-1])[::-1]
+    tail_square_sum = np.cumsum((means ** 2)[::-1])[::-1]
+    tail_count = np.arange(num_batches, 0, -1, dtype=np.float64)
+    squared_error = np.maximum(tail_square_sum - tail_sum ** 2 / tail_count, 0.)
+    mser = squared_error / tail_count ** 2
+    limit = max(1, int(num_batches * max_fraction))
+    return int(np.argmin(mser[:limit])) * batch
+
+
+def latency_summary(latencies, batch_size=1):
+    """Summarize the latencies of the measured iterations.
+
+    Args:
+        latencies (array like): The per-iteration latencies in seconds.
+        batch_size (int, optional): The batch size of each iteration. Defaults to 1.
+
+    Returns:
+        dict: The count, mean, std, cv (std / mean), min, max and the PERCENTILES of the
+            per-iteration latency, e.g. 'p99', and the throughput in samples per second.
+    """
+    latencies = np.asarray(latencies, dtype=np.float64)
+    if len(latencies) == 0:
+        return {}
+    mean = float(latencies.mean())
+    std = float(latencies.std())
+    summary = {'count': len(latencies), 'mean': mean, 'std': std,
+               'cv': std / mean if mean > 0 else 0., 'min': float(latencies.min()),
+               'max': float(latencies.max())}
+    for q, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+        summary['p{:g}'.format(q)] = float(value)
+    summary['throughput'] = batch_size / mean if mean > 0 else 0.
+    return summary
+
+
+def reject_outliers(latencies, threshold=3.5):
+    """Drop the outliers, whose modified z-score by the median absolute deviation exceeds threshold.
+
+    Args:
+        latencies (array like): The latencies.
+        threshold (float, optional): The modified z-score threshold. Defaults to 3.5.
+
+    Returns:
+        numpy.ndarray: The latencies without the outliers, in the original order.
+    """
+    latencies = np.asarray(latencies, dtype=np.float64)
+    if len(latencies) == 0:
+        return latencies
+    median = np.median(latencies)
+    mad = np.median(np.abs(latencies - median))
+    if mad == 0:
+        return latencies
+    return latencies[0.6745 * np.abs(latencies - median) / mad <= threshold]
+
+
+def normal_quantile(p):
+    """Get the p-quantile of the standard normal distribution.
+
+    It's found by bisection of the cdf from math.erf, statistics.NormalDist is only
+    available from Python 3.8.
+    """
+    low, high = -40., 40.
+    for _ in range(100):
+        mid = (low + high) / 2
+        if 0.5 * (1. + math.erf(mid / math.sqrt(2.))) < p:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+
+def median_confidence_interval(latencies, confidence=0.95):
+    """Get the distribution-free confidence interval of the median from the order statistics.
+
+    Args:
+        latencies (array like): The latencies.
+        confidence (float, optional): The confidence level. Defaults to 0.95.
+
+    Returns:
+        tuple: The lower and upper bounds of the median.
+    """
+    latencies = np.sort(np.asarray(latencies, dtype=np.float64))
+    n = len(latencies)
+    z = normal_quantile(0.5 + confidence / 2)
+    low = max(int(np.floor(n / 2 - z * np.sqrt(n) / 2)), 0)
+    high = min(int(np.ceil(n / 2 + z * np.sqrt(n) / 2)), n - 1)
+    return float(latencies[low]), float(latencies[high])
+
+
+def measure_until_stable(run, synchronize=None, warmup=1, min_iterations=10,
+                         max_iterations=1000, max_seconds=60., precision=0.02,
+                         confidence=0.95, check_interval=5):
+    """Measure the latency of a function until the confidence interval of its median converges.
+
+    The iterations are timed with time.perf_counter_ns, or time.perf_counter before Python
+    3.7. Every check_interval iterations, the warm-up detected by detect_warmup and the
+    outliers are dropped, and the measurement stops once the half width of the confidence
+    interval of the median is within precision of the median. So a fast and stable function
+    takes a few iterations, and a noisy one takes more, up to max_iterations or max_seconds.
+
+    Args:
+        run (callable): The function to measure, called without arguments.
+        synchronize (callable, optional): Called before and after each timed call to wait for
+            asynchronous devices. Defaults to None.
+        warmup (int, optional): The number of untimed calls before measuring. Defaults to 1.
+        min_iterations (int, optional): The minimum number of timed calls. Defaults to 10.
+        max_iterations (int, optional): The maximum number of timed calls. Defaults to 1000.
+        max_seconds (float, optional): The time budget of the timed calls. Defaults to 60.
+        precision (float, optional): The relative half width of the confidence interval to
+            converge to. Defaults to 0.02.
+        confidence (float, optional): The confidence level. Defaults to 0.95.
+        check_interval (int, optional): The number of calls between the convergence checks.
+            Defaults to 5.
+
+    Returns:
+        dict: The latency_summary of the kept latencies in seconds, with the 'median', its
+            confidence interval 'ci_low' and 'ci_high', 'iterations', the number of timed
+            calls, and 'converged'.
+    """
+    for _ in range(warmup):
+        run()
+    recorder = LatencyRecorder()
+    deadline = _perf_counter_ns() + int(max_seconds * 1e9)
+    converged = False
+    while len(recorder) < max(max_iterations, 1):
+        if synchronize:
+            synchronize()
+        start = _perf_counter_ns()
+        run()
+        if synchronize:
+            synchronize()
+        end = _perf_counter_ns()
+        recorder.append((end - start) * 1e-9)
+        count = len(recorder)
+        if count >= min_iterations and (count - min_iterations) % check_interval == 0:
+            latencies = recorder.values[detect_warmup(recorder.values):]
+            latencies = reject_outliers(latencies)
+            median = np.median(latencies)
+            low, high = median_confidence_interval(latencies, confidence)
+            if (high - low) / 2 <= precision * median:
+                converged = True
+                break
+        if end > deadline and count >= 2:
+            break
+    latencies = reject_outliers(recorder.values[detect_warmup(recorder.values):])
+    summary = latency_summary(latencies)
+    summary['median'] = float(np.median(latencies))
+    summary['ci_low'], summary['ci_high'] = median_confidence_interval(latencies, confidence)
+    summary['iterations'] = len(recorder)
+    summary['converged'] = converged
+    return summary
+
+
+class LatencyHistogram(object):
+    """Mergeable histogram of latencies with logarithmic buckets.
+
+    Every bucket spans a relative width of `precision`, so the percentiles are accurate to
+    half of it whatever the magnitude of the latency, and the histograms of several benchmark
+    instances are merged by adding their counts. The exact count, sum, sum of squares, min and
+    max are kept as well for the mean and the standard deviation.
+    """
+
+    MIN_LATENCY = 1e-7
+    MAX_LATENCY = 1e4
+
+    def __init__(self, precision=0.01):
+        """Init a LatencyHistogram.
+
+        Args:
+            precision (float, optional): The relative width of the buckets. Defaults to 0.01.
+        """
+        self.precision = precision
+        self._log_base = np.log1p(precision)
+        num_buckets = int(np.ceil(np.log(self.MAX_LATENCY / self.MIN_LATENCY) /
+                                  self._log_base)) + 1
+        self.counts = np.zeros(num_buckets, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.
+        self.square_sum = 0.
+        self.min = np.inf
+        self.max = -np.inf
+        # the summed throughput of the merged instances
+        self.throughput = 0.
+
+    def add(self, latencies, batch_size=None):
+        """Add the latencies of one benchmark instance.
+
+        Args:
+            latencies (array like): The per-iteration latencies in seconds.
+            batch_size (int, optional): The batch size, if given, the throughput of the
+                instance is added to the throughput. Defaults to None.
+        """
+        latencies = np.asarray(latencies, dtype=np.float64)
+        if len(latencies) == 0:
+            return
+        clipped = np.clip(latencies, self.MIN_LATENCY, self.MAX_LATENCY)
+        buckets = np.floor(np.log(clipped / self.MIN_LATENCY) / self._log_base).astype(np.int64)
+        self.counts += np.bincount(buckets, minlength=len(self.counts))
+        self.count += len(latencies)
+        self.sum += float(latencies.sum())
+        self.square_sum += float(np.square(latencies).sum())
+        self.min = min(self.min, float(latencies.min()))
+        self.max = max(self.max, float(latencies.max()))
+        if batch_size:
+            self.throughput += batch_size * len(latencies) / float(latencies.sum())
+
+    def merge(self, other):
+        """Merge the histogram of another instance into this one."""
+        assert len(other.counts) == len(self.counts) and other.precision == self.precision, \
+            "Only the histograms with the same buckets can be merged."
+        self.counts += other.counts
+        self.count += other.count
+        self.sum += other.sum
+        self.square_sum += other.square_sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.throughput += other.throughput
+
+    def percentile(self, q):
+        """Get the q-th percentile, the geometric center of the bucket containing it."""
+        if self.count == 0:
+            return 0.
+        rank = int(np.ceil(q / 100. * self.count))
+        bucket = int(np.searchsorted(np.cumsum(self.counts), max(rank, 1)))
+        value = self.MIN_LATENCY * np.exp((bucket + 0.5) * self._log_base)
+        return float(min(max(value, self.min), self.max))
+
+    def summary(self):
+        """Summarize the merged latencies like latency_summary.
+
+        Returns:
+            dict: The count, mean, std, cv, min, max, the PERCENTILES and the summed throughput.
+        """
+        if self.count == 0:
+            return {}
+        mean = self.sum / self.count
+        std = float(np.sqrt(max(self.square_sum / self.count - mean ** 2, 0.)))
+        summary = {'count': self.count, 'mean': mean, 'std': std,
+                   'cv': std / mean if mean > 0 else 0., 'min': self.min, 'max': self.max}
+        for q in PERCENTILES:
+            summary['p{:g}'.format(q)] = self.percentile(q)
+        summary['throughput'] = self.throughput
+        return summary
+
+    def save(self, path):
+        """Save the histogram to a .npz file."""
+        np.savez(path, counts=self.counts,
+                 stats=np.array([self.precision, self.count, self.sum, self.square_sum,
+                                 self.min, self.max, self.throughput]))
+
+    @classmethod
+    def load(cls, path):
+        """Load a histogram saved by save."""
+        with np.load(path) as data:
+            precision, count, total, square_sum, minimum, maximum, throughput = data['stats']
+            histogram = cls(float(precision))
+            histogram.counts = data['counts'].astype(np.int64)
+        histogram.count = int(count)
+        histogram.sum = float(total)
+        histogram.square_sum = float(square_sum)
+        histogram.min = float(minimum)
+        histogram.max = float(maximum)
+        histogram.throughput = float(throughput)
+        return histogram
+
+
+def format_latency_summary(summary):
+    """Format the latency statistics of a summary in milliseconds for logging."""
+    return 'Iteration latency p50: {:.3f} ms, p90: {:.3f} ms, p99: {:.3f} ms, p99.9: {:.3f} ms, ' \
+        'std: {:.3f} ms, CV: {:.2%}'.format(summary['p50'] * 1000, summary['p90'] * 1000,
+                                            summary['p99'] * 1000, summary['p99.9'] * 1000,
+                                            summary['std'] * 1000, summary['cv'])
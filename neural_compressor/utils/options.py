@@ -25,6 +25,7 @@ class onnxrt:
     qdq_setting = DotDict({'OpTypesToExcludeOutputQuantizatioin': None, 
                            'AddQDQPairToWeight': False,
                            'DedicatedQDQPair': False})
+    evaluation = DotDict({'pipeline': False, 'prefetch': 2, 'iobinding': False})
 
 OPTIONS = {'tensorflow': None,
            'tensorflow_itex': None,
@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Append-only on-disk store of the tensors recorded by the tensor inspection."""
+
+import os
+import json
+from collections import OrderedDict
+import numpy as np
+
+# 'tensor' records the full tensors, 'sample' a reservoir sample of their values and 'stats'
+# their summary statistics
+RECORD_MODES = ['tensor', 'sample', 'stats']
+DEFAULT_PERCENTILES = [0.01, 1, 5, 25, 50, 75, 95, 99, 99.99]
+# the directory of the activation store in the dump directory of a model, e.g. fp32 or quan
+INSPECT_STORE_DIR = 'inspect_store'
+# the number of values sampled at a time, it bounds the random indices kept in memory
+RESERVOIR_CHUNK = 1 << 20
+# the number of op data files kept open for appending, the least recently used is closed
+MAX_OPEN_FILES = 32
+
+
+class Reservoir(object):
+    """A uniform sample of fixed size of a stream of values, by reservoir sampling.
+
+    The first `size` values fill the sample, then the i-th value of the stream replaces a
+    random value of the sample with probability size / i, so every value seen is in the
+    sample with the same probability whatever the length of the stream.
+
+    Args:
+        size (int): The size of the sample.
+        rng (numpy.random.Generator, optional): The random generator. Defaults to None.
+    """
+
+    def __init__(self, size, rng=None):
+        """Init an empty reservoir."""
+        self.size = size
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.sample = None
+        self.seen = 0
+
+    def update(self, values):
+        """Sample the values of a tensor, they're the next values of the stream."""
+        values = np.asarray(values).reshape(-1)
+        if self.sample is None:
+            self.sample = np.empty(0, dtype=values.dtype)
+        for start in range(0, len(values), RESERVOIR_CHUNK):
+            chunk = values[start:start + RESERVOIR_CHUNK]
+            fill = min(self.size - len(self.sample), len(chunk))
+            if fill > 0:
+                self.sample = np.concatenate([self.sample, chunk[:fill]])
+            rest = chunk[fill:]
+            if len(rest):
+                # the value at the 0-based position t of the stream picks a slot in [0, t]
+                positions = np.arange(self.seen + fill, self.seen + len(chunk)) + 1
+                slots = self.rng.integers(0, positions)
+                kept = slots < self.size
+                # the last value picking a slot is the one left in it
+                slots, indices = np.unique(slots[kept][::-1], return_index=True)
+                self.sample[slots] = rest[kept][::-1][indices]
+            self.seen += len(chunk)
+        return self
+
+
+def tensor_statistics(array, bins=256, percentiles=DEFAULT_PERCENTILES):
+    """Get the summary statistics of a tensor.
+
+    Args:
+        array (numpy.ndarray): The tensor.
+        bins (int, optional): The number of bins of the histogram. Defaults to 256.
+        percentiles (list, optional): The percentiles to compute. Defaults to
+            DEFAULT_PERCENTILES.
+
+    Returns:
+        dict: The size, min, max, mean and std of the values, the percentiles as
+            {percentile: value}, and the histogram as (counts, edges). The percentiles and
+            the histogram are of the finite values.
+    """
+    values = np.asarray(array).reshape(-1)
+    stats = {'num': values.size, 'min': np.nan, 'max': np.nan, 'mean': np.nan, 'std': np.nan,
+             'percentiles': OrderedDict((p, np.nan) for p in percentiles),
+             'histogram': (np.zeros(bins, dtype=np.int64), np.full(bins + 1, np.nan))}
+    if values.size == 0:
+        return stats
+    stats.update({'min': float(values.min()), 'max': float(values.max()),
+                  'mean': float(values.mean(dtype=np.float64)),
+                  'std': float(values.std(dtype=np.float64))})
+    if not (np.isfinite(stats['min']) and np.isfinite(stats['max'])):
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return stats
+    stats['percentiles'] = OrderedDict(zip(percentiles, np.percentile(values, percentiles)))
+    stats['histogram'] = np.histogram(values, bins=bins, range=(values.min(), values.max()))
+    return stats
+
+
+def _encode_statistics(stats):
+    """Pack the statistics in a float64 vector to append it to the store."""
+    counts, edges = stats['histogram']
+    return np.concatenate([[stats['num'], stats['min'], stats['max'], stats['mean'],
+                            stats['std']], list(stats['percentiles'].values()),
+                           counts, edges]).astype(np.float64)
+
+
+def _decode_statistics(vector, percentiles, bins):
+    """Unpack the statistics packed by _encode_statistics."""
+    num_percentiles = len(percentiles)
+    counts = vector[5 + num_percentiles:5 + num_percentiles + bins]
+    return {'num': int(vector[0]), 'min': vector[1], 'max': vector[2], 'mean': vector[3],
+            'std': vector[4],
+            'percentiles': OrderedDict(zip(percentiles, vector[5:5 + num_percentiles])),
+            'histogram': (counts.astype(np.int64), vector[5 + num_percentiles + bins:])}
+
+
+class TensorStore(object):
+    """Append-only store of the tensors recorded per op, one memory-mapped file per op.
+
+    A record is a tensor of an op at an iteration, e.g. an output of the op. Its payload, the
+    full tensor, a reservoir sample of its values or its statistics depending on the mode, is
+    appended to the file of the op right away, and its offset, dtype and shape to an index of
+    json lines, so the records are never kept in memory and a store is reopened to append to
+    it or to read it. The records are read memory-mapped. Only the MAX_OPEN_FILES most
+    recently appended data files are kept open, a model with more ops doesn't run out of file
+    descriptors.
+
+    Args:
+        path (str): The directory of the store.
+        mode (str, optional): One of RECORD_MODES. Defaults to 'tensor'.
+        sample_size (int, optional): The size of the reservoir samples. Defaults to 1024.
+        bins (int, optional): The number of bins of the histograms. Defaults to 256.
+        percentiles (list, optional): The percentiles of the statistics. Defaults to
+            DEFAULT_PERCENTILES.
+        seed (int, optional): The seed of the reservoir sampling. Defaults to None.
+        read_only (bool, optional): Whether the existing store is only read, no file is opened
+            for writing and nothing can be recorded. Defaults to False.
+    """
+
+    def __init__(self, path, mode='tensor', sample_size=1024, bins=256,
+                 percentiles=DEFAULT_PERCENTILES, seed=None, read_only=False):
+        """Open a store, the records of an existing store are kept."""
+        assert mode in RECORD_MODES, "The record mode should be one of {}.".format(RECORD_MODES)
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.mode = mode
+        self.sample_size = sample_size
+        self.bins = bins
+        self.percentiles = list(percentiles)
+        self.rng = np.random.default_rng(seed)
+        self.read_only = read_only
+        # data file name -> file open for appending, from the least recently used
+        self.files = OrderedDict()
+        self.records = []
+        # (op name, iteration) -> records, in the order they're recorded
+        self.op_records = {}
+        self._iterations = set()
+        # op name -> data file name
+        self.op_files = OrderedDict()
+        if not read_only:
+            os.makedirs(self.path, exist_ok=True)
+        index_path = os.path.join(self.path, 'index.jsonl')
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                for line in f:
+                    # a line cut by an interrupted write is dropped
+                    if line.endswith('\n'):
+                        self._add_record(json.loads(line))
+        self.index_file = None if read_only else open(index_path, 'a')
+
+    def _add_record(self, record):
+        self.records.append(record)
+        self.op_records.setdefault((record['op'], record['iteration']), []).append(record)
+        self._iterations.add(record['iteration'])
+        self.op_files.setdefault(record['op'], record['file'])
+
+    def record(self, op_name, iteration, key, tensor, quantized=False):
+        """Append a tensor of an op to the store.
+
+        Args:
+            op_name (str): The name of the op.
+            iteration (int): The iteration the tensor is recorded at.
+            key (str): The name of the tensor in the op, e.g. of an output.
+            tensor (numpy.ndarray): The tensor, dequantized if it's quantized.
+            quantized (bool, optional): Whether the tensor was quantized. Defaults to False.
+        """
+        assert not self.read_only, "The tensor store {} is read-only.".format(self.path)
+        array = np.asarray(tensor)
+        if self.mode == 'stats':
+            payload = _encode_statistics(tensor_statistics(array, self.bins, self.percentiles))
+        elif self.mode == 'sample':
+            payload = Reservoir(self.sample_size, self.rng).update(array).sample
+        else:
+            payload = np.ascontiguousarray(array)
+        if op_name not in self.op_files:
+            self.op_files[op_name] = '{}.bin'.format(len(self.op_files))
+        filename = self.op_files[op_name]
+        data_file = self._data_file(filename)
+        offset = data_file.tell()
+        data_file.write(payload.tobytes())
+        record = {'op': op_name, 'iteration': iteration, 'key': key, 'file': filename,
+                  'offset': offset, 'dtype': payload.dtype.str, 'shape': list(payload.shape),
+                  'tensor_shape': list(array.shape), 'quantized': bool(quantized),
+                  'mode': self.mode}
+        if self.mode == 'stats':
+            record.update({'percentiles': self.percentiles, 'bins': self.bins})
+        self._add_record(record)
+        # the data is flushed before its index line is written, so the records indexed by an
+        # interrupted process are complete
+        data_file.flush()
+        self.index_file.write(json.dumps(record) + '\n')
+
+    def _data_file(self, filename):
+        """Get the data file open for appending, the least recently used one may be closed."""
+        if filename in self.files:
+            self.files.move_to_end(filename)
+        else:
+            if len(self.files) >= MAX_OPEN_FILES:
+                self.files.popitem(last=False)[1].close()
+            self.files[filename] = open(os.path.join(self.path, filename), 'ab')
+        return self.files[filename]
+
+    def flush(self):
+        """Flush the records to the files."""
+        for data_file in self.files.values():
+            data_file.flush()
+        if self.index_file is not None:
+            self.index_file.flush()
+
+    def close(self):
+        """Close the files, the records can still be loaded."""
+        self.flush()
+        for data_file in self.files.values():
+            data_file.close()
+        self.files = OrderedDict()
+        if self.index_file is not None:
+            self.index_file.close()
+
+    def ops(self):
+        """Get the names of the ops recorded, in the order they're first recorded."""
+        return list(self.op_files.keys())
+
+    def iterations(self):
+        """Get the iterations recorded, in ascending order."""
+        return sorted(self._iterations)
+
+    def _load_record(self, record, mmap=True):
+        """Map or read the payload of a record, the statistics are decoded."""
+        dtype = np.dtype(record['dtype'])
+        shape = tuple(record['shape'])
+        count = int(np.prod(shape))
+        if count == 0:
+            payload = np.zeros(shape, dtype=dtype)
+        elif mmap:
+            payload = np.memmap(os.path.join(self.path, record['file']), dtype=dtype,
+                                mode='r', offset=record['offset'], shape=shape)
+        else:
+            payload = np.fromfile(os.path.join(self.path, record['file']), dtype=dtype,
+                                  count=count, offset=record['offset']).reshape(shape)
+        if record['mode'] == 'stats':
+            return _decode_statistics(payload, record['percentiles'], record['bins'])
+        return payload
+
+    def load(self, op_name, iteration, mmap=True):
+        """Load the tensors of an op at an iteration.
+
+        Args:
+            op_name (str): The name of the op.
+            iteration (int): The iteration.
+            mmap (bool, optional): Whether the tensors are memory-mapped, or read in memory,
+                e.g. to remove the store afterwards. Defaults to True.
+
+        Returns:
+            OrderedDict: The tensors, arrays in the 'tensor' and 'sample' modes and statistics
+                dicts, see tensor_statistics, in the 'stats' mode, by key.
+        """
+        if self.files:
+            self.flush()
+        return OrderedDict((record['key'], self._load_record(record, mmap)) for record in \
+            self.op_records.get((op_name, iteration), []))
+
+    def is_quantized(self, op_name, iteration):
+        """Check whether the tensors of an op at an iteration were quantized."""
+        return any(record['quantized'] for record in \
+            self.op_records.get((op_name, iteration), []))
+
+    def load_inspect_result(self):
+        """Load the records in the 'activation' format of the inspect_tensor results.
+
+        Returns:
+            dict: {'activation': [{op name: {key: tensor}} per iteration]}.
+        """
+        if self.files:
+            self.flush()
+        activation = OrderedDict((iteration, OrderedDict()) for iteration in self.iterations())
+        for record in self.records:
+            activation[record['iteration']].setdefault(record['op'], OrderedDict())[
+                record['key']] = self._load_record(record)
+        return {'activation': list(activation.values())}
@@ -215,6 +215,126 @@ def equal_dicts(d1, d2, compare_keys=None, ignore_keys=None):
         assert False
 
 
+def _canonical(obj):
+    """Convert obj to a hashable form where objects comparing equal are equal as well."""
+    if isinstance(obj, dict):
+        return frozenset((_canonical(k), _canonical(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return tuple(_canonical(v) for v in obj)
+    if isinstance(obj, (set, frozenset)):
+        return frozenset(_canonical(v) for v in obj)
+    try:
+        hash(obj)
+    except TypeError:
+        # unhashable objects only contribute their type, equality is checked by the caller
+        return type(obj).__name__
+    return obj
+
+
+def canonical_hash(obj, ignore_keys=None):
+    """Get a hash of a nested config which doesn't depend on the order of the dict keys.
+
+    Objects comparing equal always get the same hash, so the hash can be used to index
+    configs and only the configs in the same bucket need to be compared.
+
+    Args:
+        obj: The nested dict/list config to hash.
+        ignore_keys (list, optional): The top level keys of obj excluded from the hash.
+
+    Returns:
+        int: The hash value.
+    """
+    if ignore_keys and isinstance(obj, dict):
+        obj = {k: v for k, v in obj.items() if k not in ignore_keys}
+    return hash(_canonical(obj))
+
+
+class TuningHistoryJournal(object):
+    """Append-only journal of the tuning history.
+
+    The journal is a sequence of pickled records. The first write of a process writes the
+    whole tuning history, the later writes only append the history items and the fields
+    of the tuning history which changed since the previous write, so the saving cost
+    doesn't grow with the number of trials. Loading replays the records in order.
+    """
+
+    MAGIC = 'neural_compressor.tuning_history_journal'
+
+    def __init__(self, path):
+        """Init a TuningHistoryJournal object.
+
+        Args:
+            path (str): The journal file path.
+        """
+        self.path = path
+        # [(tuning_history dict, number of journaled history items, pickled fields)]
+        self._journaled = []
+
+    @staticmethod
+    def _fields(tuning_history):
+        return {k: v for k, v in tuning_history.items() if k != 'history'}
+
+    def write(self, tuning_history_list):
+        """Persist the changes of tuning_history_list since the last write."""
+        if not self._journaled or len(tuning_history_list) < len(self._journaled) or \
+           any(journaled[0] is not tuning_history for journaled, tuning_history in \
+               zip(self._journaled, tuning_history_list)):
+            self._journaled = []
+            with fault_tolerant_file(self.path) as f:
+                pickle.dump((self.MAGIC, 1), f, protocol=pickle.HIGHEST_PROTOCOL)
+                self._append(f, tuning_history_list)
+        else:
+            with open(self.path, 'ab') as f:
+                self._append(f, tuning_history_list)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _append(self, f, tuning_history_list):
+        for idx, tuning_history in enumerate(tuning_history_list):
+            fields = pickle.dumps(self._fields(tuning_history), protocol=pickle.HIGHEST_PROTOCOL)
+            if idx == len(self._journaled):
+                pickle.dump(('tuning_history', idx, tuning_history), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+                self._journaled.append((tuning_history, len(tuning_history['history']), fields))
+                continue
+            _, count, journaled_fields = self._journaled[idx]
+            for history in tuning_history['history'][count:]:
+                pickle.dump(('history', idx, history), f, protocol=pickle.HIGHEST_PROTOCOL)
+            if fields != journaled_fields:
+                pickle.dump(('fields', idx, self._fields(tuning_history)), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            self._journaled[idx] = (tuning_history, len(tuning_history['history']), fields)
+
+    @classmethod
+    def load(cls, path):
+        """Replay the journal, or unpickle the whole snapshot saved by an older version.
+
+        Args:
+            path (str): The journal file path.
+
+        Returns:
+            dict: The saved state of the strategy, i.e. {'tuning_history': [...]}.
+        """
+        tuning_history_list = []
+        with open(path, 'rb') as f:
+            header = pickle.load(f)
+            if not (isinstance(header, tuple) and header and header[0] == cls.MAGIC):
+                return header.__dict__
+            while True:
+                try:
+                    kind, idx, data = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError):
+                    # the end of the journal or a record truncated by an interruption
+                    break
+                if kind == 'tuning_history':
+                    tuning_history_list.append(data)
+                elif kind == 'history':
+                    tuning_history_list[idx]['history'].append(data)
+                elif kind == 'fields':
+                    tuning_history_list[idx].update(data)
+        return {'tuning_history': tuning_history_list}
+
+
 @singleton
 class CpuInfo(object):
     """Get CPU Info."""
@@ -263,6 +383,9 @@ class CpuInfo(object):
 
     def get_number_of_sockets(self) -> int:
         """Get number of sockets in platform."""
+        if psutil.LINUX and os.path.exists('/proc/cpuinfo'):
+            from .cpu_topology import get_cpu_topology
+            return len(get_cpu_topology().sockets)
         cmd = "lscpu | grep 'Socket(s)' | cut -d ':' -f 2"
         if psutil.WINDOWS:
             cmd = 'wmic cpu get DeviceID | find /c "CPU"'
@@ -306,6 +429,11 @@ def combine_histogram(old_hist, arr):
     new_min = np.min(arr)
     new_th = max(abs(new_min), abs(new_max))
     (old_hist, old_hist_edges, old_min, old_max, old_th) = old_hist
+    if old_th == 0 and new_th > 0:
+        # the old values are all zeros, rebuild the histogram with the range of arr
+        hist, hist_edges = np.histogram(arr, bins=len(old_hist), range=(-new_th, new_th))
+        hist += np.histogram(np.zeros(1), bins=hist_edges)[0] * old_hist.sum()
+        return (hist, hist_edges, min(old_min, new_min), max(old_max, new_max), new_th)
     if new_th <= old_th:
         hist, _ = np.histogram(arr,
                                bins=len(old_hist),
@@ -346,10 +474,7 @@ def get_tuning_history(tuning_history_path):
     Args:
         tuning_history_path: The tuning history path, which need users to assign
     """
-    with open(tuning_history_path, 'rb') as f:
-        strategy_object = pickle.load(f)
-    tuning_history = strategy_object.tuning_history
-    return tuning_history
+    return TuningHistoryJournal.load(tuning_history_path)['tuning_history']
 
 
 def recover(fp32_model, tuning_history_path, num, **kwargs):
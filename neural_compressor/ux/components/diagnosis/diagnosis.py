@@ -35,22 +35,35 @@ class Diagnosis:
 
     def get_tensors_info(self, model_type: str = "optimized") -> dict:
         """Get information about tensors."""
-        tensors_filenames = {
-            "input": os.path.join("fp32", "inspect_result.pkl"),
-            "optimized": os.path.join("quan", "inspect_result.pkl"),
+        tensors_dirs = {
+            "input": "fp32",
+            "optimized": "quan",
         }
 
-        tensors_filename = tensors_filenames.get(model_type, None)
-        if tensors_filename is None:
+        tensors_dir = tensors_dirs.get(model_type, None)
+        if tensors_dir is None:
             raise InternalException(f"Could not find tensors data for {model_type} model.")
         tensors_path = os.path.join(
             self.optimization.workdir,
-            tensors_filename,
+            tensors_dir,
+            "inspect_result.pkl",
         )
-        if not os.path.exists(tensors_path):
+        store_path = os.path.join(self.optimization.workdir, tensors_dir, "inspect_store")
+        has_store = os.path.exists(os.path.join(store_path, "index.jsonl"))
+        if not os.path.exists(tensors_path) and not has_store:
             raise ClientErrorException("Could not find tensor data for specified optimization.")
-        with open(tensors_path, "rb") as tensors_pickle:
-            dump_tensor_result = pickle.load(tensors_pickle)
+        dump_tensor_result: dict = {}
+        if os.path.exists(tensors_path):
+            with open(tensors_path, "rb") as tensors_pickle:
+                dump_tensor_result = pickle.load(tensors_pickle)
+        if has_store:
+            # the activations recorded to a tensor store are read memory-mapped
+            check_module("numpy")
+            from neural_compressor.utils.tensor_store import TensorStore
+
+            store = TensorStore(store_path, read_only=True)
+            dump_tensor_result.update(store.load_inspect_result())
+            store.close()
         return dump_tensor_result
 
     def load_quantization_config(self) -> dict:
@@ -101,6 +114,12 @@ class Diagnosis:
 
         if input_model_op_data is None or optimized_model_op_data is None:
             return None
+        # the statistics recorded instead of the tensors can't be compared
+        if isinstance(next(iter(input_model_op_data.values())), dict) or isinstance(
+            next(iter(optimized_model_op_data.values())),
+            dict,
+        ):
+            return None
 
         mse: float = self.mse_metric_gap(
             next(iter(input_model_op_data.values()))[0],
@@ -137,7 +156,7 @@ class Diagnosis:
         op_histograms = []
         for tensor_name, tensor_data in op_tensors.items():
             tensor_histograms = []
-            if tensor_data.ndim < 2:
+            if isinstance(tensor_data, dict) or tensor_data.ndim < 2:
                 continue
             for tensor_channel_data in tensor_data[0]:
                 tensor_histograms.append(
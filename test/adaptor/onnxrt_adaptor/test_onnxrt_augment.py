@@ -10,6 +10,7 @@ from onnx import helper, TensorProto, numpy_helper
 sys.path.append('..')
 from neural_compressor.experimental.data.datasets.dataset import Dataset
 from neural_compressor.adaptor.ox_utils.calibration import ONNXRTAugment
+from neural_compressor.adaptor.ox_utils.calibrator import CALIBRATOR, calib_ranges
 from neural_compressor.model.onnx_model import ONNXModel
 from neural_compressor.data import Datasets, DATALOADERS
 
@@ -148,6 +149,22 @@ class TestAugment(unittest.TestCase):
         map_dumped_tensors = augment.dump_tensor()
         assert "gather" in map_dumped_tensors["activation"][0]
 
+    def test_stream_activation(self):
+        model, dataloader = self.cv_session
+        dumped = ONNXRTAugment(ONNXModel(model), dataloader, [], iterations=[0, 2],
+                               white_nodes=["conv", "relu"]).dump_tensor()["activation"]
+        augment = ONNXRTAugment(ONNXModel(model), dataloader, [], iterations=[0, 2],
+                                white_nodes=["conv", "relu"])
+        streamed = list(augment.stream_activation())
+        self.assertEqual(len(streamed), 2)
+        for activations, expected in zip(streamed, dumped):
+            self.assertEqual(activations.keys(), expected.keys())
+            for node_name in expected:
+                self.assertEqual(activations[node_name].keys(), expected[node_name].keys())
+                for name in expected[node_name]:
+                    np.testing.assert_array_equal(activations[node_name][name],
+                                                  expected[node_name][name])
+
     def test_dump_calibration(self):
         model, dataloader = self.cv_session
         augment = ONNXRTAugment(ONNXModel(model),
@@ -157,6 +174,98 @@ class TestAugment(unittest.TestCase):
         calib_params = augment.dump_calibration({})
         assert "A" in calib_params and "B" in calib_params and "D" in calib_params and "C" in calib_params
 
+    def test_streaming_calibration(self):
+        model, dataloader = self.cv_session
+        augment = ONNXRTAugment(ONNXModel(model), dataloader, ["Conv", "Relu"])
+        augment.augment_graph()
+        _, output_dicts = augment.get_intermediate_outputs()
+        node_output_names, minmax_dicts = augment.get_intermediate_outputs('naive')
+        for name in node_output_names:
+            self.assertEqual(len(minmax_dicts[name]), 1)
+            tensors = output_dicts[name]
+            self.assertAlmostEqual(minmax_dicts[name][0][0], min([t.min() for t in tensors]))
+            self.assertAlmostEqual(minmax_dicts[name][0][1], max([t.max() for t in tensors]))
+        # the weight is only fetched in the first pass
+        self.assertEqual(len(output_dicts['B']), 1)
+        self.assertEqual(len(output_dicts['C']), 3)
+
+        for calib_mode in ['percentile', 'kl']:
+            calib_range = augment.dump_minmax(calib_mode)
+            for name in node_output_names:
+                self.assertGreaterEqual(calib_range[name][0], minmax_dicts[name][0][0])
+                self.assertLessEqual(calib_range[name][1], minmax_dicts[name][0][1])
+
+    def test_cached_calibration(self):
+        model, dataloader = self.cv_session
+        cached_ranges = {}
+        augment = ONNXRTAugment(ONNXModel(model), dataloader, ["Conv", "Relu"])
+        calib_range = augment.dump_minmax(cached_ranges=cached_ranges)
+        self.assertEqual(calib_range, cached_ranges)
+        self.assertEqual(calib_range, ONNXRTAugment(ONNXModel(model), dataloader,
+                                                    ["Conv", "Relu"]).dump_minmax())
+
+        # all tensors are cached, the model isn't run
+        augment = ONNXRTAugment(ONNXModel(model), dataloader, ["Conv", "Relu"],
+                                black_nodes=['relu'])
+        augment.get_intermediate_outputs = None
+        self.assertEqual(augment.dump_minmax(cached_ranges=cached_ranges),
+                         {name: calib_range[name] for name in ['D', 'A', 'B', 'C']})
+
+        # only the tensors missing in the cache are added as outputs
+        del cached_ranges['C']
+        augment = ONNXRTAugment(ONNXModel(model), dataloader, ["Conv", "Relu"])
+        self.assertEqual(augment.dump_minmax(cached_ranges=cached_ranges), calib_range)
+        self.assertEqual([output.name for output in augment.augmented_model.graph.output],
+                         ['D', 'C'])
+
+    def test_calibrator(self):
+        data = [np.random.randn(10, 100).astype(np.float32) * (i + 1) for i in range(3)]
+        data[1][0, 0] = 1000.
+        minmax = CALIBRATOR['minmax']()
+        percentile = CALIBRATOR['percentile'](percentile=99.)
+        for batch in data:
+            minmax.collect(batch)
+            percentile.collect(batch)
+        all_data = np.concatenate(data)
+        self.assertEqual(minmax.calib_range, [all_data.min(), all_data.max()])
+        # the outlier is clipped by the percentile calibrator
+        self.assertLess(percentile.calib_range[1], 100.)
+        self.assertGreaterEqual(percentile.calib_range[1],
+                                np.percentile(np.abs(all_data), 99.) * 0.9)
+        minmax.clear()
+        self.assertIsNone(minmax.calib_range)
+
+    def test_calibrator_zero_first_batch(self):
+        data = [np.zeros((10, 100), np.float32), np.random.randn(10, 100).astype(np.float32)]
+        for calib_mode in ['percentile', 'kl']:
+            calibrator = CALIBRATOR[calib_mode]()
+            for batch in data:
+                calibrator.collect(batch)
+            hist, hist_edges, data_min, data_max, th = calibrator.histogram
+            self.assertEqual(hist.sum(), 2000)
+            self.assertEqual(th, np.abs(data[1]).max())
+            self.assertAlmostEqual(hist_edges[-1], th, places=5)
+            self.assertEqual([data_min, data_max], [data[1].min(), data[1].max()])
+            # the zeros of the first batch are counted in the bin of 0
+            zero_bin = np.searchsorted(hist_edges, 0., side='right') - 1
+            self.assertGreaterEqual(hist[zero_bin], 1000)
+            calib_range = calibrator.calib_range
+            self.assertTrue(data[1].min() <= calib_range[0] < 0 < calib_range[1] <= data[1].max())
+
+    def test_calib_ranges(self):
+        calibrators = {}
+        for i, calib_mode in enumerate(['kl', 'minmax', 'kl', 'percentile', 'kl']):
+            calibrators['tensor{}'.format(i)] = CALIBRATOR[calib_mode]()
+            for j in range(3):
+                calibrators['tensor{}'.format(i)].collect(
+                    np.random.laplace(size=(10, 100)).astype(np.float32) * (i + j + 1))
+        calibrators['empty'] = CALIBRATOR['kl']()
+        expected = {name: calibrator.calib_range for name, calibrator in calibrators.items()
+                    if calibrator.calib_range is not None}
+        self.assertEqual(calib_ranges(calibrators), expected)
+        self.assertEqual(calib_ranges(calibrators, num_threads=3), expected)
+        self.assertEqual(list(calib_ranges(calibrators)), list(expected))
+
     def test_augment_graph(self):
 
         ''' TEST_CONFIG_1'''
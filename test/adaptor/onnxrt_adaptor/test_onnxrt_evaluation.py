@@ -0,0 +1,136 @@
+import shutil
+import unittest
+
+import numpy as np
+import onnx
+from onnx import helper, TensorProto
+
+from neural_compressor import options
+from neural_compressor.adaptor import FRAMEWORKS
+from neural_compressor.adaptor.ox_utils.util import pipelined_evaluate
+from neural_compressor.model.onnx_model import ONNXModel
+from neural_compressor.utils.early_stop import EarlyStopCriterion, EarlyStopDataLoader
+
+
+def build_model():
+    input = helper.make_tensor_value_info('input', TensorProto.FLOAT, [None, 4])
+    output = helper.make_tensor_value_info('output', TensorProto.FLOAT, [None, 4])
+    relu_node = onnx.helper.make_node('Relu', ['input'], ['output'], name='Relu')
+    graph = helper.make_graph([relu_node], 'test_graph', [input], [output])
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+
+
+class OrderedMetric:
+    """Record the predictions and labels in the order they are updated."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.updates = []
+
+    def update(self, predictions, labels):
+        self.updates.append((predictions[0].copy(), labels[0]))
+
+    def result(self):
+        return len(self.updates)
+
+
+class GeneralTopK:
+    """Count the labels as the correct predictions, averaged like GeneralTopK."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.num_correct = 0
+        self.num_sample = 0
+
+    def update(self, predictions, labels):
+        self.num_correct += int(np.sum(labels[0]))
+        self.num_sample += len(labels[0])
+
+    def result(self):
+        return self.num_correct / self.num_sample
+
+    def running_mean(self):
+        return (self.num_correct / self.num_sample if self.num_sample else 0.), self.num_sample
+
+
+class TestPipelinedEvaluation(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        framework_specific_info = {"device": "cpu",
+                                   "approach": "post_training_static_quant",
+                                   "random_seed": 1234,
+                                   "q_dataloader": None,
+                                   "backend": "default",
+                                   "format": "default",
+                                   "graph_optimization": options.onnxrt.graph_optimization,
+                                   "workspace_path": './nc_workspace/onnxrt/evaluation/'}
+        self.adaptor = FRAMEWORKS["onnxrt_qlinearops"](framework_specific_info)
+        self.model = ONNXModel(build_model())
+        self.dataloader = [(np.random.randn(2, 4).astype(np.float32), label) \
+            for label in range(10)]
+
+    @classmethod
+    def tearDownClass(self):
+        shutil.rmtree('./nc_workspace', ignore_errors=True)
+
+    def tearDown(self):
+        options.onnxrt.evaluation.pipeline = False
+        options.onnxrt.evaluation.iobinding = False
+
+    def evaluate(self, iteration=-1):
+        metric = OrderedMetric()
+        self.assertEqual(self.adaptor.evaluate(self.model, self.dataloader, metrics=[metric],
+                                               iteration=iteration), len(metric.updates))
+        return metric.updates
+
+    def test_pipeline(self):
+        expected = self.evaluate()
+        self.assertEqual(len(expected), 10)
+        for iobinding in [False, True]:
+            options.onnxrt.evaluation.pipeline = True
+            options.onnxrt.evaluation.iobinding = iobinding
+            updates = self.evaluate()
+            self.assertEqual([label for _, label in updates], list(range(10)))
+            for (predictions, _), (expected_predictions, _) in zip(updates, expected):
+                np.testing.assert_array_equal(predictions, expected_predictions)
+            self.assertEqual(len(self.evaluate(iteration=3)), 3)
+
+    def test_early_stop(self):
+        batches = [(np.random.randn(10, 4).astype(np.float32), np.ones(10) * (i % 5 != 4)) \
+            for i in range(100)]
+        evaluated = []
+        for pipeline in [False, True]:
+            options.onnxrt.evaluation.pipeline = pipeline
+            metric = GeneralTopK()
+            dataloader = EarlyStopDataLoader(batches, metric, EarlyStopCriterion(0.5))
+            self.adaptor.evaluate(self.model, dataloader, metrics=[metric])
+            self.assertEqual(dataloader.decision, 'met')
+            # the metric is updated with every batch before the next one is fetched
+            self.assertEqual(dataloader.num_samples, metric.num_sample)
+            evaluated.append(metric.num_sample)
+        self.assertEqual(evaluated[0], evaluated[1])
+        self.assertLess(evaluated[1], 1000)
+
+    def test_errors(self):
+        def fail(predictions, labels):
+            if labels == 5:
+                raise ValueError('postprocess failed')
+        with self.assertRaises(ValueError):
+            pipelined_evaluate(self.dataloader, lambda x: x, lambda x: x, fail)
+
+        def load():
+            yield self.dataloader[0]
+            raise IOError('dataloader failed')
+        consumed = []
+        with self.assertRaises(IOError):
+            pipelined_evaluate(load(), lambda x: x, lambda x: x,
+                               lambda *batch: consumed.append(batch), prefetch=1)
+        self.assertEqual(len(consumed), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -726,6 +726,18 @@ class TestPytorchAdaptor(unittest.TestCase):
         quantizer.strategy.adaptor.inspect_tensor(
             q_model, dataloader, op_list=['conv1.0', 'layer1.0.conv1.0'],
             iteration_list=[1, 2], inspect_type='all', save_to_disk=False)
+        stats = quantizer.strategy.adaptor.inspect_tensor(
+            model, dataloader, op_list=['conv1.0', 'layer1.0.conv1.0'],
+            iteration_list=[1, 2], record_mode='stats')['activation']
+        self.assertEqual(len(stats), 2)
+        output = a['conv1.0'].item()[list(stats[0]['conv1.0'].keys())[0]]
+        output_stats = list(stats[0]['conv1.0'].values())[0]
+        self.assertEqual(output_stats['num'], output.size)
+        self.assertAlmostEqual(output_stats['max'], float(output.max()), places=5)
+        samples = quantizer.strategy.adaptor.inspect_tensor(
+            model, dataloader, op_list=['conv1.0'], iteration_list=[1],
+            record_mode='sample', sample_size=16)['activation']
+        self.assertEqual(list(samples[0]['conv1.0'].values())[0].shape, (16,))
 
     def test_get_graph_info(self):
         from neural_compressor.adaptor.pytorch import get_ops_recursively
@@ -195,6 +195,21 @@ class DynamicModel(torch.nn.Module):
         return x
 
 
+class SensitivityModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.conv1 = nn.Conv2d(3, 4, 3, padding=1)
+        self.relu = nn.ReLU(inplace=True)
+        self.conv2 = nn.Conv2d(4, 4, 3, padding=1)
+        self.fc = nn.Linear(4 * 8 * 8, 2)
+
+    def forward(self, x):
+        x = self.relu(self.conv1(x))
+        # conv2 is called twice, so it can't be scored alone
+        x = self.relu(self.conv2(self.relu(self.conv2(x))))
+        return self.fc(x.flatten(1))
+
+
 class SubModel(torch.nn.Module):
     def __init__(self, bypass=True):
         super().__init__()
@@ -504,5 +519,44 @@ class TestPytorchFXAdaptor(unittest.TestCase):
         self.assertEqual(q_model._model.conv.module.module.bias.dtype, torch.bfloat16)
 
 
+@unittest.skipIf(not FX_MODE, "Unsupport Fx Mode with PyTorch Version Below 1.8")
+class TestOpSensitivity(unittest.TestCase):
+    def test_op_sensitivity(self):
+        from neural_compressor.adaptor import FRAMEWORKS
+        from neural_compressor.model import MODELS
+        model = SensitivityModel()
+        dataset = Datasets("pytorch")["dummy"]((4, 3, 8, 8))
+        dataloader = DataLoader("pytorch", dataset)
+        q_model = quantization.fit(copy.deepcopy(model), PostTrainingQuantConfig(),
+                                   calib_dataloader=dataloader)
+        tune_cfg = q_model.q_config
+        framework_specific_info = {"device": "cpu",
+                                   "approach": "post_training_static_quant",
+                                   "random_seed": 1234,
+                                   "q_dataloader": None,
+                                   "workspace_path": "./"}
+        adaptor = FRAMEWORKS["pytorch_fx"](framework_specific_info)
+        fp32_model = MODELS["pytorch_fx"](model)
+
+        ops = adaptor.calculate_op_sensitivity(fp32_model, dataloader, copy.deepcopy(tune_cfg),
+                                               None, 2, fallback=True)
+        self.assertEqual(set(ops), set(tune_cfg["op"].keys()))
+        op_sensitivity = adaptor.op_sensitivity
+        self.assertEqual(op_sensitivity.unscorable, {"conv2"})
+        self.assertEqual(len(op_sensitivity.scores), 2)
+        # the captured activations are released once the ops are scored
+        self.assertEqual(op_sensitivity.records, {})
+        # the ops are scored once, the later rankings reuse the scores
+        self.assertEqual(adaptor.calculate_op_sensitivity(
+            fp32_model, dataloader, copy.deepcopy(tune_cfg), None, 2, fallback=True), ops)
+        self.assertIs(adaptor.op_sensitivity, op_sensitivity)
+        self.assertEqual(len(op_sensitivity.scores), 2)
+
+        # the fallen back op is the one to re-quantize
+        tune_cfg["op"][ops[0]] = {"weight": {"dtype": "fp32"}, "activation": {"dtype": "fp32"}}
+        self.assertEqual(adaptor.calculate_op_sensitivity(
+            fp32_model, dataloader, copy.deepcopy(tune_cfg), None, 2, fallback=False), [ops[0]])
+        shutil.rmtree("./nc_workspace", ignore_errors=True)
+
 if __name__ == "__main__":
     unittest.main()
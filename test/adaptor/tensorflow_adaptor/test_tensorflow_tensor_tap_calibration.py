@@ -0,0 +1,69 @@
+#
+#  -*- coding: utf-8 -*-
+#
+import unittest
+import os
+import tempfile
+import numpy as np
+
+from neural_compressor.adaptor.tf_utils.graph_rewriter.generic.insert_print_node import InsertPrintMinMaxNode
+from neural_compressor.adaptor.tf_utils.graph_rewriter.generic.convert_print_to_tap import ConvertPrintToTapOptimizer
+from neural_compressor.adaptor.tf_utils.graph_util import GraphRewriterHelper as Helper
+from neural_compressor.adaptor.tf_utils.util import disable_random
+
+import tensorflow as tf
+from tensorflow.python.framework import graph_util
+
+
+class TestTensorTapCalibration(unittest.TestCase):
+    @disable_random()
+    def test_convert_print_to_tap(self):
+        x = tf.compat.v1.placeholder(tf.float32, [1, 8, 8, 4], name="input")
+        conv_weights = tf.compat.v1.get_variable("weight", [3, 3, 4, 4],
+                                                 initializer=tf.compat.v1.random_normal_initializer())
+        conv = tf.nn.conv2d(x, conv_weights, strides=[1, 1, 1, 1], padding="SAME", name='conv')
+        relu = tf.nn.relu(conv, name='op_to_store')
+        with tf.compat.v1.Session() as sess:
+            sess.run(tf.compat.v1.global_variables_initializer())
+            graph_def = graph_util.convert_variables_to_constants(
+                sess=sess,
+                input_graph_def=sess.graph_def,
+                output_node_names=[relu.name.split(':')[0]])
+
+        sampling_graph_def, _ = InsertPrintMinMaxNode(
+            graph_def, 'conv', 'op_to_store', False).do_transformation()
+        self.assertTrue(any(node.op == 'Print' for node in sampling_graph_def.node))
+        tap_graph_def, taps = ConvertPrintToTapOptimizer(sampling_graph_def).do_transformation()
+        self.assertFalse(any(node.op == 'Print' for node in tap_graph_def.node))
+        self.assertEqual(len(taps), 4)
+
+        data = np.random.random([1, 8, 8, 4]).astype(np.float32)
+        with tf.Graph().as_default() as g:
+            tf.import_graph_def(tap_graph_def, name='')
+            with tf.compat.v1.Session(graph=g) as sess:
+                outputs = sess.run([name for name, _ in taps] + ['conv:0', 'op_to_store:0'],
+                                   {'input:0': data})
+        values = dict(zip([message for _, message in taps], outputs))
+        self.assertAlmostEqual(values[';conv_eightbit_min_input__print__;__min:'], data.min())
+        self.assertAlmostEqual(values[';conv_eightbit_max_input__print__;__max:'], data.max())
+        self.assertAlmostEqual(
+            values[';conv_eightbit_requant_range__print__;__requant_max:'], outputs[-1].max())
+
+    def test_sampling_data(self):
+        messages = [';conv_eightbit_min_input__print__;__min:',
+                    ';conv_eightbit_max_input__print__;__max:',
+                    ';conv_eightbit_requant_range__print__;__requant_min:',
+                    ';conv_eightbit_requant_range__print__;__requant_max:']
+        values = np.array([[-1.5, 2.0, -0.5, 3.0], [-1.0, 2.5, 0.5, 4.0]])
+        tmp_dump_file = tempfile.mkstemp(suffix='.log')[1]
+        with open(tmp_dump_file, 'w') as f:
+            for iteration_values in values:
+                for message, value in zip(messages, iteration_values):
+                    f.write('{}[{}]\n'.format(message, value))
+        expected = Helper.gen_valid_sampling_log(tmp_dump_file)
+        os.remove(tmp_dump_file)
+        self.assertEqual(Helper.gen_valid_sampling_data(messages, values), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Tests for the cpu topology discovery of benchmark"""
+import os
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from neural_compressor.utils.cpu_topology import CpuTopology, parse_cpu_list, \
+    get_cpu_topology, apply_cpu_affinity, CPU_AFFINITY_ENV
+
+
+def build_cpuinfo(sockets=2, cores=4, threads=2):
+    """cpu ids are numbered like linux, the first threads of all cores before the siblings."""
+    blocks = []
+    cores_total = sockets * cores
+    for thread in range(threads):
+        for socket in range(sockets):
+            for core in range(cores):
+                processor = thread * cores_total + socket * cores + core
+                blocks.append('processor\t: {}\nphysical id\t: {}\ncore id\t\t: {}\n'.format(
+                    processor, socket, core))
+    return '\n'.join(blocks)
+
+
+def build_topology(sockets=2, cores=4, threads=2):
+    cores_total = sockets * cores
+    node_cpus = {socket: [thread * cores_total + socket * cores + core \
+        for thread in range(threads) for core in range(cores)] for socket in range(sockets)}
+    return CpuTopology(build_cpuinfo(sockets, cores, threads), node_cpus, 'x86_64')
+
+
+class TestCpuTopology(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(parse_cpu_list('0-3,8,10-11\n'), [0, 1, 2, 3, 8, 10, 11])
+        topology = build_topology()
+        self.assertEqual(topology.threads, list(range(16)))
+        self.assertEqual(topology.sockets, [0, 1])
+        self.assertEqual(topology.nodes, [0, 1])
+        self.assertEqual(topology.physical_cores, list(range(8)))
+        self.assertEqual(topology.threads_per_core, 2)
+        self.assertEqual(topology.siblings(13), [5, 13])
+        self.assertEqual(topology.node_of(13), 1)
+        self.assertEqual(topology.node_cores(1), [4, 5, 6, 7])
+        self.assertEqual(topology.cores_of({0, 1, 8, 9, 13, 20}), [0, 1, 5, 20])
+
+        # no physical id and core id, e.g. aarch64
+        topology = CpuTopology('processor\t: 0\n\nprocessor\t: 1\n', None, 'aarch64')
+        self.assertEqual(topology.physical_cores, [0, 1])
+        self.assertEqual(topology.threads_per_core, 1)
+        self.assertEqual(topology.nodes, [0])
+
+    def test_system(self):
+        topology = get_cpu_topology()
+        self.assertIs(topology, get_cpu_topology())
+        self.assertEqual(len(topology.threads), os.cpu_count())
+        from neural_compressor.experimental.benchmark import get_bounded_threads, \
+            get_core_ids, get_threads, get_physical_ids
+        self.assertEqual(get_bounded_threads(get_core_ids(), get_threads(), get_physical_ids()),
+                         topology.physical_cores)
+
+    def test_layout(self):
+        topology = build_topology()
+        # the instances are spread over the nodes
+        self.assertEqual(topology.instance_layout(2, 2), [([0, 1], [0]), ([4, 5], [1])])
+        self.assertEqual(topology.instance_layout(4, 2),
+                         [([0, 1], [0]), ([4, 5], [1]), ([2, 3], [0]), ([6, 7], [1])])
+        # the instance larger than a node is split across the sockets
+        self.assertEqual(topology.instance_layout(1, 6), [([0, 1, 2, 3, 4, 5], [0, 1])])
+        self.assertEqual(topology.instance_layout(2, 3),
+                         [([0, 1, 2], [0]), ([4, 5, 6], [1])])
+        self.assertEqual(topology.instance_layout(8, 1)[-1], ([7], [1]))
+        with self.assertRaises(AssertionError):
+            topology.instance_layout(3, 3)
+
+    def test_prefix(self):
+        from neural_compressor.experimental.benchmark import Benchmark
+        benchmarker = Benchmark.__new__(Benchmark)
+        with patch('neural_compressor.experimental.benchmark.numactl_available',
+                   return_value=True):
+            self.assertEqual(benchmarker.generate_prefix(np.array([0, 1]), [0]),
+                             'OMP_NUM_THREADS=2 numactl --localalloc --physcpubind=0,1')
+            self.assertEqual(benchmarker.generate_prefix(np.array([3, 4]), [0, 1]),
+                             'OMP_NUM_THREADS=2 numactl --interleave=0,1 --physcpubind=3,4')
+        with patch('neural_compressor.experimental.benchmark.numactl_available',
+                   return_value=False):
+            self.assertEqual(benchmarker.generate_prefix(np.array([0, 1])),
+                             'OMP_NUM_THREADS=2 {}=0,1'.format(CPU_AFFINITY_ENV))
+
+    def test_affinity(self):
+        affinity = os.sched_getaffinity(0)
+        cpu = min(affinity)
+        os.environ[CPU_AFFINITY_ENV] = str(cpu)
+        try:
+            self.assertEqual(apply_cpu_affinity(), [cpu])
+            self.assertEqual(os.sched_getaffinity(0), {cpu})
+        finally:
+            del os.environ[CPU_AFFINITY_ENV]
+            os.sched_setaffinity(0, affinity)
+        self.assertIsNone(apply_cpu_affinity())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""Tests for the tail latency statistics of benchmark"""
+import os
+import unittest
+
+import numpy as np
+from onnx import helper, TensorProto, numpy_helper
+
+from neural_compressor.objective import Performance
+from neural_compressor.utils.latency_stats import LatencyRecorder, LatencyHistogram, \
+    detect_warmup, latency_summary, reject_outliers, median_confidence_interval, \
+    measure_until_stable, normal_quantile
+
+
+def build_model():
+    X = helper.make_tensor_value_info('X', TensorProto.FLOAT, [None, 32])
+    Y = helper.make_tensor_value_info('Y', TensorProto.FLOAT, [None, 32])
+    W = numpy_helper.from_array(np.random.randn(32, 32).astype(np.float32), 'W')
+    matmul = helper.make_node('MatMul', ['X', 'W'], ['Y'], name='matmul')
+    graph = helper.make_graph([matmul], 'test', [X], [Y], [W])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 7
+    return model
+
+
+def build_yaml():
+    with open('latency_stats.yaml', 'w', encoding='utf-8') as f:
+        f.write('''
+model:
+  name: latency_stats
+  framework: onnxrt_qlinearops
+evaluation:
+  performance:
+    warmup: auto
+    iteration: 100
+    configs:
+      cores_per_instance: 1
+      num_of_instance: 1
+''')
+
+
+class TestLatencyStats(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        build_yaml()
+
+    @classmethod
+    def tearDownClass(self):
+        os.remove('latency_stats.yaml')
+        if os.path.exists('1_1_0_latency.npz'):
+            os.remove('1_1_0_latency.npz')
+
+    def test_recorder(self):
+        recorder = LatencyRecorder(capacity=2)
+        recorder.extend(range(5))
+        self.assertEqual(len(recorder), 5)
+        np.testing.assert_array_equal(recorder.values, np.arange(5))
+
+        performance = Performance()
+        for _ in range(3):
+            performance.start()
+            performance.end()
+        self.assertIsInstance(performance.result_list(), list)
+        self.assertEqual(len(performance.result_list()), 3)
+        self.assertGreaterEqual(performance.result(), 0)
+        self.assertEqual(performance.reset(), [])
+        self.assertEqual(len(performance.result_list()), 0)
+
+    def test_detect_warmup(self):
+        rng = np.random.default_rng(0)
+        steady = 0.01 + 0.001 * rng.random(500)
+        warmup = np.linspace(0.1, 0.02, 40)
+        detected = detect_warmup(np.concatenate([warmup, steady]))
+        self.assertGreaterEqual(detected, 35)
+        self.assertLessEqual(detected, 60)
+        self.assertLessEqual(detect_warmup(steady), 250)
+        self.assertEqual(detect_warmup([0.1, 0.2, 0.3]), 0)
+
+    def test_summary_and_histogram(self):
+        rng = np.random.default_rng(0)
+        instances = [rng.lognormal(-4, 0.5, size=10000) for _ in range(3)]
+        latencies = np.concatenate(instances)
+        summary = latency_summary(latencies, batch_size=2)
+        self.assertAlmostEqual(summary['p99'], np.percentile(latencies, 99))
+        self.assertAlmostEqual(summary['cv'], latencies.std() / latencies.mean())
+        self.assertAlmostEqual(summary['throughput'], 2 / latencies.mean())
+
+        histogram = LatencyHistogram()
+        histogram.add(instances[0], batch_size=2)
+        histogram.save('histogram.npz')
+        histogram = LatencyHistogram.load('histogram.npz')
+        os.remove('histogram.npz')
+        for latencies_per_instance in instances[1:]:
+            other = LatencyHistogram()
+            other.add(latencies_per_instance, batch_size=2)
+            histogram.merge(other)
+        merged = histogram.summary()
+        self.assertEqual(merged['count'], len(latencies))
+        self.assertAlmostEqual(merged['mean'], summary['mean'])
+        self.assertAlmostEqual(merged['std'], summary['std'])
+        for q in ['p50', 'p90', 'p99', 'p99.9']:
+            self.assertLess(abs(merged[q] - summary[q]) / summary[q], 0.01)
+        self.assertAlmostEqual(merged['throughput'],
+                               sum(2 / latencies.mean() for latencies in instances))
+
+    def test_measure_until_stable(self):
+        latencies = np.concatenate([np.full(98, 0.01), [1., 2.]])
+        self.assertEqual(len(reject_outliers(latencies + np.linspace(0, 1e-4, 100))), 98)
+        low, high = median_confidence_interval(np.arange(100))
+        self.assertLessEqual(low, 49.5)
+        self.assertGreaterEqual(high, 49.5)
+        self.assertGreater(low, 30)
+        self.assertLess(high, 70)
+        self.assertAlmostEqual(normal_quantile(0.975), 1.959964, places=5)
+        self.assertAlmostEqual(normal_quantile(0.5), 0., places=6)
+
+        calls = []
+        summary = measure_until_stable(lambda: calls.append(sum(range(1000))), warmup=3,
+                                       min_iterations=10, max_iterations=500)
+        self.assertEqual(len(calls), summary['iterations'] + 3)
+        self.assertGreaterEqual(summary['iterations'], 10)
+        self.assertLessEqual(summary['ci_low'], summary['median'])
+        self.assertLessEqual(summary['median'], summary['ci_high'])
+        summary = measure_until_stable(lambda: None, warmup=0, min_iterations=7, max_iterations=7)
+        self.assertEqual(summary['iterations'], 7)
+
+    def test_benchmark(self):
+        from neural_compressor.experimental import Benchmark, common
+        from neural_compressor.data import Datasets
+        os.environ['NC_ENV_CONF'] = 'True'
+        os.environ['NC_INSTANCE_ID'] = '0'
+        try:
+            benchmarker = Benchmark('latency_stats.yaml')
+            dataset = Datasets('onnxrt_qlinearops')['dummy'](shape=(200, 32), label=True)
+            benchmarker.b_dataloader = common.DataLoader(dataset, batch_size=2)
+            benchmarker.model = build_model()
+            benchmarker('performance')
+            for key in ['NC_ENV_CONF', 'NC_INSTANCE_ID']:
+                del os.environ[key]
+            summary = benchmarker.latency_summary['performance']
+            self.assertLessEqual(summary['count'], 100)
+            self.assertGreaterEqual(summary['count'], 50)
+            self.assertLessEqual(summary['p50'], summary['p99'])
+            self.assertTrue(os.path.exists('1_1_0_latency.npz'))
+            os.environ['NUM_OF_INSTANCE'] = '1'
+            os.environ['CORES_PER_INSTANCE'] = '1'
+            benchmarker.summary_benchmark()
+            self.assertEqual(benchmarker.latency_summary['performance']['count'],
+                             summary['count'])
+        finally:
+            for key in ['NC_ENV_CONF', 'NC_INSTANCE_ID']:
+                os.environ.pop(key, None)
+
+
+if __name__ == "__main__":
+    unittest.main()
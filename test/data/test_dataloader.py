@@ -1282,6 +1282,111 @@ class TestDataloader(unittest.TestCase):
             dataset = datasets['dummy'](\
                 shape=[(4, 256, 256, 3), (4, 256, 256, 3)], dtype=['float32', 'int8', 'int8'])
 
+    def test_onnxrt_num_workers(self):
+        from neural_compressor.experimental.data.dataloaders.default_dataloader import \
+            DefaultDataLoader
+        class IndexDataset:
+            def __len__(self):
+                return 7
+            def __getitem__(self, index):
+                # large enough to be sent back by the processes in shared memory
+                return np.full((128, 128), index, dtype=np.float32), index
+
+        expected = list(DATALOADERS['onnxrt_qlinearops'](IndexDataset(), batch_size=2))
+        self.assertEqual(len(expected), 4)
+        for data_loader in [
+            DATALOADERS['onnxrt_qlinearops'](IndexDataset(), batch_size=2, num_workers=2),
+            DefaultDataLoader(IndexDataset(), batch_size=2, num_workers=2, worker_type='process')]:
+            batches = list(data_loader)
+            self.assertEqual(len(batches), len(expected))
+            for (data, label), (expected_data, expected_label) in zip(batches, expected):
+                np.testing.assert_array_equal(data, expected_data)
+                self.assertEqual(list(label), list(expected_label))
+            # stop in the middle of the prefetched batches
+            for idx, (data, label) in enumerate(data_loader):
+                if idx == 1:
+                    break
+            self.assertEqual(list(label), [2, 3])
+
+    def test_onnxrt_cache(self):
+        from neural_compressor.experimental.data.datasets import CachedDataset
+        class IndexDataset:
+            def __len__(self):
+                return 5
+            def __getitem__(self, index):
+                return (np.full((3, index + 1), index, dtype=np.float32),
+                        np.full((2, 2), index, dtype=np.int64)), index, 'sample{}'.format(index)
+
+        cache_dir = './cache'
+        dataset = CachedDataset(IndexDataset(), cache_dir, 'index')
+        self.assertEqual(len(dataset), 5)
+        for idx in [0, 3, -1]:
+            (ragged, fixed), label, name = dataset[idx]
+            (expected_ragged, expected_fixed), expected_label, expected_name = \
+                IndexDataset()[idx % 5]
+            np.testing.assert_array_equal(ragged, expected_ragged)
+            np.testing.assert_array_equal(fixed, expected_fixed)
+            self.assertEqual((label, name), (expected_label, expected_name))
+        self.assertRaises(IndexError, dataset.__getitem__, 5)
+        # writing to a sample doesn't change the cache
+        fixed[:] = 0
+        self.assertEqual(CachedDataset(IndexDataset(), cache_dir, 'index')[-1][0][1][0, 0], 4)
+
+        dataloader_args = {
+            'batch_size': 2,
+            'cache': cache_dir,
+            'dataset': {'dummy': {'shape': (4, 8, 8, 3), 'label': True}},
+            'transform': {'Resize': {'size': 4}},
+            'filter': None
+        }
+        dataloader = create_dataloader('onnxrt_qlinearops', dataloader_args)
+        self.assertIsInstance(dataloader.dataset, CachedDataset)
+        data, label = next(iter(dataloader))
+        self.assertEqual(data.shape, (2, 8, 8, 3))
+        # the same config reuses the cache, another transform gets its own one
+        self.assertEqual(create_dataloader('onnxrt_qlinearops', dataloader_args).dataset.path,
+                         dataloader.dataset.path)
+        dataloader_args['transform'] = {'Resize': {'size': 6}}
+        self.assertNotEqual(create_dataloader('onnxrt_qlinearops', dataloader_args).dataset.path,
+                            dataloader.dataset.path)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    def test_pytorch_cache(self):
+        import torch
+        from neural_compressor.experimental.data.datasets import CachedDataset
+        class TensorDataset:
+            def __len__(self):
+                return 3
+            def __getitem__(self, index):
+                return [torch.full((2, 3), index, dtype=torch.float32)], \
+                    torch.tensor(index)
+
+        cache_dir = './cache'
+        dataset = CachedDataset(TensorDataset(), cache_dir, 'tensor')
+        for idx in range(3):
+            (data,), label = dataset[idx]
+            self.assertIsInstance(data, torch.Tensor)
+            self.assertTrue(torch.equal(data, TensorDataset()[idx][0][0]))
+            self.assertEqual(label.item(), idx)
+        # the tensors are mapped from the cache, not kept in a pickle
+        self.assertEqual([kind for kind, _ in dataset.leaves], ['fixed', 'fixed'])
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    def test_cache_key(self):
+        from neural_compressor.experimental.data.datasets.cached_dataset import \
+            dataset_cache_key
+        os.makedirs('./cache_data/sub', exist_ok=True)
+        with open('./cache_data/sub/image.txt', 'w') as f:
+            f.write('0')
+        data_source = {'ImageFolder': {'root': './cache_data'}}
+        key = dataset_cache_key('onnxrt_qlinearops', data_source)
+        self.assertEqual(dataset_cache_key('onnxrt_qlinearops', data_source), key)
+        # a file changed in a subdirectory doesn't touch the mtime of the root
+        with open('./cache_data/sub/image.txt', 'w') as f:
+            f.write('01')
+        self.assertNotEqual(dataset_cache_key('onnxrt_qlinearops', data_source), key)
+        shutil.rmtree('./cache_data', ignore_errors=True)
+
     def test_onnx_integer_dummy(self):
         datasets = Datasets('onnxrt_integerops')
         dataset = datasets['dummy'](shape=(4, 256, 256, 3))
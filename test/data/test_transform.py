@@ -962,6 +962,73 @@ class TestONNXTransfrom(unittest.TestCase):
         with self.assertRaises(ValueError):
             TestONNXTransfrom.transforms["RandomResizedCrop"](**args)
 
+    def testBatchTransform(self):
+        from neural_compressor.data.transforms.transform import BatchComposeTransform
+        from neural_compressor.experimental.data.dataloaders.default_dataloader import \
+            default_collate
+        from neural_compressor.utils.create_obj_from_config import split_batch_preprocess, \
+            create_dataloader
+        transforms = TestONNXTransfrom.transforms
+        images = [(np.random.random_sample([12, 10, 3]) * 255).astype(np.uint8) \
+            for _ in range(4)]
+        for transform_list, exact in [
+            ([transforms['CenterCrop'](size=8), transforms['Normalize'](
+                mean=[0.5, 0.4, 0.3], std=[0.2, 0.25, 0.3]), transforms['Transpose'](
+                perm=[2, 0, 1]), transforms['Cast'](dtype='float32')], False),
+            ([transforms['Transpose'](perm=[2, 0, 1]), transforms['Cast'](dtype='float32'),
+              transforms['CenterCrop'](size=3)], True),
+            ([transforms['Normalize'](mean=[100, 100, 100], std=[1, 2, 3]),
+              transforms['Cast'](dtype='int8')], True)]:
+            compose = transforms['Compose'](transform_list)
+            expected = default_collate([compose((image, idx)) for idx, image in enumerate(images)])
+            batch = BatchComposeTransform(transform_list)(
+                default_collate([(image, idx) for idx, image in enumerate(images)]))
+            self.assertEqual(batch[0].dtype, expected[0].dtype)
+            self.assertTrue(batch[0].flags['C_CONTIGUOUS'])
+            self.assertEqual(list(batch[1]), list(expected[1]))
+            if exact:
+                np.testing.assert_array_equal(batch[0], expected[0])
+            else:
+                np.testing.assert_allclose(batch[0], expected[0], rtol=1e-6)
+        with self.assertRaises(AssertionError):
+            BatchComposeTransform([transforms['Resize'](size=8)])
+
+        # the images of different sizes aren't stacked by the collation, they are cropped one
+        # by one as without the batch transform
+        ragged_images = [(np.random.random_sample([12 + i, 10 + 2 * i, 3]) * 255).astype( \
+            np.uint8) for i in range(4)]
+        for transform_list, stacked in [
+            ([transforms['CenterCrop'](size=8), transforms['Cast'](dtype='float32')], True),
+            ([transforms['Cast'](dtype='float32')], False)]:
+            compose = transforms['Compose'](transform_list)
+            expected = [compose((image, idx))[0] for idx, image in enumerate(ragged_images)]
+            batch = BatchComposeTransform(transform_list)(
+                default_collate([(image, idx) for idx, image in enumerate(ragged_images)]))
+            self.assertEqual(list(batch[1]), list(range(4)))
+            if stacked:
+                np.testing.assert_array_equal(batch[0], np.stack(expected))
+            else:
+                self.assertEqual(len(batch[0]), 4)
+                for image, expected_image in zip(batch[0], expected):
+                    np.testing.assert_array_equal(image, expected_image)
+
+        cfg_preprocess = {'Resize': {'size': 8}, 'Normalize': {'mean': [0.5], 'std': [0.2]},
+                          'Transpose': {'perm': [2, 0, 1]}}
+        cfg_sample, batch_preprocess = split_batch_preprocess('onnxrt_qlinearops', cfg_preprocess)
+        self.assertEqual(list(cfg_sample), ['Resize'])
+        self.assertEqual(len(batch_preprocess.transform_list), 2)
+        self.assertEqual(split_batch_preprocess('onnxrt_qlinearops', {'Resize': {'size': 8}}),
+                         ({'Resize': {'size': 8}}, None))
+        dataloader_args = {
+            'batch_size': 2,
+            'batch_transform': True,
+            'dataset': {'dummy': {'shape': (4, 8, 8, 3), 'label': True}},
+            'transform': {'Transpose': {'perm': [2, 0, 1]}},
+            'filter': None
+        }
+        dataloader = create_dataloader('onnxrt_qlinearops', dataloader_args)
+        self.assertEqual(next(iter(dataloader))[0].shape, (2, 3, 8, 8))
+
 class TestImagenetTransform(unittest.TestCase):
     def testParseDecodeImagenet(self):
         random_array = np.random.random_sample([100,100,3]) * 255
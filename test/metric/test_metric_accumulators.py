@@ -0,0 +1,99 @@
+"""Tests for the running accumulators of the metrics."""
+import unittest
+
+import numpy as np
+import sklearn.metrics
+
+from neural_compressor.metric import METRICS
+from neural_compressor.experimental.metric import METRICS as EXP_METRICS
+
+
+def reference_roc(batches):
+    pred_list, label_list = None, None
+    for preds, labels in batches:
+        if pred_list is None:
+            pred_list, label_list = preds, labels
+        else:
+            pred_list = np.append(pred_list, preds, axis=0)
+            label_list = np.append(label_list, labels, axis=0)
+    scores, targets = np.squeeze(pred_list), np.squeeze(label_list)
+    return sklearn.metrics.accuracy_score(targets, np.round(scores)), \
+        sklearn.metrics.roc_auc_score(targets, scores)
+
+
+def reference_accuracy(batches):
+    pred_list, label_list, sample = [], [], 0
+    for preds, labels in batches:
+        pred_list.extend(np.argmax(preds, axis=1).astype('int32'))
+        label_list.extend(labels)
+        sample += labels.shape[0]
+    return np.sum(np.array(pred_list) == np.array(label_list)) / sample
+
+
+def roc_stream(num_batches, batch_size, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(num_batches):
+        labels = rng.integers(0, 2, size=(batch_size, 1)).astype(np.float32)
+        preds = np.clip(0.3 * labels + rng.random((batch_size, 1), dtype=np.float32) * 0.7, 0, 1)
+        yield preds, labels
+
+
+class TestMetricAccumulators(unittest.TestCase):
+    def test_accuracy(self):
+        rng = np.random.default_rng(0)
+        batches = [(rng.random((32, 10)), rng.integers(0, 10, size=32)) for _ in range(20)]
+        for metrics in [METRICS('pytorch'), EXP_METRICS('onnxrt_qlinearops')]:
+            acc = metrics['Accuracy']()
+            for preds, labels in batches:
+                acc.update(preds, labels)
+            self.assertEqual(acc.result(), reference_accuracy(batches))
+
+    def test_mse_mae(self):
+        rng = np.random.default_rng(0)
+        batches = [([rng.random((4, 3)), rng.random(5)], [rng.random((4, 3)), rng.random(5)])
+                   for _ in range(10)]
+        squares = [(a - b) ** 2.0 for preds, labels in batches for (a, b) in zip(labels, preds)]
+        aes = [abs(a - b) for preds, labels in batches for (a, b) in zip(labels, preds)]
+        metrics = METRICS('onnxrt_qlinearops')
+        mse, mae = metrics['MSE'](), metrics['MAE']()
+        for preds, labels in batches:
+            mse.update(preds, labels)
+            mae.update(preds, labels)
+        self.assertEqual(mse.result(),
+            sum([np.sum(square) for square in squares]) / sum([square.size for square in squares]))
+        self.assertEqual(mae.result(), sum([np.sum(ae) for ae in aes]) / sum([ae.size for ae in aes]))
+
+    def test_roc(self):
+        batches = list(roc_stream(50, 64))
+        acc, auc = reference_roc(batches)
+        for metrics in [METRICS('pytorch'), EXP_METRICS('pytorch')]:
+            roc = metrics['ROC']()
+            for preds, labels in batches:
+                roc.update(preds, labels)
+            self.assertEqual(roc.result(), acc)
+            self.assertEqual(roc.roc_auc, auc)
+            self.assertEqual(roc.pred_list.shape, (50 * 64, 1))
+
+            streaming_roc = metrics['ROC'](num_bins=10000)
+            for preds, labels in batches:
+                streaming_roc.update(preds, labels)
+            self.assertAlmostEqual(streaming_roc.result(), acc)
+            self.assertAlmostEqual(streaming_roc.roc_auc, auc, places=3)
+            self.assertIsNone(streaming_roc.pred_list)
+            streaming_roc.reset()
+            streaming_roc.update(*batches[0])
+            self.assertAlmostEqual(streaming_roc.result(), reference_roc(batches[:1])[0])
+
+    def test_roc_uneven_batches(self):
+        batches = [batch for i in range(40) for batch in roc_stream(1, 1 + 7 * i % 97, seed=i)]
+        acc, auc = reference_roc(batches)
+        roc = METRICS('pytorch')['ROC']()
+        for preds, labels in batches:
+            roc.update(preds, labels)
+        self.assertEqual(roc.result(), acc)
+        self.assertEqual(roc.roc_auc, auc)
+        self.assertEqual(roc.pred_list.shape, (sum(len(labels) for _, labels in batches), 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -257,6 +257,115 @@ class TestOnnxModel(unittest.TestCase):
         self.assertIsNotNone(initializer)
         initializer = find_by_name('X1', self.model.initializer())
         self.assertIsNone(initializer)
-    
+
+    def test_name_index(self):
+        conv = self.model.get_node('Conv1')
+        self.assertIs(conv, self.model.nodes()[1])
+        self.assertIsNone(self.model.get_node('Conv4'))
+
+        # the index follows the add and remove methods
+        self.model.add_nodes([onnx.helper.make_node('Relu', ['output'], ['output1'], name='Relu3')])
+        self.assertIs(self.model.get_node('Relu3'), self.model.nodes()[-1])
+        self.model.remove_node(self.model.get_node('Relu3'))
+        self.assertIsNone(self.model.get_node('Relu3'))
+        self.model.add_initializer(generate_input_initializer([3], np.float32, 'X7_bias'))
+        self.assertIs(self.model.get_initializer('X7_bias'), self.model.initializer()[-1])
+        self.model.remove_initializer(self.model.get_initializer('X1_weight'))
+        self.assertIsNone(self.model.get_initializer('X1_weight'))
+        self.assertEqual(self.model.get_initializer('X1_bias').name, 'X1_bias')
+
+        # nodes renamed in place and fields edited directly
+        conv.name = 'Conv1_quant'
+        self.assertIsNone(self.model.get_node('Conv1'))
+        self.assertIs(self.model.get_node('Conv1_quant'), conv)
+        self.model.graph().node.extend([onnx.helper.make_node('Relu', ['output'], ['output1'],
+            name='Relu4')])
+        self.assertEqual(self.model.find_node_by_name('Relu4', [], self.model.graph()).name, 'Relu4')
+        self.model.topological_sort()
+        self.assertEqual(self.model.get_node('Add').op_type, 'Add')
+
+        # a copied model indexes its own graph
+        import copy
+        copied_model = copy.deepcopy(self.model)
+        self.assertTrue(any(node is copied_model.get_node('Add') for node in copied_model.nodes()))
+        self.assertIsNot(copied_model.get_node('Add'), self.model.get_node('Add'))
+
+    def test_session_cache(self):
+        import copy
+        import pickle
+        import onnxruntime as ort
+        from neural_compressor.adaptor.ox_utils.util import get_inference_session, \
+            SessionCache, is_large_model
+        self.assertFalse(self.model.large_size)
+        self.assertFalse(is_large_model(self.model.model))
+        cache = SessionCache()
+        session = get_inference_session(self.model.model, ort.SessionOptions(),
+                                        ['CPUExecutionProvider'], cache=cache)
+        self.assertIs(get_inference_session(self.model.model, ort.SessionOptions(),
+                                            ['CPUExecutionProvider'], cache=cache), session)
+        # no cache, no reuse
+        self.assertIsNot(get_inference_session(self.model.model, ort.SessionOptions(),
+                                               ['CPUExecutionProvider']), session)
+        sess_options = ort.SessionOptions()
+        sess_options.intra_op_num_threads = 1
+        self.assertIsNot(get_inference_session(self.model.model, sess_options,
+                                               ['CPUExecutionProvider'], cache=cache), session)
+        self.assertIsNot(get_inference_session(self.model.model, ort.SessionOptions(),
+            ['CPUExecutionProvider'], cache=cache, custom_ops_libraries=['ops.so']), session)
+        self.assertEqual(len(cache), 2)
+        # a copy of the model gets its own session
+        self.assertIsNot(get_inference_session(copy.deepcopy(self.model.model),
+            ort.SessionOptions(), ['CPUExecutionProvider'], cache=cache), session)
+        # the sessions aren't pickled
+        self.assertEqual(len(pickle.loads(pickle.dumps(cache))), 0)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_name_index_reuse(self):
+        num = 10000
+        initializers = [numpy_helper.from_array(np.zeros(1, np.float32), 'W{}'.format(i))
+                        for i in range(num)]
+        nodes = [onnx.helper.make_node('Add', ['X{}'.format(i), 'W{}'.format(i)],
+            ['X{}'.format(i + 1)], name='Add{}'.format(i)) for i in range(num)]
+        graph = helper.make_graph(nodes, 'chain',
+            [helper.make_tensor_value_info('X0', TensorProto.FLOAT, [1])],
+            [helper.make_tensor_value_info('X{}'.format(num), TensorProto.FLOAT, [1])],
+            initializer=initializers)
+        model = ONNXModel(helper.make_model(graph))
+        for i in range(num - 1, -1, -1):
+            self.assertIs(model.get_initializer('W{}'.format(i)), model.initializer()[i])
+        self.assertIs(model.get_node('Add0'), model.nodes()[0])
+        # the indexes built by the first lookups are updated in place from then on
+        initializer_index = model._initializer_index._index
+        node_index = model._node_index._index
+        model.extend_initializers([numpy_helper.from_array(np.ones(1, np.float32), 'W0')])
+        self.assertEqual(len(model.initializer()), num + 1)
+        self.assertIs(model.get_initializer('W0'), model.initializer()[0])
+        model.add_initializer(numpy_helper.from_array(np.ones(1, np.float32), 'W1'))
+        self.assertEqual(len(model.initializer()), num + 1)
+        for i in range(num):
+            node = model.nodes()[i]
+            node.name = node.name + '_quant'
+            model.node_renamed(node, 'Add{}'.format(i))
+            self.assertIs(model.get_node('Add{}_quant'.format(i)), node)
+        self.assertIsNone(model.get_node('Add0'))
+        model.remove_node(model.get_node('Add5_quant'))
+        self.assertIsNone(model.get_node('Add5_quant'))
+        self.assertIs(model._initializer_index._index, initializer_index)
+        self.assertIs(model._node_index._index, node_index)
+
+    def test_name_index_pickle(self):
+        import pickle
+        conv = self.model.get_node('Conv1')
+        self.assertIs(conv, self.model.nodes()[1])
+        self.assertIsNotNone(self.model.get_initializer('X1_weight'))
+        loaded_model = pickle.loads(pickle.dumps(self.model))
+        self.assertIsNone(loaded_model._node_index._index)
+        self.assertIsNone(loaded_model._initializer_index._index)
+        # the unpickled index refers to the protos of the unpickled graph
+        self.assertIs(loaded_model.get_node('Conv1'), loaded_model.nodes()[1])
+        weight = loaded_model.get_initializer('X1_weight')
+        self.assertTrue(any(init is weight for init in loaded_model.initializer()))
+
 if __name__ == "__main__":
     unittest.main()
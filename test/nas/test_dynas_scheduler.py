@@ -0,0 +1,82 @@
+"""Tests for the DyNAS subnet validation scheduler"""
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import suppress
+from datetime import datetime
+
+from neural_compressor.experimental.nas.dynast.dynas_manager import ParameterManager
+from neural_compressor.experimental.nas.dynast.dynas_scheduler import SubnetValidationScheduler
+
+
+class FakeValidationInterface:
+    """Write the validation results like EvaluationInterfaceResNet50 without a supernet."""
+
+    def __init__(self, manager, csv_path):
+        self.manager = manager
+        self.csv_path = csv_path
+        self.csv_lock = None
+
+    def get_sample(self, param_dict):
+        return {'d': param_dict['d'], 'e': param_dict['e'], 'r': [224]}
+
+    def get_csv_subnet(self, sample, param_dict):
+        return sample
+
+    def eval_subnet(self, x):
+        sample = self.get_sample(self.manager.translate2param(x))
+        with self.csv_lock or suppress():
+            with open(self.csv_path, 'a') as f:
+                csv.writer(f).writerow([sample, str(datetime.now()), 0, sum(x), os.getpid()])
+        return sample, sum(x), 0
+
+
+class TestSubnetValidationScheduler(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.workspace, 'results.csv')
+        with open(self.csv_path, 'w') as f:
+            csv.writer(f).writerow(['Sub-network', 'Date', 'Latency (ms)', 'MACs', 'Top-1 Acc (%)'])
+        self.manager = ParameterManager({'d': {'count': 2, 'vars': [2, 3, 4]},
+                                         'e': {'count': 3, 'vars': [3, 4, 6]}})
+        self.interface = FakeValidationInterface(self.manager, self.csv_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace, ignore_errors=True)
+
+    def read_results(self):
+        with open(self.csv_path, newline='') as f:
+            return list(csv.reader(f))[1:]
+
+    def test_deduplicate_and_resume(self):
+        scheduler = SubnetValidationScheduler(self.interface, self.csv_path)
+        population = [[0, 1, 2, 0, 1], [1, 1, 1, 1, 1], [0, 1, 2, 0, 1]]
+        scheduler.validate(population)
+        self.assertEqual(len(self.read_results()), 2)
+        self.assertIsNone(scheduler.load_pending())
+
+        # an interrupted validation is resumed without the subnets validated already
+        scheduler.save_pending(population + [[2, 2, 2, 2, 2]])
+        scheduler = SubnetValidationScheduler(self.interface, self.csv_path)
+        pending = scheduler.load_pending()
+        self.assertEqual(len(pending), 4)
+        scheduler.validate(pending)
+        self.assertEqual(len(self.read_results()), 3)
+        self.assertFalse(os.path.exists(scheduler.pending_path))
+
+    def test_concurrent_validation(self):
+        scheduler = SubnetValidationScheduler(self.interface, self.csv_path, num_processes=2)
+        population = self.manager.random_samples(size=6)
+        scheduler.validate(population)
+        results = self.read_results()
+        self.assertEqual(len(results), 6)
+        self.assertEqual(set(row[0] for row in results),
+                         set(scheduler.subnet_key(individual) for individual in population))
+        self.assertNotIn(str(os.getpid()), set(row[4] for row in results))
+        self.assertIsNone(self.interface.csv_lock)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -266,6 +266,11 @@ class TestNAS(unittest.TestCase):
 
             onehot_vector = nas_agent.supernet_manager.onehot_generic(in_array=test_config['pymoo_vector'])
             self.assertListEqual(list(onehot_vector), test_config['onehot_vector_expected'])
+            onehot_vectors = nas_agent.supernet_manager.onehot_population(
+                [test_config['pymoo_vector'], test_config['pymoo_vector']])
+            self.assertEqual(onehot_vectors.shape[0], 2)
+            for onehot_vector in onehot_vectors:
+                self.assertListEqual(list(onehot_vector), test_config['onehot_vector_expected'])
 
     def test_parameter_manager_translate2param(self):
         test_configs = [
@@ -0,0 +1,78 @@
+"""Benchmark of the vectorized KL divergence threshold search against the per-candidate loops.
+
+Not part of the unit tests, run it directly:
+
+    python test/perf/bench_kl_divergence.py --num_bins 8001 --num_threads 4
+"""
+import argparse
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from neural_compressor.utils.collect_layer_histogram import LayerHistogramCollector
+from neural_compressor.utils.kl_divergence import KL_Divergence
+
+
+def reference_threshold(kl, hist, hist_edges, min_val, max_val, num_bins,
+                        num_quantized_bins=255):
+    """The threshold search with the original per-candidate loops."""
+    starting_iter, ending_iter = kl._candidate_range(hist, min_val, max_val, num_bins)
+    min_kl_divergence = None
+    min_kl_index = 0
+    for i in range(max(starting_iter, 1), ending_iter + 1):
+        if hist[i - 1] == 0:
+            continue
+        kl_divergence = kl.kl_divergence(hist, i, num_quantized_bins)
+        if min_kl_divergence is None or kl_divergence < min_kl_divergence:
+            min_kl_divergence = kl_divergence
+            min_kl_index = i
+    if min_kl_index == 0:
+        while starting_iter > 0 and hist[starting_iter] == 0:
+            starting_iter -= 1
+        min_kl_index = starting_iter
+    return (min_kl_index + 0.5) * (hist_edges[1] - hist_edges[0])
+
+
+def collect(num_bins, num_tensors):
+    rng = np.random.default_rng(0)
+    layer_tensor = OrderedDict()
+    for i in range(num_tensors):
+        layer_tensor['relu{}'.format(i)] = \
+            np.maximum(rng.standard_normal((64, 32)), 0).astype(np.float32)
+        layer_tensor['laplace{}'.format(i)] = rng.laplace(size=(64, 32)).astype(np.float32)
+    collector = LayerHistogramCollector(num_bins=num_bins, layer_tensor=layer_tensor,
+                                        include_layer=layer_tensor)
+    collector.collect()
+    return collector.hist_dict
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--num_bins', type=int, default=8001)
+    parser.add_argument('--num_tensors', type=int, default=8,
+                        help='number of relu and laplace tensor pairs')
+    parser.add_argument('--num_threads', type=int, default=4)
+    args = parser.parse_args()
+
+    hist_dict = collect(args.num_bins, args.num_tensors)
+    kl = KL_Divergence()
+    reference_time = vectorized_time = 0.
+    for name, (hist, hist_edges, min_val, max_val, _) in hist_dict.items():
+        start = time.perf_counter()
+        expected = reference_threshold(kl, hist, hist_edges, min_val, max_val, args.num_bins)
+        reference_time += time.perf_counter() - start
+        start = time.perf_counter()
+        threshold = kl.get_threshold(hist, hist_edges, min_val, max_val, args.num_bins, 'int8')
+        vectorized_time += time.perf_counter() - start
+        assert threshold == expected, name
+    start = time.perf_counter()
+    KL_Divergence(num_threads=args.num_threads).get_thresholds(hist_dict, 'int8')
+    threaded_time = time.perf_counter() - start
+    print("KL thresholds of {} tensors with {} bins: reference {:.4f}s, vectorized {:.4f}s, "
+          "vectorized on {} threads {:.4f}s".format(len(hist_dict), args.num_bins,
+          reference_time, vectorized_time, args.num_threads, threaded_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark of the ROC metric accumulation against the np.append reference.
+
+Not part of the unit tests, run it directly:
+
+    python test/perf/bench_metric_roc.py --num_batches 2000 --batch_size 512
+"""
+import argparse
+import time
+
+import numpy as np
+
+from neural_compressor.metric import METRICS
+
+
+def roc_stream(num_batches, batch_size, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(num_batches):
+        labels = rng.integers(0, 2, size=(batch_size, 1)).astype(np.float32)
+        preds = np.clip(0.3 * labels + rng.random((batch_size, 1), dtype=np.float32) * 0.7, 0, 1)
+        yield preds, labels
+
+
+def append_roc(batches):
+    """Accumulate the batches with np.append, as ROC did before the growing buffer."""
+    pred_list, label_list = None, None
+    for preds, labels in batches:
+        if pred_list is None:
+            pred_list, label_list = preds, labels
+        else:
+            pred_list = np.append(pred_list, preds, axis=0)
+            label_list = np.append(label_list, labels, axis=0)
+    return pred_list, label_list
+
+
+def time_roc(batches, **kwargs):
+    roc = METRICS('pytorch')['ROC'](**kwargs)
+    start = time.perf_counter()
+    for preds, labels in batches:
+        roc.update(preds, labels)
+    roc.result()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--num_batches', type=int, default=2000)
+    parser.add_argument('--batch_size', type=int, default=512)
+    parser.add_argument('--num_bins', type=int, default=10000)
+    args = parser.parse_args()
+
+    batches = list(roc_stream(args.num_batches, args.batch_size))
+    start = time.perf_counter()
+    append_roc(batches)
+    append_time = time.perf_counter() - start
+    buffer_time = time_roc(batches)
+    streaming_time = time_roc(batches, num_bins=args.num_bins)
+    print("ROC over {} samples: np.append {:.3f}s, buffer {:.3f}s, streaming {:.3f}s".format(
+        args.num_batches * args.batch_size, append_time, buffer_time, streaming_time))
+
+
+if __name__ == "__main__":
+    main()
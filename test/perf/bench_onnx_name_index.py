@@ -0,0 +1,58 @@
+"""Benchmark of the ONNXModel name index lookups against the find_by_name field scan.
+
+Not part of the unit tests, run it directly:
+
+    python test/perf/bench_onnx_name_index.py --sizes 1000 10000
+"""
+import argparse
+import time
+
+import numpy as np
+from onnx import helper, numpy_helper, TensorProto
+
+from neural_compressor.adaptor.ox_utils.util import find_by_name
+from neural_compressor.model.onnx_model import ONNXModel
+
+
+def build_chain(num):
+    initializers = [numpy_helper.from_array(np.zeros(1, np.float32), 'W{}'.format(i))
+                    for i in range(num)]
+    nodes = [helper.make_node('Add', ['X{}'.format(i), 'W{}'.format(i)],
+        ['X{}'.format(i + 1)], name='Add{}'.format(i)) for i in range(num)]
+    graph = helper.make_graph(nodes, 'chain',
+        [helper.make_tensor_value_info('X0', TensorProto.FLOAT, [1])],
+        [helper.make_tensor_value_info('X{}'.format(num), TensorProto.FLOAT, [1])],
+        initializer=initializers)
+    return ONNXModel(helper.make_model(graph))
+
+
+def lookup_time(num, lookups):
+    """Time the lookups of the last initializers, the scan is timed on a tenth of them."""
+    model = build_chain(num)
+    names = ['W{}'.format(i) for i in range(num - 1, max(num - 1 - lookups, -1), -1)]
+    start = time.perf_counter()
+    for name in names:
+        assert model.get_initializer(name).name == name
+    indexed = time.perf_counter() - start
+    scanned_names = names[:max(len(names) // 10, 1)]
+    start = time.perf_counter()
+    for name in scanned_names:
+        find_by_name(name, model.initializer())
+    scanned = (time.perf_counter() - start) * len(names) / len(scanned_names)
+    return len(names), indexed, scanned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--lookups', type=int, default=1000)
+    args = parser.parse_args()
+
+    for num in args.sizes:
+        lookups, indexed, scanned = lookup_time(num, args.lookups)
+        print('{} lookups in {} initializers: indexed {:.4f}s, scanned {:.4f}s'.format(
+            lookups, num, indexed, scanned))
+
+
+if __name__ == "__main__":
+    main()
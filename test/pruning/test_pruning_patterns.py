@@ -8,6 +8,7 @@ from neural_compressor.data import Datasets
 from neural_compressor.experimental.data.dataloaders.pytorch_dataloader import PyTorchDataLoader
 from neural_compressor.config import WeightPruningConfig
 from neural_compressor.pruner.pruning import Pruning
+from neural_compressor.pruner.patterns import get_global_kthvalue
 
 
 class TestPruningPatterns(unittest.TestCase):
@@ -77,6 +78,43 @@ class TestPruningPatterns(unittest.TestCase):
         prune.on_before_eval()
         prune.on_after_eval()
 
+    def test_compact_masks(self):
+        model = nn.Sequential(nn.Linear(16, 32), nn.ReLU(), nn.Linear(32, 8))
+        config = WeightPruningConfig([{"op_names": ['0', '2'], "pattern": '4x1',
+                                       "pruning_type": "magnitude"}],
+                                     target_sparsity=0.5, start_step=0, end_step=0)
+        prune = Pruning(config)
+        prune.model = model
+        prune.on_train_begin()
+        pruner = prune.pruners[0]
+        for key in pruner.masks:
+            self.assertEqual(pruner.masks[key].dtype, torch.bool)
+            # the unpruned masks are a broadcast view, not a copy of the weight size
+            self.assertEqual(pruner.masks[key].untyped_storage().nbytes(), 1)
+        prune.on_step_begin(0)
+        for key, module in pruner.modules.items():
+            mask = pruner.masks[key]
+            self.assertEqual(mask.dtype, torch.bool)
+            self.assertEqual(tuple(mask.shape), (module.weight.shape[0] // 4, module.weight.shape[1]))
+            expanded = pruner.pattern.expand_mask(mask, key)
+            self.assertEqual(expanded.shape, module.weight.shape)
+            self.assertTrue(torch.all(module.weight.data[~expanded] == 0))
+            self.assertEqual(pruner.pattern.get_element_zero_cnt(mask, key),
+                             int((~expanded).sum()))
+            weight = torch.randn(module.weight.shape)
+            masked_weight = weight.clone()
+            pruner.pattern.apply_mask(masked_weight, mask, key)
+            self.assertTrue(torch.equal(masked_weight, weight * expanded))
+
+    def test_global_kthvalue(self):
+        scores = [torch.randn(64, 32), torch.randn(300), torch.randint(0, 4, (16, 16)).float(),
+                  torch.empty(0)]
+        global_scores = torch.cat([score.flatten() for score in scores])
+        for k in [1, 100, 333, 900, global_scores.numel()]:
+            threshold = get_global_kthvalue(scores, k, bins=8, chunk_size=128)
+            self.assertEqual(threshold, torch.kthvalue(global_scores, k)[0])
+        self.assertEqual(get_global_kthvalue([torch.ones(300), torch.ones(200)], 400), 1.)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,140 @@
+"""Tests for the persistent FP32 baseline cache."""
+import os
+import shutil
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from onnx import helper, TensorProto, numpy_helper
+
+from neural_compressor.utils.baseline_cache import BaselineCache, model_digest, \
+    dataloader_fingerprint
+
+
+def build_model(seed=0):
+    rng = np.random.default_rng(seed)
+    X = helper.make_tensor_value_info('X', TensorProto.FLOAT, [None, 16])
+    Z = helper.make_tensor_value_info('Z', TensorProto.FLOAT, [None, 4])
+    W = numpy_helper.from_array(rng.standard_normal((16, 8)).astype(np.float32), 'W')
+    W2 = numpy_helper.from_array(rng.standard_normal((8, 4)).astype(np.float32), 'W2')
+    matmul = helper.make_node('MatMul', ['X', 'W'], ['Y'], name='matmul')
+    matmul2 = helper.make_node('MatMul', ['Y', 'W2'], ['Z'], name='matmul2')
+    graph = helper.make_graph([matmul, matmul2], 'test', [X], [Z], [W, W2])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 7
+    return model
+
+
+class Dataset(object):
+    def __init__(self, num_samples=64, seed=0):
+        self.data = np.random.default_rng(seed).standard_normal((num_samples, 16)).astype(np.float32)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        return self.data[index], 0
+
+
+def build_yaml():
+    with open('baseline_cache.yaml', 'w', encoding='utf-8') as f:
+        f.write('''
+model:
+  name: baseline_cache
+  framework: onnxrt_qlinearops
+quantization:
+  approach: post_training_static_quant
+  calibration:
+    sampling_size: 16
+evaluation:
+  accuracy:
+    metric:
+      MSE:
+        compare_label: False
+tuning:
+  strategy:
+    name: mse
+  accuracy_criterion:
+    absolute: 0.0
+    higher_is_better: False
+  exit_policy:
+    max_trials: 8
+  workspace:
+    path: ./saved_baseline_cache
+    baseline_cache: ./saved_baseline_cache/fp32
+''')
+
+
+class TestBaselineCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        build_yaml()
+
+    @classmethod
+    def tearDownClass(self):
+        os.remove('baseline_cache.yaml')
+        shutil.rmtree('./saved_baseline_cache', ignore_errors=True)
+        shutil.rmtree('./nc_workspace', ignore_errors=True)
+
+    def test_keys(self):
+        from neural_compressor.experimental import common
+        self.assertEqual(model_digest(build_model()), model_digest(build_model()))
+        self.assertNotEqual(model_digest(build_model()), model_digest(build_model(1)))
+        dataloader = common.DataLoader(Dataset(), batch_size=8)
+        self.assertEqual(dataloader_fingerprint(dataloader),
+                         dataloader_fingerprint(common.DataLoader(Dataset(), batch_size=8)))
+        self.assertNotEqual(dataloader_fingerprint(dataloader),
+                            dataloader_fingerprint(common.DataLoader(Dataset(), batch_size=4)))
+        self.assertNotEqual(dataloader_fingerprint(dataloader),
+                            dataloader_fingerprint(common.DataLoader(Dataset(seed=1), batch_size=8)))
+
+    def test_arrays(self):
+        cache = BaselineCache('./saved_baseline_cache/arrays', {'model': 'a'})
+        self.assertIsNone(cache.load_baseline())
+        cache.save_baseline([0.5, [1.0]], True)
+        self.assertEqual(cache.load_baseline(), ([0.5, [1.0]], True))
+        arrays = {'op': {'tensor': np.arange(6).reshape(2, 3)}, 'outputs': [np.ones(3), 2]}
+        self.assertTrue(cache.save_arrays('arrays', arrays))
+        loaded = cache.load_arrays('arrays')
+        self.assertIsInstance(loaded['op']['tensor'], np.memmap)
+        np.testing.assert_array_equal(loaded['op']['tensor'], arrays['op']['tensor'])
+        np.testing.assert_array_equal(loaded['outputs'][0], np.ones(3))
+        self.assertEqual(loaded['outputs'][1], 2)
+        self.assertIsNone(BaselineCache('./saved_baseline_cache/arrays',
+                                        {'model': 'b'}).load_baseline())
+
+    def tune(self):
+        from neural_compressor.experimental import Quantization, common
+        from neural_compressor.adaptor.onnxrt import ONNXRUNTIMEAdaptor
+        quantizer = Quantization('baseline_cache.yaml')
+        quantizer.model = build_model()
+        quantizer.calib_dataloader = common.DataLoader(Dataset(), batch_size=8)
+        quantizer.eval_dataloader = common.DataLoader(Dataset(), batch_size=8)
+        evaluate, inspect_tensor = ONNXRUNTIMEAdaptor.evaluate, ONNXRUNTIMEAdaptor.inspect_tensor
+        with patch.object(ONNXRUNTIMEAdaptor, 'evaluate', autospec=True,
+                          side_effect=evaluate) as mock_evaluate, \
+             patch.object(ONNXRUNTIMEAdaptor, 'inspect_tensor', autospec=True,
+                          side_effect=inspect_tensor) as mock_inspect:
+            quantizer.fit()
+        # (self, model, dataloader, postprocess, metrics, measurer, iteration, tensorboard,
+        #  fp32_baseline)
+        baseline_evaluations = sum(1 for call in mock_evaluate.call_args_list if call.args[8])
+        history = quantizer.strategy.tuning_history[0]
+        results = [entry['tune_result'][0] for entry in history['history']]
+        return history['baseline'][0], results, baseline_evaluations, mock_inspect.call_count
+
+    def test_tuning(self):
+        shutil.rmtree('./saved_baseline_cache/fp32', ignore_errors=True)
+        baseline, results, baseline_evaluations, inspections = self.tune()
+        self.assertEqual(baseline_evaluations, 1)
+        self.assertGreater(inspections, 0)
+        cached_baseline, cached_results, baseline_evaluations, cached_inspections = self.tune()
+        self.assertEqual(baseline_evaluations, 0)
+        # only the quantized models are inspected
+        self.assertEqual(cached_inspections, inspections // 2)
+        self.assertEqual(cached_baseline, baseline)
+        np.testing.assert_allclose(cached_results, results, rtol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
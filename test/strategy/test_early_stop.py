@@ -0,0 +1,194 @@
+"""Tests for the early termination of the accuracy evaluation."""
+import os
+import shutil
+import unittest
+
+import numpy as np
+from onnx import helper, TensorProto, numpy_helper
+
+from neural_compressor.experimental.data.dataloaders.base_dataloader import BaseDataLoader
+from neural_compressor.utils.early_stop import EarlyStopCriterion, EarlyStopDataLoader, \
+    early_stop_dataloader, running_mean, is_shuffled
+
+
+class GeneralTopK(object):
+    def __init__(self):
+        self.num_correct = 0
+        self.num_sample = 0
+
+    def update(self, correct):
+        self.num_correct += int(np.sum(correct))
+        self.num_sample += len(correct)
+
+    def running_mean(self):
+        return (self.num_correct / self.num_sample if self.num_sample else 0.), self.num_sample
+
+
+class ClassifyDataset(object):
+    def __init__(self, weight, num_samples):
+        rng = np.random.default_rng(0)
+        self.data = rng.standard_normal((num_samples, weight.shape[0])).astype(np.float32)
+        self.labels = np.argmax(self.data @ weight, axis=1)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, index):
+        return self.data[index], self.labels[index]
+
+
+def build_model(weight):
+    X = helper.make_tensor_value_info('X', TensorProto.FLOAT, [None, weight.shape[0]])
+    Y = helper.make_tensor_value_info('Y', TensorProto.FLOAT, [None, weight.shape[1]])
+    W = numpy_helper.from_array(weight, 'W')
+    matmul = helper.make_node('MatMul', ['X', 'W'], ['Y'], name='matmul')
+    graph = helper.make_graph([matmul], 'test', [X], [Y], [W])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 7
+    return model
+
+
+def build_yaml():
+    with open('early_stop.yaml', 'w', encoding='utf-8') as f:
+        f.write('''
+model:
+  name: early_stop
+  framework: onnxrt_qlinearops
+quantization:
+  approach: post_training_static_quant
+  calibration:
+    sampling_size: 16
+evaluation:
+  accuracy:
+    metric:
+      topk: 1
+    early_stop:
+      confidence: 0.99
+      min_samples: 100
+      shuffled: True
+tuning:
+  accuracy_criterion:
+    absolute: 0.5
+  exit_policy:
+    max_trials: 3
+  workspace:
+    path: ./saved_early_stop
+''')
+
+
+class TestEarlyStop(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        build_yaml()
+
+    @classmethod
+    def tearDownClass(self):
+        os.remove('early_stop.yaml')
+        shutil.rmtree('./saved_early_stop', ignore_errors=True)
+
+    def test_criterion(self):
+        criterion = EarlyStopCriterion(0.7, confidence=0.99)
+        self.assertIsNone(criterion.decide(0.72, 100, 10000))
+        self.assertEqual(criterion.decide(0.3, 100, 10000), 'missed')
+        self.assertEqual(criterion.decide(0.95, 1000, 10000), 'met')
+        # all samples evaluated gives the exact accuracy
+        self.assertEqual(criterion.bounds(0.71, 100, 100), (0.71, 0.71))
+        self.assertEqual(criterion.decide(0.71, 100, 100), 'met')
+        # the remaining samples can't change the result
+        self.assertEqual(criterion.decide(0.5, 90, 100), 'missed')
+        lower_criterion = EarlyStopCriterion(0.1, higher_is_better=False, confidence=0.99)
+        self.assertEqual(lower_criterion.decide(0.01, 2000, 10000), 'met')
+        self.assertEqual(lower_criterion.decide(0.5, 1000, 10000), 'missed')
+        self.assertIsNone(EarlyStopCriterion(0.7, min_samples=500).decide(0.3, 100, 10000))
+
+    def test_dataloader(self):
+        metric = GeneralTopK()
+        batches = [np.ones(10) * (i % 5 != 4) for i in range(100)]
+        dataloader = early_stop_dataloader(batches, metric, EarlyStopCriterion(0.5))
+        self.assertIsInstance(dataloader, EarlyStopDataLoader)
+        self.assertNotIsInstance(dataloader, BaseDataLoader)
+        for batch in dataloader:
+            metric.update(batch)
+        self.assertTrue(dataloader.partial)
+        self.assertEqual(dataloader.decision, 'met')
+        self.assertLess(metric.num_sample, 1000)
+        self.assertEqual(dataloader.num_samples, metric.num_sample)
+
+        metric = GeneralTopK()
+        # the final accuracy 0.8 misses 0.85, but it isn't settled before the last batch
+        criterion = EarlyStopCriterion(0.85, confidence=0.999999)
+        dataloader = EarlyStopDataLoader(batches, metric, criterion, iteration=10)
+        for idx, batch in enumerate(dataloader):
+            metric.update(batch)
+            if idx + 1 == 10:
+                break
+        self.assertFalse(dataloader.partial)
+        self.assertEqual(metric.num_sample, 100)
+
+    def test_running_mean(self):
+        from neural_compressor.metric import METRICS
+        metrics = METRICS('onnxrt_qlinearops')
+        topk = metrics['topk']()
+        topk.update(np.eye(4)[[0, 1, 2, 3]], np.array([0, 1, 2, 0]))
+        self.assertEqual(running_mean(topk), (0.75, 4))
+        accuracy = metrics['Accuracy']()
+        accuracy.update(np.array([1, 0, 1]), np.array([1, 1, 1]))
+        self.assertEqual(running_mean(accuracy), (2. / 3, 3))
+        self.assertIsNone(running_mean(metrics['MSE']()))
+        self.assertIsNone(running_mean(METRICS('pytorch')['ROC']()))
+        self.assertEqual(running_mean(METRICS('pytorch')['ROC'](num_bins=10)), (0., 0))
+        self.assertIsNone(running_mean(object()))
+
+    def test_shuffled(self):
+        from neural_compressor.experimental.data import DATALOADERS
+        weight = np.random.default_rng(1).standard_normal((16, 10)).astype(np.float32)
+        dataset = ClassifyDataset(weight, 100)
+        self.assertFalse(is_shuffled([]))
+        # the onnxrt dataloader ignores shuffle
+        self.assertFalse(is_shuffled(DATALOADERS['onnxrt_qlinearops'](dataset, 16,
+                                                                      shuffle=True)))
+        try:
+            import torch
+        except ImportError:
+            return
+        self.assertTrue(is_shuffled(DATALOADERS['pytorch'](dataset, 16, shuffle=True)))
+        self.assertFalse(is_shuffled(DATALOADERS['pytorch'](dataset, 16)))
+        self.assertTrue(is_shuffled(torch.utils.data.DataLoader(dataset, 16, shuffle=True)))
+        self.assertFalse(is_shuffled(torch.utils.data.DataLoader(dataset, 16)))
+
+    def test_base_dataloader(self):
+        from neural_compressor.experimental.data import DATALOADERS
+        weight = np.random.default_rng(1).standard_normal((16, 10)).astype(np.float32)
+        dataset = ClassifyDataset(weight, 100)
+        dataloader = early_stop_dataloader(DATALOADERS['onnxrt_qlinearops'](dataset, 16),
+                                           GeneralTopK(), EarlyStopCriterion(0.5))
+        self.assertIsInstance(dataloader, BaseDataLoader)
+        self.assertEqual(dataloader.batch_size, 16)
+        self.assertEqual(len(dataloader), 7)
+        # the retry of the adaptors with batch size 1 changes the wrapped dataloader
+        dataloader.batch(1)
+        self.assertEqual(dataloader.batch_size, 1)
+        self.assertEqual(dataloader.dataloader.batch_size, 1)
+        self.assertEqual(len(dataloader), 100)
+        self.assertEqual(len(list(dataloader)), 100)
+
+    def test_tuning(self):
+        from neural_compressor.experimental import Quantization, common
+        weight = np.random.default_rng(1).standard_normal((16, 10)).astype(np.float32)
+        quantizer = Quantization('early_stop.yaml')
+        quantizer.model = build_model(weight)
+        dataset = ClassifyDataset(weight, 2000)
+        quantizer.calib_dataloader = common.DataLoader(dataset, batch_size=16)
+        quantizer.eval_dataloader = common.DataLoader(dataset, batch_size=16)
+        q_model = quantizer.fit()
+        self.assertIsNotNone(q_model)
+        tuning_history = quantizer.strategy.tuning_history[0]
+        self.assertEqual(tuning_history['baseline'][0], 1.0)
+        entry = tuning_history['history'][-1]
+        self.assertTrue(entry['partial_evaluation'])
+        self.assertLess(entry['evaluated_samples'], 2000)
+        self.assertGreaterEqual(entry['evaluated_samples'], 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Tests for the MSE tuning strategy with the activations streamed."""
+import os
+import shutil
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from onnx import helper, TensorProto, numpy_helper
+
+
+def build_model():
+    rng = np.random.default_rng(0)
+    X = helper.make_tensor_value_info('X', TensorProto.FLOAT, [None, 16])
+    Z = helper.make_tensor_value_info('Z', TensorProto.FLOAT, [None, 4])
+    W = numpy_helper.from_array(rng.standard_normal((16, 8)).astype(np.float32), 'W')
+    W2 = numpy_helper.from_array(rng.standard_normal((8, 4)).astype(np.float32), 'W2')
+    matmul = helper.make_node('MatMul', ['X', 'W'], ['Y'], name='matmul')
+    matmul2 = helper.make_node('MatMul', ['Y', 'W2'], ['Z'], name='matmul2')
+    graph = helper.make_graph([matmul, matmul2], 'test', [X], [Z], [W, W2])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 7
+    return model
+
+
+class Dataset(object):
+    def __init__(self, num_samples=64):
+        self.data = np.random.default_rng(0).standard_normal((num_samples, 16)).astype(np.float32)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        return self.data[index], 0
+
+
+def build_yaml():
+    with open('mse_streaming.yaml', 'w', encoding='utf-8') as f:
+        f.write('''
+model:
+  name: mse_streaming
+  framework: onnxrt_qlinearops
+quantization:
+  approach: post_training_static_quant
+  calibration:
+    sampling_size: 16
+evaluation:
+  accuracy:
+    metric:
+      MSE:
+        compare_label: False
+tuning:
+  strategy:
+    name: mse
+    mse_streaming: True
+    confidence_batches: 3
+  accuracy_criterion:
+    absolute: 0.0
+    higher_is_better: False
+  exit_policy:
+    max_trials: 8
+  workspace:
+    path: ./saved_mse_streaming
+''')
+
+
+class TestMSEStreaming(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        build_yaml()
+
+    @classmethod
+    def tearDownClass(self):
+        os.remove('mse_streaming.yaml')
+        shutil.rmtree('./saved_mse_streaming', ignore_errors=True)
+        shutil.rmtree('./nc_workspace', ignore_errors=True)
+
+    def test_streaming(self):
+        from neural_compressor.experimental import Quantization, common
+        from neural_compressor.adaptor.onnxrt import ONNXRUNTIMEAdaptor
+        quantizer = Quantization('mse_streaming.yaml')
+        quantizer.model = build_model()
+        quantizer.calib_dataloader = common.DataLoader(Dataset(), batch_size=8)
+        quantizer.eval_dataloader = common.DataLoader(Dataset(), batch_size=8)
+        stream_inspect_tensor = ONNXRUNTIMEAdaptor.stream_inspect_tensor
+        with patch.object(ONNXRUNTIMEAdaptor, 'stream_inspect_tensor', autospec=True,
+                          side_effect=stream_inspect_tensor) as mock_stream, \
+             patch.object(ONNXRUNTIMEAdaptor, 'inspect_tensor', autospec=True) as mock_inspect:
+            quantizer.fit()
+        self.assertGreater(mock_stream.call_count, 0)
+        self.assertEqual(mock_inspect.call_count, 0)
+
+        # the streamed MSE is the one of the dumped activations of the same batches
+        strategy = quantizer.strategy
+        op_names = ['matmul', 'matmul2']
+        tune_cfg = strategy._tune_cfg_converter(strategy.cur_best_tuning_cfg)
+        ops_mse = strategy._streamed_ops_mse(op_names, strategy.model, tune_cfg)
+        fp32_dump = strategy.adaptor.inspect_tensor(strategy.model, strategy.calib_dataloader,
+            op_names, [0, 1, 2], quantization_cfg=tune_cfg)['activation']
+        quant_dump = strategy.adaptor.inspect_tensor(strategy.q_model, strategy.calib_dataloader,
+            op_names, [0, 1, 2], quantization_cfg=tune_cfg)['activation']
+        self.assertEqual(len(fp32_dump), 3)
+        self.assertEqual(set(ops_mse), set(op_names))
+        for op in op_names:
+            expected = np.mean([strategy._mse_metric_gap(list(fp32[op].values())[0],
+                list(dequantize[op].values())[0]) for fp32, dequantize in zip(fp32_dump, quant_dump)])
+            self.assertAlmostEqual(ops_mse[op], expected, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
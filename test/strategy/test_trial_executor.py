@@ -0,0 +1,113 @@
+"""Tests for the parallel trial execution of the tuning strategy."""
+import os
+import pickle
+import shutil
+import unittest
+from functools import partial
+from types import SimpleNamespace
+
+import numpy as np
+import onnx
+from onnx import helper, TensorProto, numpy_helper
+
+from neural_compressor.strategy.utils.trial_executor import partition_cores, dump_strategy, \
+    load_trial_state
+
+
+def build_model():
+    np.random.seed(0)
+    A = helper.make_tensor_value_info('A', TensorProto.FLOAT, [1, 1, 5, 5])
+    D = helper.make_tensor_value_info('D', TensorProto.FLOAT, [1, 1, 5, 5])
+    B = numpy_helper.from_array(np.random.randn(1, 1, 3, 3).astype(np.float32), 'B')
+    B2 = numpy_helper.from_array(np.random.randn(1, 1, 3, 3).astype(np.float32), 'B2')
+    conv = helper.make_node('Conv', ['A', 'B'], ['C'], name='conv', kernel_shape=[3, 3], pads=[1, 1, 1, 1])
+    relu = helper.make_node('Relu', ['C'], ['C2'], name='relu')
+    conv2 = helper.make_node('Conv', ['C2', 'B2'], ['D'], name='conv2', kernel_shape=[3, 3], pads=[1, 1, 1, 1])
+    graph = helper.make_graph([conv, relu, conv2], 'test', [A], [D], [B, B2])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 7
+    return model
+
+
+def eval_quantized_convs(target, model):
+    # only the trial quantizing `target` convs meets the accuracy goal, at module level so the
+    # spawned trial workers can unpickle it
+    num_quantized = sum(1 for node in model.graph.node if node.op_type == 'QLinearConv')
+    return 1.0 if num_quantized == target else 0.5 - 0.1 * num_quantized
+
+
+def build_yaml(workers):
+    with open('trial_executor.yaml', 'w', encoding='utf-8') as f:
+        f.write('''
+model:
+  name: trial_executor
+  framework: onnxrt_qlinearops
+quantization:
+  approach: post_training_static_quant
+  calibration:
+    sampling_size: 4
+tuning:
+  accuracy_criterion:
+    absolute: 0.01
+  exit_policy:
+    max_trials: 10
+  workers: {}
+  workspace:
+    path: ./saved_trial_executor
+'''.format(workers))
+
+
+class TestTrialExecutor(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.model = build_model()
+
+    @classmethod
+    def tearDownClass(self):
+        os.remove('trial_executor.yaml')
+        shutil.rmtree('./saved_trial_executor', ignore_errors=True)
+        shutil.rmtree('./nc_workspace', ignore_errors=True)
+
+    def test_partition_cores(self):
+        self.assertEqual(partition_cores([3, 0, 2, 1, 4], 2), [[0, 1, 2], [3, 4]])
+        self.assertEqual(partition_cores(range(8), 4), [[0, 1], [2, 3], [4, 5], [6, 7]])
+
+    def test_load_trial_state(self):
+        strategy = SimpleNamespace(adaptor=SimpleNamespace(quantize_config={}, work_space='ws'))
+        state = pickle.dumps(({'q': 1}, {'last': 2}, {'quantize_config': {'op': 'int8'}}))
+        self.assertEqual(load_trial_state(strategy, state), ({'q': 1}, {'last': 2}))
+        self.assertEqual(strategy.adaptor.quantize_config, {'op': 'int8'})
+        self.assertEqual(strategy.adaptor.work_space, 'ws')
+
+    def tune(self, workers, target):
+        from neural_compressor.experimental import Quantization
+        from neural_compressor.data import Datasets, DATALOADERS
+        shutil.rmtree('./saved_trial_executor', ignore_errors=True)
+        build_yaml(workers)
+        dataset = Datasets('onnxrt_qlinearops')['dummy'](shape=(8, 1, 5, 5), label=True)
+        quantizer = Quantization('trial_executor.yaml')
+        quantizer.model = self.model
+        quantizer.calib_dataloader = DATALOADERS['onnxrt_qlinearops'](dataset, batch_size=1)
+        quantizer.eval_func = partial(eval_quantized_convs, target)
+        q_model = quantizer.fit()
+        # the strategy is sent to the workers, the parallel traverse doesn't fall back
+        self.assertIsNotNone(dump_strategy(quantizer.strategy))
+        history = [(entry['tune_cfg'], entry['tune_result'][0])
+                   for entry in quantizer.strategy.tuning_history[0]['history']]
+        return q_model, history
+
+    def test_parallel_traverse(self):
+        for target in [1, 0]:
+            q_model, history = self.tune(1, target)
+            parallel_q_model, parallel_history = self.tune(3, target)
+            self.assertIsNotNone(q_model)
+            self.assertIsNotNone(parallel_q_model)
+            self.assertEqual(parallel_history, history)
+            self.assertEqual(parallel_history[-1][1], 1.0)
+            # the committed model is the one quantized by the worker
+            self.assertEqual(sum(1 for node in parallel_q_model.nodes() \
+                if node.op_type == 'QLinearConv'), target)
+
+
+if __name__ == "__main__":
+    unittest.main()
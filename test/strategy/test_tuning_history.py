@@ -0,0 +1,116 @@
+"""Tests for the indexed tuning history and its snapshot journal."""
+import os
+import pickle
+import shutil
+import unittest
+from collections import OrderedDict
+
+from neural_compressor.conf.dotdict import DotDict
+from neural_compressor.strategy.strategy import TuneStrategy
+from neural_compressor.utils.utility import canonical_hash, get_tuning_history, \
+    TuningHistoryJournal
+
+
+class FakeStrategy(object):
+    def __init__(self, tuning_history):
+        self.tuning_history = tuning_history
+
+
+def build_strategy(workspace):
+    strategy = TuneStrategy.__new__(TuneStrategy)
+    strategy.cfg = DotDict({'model': {'framework': 'onnxrt_qlinearops'},
+                            'tuning': {'exit_policy': {'max_trials': 10}}})
+    strategy.history_path = os.path.join(workspace, 'history.snapshot')
+    strategy._history_journal = TuningHistoryJournal(strategy.history_path)
+    strategy.tuning_history = []
+    strategy._indexed_history = None
+    strategy._indexed_items = []
+    strategy._yaml_index = {}
+    strategy.baseline = [1.0, [1.0]]
+    strategy.last_tune_result = None
+    strategy.best_tune_result = None
+    strategy.last_eval_info = {}
+    return strategy
+
+
+def tune_cfg(idx):
+    return {'op': OrderedDict([(('conv', 'Conv'), {'activation': {'dtype': 'uint8'}}),
+                               (('matmul', 'MatMul'), {'activation': {'dtype': 'fp32'}})]),
+            'calib_iteration': idx}
+
+
+class TestTuningHistory(unittest.TestCase):
+    workspace = './tuning_history_test'
+
+    def setUp(self):
+        os.makedirs(self.workspace, exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace, ignore_errors=True)
+
+    def test_canonical_hash(self):
+        cfg = tune_cfg(1)
+        reordered = {'calib_iteration': 1.0,
+                     'op': OrderedDict(reversed(list(cfg['op'].items())))}
+        self.assertEqual(canonical_hash(cfg), canonical_hash(reordered))
+        self.assertNotEqual(canonical_hash(cfg), canonical_hash(tune_cfg(2)))
+        self.assertEqual(canonical_hash({'a': 1, 'tuning': 1}, ignore_keys=['tuning']),
+                         canonical_hash({'a': 1, 'tuning': 2}, ignore_keys=['tuning']))
+
+    def test_find_and_add_history(self):
+        strategy = build_strategy(self.workspace)
+        strategy._add_tuning_history()
+        for idx in range(5):
+            strategy.last_tune_result = [0.9 + idx / 100, [1.0]]
+            strategy._add_tuning_history(tune_cfg(idx), strategy.last_tune_result, q_config=idx)
+        self.assertEqual(len(strategy.tuning_history), 1)
+        self.assertEqual(strategy._find_history(tune_cfg(3))['q_config'], 3)
+        self.assertIs(strategy._find_tuning_history(tune_cfg(4)), strategy.tuning_history[0])
+        self.assertIsNone(strategy._find_history(tune_cfg(5)))
+
+        # the history of another yaml config is not visible
+        strategy.cfg = DotDict({'model': {'framework': 'pytorch'},
+                                'tuning': {'exit_policy': {'max_trials': 10}}})
+        self.assertIsNone(strategy._find_history(tune_cfg(3)))
+        self.assertIsNone(strategy._find_self_tuning_history())
+
+    def test_journal_replay(self):
+        strategy = build_strategy(self.workspace)
+        strategy._add_tuning_history()
+        size = os.path.getsize(strategy.history_path)
+        for idx in range(3):
+            strategy.last_tune_result = [0.9, [1.0]]
+            strategy._add_tuning_history(tune_cfg(idx), strategy.last_tune_result, q_config=idx)
+            self.assertGreater(os.path.getsize(strategy.history_path), size)
+            size = os.path.getsize(strategy.history_path)
+        strategy.tuning_history[0]['ordered_ops'] = ['conv']
+        strategy._save()
+
+        resume = TuningHistoryJournal.load(strategy.history_path)
+        self.assertEqual(resume['tuning_history'], strategy.tuning_history)
+        self.assertEqual(get_tuning_history(strategy.history_path)[0]['ordered_ops'], ['conv'])
+
+        # a resumed strategy compacts the journal in its first save
+        resumed = build_strategy(self.workspace)
+        resumed.tuning_history = resume['tuning_history']
+        self.assertEqual(resumed._find_history(tune_cfg(2))['q_config'], 2)
+        resumed._add_tuning_history(tune_cfg(3), [0.9, [1.0]], q_config=3)
+        history = get_tuning_history(resumed.history_path)[0]['history']
+        self.assertEqual([h['q_config'] for h in history if h['tune_cfg']], [0, 1, 2, 3])
+
+        # a record truncated by an interruption is ignored
+        with open(resumed.history_path, 'ab') as f:
+            f.write(pickle.dumps(('history', 0, {'tune_cfg': tune_cfg(4)}))[:-5])
+        self.assertEqual(TuningHistoryJournal.load(resumed.history_path)['tuning_history'],
+                         resumed.tuning_history)
+
+    def test_legacy_snapshot(self):
+        path = os.path.join(self.workspace, 'legacy.snapshot')
+        tuning_history = [{'cfg': {}, 'history': [{'tune_cfg': tune_cfg(0)}]}]
+        with open(path, 'wb') as f:
+            pickle.dump(FakeStrategy(tuning_history), f)
+        self.assertEqual(get_tuning_history(path), tuning_history)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Tests for the vectorized KL divergence threshold search."""
+import unittest
+from collections import OrderedDict
+
+import numpy as np
+
+from neural_compressor.utils.collect_layer_histogram import LayerHistogramCollector
+from neural_compressor.utils.kl_divergence import KL_Divergence
+
+
+def reference_threshold(kl, hist, hist_edges, min_val, max_val, num_bins,
+                        num_quantized_bins=255):
+    """The threshold search with the original per-candidate loops."""
+    starting_iter, ending_iter = kl._candidate_range(hist, min_val, max_val, num_bins)
+    min_kl_divergence = None
+    min_kl_index = 0
+    for i in range(max(starting_iter, 1), ending_iter + 1):
+        if hist[i - 1] == 0:
+            continue
+        kl_divergence = kl.kl_divergence(hist, i, num_quantized_bins)
+        if min_kl_divergence is None or kl_divergence < min_kl_divergence:
+            min_kl_divergence = kl_divergence
+            min_kl_index = i
+    if min_kl_index == 0:
+        while starting_iter > 0 and hist[starting_iter] == 0:
+            starting_iter -= 1
+        min_kl_index = starting_iter
+    return (min_kl_index + 0.5) * (hist_edges[1] - hist_edges[0])
+
+
+class TestKLDivergence(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        layer_tensor = OrderedDict()
+        layer_tensor['relu'] = np.maximum(rng.standard_normal((64, 32)), 0).astype(np.float32)
+        layer_tensor['normal'] = (rng.standard_normal((64, 32)) * 2 + 0.5).astype(np.float32)
+        layer_tensor['laplace'] = rng.laplace(size=(64, 32)).astype(np.float32)
+        cls.layer_tensor = layer_tensor
+
+    def collect(self, num_bins):
+        collector = LayerHistogramCollector(num_bins=num_bins, layer_tensor=self.layer_tensor,
+                                            include_layer=self.layer_tensor)
+        collector.collect()
+        return collector.hist_dict
+
+    def test_same_threshold_as_reference(self):
+        kl = KL_Divergence()
+        for num_bins in [300, 1000, 2048]:
+            for name, (hist, hist_edges, min_val, max_val, _) in \
+                    self.collect(num_bins).items():
+                expected = reference_threshold(kl, hist, hist_edges, min_val, max_val, num_bins)
+                threshold = kl.get_threshold(hist, hist_edges, min_val, max_val,
+                                             num_bins, 'int8')
+                self.assertEqual(threshold, expected, name)
+
+    def test_sparse_histogram(self):
+        kl = KL_Divergence()
+        hist = np.zeros(2048, dtype=np.int64)
+        hist[[3, 500, 501, 1500, 2047]] = [7, 1, 1, 2, 1]
+        hist_edges = np.linspace(0, 1, 2049)
+        expected = reference_threshold(kl, hist, hist_edges, 0., 1., 2048)
+        self.assertEqual(kl.get_threshold(hist, hist_edges, 0., 1., 2048, 'int8'), expected)
+
+    def test_get_thresholds(self):
+        hist_dict = self.collect(2048)
+        expected = KL_Divergence().get_thresholds(hist_dict, 'int8')
+        thresholds = KL_Divergence(num_threads=3).get_thresholds(hist_dict, 'int8')
+        self.assertEqual(thresholds, expected)
+        self.assertEqual(list(thresholds.keys()), list(hist_dict.keys()))
+
+    def test_same_threshold_8001_bins(self):
+        kl = KL_Divergence()
+        for name, (hist, hist_edges, min_val, max_val, _) in self.collect(8001).items():
+            expected = reference_threshold(kl, hist, hist_edges, min_val, max_val, 8001)
+            threshold = kl.get_threshold(hist, hist_edges, min_val, max_val, 8001, 'int8')
+            self.assertEqual(threshold, expected, name)
+
+if __name__ == "__main__":
+    unittest.main()
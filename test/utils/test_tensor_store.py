@@ -0,0 +1,143 @@
+"""Tests for the tensor store of the tensor inspection."""
+import os
+import shutil
+import unittest
+
+import numpy as np
+
+from neural_compressor.utils.tensor_store import Reservoir, TensorStore, tensor_statistics
+
+
+class TestTensorStore(unittest.TestCase):
+    work_space = './tensor_store_test'
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_space, ignore_errors=True)
+
+    def test_tensor_mode(self):
+        path = os.path.join(self.work_space, 'tensor')
+        store = TensorStore(path)
+        tensors = {(op, iteration): np.random.randn(2, 3 + iteration).astype(np.float32) \
+            for op in ['conv', 'fc'] for iteration in [1, 2]}
+        for (op, iteration), tensor in tensors.items():
+            store.record(op, iteration, op + '.output0', tensor, quantized=(op == 'fc'))
+        store.record('conv', 2, 'conv.output1', np.arange(4))
+        store.close()
+        self.assertEqual(len(os.listdir(path)), 3)
+
+        # the records are appended to the reopened store
+        store = TensorStore(path)
+        store.record('conv', 3, 'conv.output0', np.ones(2))
+        self.assertEqual(store.ops(), ['conv', 'fc'])
+        self.assertEqual(store.iterations(), [1, 2, 3])
+        conv = store.load('conv', 2)
+        self.assertEqual(list(conv.keys()), ['conv.output0', 'conv.output1'])
+        self.assertIsInstance(conv['conv.output0'], np.memmap)
+        np.testing.assert_array_equal(conv['conv.output0'], tensors[('conv', 2)])
+        np.testing.assert_array_equal(conv['conv.output1'], np.arange(4))
+        np.testing.assert_array_equal(store.load('conv', 3)['conv.output0'], np.ones(2))
+        in_memory = store.load('conv', 2, mmap=False)['conv.output0']
+        self.assertNotIsInstance(in_memory, np.memmap)
+        np.testing.assert_array_equal(in_memory, tensors[('conv', 2)])
+        self.assertEqual(len(store.load('conv', 4)), 0)
+        self.assertTrue(store.is_quantized('fc', 1))
+        self.assertFalse(store.is_quantized('conv', 1))
+        activation = store.load_inspect_result()['activation']
+        self.assertEqual(len(activation), 3)
+        np.testing.assert_array_equal(activation[0]['fc']['fc.output0'], tensors[('fc', 1)])
+        store.close()
+
+        # a record cut by an interrupted write isn't loaded
+        with open(os.path.join(path, 'index.jsonl'), 'a') as f:
+            f.write('{"op": "conv"')
+        self.assertEqual(TensorStore(path).iterations(), [1, 2, 3])
+
+    def test_read_only(self):
+        path = os.path.join(self.work_space, 'read_only')
+        store = TensorStore(path)
+        store.record('conv', 1, 'conv.output0', np.arange(3))
+        store.close()
+        index_mtime = os.path.getmtime(os.path.join(path, 'index.jsonl'))
+        store = TensorStore(path, read_only=True)
+        self.assertIsNone(store.index_file)
+        np.testing.assert_array_equal(store.load('conv', 1)['conv.output0'], np.arange(3))
+        with self.assertRaises(AssertionError):
+            store.record('conv', 2, 'conv.output0', np.arange(3))
+        store.close()
+        self.assertEqual(os.path.getmtime(os.path.join(path, 'index.jsonl')), index_mtime)
+        self.assertEqual(TensorStore(os.path.join(self.work_space, 'missing'),
+                                     read_only=True).ops(), [])
+        self.assertFalse(os.path.exists(os.path.join(self.work_space, 'missing')))
+
+    def test_open_files(self):
+        from neural_compressor.utils import tensor_store
+        path = os.path.join(self.work_space, 'open_files')
+        store = TensorStore(path)
+        num_ops = tensor_store.MAX_OPEN_FILES + 8
+        for iteration in [1, 2]:
+            for op in range(num_ops):
+                store.record('op{}'.format(op), iteration, 'output0',
+                             np.full(op + 1, iteration, np.int64))
+                self.assertLessEqual(len(store.files), tensor_store.MAX_OPEN_FILES)
+        # the closed files are reopened to append to them
+        for op in range(num_ops):
+            for iteration in [1, 2]:
+                np.testing.assert_array_equal(
+                    store.load('op{}'.format(op), iteration)['output0'],
+                    np.full(op + 1, iteration, np.int64))
+        store.close()
+
+    def test_stats_mode(self):
+        store = TensorStore(os.path.join(self.work_space, 'stats'), mode='stats', bins=16,
+                            percentiles=[1, 50, 99])
+        tensor = np.random.randn(4, 100).astype(np.float32)
+        store.record('conv', 1, 'conv.output0', tensor)
+        store.record('conv', 1, 'conv.output1', np.zeros(0, dtype=np.float32))
+        stats = store.load('conv', 1)['conv.output0']
+        expected = tensor_statistics(tensor, bins=16, percentiles=[1, 50, 99])
+        self.assertEqual(stats['num'], tensor.size)
+        for key in ['min', 'max', 'mean', 'std']:
+            self.assertAlmostEqual(stats[key], expected[key], places=5)
+        self.assertAlmostEqual(stats['std'], float(tensor.std()), places=5)
+        np.testing.assert_allclose(list(stats['percentiles'].values()),
+                                   np.percentile(tensor, [1, 50, 99]), rtol=1e-6)
+        counts, edges = np.histogram(tensor, bins=16)
+        np.testing.assert_array_equal(stats['histogram'][0], counts)
+        np.testing.assert_allclose(stats['histogram'][1], edges, rtol=1e-6)
+        self.assertEqual(store.load('conv', 1)['conv.output1']['num'], 0)
+        store.close()
+
+        stats = tensor_statistics(np.array([np.inf, 1., 2., 3.]), bins=2, percentiles=[50])
+        self.assertEqual(stats['max'], np.inf)
+        self.assertEqual(stats['percentiles'][50], 2.)
+        self.assertEqual(stats['histogram'][0].sum(), 3)
+
+    def test_sample_mode(self):
+        store = TensorStore(os.path.join(self.work_space, 'sample'), mode='sample',
+                            sample_size=64, seed=0)
+        tensor = np.arange(10000, dtype=np.float32).reshape(100, 100)
+        store.record('conv', 1, 'conv.output0', tensor)
+        store.record('conv', 2, 'conv.output0', tensor[:1, :10])
+        sample = store.load('conv', 1)['conv.output0']
+        self.assertEqual(sample.shape, (64,))
+        self.assertEqual(len(np.unique(sample)), 64)
+        self.assertTrue(np.isin(sample, tensor).all())
+        np.testing.assert_array_equal(store.load('conv', 2)['conv.output0'], np.arange(10))
+        store.close()
+
+    def test_reservoir(self):
+        # every value of the stream is sampled with the same probability
+        rng = np.random.default_rng(0)
+        counts = np.zeros(100)
+        for _ in range(2000):
+            reservoir = Reservoir(10, rng)
+            reservoir.update(np.arange(30))
+            reservoir.update(np.arange(30, 100))
+            self.assertEqual(reservoir.seen, 100)
+            counts[reservoir.sample.astype(int)] += 1
+        np.testing.assert_allclose(counts / 2000, 0.1, atol=0.035)
+
+
+if __name__ == "__main__":
+    unittest.main()